@@ -233,6 +233,45 @@ options:
         description:
           - Indicates if the given action rule is enabled or disabled
         type: str
+  max_items:
+    description:
+      - Maximum number of items returned by list operations.
+      - Next pages are not requested once this number of items was collected.
+    type: int
+  page_size:
+    description:
+      - Number of items requested per page, passed to list operations as C($top).
+    type: int
+  fields:
+    description:
+      - Fields to return for each item, as dot separated paths, for example C(properties.provisioningState).
+      - Entries which are not plain paths are evaluated as JMESPath expressions, which requires C(jmespath).
+      - Fields are selected as the response is decoded, by default all of them are returned.
+    type: list
+  backend:
+    description:
+      - Backend used to list resources when I(name) is not specified.
+      - C(resource_graph) lists resources of all I(subscriptions) and I(resource_groups) with a single Azure Resource Graph query.
+      - Resource Graph data may lag behind ARM and only top level properties are guaranteed to match.
+    type: str
+    choices:
+      - arm
+      - resource_graph
+    default: arm
+  subscriptions:
+    description:
+      - List of subscription IDs to query, instead of the subscription of the credentials.
+    type: list
+  resource_groups:
+    description:
+      - List of resource groups to query, instead of I(resource_group).
+    type: list
+  scopes:
+    description:
+      - List of scopes to query, each a dict of options of this module, for example parent resource names.
+      - Every combination of I(subscriptions), I(resource_groups) and I(scopes) is queried in parallel within a single task.
+      - Items of all scopes are merged, I(scopes) reports errors of every scope.
+    type: list
 extends_documentation_fragment:
   - azure
 author:
@@ -516,12 +555,32 @@ action_rules:
               type: str
               sample: null
 
+scopes:
+  description:
+    - Every scope queried, when I(subscriptions), I(resource_groups) or I(scopes) were specified, unless I(backend=resource_graph) listed them with a single query.
+  returned: when scopes specified
+  type: complex
+  contains:
+    scope:
+      description:
+        - Options which were set for the scope.
+      type: dict
+    error:
+      description:
+        - Error which occurred while querying the scope, null if the scope succeeded.
+      type: str
+
 '''
 
 import time
 import json
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_info_ext import get_projection, project, get_scope_plan, query_scopes, lists_with_resource_graph
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+from ansible.module_utils.azure_rm_common_log import log_debug
+from ansible.module_utils.azure_rm_common_url import build_url
 from copy import deepcopy
 from msrestazure.azure_exceptions import CloudError
 
@@ -564,6 +623,29 @@ class AzureRMActionRulesInfo(AzureRMModuleBase):
             ),
             name=dict(
                 type='str'
+            ),
+            max_items=dict(
+                type='int'
+            ),
+            page_size=dict(
+                type='int'
+            ),
+            fields=dict(
+                type='list'
+            ),
+            backend=dict(
+                type='str',
+                choices=['arm', 'resource_graph'],
+                default='arm'
+            ),
+            subscriptions=dict(
+                type='list'
+            ),
+            resource_groups=dict(
+                type='list'
+            ),
+            scopes=dict(
+                type='list'
             )
         )
 
@@ -585,6 +667,15 @@ class AzureRMActionRulesInfo(AzureRMModuleBase):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.subscriptions = None
+        self.resource_groups = None
+        self.scopes = None
+        self.in_scope = False
+        self.backend = None
+        self.fields = None
+        self.projection = None
+        self.max_items = None
+        self.page_size = None
         self.url = None
         self.status_code = [200]
 
@@ -601,9 +692,22 @@ class AzureRMActionRulesInfo(AzureRMModuleBase):
         for key in self.module_arg_spec:
             setattr(self, key, kwargs[key])
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.projection = get_projection(self.fields, self.fail)
+
+        if lists_with_resource_graph(self, ['name']):
+            # one Resource Graph query lists resources of all subscriptions and resource groups
+            self.resource_group = self.resource_groups or self.resource_group
+            self.query_info()
+        elif self.subscriptions or self.resource_groups or self.scopes:
+            plan = get_scope_plan(self.subscriptions, self.resource_groups, self.scopes, self.module_arg_spec, self.fail)
+            self.results['scopes'] = query_scopes(self, plan, AzureRMActionRulesInfo.query_info)
+        else:
+            self.query_info()
+        return self.results
 
+    def query_info(self):
         if (self.resource_group is not None and
             self.name is not None):
             self.results['action_rules'] = self.format_item(self.getbyname())
@@ -611,23 +715,18 @@ class AzureRMActionRulesInfo(AzureRMModuleBase):
             self.results['action_rules'] = self.format_item(self.listbyresourcegroup())
         else:
             self.results['action_rules'] = [self.format_item(self.listbysubscription())]
-        return self.results
 
     def getbyname(self):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.AlertsManagement' +
-                    '/actionRules' +
-                    '/{{ action_rule_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ action_rule_name }}', self.name)
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.AlertsManagement/actionRules/{{ action_rule_name }}',
+                                 subscription_id=self.subscription_id,
+                                 resource_group=self.resource_group,
+                                 action_rule_name=self.name)
+        except ValueError as exc:
+            self.fail(str(exc))
 
         try:
             response = self.mgmt_client.query(self.url,
@@ -638,9 +737,11 @@ class AzureRMActionRulesInfo(AzureRMModuleBase):
                                               self.status_code,
                                               600,
                                               30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = project(json.loads(response.text), self.projection)
+            log_debug(self, 'Response : {0}', response)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
@@ -648,30 +749,43 @@ class AzureRMActionRulesInfo(AzureRMModuleBase):
     def listbyresourcegroup(self):
         response = None
         results = {}
+        if self.backend == 'resource_graph':
+            try:
+                results['temp_item'] = self.mgmt_client.query_resource_graph('Microsoft.AlertsManagement/actionRules',
+                                                                             self.subscriptions or [self.subscription_id],
+                                                                             self.resource_group,
+                                                                             self.header_parameters,
+                                                                             self.max_items,
+                                                                             self.page_size,
+                                                                             self.projection)
+            except CloudError as e:
+                if self.in_scope:
+                    raise
+                self.log('Could not list resources using Resource Graph.')
+            return results
+
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.AlertsManagement' +
-                    '/actionRules')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ action_rule_name }}', self.name)
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.AlertsManagement/actionRules',
+                                 subscription_id=self.subscription_id,
+                                 resource_group=self.resource_group)
+        except ValueError as exc:
+            self.fail(str(exc))
 
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = self.mgmt_client.query_list(self.url,
+                                                               'GET',
+                                                               self.query_parameters,
+                                                               self.header_parameters,
+                                                               None,
+                                                               self.status_code,
+                                                               self.max_items,
+                                                               self.page_size,
+                                                               self.projection)
+            log_debug(self, 'Response : {0}', results['temp_item'])
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
@@ -679,37 +793,53 @@ class AzureRMActionRulesInfo(AzureRMModuleBase):
     def listbysubscription(self):
         response = None
         results = {}
+        if self.backend == 'resource_graph':
+            try:
+                results['temp_item'] = self.mgmt_client.query_resource_graph('Microsoft.AlertsManagement/actionRules',
+                                                                             self.subscriptions or [self.subscription_id],
+                                                                             None,
+                                                                             self.header_parameters,
+                                                                             self.max_items,
+                                                                             self.page_size,
+                                                                             self.projection)
+            except CloudError as e:
+                if self.in_scope:
+                    raise
+                self.log('Could not list resources using Resource Graph.')
+            return results
+
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/providers' +
-                    '/Microsoft.AlertsManagement' +
-                    '/actionRules')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ action_rule_name }}', self.name)
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/providers/Microsoft.AlertsManagement/actionRules',
+                                 subscription_id=self.subscription_id)
+        except ValueError as exc:
+            self.fail(str(exc))
 
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = self.mgmt_client.query_list(self.url,
+                                                               'GET',
+                                                               self.query_parameters,
+                                                               self.header_parameters,
+                                                               None,
+                                                               self.status_code,
+                                                               self.max_items,
+                                                               self.page_size,
+                                                               self.projection)
+            log_debug(self, 'Response : {0}', results['temp_item'])
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
 
-    def format_item(item):
+    def format_item(self, item):
         return item
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMActionRulesInfo()
 
 
@@ -226,6 +226,31 @@ options:
             The URI to fetch the next page of alerts. Call ListNext() with this
             URI to fetch the next page alerts.
         type: str
+  max_items:
+    description:
+      - Maximum number of items returned by list operations.
+      - Next pages are not requested once this number of items was collected.
+    type: int
+  page_size:
+    description:
+      - Number of items requested per page, passed to list operations as C($top).
+    type: int
+  fields:
+    description:
+      - Fields to return for each item, as dot separated paths, for example C(properties.provisioningState).
+      - Entries which are not plain paths are evaluated as JMESPath expressions, which requires C(jmespath).
+      - Fields are selected as the response is decoded, by default all of them are returned.
+    type: list
+  subscriptions:
+    description:
+      - List of subscription IDs to query, instead of the subscription of the credentials.
+    type: list
+  scopes:
+    description:
+      - List of scopes to query, each a dict of options of this module, for example parent resource names.
+      - Every combination of I(subscriptions), I(resource_groups) and I(scopes) is queried in parallel within a single task.
+      - Items of all scopes are merged, I(scopes) reports errors of every scope.
+    type: list
 extends_documentation_fragment:
   - azure
 author:
@@ -476,12 +501,32 @@ smart_groups:
               type: str
               sample: null
 
+scopes:
+  description:
+    - Every scope queried, when I(subscriptions), I(resource_groups) or I(scopes) were specified.
+  returned: when scopes specified
+  type: complex
+  contains:
+    scope:
+      description:
+        - Options which were set for the scope.
+      type: dict
+    error:
+      description:
+        - Error which occurred while querying the scope, null if the scope succeeded.
+      type: str
+
 '''
 
 import time
 import json
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_info_ext import get_projection, project, get_scope_plan, query_scopes
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+from ansible.module_utils.azure_rm_common_log import log_debug
+from ansible.module_utils.azure_rm_common_url import build_url
 from copy import deepcopy
 from msrestazure.azure_exceptions import CloudError
 
@@ -524,6 +569,21 @@ class AzureRMSmartGroupsInfo(AzureRMModuleBase):
             ),
             smart_group_id=dict(
                 type='str'
+            ),
+            max_items=dict(
+                type='int'
+            ),
+            page_size=dict(
+                type='int'
+            ),
+            fields=dict(
+                type='list'
+            ),
+            subscriptions=dict(
+                type='list'
+            ),
+            scopes=dict(
+                type='list'
             )
         )
 
@@ -545,6 +605,13 @@ class AzureRMSmartGroupsInfo(AzureRMModuleBase):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.subscriptions = None
+        self.scopes = None
+        self.in_scope = False
+        self.fields = None
+        self.projection = None
+        self.max_items = None
+        self.page_size = None
         self.url = None
         self.status_code = [200]
 
@@ -561,30 +628,35 @@ class AzureRMSmartGroupsInfo(AzureRMModuleBase):
         for key in self.module_arg_spec:
             setattr(self, key, kwargs[key])
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.projection = get_projection(self.fields, self.fail)
 
+        if self.subscriptions or self.scopes:
+            plan = get_scope_plan(self.subscriptions, None, self.scopes, self.module_arg_spec, self.fail)
+            self.results['scopes'] = query_scopes(self, plan, AzureRMSmartGroupsInfo.query_info)
+        else:
+            self.query_info()
+        return self.results
+
+    def query_info(self):
         if (self.smart_group_id is not None):
             self.results['smart_groups'] = self.format_item(self.gethistory())
         elif (self.smart_group_id is not None):
             self.results['smart_groups'] = self.format_item(self.getbyid())
         else:
             self.results['smart_groups'] = [self.format_item(self.getall())]
-        return self.results
 
     def gethistory(self):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/providers' +
-                    '/Microsoft.AlertsManagement' +
-                    '/smartGroups' +
-                    '/{{ smart_group_name }}' +
-                    '/history')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ smart_group_name }}', self.name)
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/providers/Microsoft.AlertsManagement/smartGroups/{{ smart_group_name }}/history',
+                                 subscription_id=self.subscription_id,
+                                 smart_group_name=self.smart_group_id)
+        except ValueError as exc:
+            self.fail(str(exc))
 
         try:
             response = self.mgmt_client.query(self.url,
@@ -595,9 +667,11 @@ class AzureRMSmartGroupsInfo(AzureRMModuleBase):
                                               self.status_code,
                                               600,
                                               30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = project(json.loads(response.text), self.projection)
+            log_debug(self, 'Response : {0}', response)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
@@ -606,14 +680,12 @@ class AzureRMSmartGroupsInfo(AzureRMModuleBase):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/providers' +
-                    '/Microsoft.AlertsManagement' +
-                    '/smartGroups' +
-                    '/{{ smart_group_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ smart_group_name }}', self.name)
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/providers/Microsoft.AlertsManagement/smartGroups/{{ smart_group_name }}',
+                                 subscription_id=self.subscription_id,
+                                 smart_group_name=self.smart_group_id)
+        except ValueError as exc:
+            self.fail(str(exc))
 
         try:
             response = self.mgmt_client.query(self.url,
@@ -624,9 +696,11 @@ class AzureRMSmartGroupsInfo(AzureRMModuleBase):
                                               self.status_code,
                                               600,
                                               30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = project(json.loads(response.text), self.projection)
+            log_debug(self, 'Response : {0}', response)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
@@ -635,35 +709,37 @@ class AzureRMSmartGroupsInfo(AzureRMModuleBase):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/providers' +
-                    '/Microsoft.AlertsManagement' +
-                    '/smartGroups')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ smart_group_name }}', self.name)
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/providers/Microsoft.AlertsManagement/smartGroups',
+                                 subscription_id=self.subscription_id)
+        except ValueError as exc:
+            self.fail(str(exc))
 
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = self.mgmt_client.query_list(self.url,
+                                                               'GET',
+                                                               self.query_parameters,
+                                                               self.header_parameters,
+                                                               None,
+                                                               self.status_code,
+                                                               self.max_items,
+                                                               self.page_size,
+                                                               self.projection)
+            log_debug(self, 'Response : {0}', results['temp_item'])
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
 
-    def format_item(item):
+    def format_item(self, item):
         return item
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMSmartGroupsInfo()
 
 
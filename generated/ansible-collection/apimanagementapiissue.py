@@ -46,6 +46,24 @@ options:
     description:
       - Date and time when the issue was created.
     type: datetime
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure.rm.operation_info) to track progress.
+    type: bool
+    default: true
+  polling_timeout:
+    description:
+      - Maximum time in seconds to wait for long running operation to complete.
+      - Status is polled as indicated by C(Azure-AsyncOperation), C(Location) and C(Retry-After) headers.
+    type: int
+    default: 600
+  state_snapshot:
+    description:
+      - Path of state snapshot exported by M(azure.rm.statesnapshot).
+      - In check mode current state of the instance is taken from the snapshot instead of Azure, if the snapshot covers it.
+      - Instances of resource types, subscriptions or resource groups not exported to the snapshot are read from Azure.
+    type: path
   state:
     description:
       - Assert the state of the ApiIssue.
@@ -185,13 +203,26 @@ properties:
       type: str
       sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_compare import get_comparator, create_merge_patch
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+from ansible.module_utils.azure_rm_common_log import log_debug
+from ansible.module_utils.azure_rm_common_snapshot import get_snapshot_resource
+from ansible.module_utils.azure_rm_common_url import build_url
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -266,6 +297,17 @@ class AzureRMApiIssue(AzureRMModuleBaseExt):
                          '/{{ resource_group }}/providers/Microsoft.ApiManagement/service'
                          '/{{ service_name }}/users/{{ name }}')
             ),
+            wait=dict(
+                type='bool',
+                default=True
+            ),
+            polling_timeout=dict(
+                type='int',
+                default=600
+            ),
+            state_snapshot=dict(
+                type='path'
+            ),
             state=dict(
                 type='str',
                 default='present',
@@ -284,6 +326,9 @@ class AzureRMApiIssue(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.state_snapshot = None
+        self.wait = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -310,30 +355,25 @@ class AzureRMApiIssue(AzureRMModuleBaseExt):
         old_response = None
         response = None
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
 
         resource_group = self.get_resource_group(self.resource_group)
 
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.ApiManagement' +
-                    '/service' +
-                    '/{{ service_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}' +
-                    '/issues' +
-                    '/{{ issue_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ service_name }}', self.service_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ issue_name }}', self.name)
-
-        old_response = self.get_resource()
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.ApiManagement/service/{{ service_name }}/apis/{{ api_name }}/issues/{{ issue_name }}',
+                                 subscription_id=self.subscription_id,
+                                 resource_group=self.resource_group,
+                                 service_name=self.service_name,
+                                 api_name=self.api_id,
+                                 issue_name=self.name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        if self.check_mode and self.state_snapshot:
+            old_response = get_snapshot_resource(self.state_snapshot, self.url, self.fail)
+        if old_response is None:
+            old_response = self.get_resource()
 
         if not old_response:
             self.log("ApiIssue instance doesn't exist")
@@ -348,12 +388,9 @@ class AzureRMApiIssue(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                self.results['modifiers'] = modifiers
-                self.results['compare'] = []
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -364,6 +401,9 @@ class AzureRMApiIssue(AzureRMModuleBaseExt):
                 return self.results
 
             response = self.create_update_resource()
+            if not self.wait:
+                self.results['id'] = self.url
+                response = None
 
             # if not old_response:
             self.results['changed'] = True
@@ -377,12 +417,13 @@ class AzureRMApiIssue(AzureRMModuleBaseExt):
             if self.check_mode:
                 return self.results
 
-            self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
+            response = self.delete_resource()
+            if not self.wait:
+                self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                           'DELETE',
+                                                                           self.query_parameters,
+                                                                           response)
+            response = None
         else:
             self.log('ApiIssue instance unchanged')
             self.results['changed'] = False
@@ -400,18 +441,36 @@ class AzureRMApiIssue(AzureRMModuleBaseExt):
         # self.log('Creating / Updating the ApiIssue instance {0}'.format(self.))
 
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'PUT',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              self.body,
-                                              self.status_code,
-                                              600,
-                                              30)
+            if self.to_do == Actions.Create:
+                response = self.mgmt_client.query(self.url,
+                                                  'PUT',
+                                                  self.query_parameters,
+                                                  self.header_parameters,
+                                                  self.body,
+                                                  self.status_code,
+                                                  self.polling_timeout if self.wait else 0,
+                                                  30)
+            else:
+                header_parameters = dict(self.header_parameters)
+                header_parameters['If-Match'] = '*'
+                response = self.mgmt_client.query(self.url,
+                                                  'PATCH',
+                                                  self.query_parameters,
+                                                  header_parameters,
+                                                  create_merge_patch(self.body, self.results['compare']),
+                                                  self.status_code,
+                                                  self.polling_timeout if self.wait else 0,
+                                                  30)
         except CloudError as exc:
             self.log('Error attempting to create the ApiIssue instance.')
             self.fail('Error creating the ApiIssue instance: {0}'.format(str(exc)))
 
+        if not self.wait:
+            self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                       'PUT' if self.to_do == Actions.Create else 'PATCH',
+                                                                       self.query_parameters,
+                                                                       response)
+
         try:
             response = json.loads(response.text)
         except Exception:
@@ -429,13 +488,20 @@ class AzureRMApiIssue(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              0,
                                               30)
+            if self.wait:
+                self.mgmt_client.wait_for_deletion(self.url,
+                                                   self.query_parameters,
+                                                   self.header_parameters,
+                                                   response,
+                                                   self.polling_timeout,
+                                                   30)
         except CloudError as e:
             self.log('Error attempting to delete the ApiIssue instance.')
             self.fail('Error deleting the ApiIssue instance: {0}'.format(str(e)))
 
-        return True
+        return response
 
     def get_resource(self):
         # self.log('Checking if the ApiIssue instance {0} is present'.format(self.))
@@ -447,10 +513,11 @@ class AzureRMApiIssue(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout,
                                               30)
+            response = json.loads(response.text)
             found = True
-            self.log("Response : {0}".format(response))
+            log_debug(self, 'Response : {0}', response)
             # self.log("ApiIssue instance : {0} found".format(response.name))
         except CloudError as e:
             self.log('Did not find the ApiIssue instance.')
@@ -461,6 +528,8 @@ class AzureRMApiIssue(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMApiIssue()
 
 
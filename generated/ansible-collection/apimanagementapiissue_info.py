@@ -24,21 +24,22 @@ options:
   resource_group:
     description:
       - The name of the resource group.
-    required: true
+      - Required unless set by I(resource_groups) or I(scopes).
     type: str
   service_name:
     description:
       - The name of the API Management service.
-    required: true
+      - Required unless set by I(scopes).
     type: str
   api_id:
     description:
       - A resource identifier for the API the issue was created for.
+      - Required unless set by I(scopes).
     type: str
   expand_comments_attachments:
     description:
       - 'Expand the comment attachments. '
-    required: true
+      - Required unless set by I(scopes).
     type: boolean
   issue_id:
     description:
@@ -81,6 +82,35 @@ options:
       - A resource identifier for the user created the issue.
     required: true
     type: str
+  max_items:
+    description:
+      - Maximum number of items returned by list operations.
+      - Next pages are not requested once this number of items was collected.
+    type: int
+  page_size:
+    description:
+      - Number of items requested per page, passed to list operations as C($top).
+    type: int
+  fields:
+    description:
+      - Fields to return for each item, as dot separated paths, for example C(properties.provisioningState).
+      - Entries which are not plain paths are evaluated as JMESPath expressions, which requires C(jmespath).
+      - Fields are selected as the response is decoded, by default all of them are returned.
+    type: list
+  subscriptions:
+    description:
+      - List of subscription IDs to query, instead of the subscription of the credentials.
+    type: list
+  resource_groups:
+    description:
+      - List of resource groups to query, instead of I(resource_group).
+    type: list
+  scopes:
+    description:
+      - List of scopes to query, each a dict of options of this module, for example parent resource names.
+      - Every combination of I(subscriptions), I(resource_groups) and I(scopes) is queried in parallel within a single task.
+      - Items of all scopes are merged, I(scopes) reports errors of every scope.
+    type: list
 extends_documentation_fragment:
   - azure
 author:
@@ -140,12 +170,32 @@ api_issue:
           type: dict
           sample: null
 
+scopes:
+  description:
+    - Every scope queried, when I(subscriptions), I(resource_groups) or I(scopes) were specified.
+  returned: when scopes specified
+  type: complex
+  contains:
+    scope:
+      description:
+        - Options which were set for the scope.
+      type: dict
+    error:
+      description:
+        - Error which occurred while querying the scope, null if the scope succeeded.
+      type: str
+
 '''
 
 import time
 import json
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_info_ext import get_projection, project, get_scope_plan, query_scopes, check_required_options
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+from ansible.module_utils.azure_rm_common_log import log_debug
+from ansible.module_utils.azure_rm_common_url import build_url
 from copy import deepcopy
 from msrestazure.azure_exceptions import CloudError
 
@@ -154,23 +204,37 @@ class AzureRMApiIssueInfo(AzureRMModuleBase):
     def __init__(self):
         self.module_arg_spec = dict(
             resource_group=dict(
-                type='str',
-                required=true
+                type='str'
             ),
             service_name=dict(
-                type='str',
-                required=true
+                type='str'
             ),
             api_id=dict(
-                type='str',
-                required=true
+                type='str'
             ),
             expand_comments_attachments=dict(
-                type='boolean',
-                required=true
+                type='boolean'
             ),
             issue_id=dict(
                 type='str'
+            ),
+            max_items=dict(
+                type='int'
+            ),
+            page_size=dict(
+                type='int'
+            ),
+            fields=dict(
+                type='list'
+            ),
+            subscriptions=dict(
+                type='list'
+            ),
+            resource_groups=dict(
+                type='list'
+            ),
+            scopes=dict(
+                type='list'
             )
         )
 
@@ -187,6 +251,14 @@ class AzureRMApiIssueInfo(AzureRMModuleBase):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.subscriptions = None
+        self.resource_groups = None
+        self.scopes = None
+        self.in_scope = False
+        self.fields = None
+        self.projection = None
+        self.max_items = None
+        self.page_size = None
         self.url = None
         self.status_code = [200]
 
@@ -203,9 +275,20 @@ class AzureRMApiIssueInfo(AzureRMModuleBase):
         for key in self.module_arg_spec:
             setattr(self, key, kwargs[key])
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.projection = get_projection(self.fields, self.fail)
+
+        if self.subscriptions or self.resource_groups or self.scopes:
+            plan = get_scope_plan(self.subscriptions, self.resource_groups, self.scopes, self.module_arg_spec, self.fail)
+            check_required_options(self, plan, ['resource_group', 'service_name', 'api_id', 'expand_comments_attachments'])
+            self.results['scopes'] = query_scopes(self, plan, AzureRMApiIssueInfo.query_info)
+        else:
+            check_required_options(self, None, ['resource_group', 'service_name', 'api_id', 'expand_comments_attachments'])
+            self.query_info()
+        return self.results
 
+    def query_info(self):
         if (self.resource_group is not None and
             self.service_name is not None and
             self.api_id is not None and
@@ -215,29 +298,20 @@ class AzureRMApiIssueInfo(AzureRMModuleBase):
               self.service_name is not None and
               self.api_id is not None):
             self.results['api_issue'] = self.format_item(self.listbyservice())
-        return self.results
 
     def get(self):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.ApiManagement' +
-                    '/service' +
-                    '/{{ service_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}' +
-                    '/issues' +
-                    '/{{ issue_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ service_name }}', self.service_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ issue_name }}', self.name)
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.ApiManagement/service/{{ service_name }}/apis/{{ api_name }}/issues/{{ issue_name }}',
+                                 subscription_id=self.subscription_id,
+                                 resource_group=self.resource_group,
+                                 service_name=self.service_name,
+                                 api_name=self.api_id,
+                                 issue_name=self.name)
+        except ValueError as exc:
+            self.fail(str(exc))
 
         try:
             response = self.mgmt_client.query(self.url,
@@ -248,9 +322,11 @@ class AzureRMApiIssueInfo(AzureRMModuleBase):
                                               self.status_code,
                                               600,
                                               30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = project(json.loads(response.text), self.projection)
+            log_debug(self, 'Response : {0}', response)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
@@ -259,44 +335,40 @@ class AzureRMApiIssueInfo(AzureRMModuleBase):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.ApiManagement' +
-                    '/service' +
-                    '/{{ service_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}' +
-                    '/issues')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ service_name }}', self.service_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ issue_name }}', self.name)
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.ApiManagement/service/{{ service_name }}/apis/{{ api_name }}/issues',
+                                 subscription_id=self.subscription_id,
+                                 resource_group=self.resource_group,
+                                 service_name=self.service_name,
+                                 api_name=self.api_id)
+        except ValueError as exc:
+            self.fail(str(exc))
 
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = self.mgmt_client.query_list(self.url,
+                                                               'GET',
+                                                               self.query_parameters,
+                                                               self.header_parameters,
+                                                               None,
+                                                               self.status_code,
+                                                               self.max_items,
+                                                               self.page_size,
+                                                               self.projection)
+            log_debug(self, 'Response : {0}', results['temp_item'])
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
 
-    def format_item(item):
+    def format_item(self, item):
         return item
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMApiIssueInfo()
 
 
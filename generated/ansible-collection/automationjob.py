@@ -112,6 +112,24 @@ options:
     description:
       - The type of the resource.
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure.rm.operation_info) to track progress.
+    type: bool
+    default: true
+  polling_timeout:
+    description:
+      - Maximum time in seconds to wait for long running operation to complete.
+      - Status is polled as indicated by C(Azure-AsyncOperation), C(Location) and C(Retry-After) headers.
+    type: int
+    default: 600
+  state_snapshot:
+    description:
+      - Path of state snapshot exported by M(azure.rm.statesnapshot).
+      - In check mode current state of the instance is taken from the snapshot instead of Azure, if the snapshot covers it.
+      - Instances of resource types, subscriptions or resource groups not exported to the snapshot are read from Azure.
+    type: path
   state:
     description:
       - Assert the state of the Job.
@@ -261,13 +279,27 @@ properties:
       type: str
       sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+from ansible.module_utils.azure_rm_common_log import log_debug
+from ansible.module_utils.azure_rm_common_snapshot import get_snapshot_resource
+from ansible.module_utils.azure_rm_common_url import build_url
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -276,59 +308,29 @@ except ImportError:
     pass
 
 
+ARG_SPEC = r'''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resourceGroupName", "required": true},
+    "automation_account_name": {"type": "str", "updatable": false, "disposition": "automationAccountName", "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "jobName", "required": true},
+    "runbook": {"type": "dict", "disposition": "/properties/*", "options": {"name": {"type": "str"}}},
+    "parameters": {"type": "unknown[DictionaryType {\"$id\":\"301\",\"$type\":\"DictionaryType\",\"valueType\":{\"$id\":\"302\",\"$type\":\"PrimaryType\",\"knownPrimaryType\":\"string\",\"name\":{\"$id\":\"303\",\"fixed\":false,\"raw\":\"String\"},\"deprecated\":false},\"supportsAdditionalProperties\":false,\"name\":{\"$id\":\"304\",\"fixed\":false},\"deprecated\":false}]", "disposition": "/properties/*"},
+    "run_on": {"type": "str", "disposition": "/properties/runOn"},
+    "client_request_id": {"type": "str", "updatable": false, "disposition": "clientRequestId"},
+    "wait": {"type": "bool", "default": true},
+    "polling_timeout": {"type": "int", "default": 600},
+    "state_snapshot": {"type": "path"},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMJob(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resourceGroupName',
-                required=true
-            ),
-            automation_account_name=dict(
-                type='str',
-                updatable=False,
-                disposition='automationAccountName',
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='jobName',
-                required=true
-            ),
-            runbook=dict(
-                type='dict',
-                disposition='/properties/*',
-                options=dict(
-                    name=dict(
-                        type='str'
-                    )
-                )
-            ),
-            parameters=dict(
-                type='unknown[DictionaryType {"$id":"301","$type":"DictionaryType","valueType":{"$id":"302","$type":"PrimaryType","knownPrimaryType":"string","name":{"$id":"303","fixed":false,"raw":"String"},"deprecated":false},"supportsAdditionalProperties":false,"name":{"$id":"304","fixed":false},"deprecated":false}]',
-                disposition='/properties/*'
-            ),
-            run_on=dict(
-                type='str',
-                disposition='/properties/runOn'
-            ),
-            client_request_id=dict(
-                type='str',
-                updatable=False,
-                disposition='clientRequestId'
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.automation_account_name = None
@@ -341,6 +343,9 @@ class AzureRMJob(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.state_snapshot = None
+        self.wait = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -362,32 +367,29 @@ class AzureRMJob(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
 
         resource_group = self.get_resource_group(self.resource_group)
 
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.Automation' +
-                    '/automationAccounts' +
-                    '/{{ automation_account_name }}' +
-                    '/jobs' +
-                    '/{{ job_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ automation_account_name }}', self.automation_account_name)
-        self.url = self.url.replace('{{ job_name }}', self.name)
-
-        old_response = self.get_resource()
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.Automation/automationAccounts/{{ automation_account_name }}/jobs/{{ job_name }}',
+                                 subscription_id=self.subscription_id,
+                                 resource_group=self.resource_group,
+                                 automation_account_name=self.automation_account_name,
+                                 job_name=self.name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        if self.check_mode and self.state_snapshot:
+            old_response = get_snapshot_resource(self.state_snapshot, self.url, self.fail)
+        if old_response is None:
+            old_response = self.get_resource()
 
         if not old_response:
             self.log("Job instance doesn't exist")
@@ -402,12 +404,9 @@ class AzureRMJob(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                self.results['modifiers'] = modifiers
-                self.results['compare'] = []
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -418,6 +417,9 @@ class AzureRMJob(AzureRMModuleBaseExt):
                 return self.results
 
             response = self.create_update_resource()
+            if not self.wait:
+                self.results['id'] = self.url
+                response = None
 
             # if not old_response:
             self.results['changed'] = True
@@ -431,12 +433,13 @@ class AzureRMJob(AzureRMModuleBaseExt):
             if self.check_mode:
                 return self.results
 
-            self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
+            response = self.delete_resource()
+            if not self.wait:
+                self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                           'DELETE',
+                                                                           self.query_parameters,
+                                                                           response)
+            response = None
         else:
             self.log('Job instance unchanged')
             self.results['changed'] = False
@@ -461,7 +464,7 @@ class AzureRMJob(AzureRMModuleBaseExt):
                                                   self.header_parameters,
                                                   self.body,
                                                   self.status_code,
-                                                  600,
+                                                  self.polling_timeout if self.wait else 0,
                                                   30)
             else:
                 response = self.mgmt_client.query(self.url,
@@ -470,12 +473,18 @@ class AzureRMJob(AzureRMModuleBaseExt):
                                                   self.header_parameters,
                                                   self.body,
                                                   self.status_code,
-                                                  600,
+                                                  self.polling_timeout if self.wait else 0,
                                                   30)
         except CloudError as exc:
             self.log('Error attempting to create the Job instance.')
             self.fail('Error creating the Job instance: {0}'.format(str(exc)))
 
+        if not self.wait:
+            self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                       'PUT',
+                                                                       self.query_parameters,
+                                                                       response)
+
         try:
             response = json.loads(response.text)
         except Exception:
@@ -493,13 +502,20 @@ class AzureRMJob(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              0,
                                               30)
+            if self.wait:
+                self.mgmt_client.wait_for_deletion(self.url,
+                                                   self.query_parameters,
+                                                   self.header_parameters,
+                                                   response,
+                                                   self.polling_timeout,
+                                                   30)
         except CloudError as e:
             self.log('Error attempting to delete the Job instance.')
             self.fail('Error deleting the Job instance: {0}'.format(str(e)))
 
-        return True
+        return response
 
     def get_resource(self):
         # self.log('Checking if the Job instance {0} is present'.format(self.))
@@ -511,10 +527,11 @@ class AzureRMJob(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout,
                                               30)
+            response = json.loads(response.text)
             found = True
-            self.log("Response : {0}".format(response))
+            log_debug(self, 'Response : {0}', response)
             # self.log("Job instance : {0} found".format(response.name))
         except CloudError as e:
             self.log('Did not find the Job instance.')
@@ -525,6 +542,8 @@ class AzureRMJob(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMJob()
 
 
@@ -83,6 +83,24 @@ options:
     description:
       - The ID of the resource.
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure.rm.operation_info) to track progress.
+    type: bool
+    default: true
+  polling_timeout:
+    description:
+      - Maximum time in seconds to wait for long running operation to complete.
+      - Status is polled as indicated by C(Azure-AsyncOperation), C(Location) and C(Retry-After) headers.
+    type: int
+    default: 600
+  state_snapshot:
+    description:
+      - Path of state snapshot exported by M(azure.rm.statesnapshot).
+      - In check mode current state of the instance is taken from the snapshot instead of Azure, if the snapshot covers it.
+      - Instances of resource types, subscriptions or resource groups not exported to the snapshot are read from Azure.
+    type: path
   state:
     description:
       - Assert the state of the BatchAccount.
@@ -266,13 +284,27 @@ properties:
       type: number
       sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_compare import get_comparator, create_merge_patch
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+from ansible.module_utils.azure_rm_common_log import log_debug
+from ansible.module_utils.azure_rm_common_snapshot import get_snapshot_resource
+from ansible.module_utils.azure_rm_common_url import build_url
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -281,68 +313,28 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resourceGroupName", "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "accountName", "required": true},
+    "location": {"type": "str", "updatable": false, "disposition": "/", "required": true},
+    "auto_storage_account_id": {"type": "raw", "disposition": "/properties/autoStorage/storageAccountId", "required": true, "pattern": "//subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.Storage/storageAccounts/{{ name }}"},
+    "pool_allocation_mode": {"type": "str", "disposition": "/properties/poolAllocationMode", "choices": ["BatchService", "UserSubscription"]},
+    "key_vault_reference": {"type": "dict", "disposition": "/properties/keyVaultReference", "options": {"id": {"type": "raw", "required": true, "pattern": "//subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.KeyVault/vaults/{{ name }}"}, "url": {"type": "str", "required": true}}},
+    "wait": {"type": "bool", "default": true},
+    "polling_timeout": {"type": "int", "default": 600},
+    "state_snapshot": {"type": "path"},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMBatchAccount(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resourceGroupName',
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='accountName',
-                required=true
-            ),
-            location=dict(
-                type='str',
-                updatable=False,
-                disposition='/',
-                required=true
-            ),
-            auto_storage_account_id=dict(
-                type='raw',
-                disposition='/properties/autoStorage/storageAccountId',
-                required=true,
-                pattern=('//subscriptions/{{ subscription_id }}/resourceGroups'
-                         '/{{ resource_group }}/providers/Microsoft.Storage/storageAccounts'
-                         '/{{ name }}')
-            ),
-            pool_allocation_mode=dict(
-                type='str',
-                disposition='/properties/poolAllocationMode',
-                choices=['BatchService',
-                         'UserSubscription']
-            ),
-            key_vault_reference=dict(
-                type='dict',
-                disposition='/properties/keyVaultReference',
-                options=dict(
-                    id=dict(
-                        type='raw',
-                        required=true,
-                        pattern=('//subscriptions/{{ subscription_id }}/resourceGroups'
-                                 '/{{ resource_group }}/providers/Microsoft.KeyVault/vaults'
-                                 '/{{ name }}')
-                    ),
-                    url=dict(
-                        type='str',
-                        required=true
-                    )
-                )
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.name = None
@@ -351,6 +343,9 @@ class AzureRMBatchAccount(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.state_snapshot = None
+        self.wait = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -372,12 +367,12 @@ class AzureRMBatchAccount(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
 
         resource_group = self.get_resource_group(self.resource_group)
@@ -385,19 +380,18 @@ class AzureRMBatchAccount(AzureRMModuleBaseExt):
         if 'location' not in self.body:
             self.body['location'] = resource_group.location
 
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.Batch' +
-                    '/batchAccounts' +
-                    '/{{ batch_account_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ batch_account_name }}', self.name)
-
-        old_response = self.get_resource()
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.Batch/batchAccounts/{{ batch_account_name }}',
+                                 subscription_id=self.subscription_id,
+                                 resource_group=self.resource_group,
+                                 batch_account_name=self.name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        if self.check_mode and self.state_snapshot:
+            old_response = get_snapshot_resource(self.state_snapshot, self.url, self.fail)
+        if old_response is None:
+            old_response = self.get_resource()
 
         if not old_response:
             self.log("BatchAccount instance doesn't exist")
@@ -412,12 +406,9 @@ class AzureRMBatchAccount(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                self.results['modifiers'] = modifiers
-                self.results['compare'] = []
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -428,6 +419,9 @@ class AzureRMBatchAccount(AzureRMModuleBaseExt):
                 return self.results
 
             response = self.create_update_resource()
+            if not self.wait:
+                self.results['id'] = self.url
+                response = None
 
             # if not old_response:
             self.results['changed'] = True
@@ -441,12 +435,13 @@ class AzureRMBatchAccount(AzureRMModuleBaseExt):
             if self.check_mode:
                 return self.results
 
-            self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
+            response = self.delete_resource()
+            if not self.wait:
+                self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                           'DELETE',
+                                                                           self.query_parameters,
+                                                                           response)
+            response = None
         else:
             self.log('BatchAccount instance unchanged')
             self.results['changed'] = False
@@ -473,21 +468,29 @@ class AzureRMBatchAccount(AzureRMModuleBaseExt):
                                                   self.header_parameters,
                                                   self.body,
                                                   self.status_code,
-                                                  600,
+                                                  self.polling_timeout if self.wait else 0,
                                                   30)
             else:
+                header_parameters = dict(self.header_parameters)
+                header_parameters['If-Match'] = '*'
                 response = self.mgmt_client.query(self.url,
-                                                  'PUT',
+                                                  'PATCH',
                                                   self.query_parameters,
-                                                  self.header_parameters,
-                                                  self.body,
+                                                  header_parameters,
+                                                  create_merge_patch(self.body, self.results['compare']),
                                                   self.status_code,
-                                                  600,
+                                                  self.polling_timeout if self.wait else 0,
                                                   30)
         except CloudError as exc:
             self.log('Error attempting to create the BatchAccount instance.')
             self.fail('Error creating the BatchAccount instance: {0}'.format(str(exc)))
 
+        if not self.wait:
+            self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                       'PUT' if self.to_do == Actions.Create else 'PATCH',
+                                                                       self.query_parameters,
+                                                                       response)
+
         try:
             response = json.loads(response.text)
         except Exception:
@@ -505,13 +508,20 @@ class AzureRMBatchAccount(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              0,
                                               30)
+            if self.wait:
+                self.mgmt_client.wait_for_deletion(self.url,
+                                                   self.query_parameters,
+                                                   self.header_parameters,
+                                                   response,
+                                                   self.polling_timeout,
+                                                   30)
         except CloudError as e:
             self.log('Error attempting to delete the BatchAccount instance.')
             self.fail('Error deleting the BatchAccount instance: {0}'.format(str(e)))
 
-        return True
+        return response
 
     def get_resource(self):
         # self.log('Checking if the BatchAccount instance {0} is present'.format(self.))
@@ -523,10 +533,11 @@ class AzureRMBatchAccount(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout,
                                               30)
+            response = json.loads(response.text)
             found = True
-            self.log("Response : {0}".format(response))
+            log_debug(self, 'Response : {0}', response)
             # self.log("BatchAccount instance : {0} found".format(response.name))
         except CloudError as e:
             self.log('Did not find the BatchAccount instance.')
@@ -537,6 +548,8 @@ class AzureRMBatchAccount(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMBatchAccount()
 
 
@@ -171,6 +171,24 @@ options:
     description:
       - Resource type
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure.rm.operation_info) to track progress.
+    type: bool
+    default: true
+  polling_timeout:
+    description:
+      - Maximum time in seconds to wait for long running operation to complete.
+      - Status is polled as indicated by C(Azure-AsyncOperation), C(Location) and C(Retry-After) headers.
+    type: int
+    default: 600
+  state_snapshot:
+    description:
+      - Path of state snapshot exported by M(azure.rm.statesnapshot).
+      - In check mode current state of the instance is taken from the snapshot instead of Azure, if the snapshot covers it.
+      - Instances of resource types, subscriptions or resource groups not exported to the snapshot are read from Azure.
+    type: path
   state:
     description:
       - Assert the state of the GalleryImage.
@@ -419,13 +437,27 @@ properties:
       type: str
       sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+from ansible.module_utils.azure_rm_common_log import log_debug
+from ansible.module_utils.azure_rm_common_snapshot import get_snapshot_resource
+from ansible.module_utils.azure_rm_common_url import build_url
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -434,150 +466,37 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resourceGroupName", "required": true},
+    "gallery_name": {"type": "str", "updatable": false, "disposition": "galleryName", "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "galleryImageName", "required": true},
+    "location": {"type": "str", "updatable": false, "disposition": "/", "required": true},
+    "description": {"type": "str", "disposition": "/properties/*"},
+    "eula": {"type": "str", "disposition": "/properties/*"},
+    "privacy_statement_uri": {"type": "str", "disposition": "/properties/privacyStatementUri"},
+    "release_note_uri": {"type": "str", "disposition": "/properties/releaseNoteUri"},
+    "os_type": {"type": "str", "disposition": "/properties/osType", "choices": ["Windows", "Linux"], "required": true},
+    "os_state": {"type": "str", "disposition": "/properties/osState", "choices": ["Generalized", "Specialized"], "required": true},
+    "end_of_life_date": {"type": "datetime", "disposition": "/properties/endOfLifeDate"},
+    "identifier": {"type": "dict", "disposition": "/properties/*", "required": true, "options": {"publisher": {"type": "str", "required": true}, "offer": {"type": "str", "required": true}, "sku": {"type": "str", "required": true}}},
+    "recommended": {"type": "dict", "disposition": "/properties/*", "options": {"v_cpus": {"type": "dict", "disposition": "vCPUs", "options": {"min": {"type": "number"}, "max": {"type": "number"}}}, "memory": {"type": "dict", "options": {"min": {"type": "number"}, "max": {"type": "number"}}}}},
+    "disallowed": {"type": "dict", "disposition": "/properties/*", "options": {"disk_types": {"type": "list", "disposition": "diskTypes"}}},
+    "purchase_plan": {"type": "dict", "disposition": "/properties/purchasePlan", "options": {"name": {"type": "str"}, "publisher": {"type": "str"}, "product": {"type": "str"}}},
+    "wait": {"type": "bool", "default": true},
+    "polling_timeout": {"type": "int", "default": 600},
+    "state_snapshot": {"type": "path"},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMGalleryImages(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resourceGroupName',
-                required=true
-            ),
-            gallery_name=dict(
-                type='str',
-                updatable=False,
-                disposition='galleryName',
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='galleryImageName',
-                required=true
-            ),
-            location=dict(
-                type='str',
-                updatable=False,
-                disposition='/',
-                required=true
-            ),
-            description=dict(
-                type='str',
-                disposition='/properties/*'
-            ),
-            eula=dict(
-                type='str',
-                disposition='/properties/*'
-            ),
-            privacy_statement_uri=dict(
-                type='str',
-                disposition='/properties/privacyStatementUri'
-            ),
-            release_note_uri=dict(
-                type='str',
-                disposition='/properties/releaseNoteUri'
-            ),
-            os_type=dict(
-                type='str',
-                disposition='/properties/osType',
-                choices=['Windows',
-                         'Linux'],
-                required=true
-            ),
-            os_state=dict(
-                type='str',
-                disposition='/properties/osState',
-                choices=['Generalized',
-                         'Specialized'],
-                required=true
-            ),
-            end_of_life_date=dict(
-                type='datetime',
-                disposition='/properties/endOfLifeDate'
-            ),
-            identifier=dict(
-                type='dict',
-                disposition='/properties/*',
-                required=true,
-                options=dict(
-                    publisher=dict(
-                        type='str',
-                        required=true
-                    ),
-                    offer=dict(
-                        type='str',
-                        required=true
-                    ),
-                    sku=dict(
-                        type='str',
-                        required=true
-                    )
-                )
-            ),
-            recommended=dict(
-                type='dict',
-                disposition='/properties/*',
-                options=dict(
-                    v_cpus=dict(
-                        type='dict',
-                        disposition='vCPUs',
-                        options=dict(
-                            min=dict(
-                                type='number'
-                            ),
-                            max=dict(
-                                type='number'
-                            )
-                        )
-                    ),
-                    memory=dict(
-                        type='dict',
-                        options=dict(
-                            min=dict(
-                                type='number'
-                            ),
-                            max=dict(
-                                type='number'
-                            )
-                        )
-                    )
-                )
-            ),
-            disallowed=dict(
-                type='dict',
-                disposition='/properties/*',
-                options=dict(
-                    disk_types=dict(
-                        type='list',
-                        disposition='diskTypes'
-                    )
-                )
-            ),
-            purchase_plan=dict(
-                type='dict',
-                disposition='/properties/purchasePlan',
-                options=dict(
-                    name=dict(
-                        type='str'
-                    ),
-                    publisher=dict(
-                        type='str'
-                    ),
-                    product=dict(
-                        type='str'
-                    )
-                )
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.gallery_name = None
@@ -589,6 +508,9 @@ class AzureRMGalleryImages(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.state_snapshot = None
+        self.wait = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -610,12 +532,12 @@ class AzureRMGalleryImages(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
 
         resource_group = self.get_resource_group(self.resource_group)
@@ -623,22 +545,19 @@ class AzureRMGalleryImages(AzureRMModuleBaseExt):
         if 'location' not in self.body:
             self.body['location'] = resource_group.location
 
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.Compute' +
-                    '/galleries' +
-                    '/{{ gallery_name }}' +
-                    '/images' +
-                    '/{{ image_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ gallery_name }}', self.gallery_name)
-        self.url = self.url.replace('{{ image_name }}', self.name)
-
-        old_response = self.get_resource()
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.Compute/galleries/{{ gallery_name }}/images/{{ image_name }}',
+                                 subscription_id=self.subscription_id,
+                                 resource_group=self.resource_group,
+                                 gallery_name=self.gallery_name,
+                                 image_name=self.name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        if self.check_mode and self.state_snapshot:
+            old_response = get_snapshot_resource(self.state_snapshot, self.url, self.fail)
+        if old_response is None:
+            old_response = self.get_resource()
 
         if not old_response:
             self.log("GalleryImage instance doesn't exist")
@@ -653,12 +572,9 @@ class AzureRMGalleryImages(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                self.results['modifiers'] = modifiers
-                self.results['compare'] = []
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -669,6 +585,9 @@ class AzureRMGalleryImages(AzureRMModuleBaseExt):
                 return self.results
 
             response = self.create_update_resource()
+            if not self.wait:
+                self.results['id'] = self.url
+                response = None
 
             # if not old_response:
             self.results['changed'] = True
@@ -682,12 +601,13 @@ class AzureRMGalleryImages(AzureRMModuleBaseExt):
             if self.check_mode:
                 return self.results
 
-            self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
+            response = self.delete_resource()
+            if not self.wait:
+                self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                           'DELETE',
+                                                                           self.query_parameters,
+                                                                           response)
+            response = None
         else:
             self.log('GalleryImage instance unchanged')
             self.results['changed'] = False
@@ -713,12 +633,18 @@ class AzureRMGalleryImages(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               self.body,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout if self.wait else 0,
                                               30)
         except CloudError as exc:
             self.log('Error attempting to create the GalleryImage instance.')
             self.fail('Error creating the GalleryImage instance: {0}'.format(str(exc)))
 
+        if not self.wait:
+            self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                       'PUT',
+                                                                       self.query_parameters,
+                                                                       response)
+
         try:
             response = json.loads(response.text)
         except Exception:
@@ -736,13 +662,20 @@ class AzureRMGalleryImages(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              0,
                                               30)
+            if self.wait:
+                self.mgmt_client.wait_for_deletion(self.url,
+                                                   self.query_parameters,
+                                                   self.header_parameters,
+                                                   response,
+                                                   self.polling_timeout,
+                                                   30)
         except CloudError as e:
             self.log('Error attempting to delete the GalleryImage instance.')
             self.fail('Error deleting the GalleryImage instance: {0}'.format(str(e)))
 
-        return True
+        return response
 
     def get_resource(self):
         # self.log('Checking if the GalleryImage instance {0} is present'.format(self.))
@@ -754,10 +687,11 @@ class AzureRMGalleryImages(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout,
                                               30)
+            response = json.loads(response.text)
             found = True
-            self.log("Response : {0}".format(response))
+            log_debug(self, 'Response : {0}', response)
             # self.log("GalleryImage instance : {0} found".format(response.name))
         except CloudError as e:
             self.log('Did not find the GalleryImage instance.')
@@ -768,6 +702,8 @@ class AzureRMGalleryImages(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMGalleryImages()
 
 
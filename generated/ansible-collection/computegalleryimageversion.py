@@ -214,6 +214,24 @@ options:
     description:
       - Resource type
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure.rm.operation_info) to track progress.
+    type: bool
+    default: true
+  polling_timeout:
+    description:
+      - Maximum time in seconds to wait for long running operation to complete.
+      - Status is polled as indicated by C(Azure-AsyncOperation), C(Location) and C(Retry-After) headers.
+    type: int
+    default: 600
+  state_snapshot:
+    description:
+      - Path of state snapshot exported by M(azure.rm.statesnapshot).
+      - In check mode current state of the instance is taken from the snapshot instead of Azure, if the snapshot covers it.
+      - Instances of resource types, subscriptions or resource groups not exported to the snapshot are read from Azure.
+    type: path
   state:
     description:
       - Assert the state of the GalleryImageVersion.
@@ -517,13 +535,27 @@ properties:
               type: number
               sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+from ansible.module_utils.azure_rm_common_log import log_debug
+from ansible.module_utils.azure_rm_common_snapshot import get_snapshot_resource
+from ansible.module_utils.azure_rm_common_url import build_url
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -532,111 +564,28 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resourceGroupName", "required": true},
+    "gallery_name": {"type": "str", "updatable": false, "disposition": "galleryName", "required": true},
+    "gallery_image_name": {"type": "str", "updatable": false, "disposition": "galleryImageName", "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "galleryImageVersionName", "required": true},
+    "location": {"type": "str", "updatable": false, "disposition": "/", "required": true},
+    "publishing_profile": {"type": "dict", "disposition": "/properties/publishingProfile", "required": true, "options": {"target_regions": {"type": "list", "disposition": "targetRegions", "options": {"name": {"type": "str", "required": true}, "regional_replica_count": {"type": "number", "disposition": "regionalReplicaCount"}, "storage_account_type": {"type": "str", "disposition": "storageAccountType", "choices": ["Standard_LRS", "Standard_ZRS"]}}}, "replica_count": {"type": "number", "disposition": "replicaCount"}, "exclude_from_latest": {"type": "boolean", "disposition": "excludeFromLatest"}, "end_of_life_date": {"type": "datetime", "disposition": "endOfLifeDate"}, "storage_account_type": {"type": "str", "disposition": "storageAccountType", "choices": ["Standard_LRS", "Standard_ZRS"]}, "source": {"type": "dict", "required": true, "options": {"managed_image": {"type": "dict", "disposition": "managedImage", "required": true, "options": {"id": {"type": "str", "required": true}}}}}}},
+    "wait": {"type": "bool", "default": true},
+    "polling_timeout": {"type": "int", "default": 600},
+    "state_snapshot": {"type": "path"},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMGalleryImageVersions(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resourceGroupName',
-                required=true
-            ),
-            gallery_name=dict(
-                type='str',
-                updatable=False,
-                disposition='galleryName',
-                required=true
-            ),
-            gallery_image_name=dict(
-                type='str',
-                updatable=False,
-                disposition='galleryImageName',
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='galleryImageVersionName',
-                required=true
-            ),
-            location=dict(
-                type='str',
-                updatable=False,
-                disposition='/',
-                required=true
-            ),
-            publishing_profile=dict(
-                type='dict',
-                disposition='/properties/publishingProfile',
-                required=true,
-                options=dict(
-                    target_regions=dict(
-                        type='list',
-                        disposition='targetRegions',
-                        options=dict(
-                            name=dict(
-                                type='str',
-                                required=true
-                            ),
-                            regional_replica_count=dict(
-                                type='number',
-                                disposition='regionalReplicaCount'
-                            ),
-                            storage_account_type=dict(
-                                type='str',
-                                disposition='storageAccountType',
-                                choices=['Standard_LRS',
-                                         'Standard_ZRS']
-                            )
-                        )
-                    ),
-                    replica_count=dict(
-                        type='number',
-                        disposition='replicaCount'
-                    ),
-                    exclude_from_latest=dict(
-                        type='boolean',
-                        disposition='excludeFromLatest'
-                    ),
-                    end_of_life_date=dict(
-                        type='datetime',
-                        disposition='endOfLifeDate'
-                    ),
-                    storage_account_type=dict(
-                        type='str',
-                        disposition='storageAccountType',
-                        choices=['Standard_LRS',
-                                 'Standard_ZRS']
-                    ),
-                    source=dict(
-                        type='dict',
-                        required=true,
-                        options=dict(
-                            managed_image=dict(
-                                type='dict',
-                                disposition='managedImage',
-                                required=true,
-                                options=dict(
-                                    id=dict(
-                                        type='str',
-                                        required=true
-                                    )
-                                )
-                            )
-                        )
-                    )
-                )
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.gallery_name = None
@@ -649,6 +598,9 @@ class AzureRMGalleryImageVersions(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.state_snapshot = None
+        self.wait = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -670,12 +622,12 @@ class AzureRMGalleryImageVersions(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
 
         resource_group = self.get_resource_group(self.resource_group)
@@ -683,25 +635,20 @@ class AzureRMGalleryImageVersions(AzureRMModuleBaseExt):
         if 'location' not in self.body:
             self.body['location'] = resource_group.location
 
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.Compute' +
-                    '/galleries' +
-                    '/{{ gallery_name }}' +
-                    '/images' +
-                    '/{{ image_name }}' +
-                    '/versions' +
-                    '/{{ version_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ gallery_name }}', self.gallery_name)
-        self.url = self.url.replace('{{ image_name }}', self.image_name)
-        self.url = self.url.replace('{{ version_name }}', self.name)
-
-        old_response = self.get_resource()
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.Compute/galleries/{{ gallery_name }}/images/{{ image_name }}/versions/{{ version_name }}',
+                                 subscription_id=self.subscription_id,
+                                 resource_group=self.resource_group,
+                                 gallery_name=self.gallery_name,
+                                 image_name=self.gallery_image_name,
+                                 version_name=self.name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        if self.check_mode and self.state_snapshot:
+            old_response = get_snapshot_resource(self.state_snapshot, self.url, self.fail)
+        if old_response is None:
+            old_response = self.get_resource()
 
         if not old_response:
             self.log("GalleryImageVersion instance doesn't exist")
@@ -716,12 +663,9 @@ class AzureRMGalleryImageVersions(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                self.results['modifiers'] = modifiers
-                self.results['compare'] = []
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -732,6 +676,9 @@ class AzureRMGalleryImageVersions(AzureRMModuleBaseExt):
                 return self.results
 
             response = self.create_update_resource()
+            if not self.wait:
+                self.results['id'] = self.url
+                response = None
 
             # if not old_response:
             self.results['changed'] = True
@@ -745,12 +692,13 @@ class AzureRMGalleryImageVersions(AzureRMModuleBaseExt):
             if self.check_mode:
                 return self.results
 
-            self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
+            response = self.delete_resource()
+            if not self.wait:
+                self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                           'DELETE',
+                                                                           self.query_parameters,
+                                                                           response)
+            response = None
         else:
             self.log('GalleryImageVersion instance unchanged')
             self.results['changed'] = False
@@ -776,12 +724,18 @@ class AzureRMGalleryImageVersions(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               self.body,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout if self.wait else 0,
                                               30)
         except CloudError as exc:
             self.log('Error attempting to create the GalleryImageVersion instance.')
             self.fail('Error creating the GalleryImageVersion instance: {0}'.format(str(exc)))
 
+        if not self.wait:
+            self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                       'PUT',
+                                                                       self.query_parameters,
+                                                                       response)
+
         try:
             response = json.loads(response.text)
         except Exception:
@@ -799,13 +753,20 @@ class AzureRMGalleryImageVersions(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              0,
                                               30)
+            if self.wait:
+                self.mgmt_client.wait_for_deletion(self.url,
+                                                   self.query_parameters,
+                                                   self.header_parameters,
+                                                   response,
+                                                   self.polling_timeout,
+                                                   30)
         except CloudError as e:
             self.log('Error attempting to delete the GalleryImageVersion instance.')
             self.fail('Error deleting the GalleryImageVersion instance: {0}'.format(str(e)))
 
-        return True
+        return response
 
     def get_resource(self):
         # self.log('Checking if the GalleryImageVersion instance {0} is present'.format(self.))
@@ -817,10 +778,11 @@ class AzureRMGalleryImageVersions(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout,
                                               30)
+            response = json.loads(response.text)
             found = True
-            self.log("Response : {0}".format(response))
+            log_debug(self, 'Response : {0}', response)
             # self.log("GalleryImageVersion instance : {0} found".format(response.name))
         except CloudError as e:
             self.log('Did not find the GalleryImageVersion instance.')
@@ -831,6 +793,8 @@ class AzureRMGalleryImageVersions(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMGalleryImageVersions()
 
 
@@ -24,22 +24,22 @@ options:
   resource_group:
     description:
       - Name of an Azure resource group.
-    required: true
+      - Required unless set by I(resource_groups) or I(scopes).
     type: str
   account_name:
     description:
       - Cosmos DB database account name.
-    required: true
+      - Required unless set by I(scopes).
     type: str
   database_rid:
     description:
       - Cosmos DB database rid.
-    required: true
+      - Required unless set by I(scopes).
     type: str
   collection_rid:
     description:
       - Cosmos DB collection rid.
-    required: true
+      - Required unless set by I(scopes).
     type: str
   value:
     description:
@@ -85,6 +85,35 @@ options:
         description:
           - The partition key range id (integer identifier) of the usages.
         type: str
+  max_items:
+    description:
+      - Maximum number of items returned by list operations.
+      - Next pages are not requested once this number of items was collected.
+    type: int
+  page_size:
+    description:
+      - Number of items requested per page, passed to list operations as C($top).
+    type: int
+  fields:
+    description:
+      - Fields to return for each item, as dot separated paths, for example C(properties.provisioningState).
+      - Entries which are not plain paths are evaluated as JMESPath expressions, which requires C(jmespath).
+      - Fields are selected as the response is decoded, by default all of them are returned.
+    type: list
+  subscriptions:
+    description:
+      - List of subscription IDs to query, instead of the subscription of the credentials.
+    type: list
+  resource_groups:
+    description:
+      - List of resource groups to query, instead of I(resource_group).
+    type: list
+  scopes:
+    description:
+      - List of scopes to query, each a dict of options of this module, for example parent resource names.
+      - Every combination of I(subscriptions), I(resource_groups) and I(scopes) is queried in parallel within a single task.
+      - Items of all scopes are merged, I(scopes) reports errors of every scope.
+    type: list
 extends_documentation_fragment:
   - azure
 author:
@@ -185,12 +214,32 @@ collection_partition:
               type: str
               sample: null
 
+scopes:
+  description:
+    - Every scope queried, when I(subscriptions), I(resource_groups) or I(scopes) were specified.
+  returned: when scopes specified
+  type: complex
+  contains:
+    scope:
+      description:
+        - Options which were set for the scope.
+      type: dict
+    error:
+      description:
+        - Error which occurred while querying the scope, null if the scope succeeded.
+      type: str
+
 '''
 
 import time
 import json
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_info_ext import get_projection, project, get_scope_plan, query_scopes, check_required_options
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+from ansible.module_utils.azure_rm_common_log import log_debug
+from ansible.module_utils.azure_rm_common_url import build_url
 from copy import deepcopy
 from msrestazure.azure_exceptions import CloudError
 
@@ -199,20 +248,34 @@ class AzureRMCollectionPartitionInfo(AzureRMModuleBase):
     def __init__(self):
         self.module_arg_spec = dict(
             resource_group=dict(
-                type='str',
-                required=true
+                type='str'
             ),
             account_name=dict(
-                type='str',
-                required=true
+                type='str'
             ),
             database_rid=dict(
-                type='str',
-                required=true
+                type='str'
             ),
             collection_rid=dict(
-                type='str',
-                required=true
+                type='str'
+            ),
+            max_items=dict(
+                type='int'
+            ),
+            page_size=dict(
+                type='int'
+            ),
+            fields=dict(
+                type='list'
+            ),
+            subscriptions=dict(
+                type='list'
+            ),
+            resource_groups=dict(
+                type='list'
+            ),
+            scopes=dict(
+                type='list'
             )
         )
 
@@ -225,6 +288,14 @@ class AzureRMCollectionPartitionInfo(AzureRMModuleBase):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.subscriptions = None
+        self.resource_groups = None
+        self.scopes = None
+        self.in_scope = False
+        self.fields = None
+        self.projection = None
+        self.max_items = None
+        self.page_size = None
         self.url = None
         self.status_code = [200]
 
@@ -241,108 +312,102 @@ class AzureRMCollectionPartitionInfo(AzureRMModuleBase):
         for key in self.module_arg_spec:
             setattr(self, key, kwargs[key])
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.projection = get_projection(self.fields, self.fail)
+
+        if self.subscriptions or self.resource_groups or self.scopes:
+            plan = get_scope_plan(self.subscriptions, self.resource_groups, self.scopes, self.module_arg_spec, self.fail)
+            check_required_options(self, plan, ['resource_group', 'account_name', 'database_rid', 'collection_rid'])
+            self.results['scopes'] = query_scopes(self, plan, AzureRMCollectionPartitionInfo.query_info)
+        else:
+            check_required_options(self, None, ['resource_group', 'account_name', 'database_rid', 'collection_rid'])
+            self.query_info()
+        return self.results
 
+    def query_info(self):
         if (self.resource_group is not None and
             self.account_name is not None and
             self.database_rid is not None and
             self.collection_rid is not None):
-            self.results['collection_partition'] = self.format_item(self.listmetrics())
+            self.results['collection_partition'] = self.format_item(self.listusages())
         elif (self.resource_group is not None and
               self.account_name is not None and
               self.database_rid is not None and
               self.collection_rid is not None):
-            self.results['collection_partition'] = self.format_item(self.listusages())
-        return self.results
+            self.results['collection_partition'] = self.format_item(self.listmetrics())
 
-    def listmetrics(self):
+    def listusages(self):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/databases' +
-                    '/{{ database_name }}' +
-                    '/collections' +
-                    '/{{ collection_name }}' +
-                    '/partitions' +
-                    '/{{ partition_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ partition_name }}', self.name)
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/databases/{{ database_name }}/collections/{{ collection_name }}/partitions/usages',
+                                 subscription_id=self.subscription_id,
+                                 resource_group=self.resource_group,
+                                 database_account_name=self.account_name,
+                                 database_name=self.database_rid,
+                                 collection_name=self.collection_rid)
+        except ValueError as exc:
+            self.fail(str(exc))
 
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = self.mgmt_client.query_list(self.url,
+                                                               'GET',
+                                                               self.query_parameters,
+                                                               self.header_parameters,
+                                                               None,
+                                                               self.status_code,
+                                                               self.max_items,
+                                                               self.page_size,
+                                                               self.projection)
+            log_debug(self, 'Response : {0}', results['temp_item'])
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
 
-    def listusages(self):
+    def listmetrics(self):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/databases' +
-                    '/{{ database_name }}' +
-                    '/collections' +
-                    '/{{ collection_name }}' +
-                    '/partitions' +
-                    '/{{ partition_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ partition_name }}', self.name)
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/databases/{{ database_name }}/collections/{{ collection_name }}/partitions/metrics',
+                                 subscription_id=self.subscription_id,
+                                 resource_group=self.resource_group,
+                                 database_account_name=self.account_name,
+                                 database_name=self.database_rid,
+                                 collection_name=self.collection_rid)
+        except ValueError as exc:
+            self.fail(str(exc))
 
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = self.mgmt_client.query_list(self.url,
+                                                               'GET',
+                                                               self.query_parameters,
+                                                               self.header_parameters,
+                                                               None,
+                                                               self.status_code,
+                                                               self.max_items,
+                                                               self.page_size,
+                                                               self.projection)
+            log_debug(self, 'Response : {0}', results['temp_item'])
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
 
-    def format_item(item):
+    def format_item(self, item):
         return item
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMCollectionPartitionInfo()
 
 
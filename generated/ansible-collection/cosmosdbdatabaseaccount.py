@@ -281,6 +281,24 @@ options:
     description:
       - The type of Azure resource.
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure.rm.operation_info) to track progress.
+    type: bool
+    default: true
+  polling_timeout:
+    description:
+      - Maximum time in seconds to wait for long running operation to complete.
+      - Status is polled as indicated by C(Azure-AsyncOperation), C(Location) and C(Retry-After) headers.
+    type: int
+    default: 1800
+  state_snapshot:
+    description:
+      - Path of state snapshot exported by M(azure.rm.statesnapshot).
+      - In check mode current state of the instance is taken from the snapshot instead of Azure, if the snapshot covers it.
+      - Instances of resource types, subscriptions or resource groups not exported to the snapshot are read from Azure.
+    type: path
   state:
     description:
       - Assert the state of the DatabaseAccount.
@@ -685,13 +703,27 @@ properties:
       type: str
       sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+from ansible.module_utils.azure_rm_common_log import log_debug
+from ansible.module_utils.azure_rm_common_snapshot import get_snapshot_resource
+from ansible.module_utils.azure_rm_common_url import build_url
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -700,139 +732,37 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resourceGroupName", "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "accountName", "required": true},
+    "location": {"type": "str", "updatable": false, "disposition": "/"},
+    "kind": {"type": "str", "updatable": false, "disposition": "/", "choices": ["GlobalDocumentDB", "MongoDB", "Parse"]},
+    "consistency_policy": {"type": "dict", "disposition": "/properties/consistencyPolicy", "options": {"default_consistency_level": {"type": "str", "disposition": "defaultConsistencyLevel", "choices": ["Eventual", "Session", "BoundedStaleness", "Strong", "ConsistentPrefix"], "required": true}, "max_staleness_prefix": {"type": "number", "disposition": "maxStalenessPrefix"}, "max_interval_in_seconds": {"type": "number", "disposition": "maxIntervalInSeconds"}}},
+    "locations": {"type": "list", "disposition": "/properties/*", "required": true, "options": {"location_name": {"type": "str", "disposition": "locationName"}, "failover_priority": {"type": "number", "disposition": "failoverPriority"}, "is_zone_redundant": {"type": "boolean", "disposition": "isZoneRedundant"}}},
+    "database_account_offer_type": {"type": "str", "disposition": "/properties/databaseAccountOfferType", "required": true},
+    "ip_range_filter": {"type": "str", "disposition": "/properties/ipRangeFilter"},
+    "is_virtual_network_filter_enabled": {"type": "boolean", "disposition": "/properties/isVirtualNetworkFilterEnabled"},
+    "enable_automatic_failover": {"type": "boolean", "disposition": "/properties/enableAutomaticFailover"},
+    "capabilities": {"type": "list", "disposition": "/properties/*", "options": {"name": {"type": "str"}}},
+    "virtual_network_rules": {"type": "list", "disposition": "/properties/virtualNetworkRules", "options": {"id": {"type": "str"}, "ignore_missing_vnet_service_endpoint": {"type": "boolean", "disposition": "ignoreMissingVNetServiceEndpoint"}}},
+    "enable_multiple_write_locations": {"type": "boolean", "disposition": "/properties/enableMultipleWriteLocations"},
+    "enable_cassandra_connector": {"type": "boolean", "disposition": "/properties/enableCassandraConnector"},
+    "connector_offer": {"type": "str", "disposition": "/properties/connectorOffer", "choices": ["Small"]},
+    "wait": {"type": "bool", "default": true},
+    "polling_timeout": {"type": "int", "default": 1800},
+    "state_snapshot": {"type": "path"},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMDatabaseAccounts(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resourceGroupName',
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='accountName',
-                required=true
-            ),
-            location=dict(
-                type='str',
-                updatable=False,
-                disposition='/'
-            ),
-            kind=dict(
-                type='str',
-                updatable=False,
-                disposition='/',
-                choices=['GlobalDocumentDB',
-                         'MongoDB',
-                         'Parse']
-            ),
-            consistency_policy=dict(
-                type='dict',
-                disposition='/properties/consistencyPolicy',
-                options=dict(
-                    default_consistency_level=dict(
-                        type='str',
-                        disposition='defaultConsistencyLevel',
-                        choices=['Eventual',
-                                 'Session',
-                                 'BoundedStaleness',
-                                 'Strong',
-                                 'ConsistentPrefix'],
-                        required=true
-                    ),
-                    max_staleness_prefix=dict(
-                        type='number',
-                        disposition='maxStalenessPrefix'
-                    ),
-                    max_interval_in_seconds=dict(
-                        type='number',
-                        disposition='maxIntervalInSeconds'
-                    )
-                )
-            ),
-            locations=dict(
-                type='list',
-                disposition='/properties/*',
-                required=true,
-                options=dict(
-                    location_name=dict(
-                        type='str',
-                        disposition='locationName'
-                    ),
-                    failover_priority=dict(
-                        type='number',
-                        disposition='failoverPriority'
-                    ),
-                    is_zone_redundant=dict(
-                        type='boolean',
-                        disposition='isZoneRedundant'
-                    )
-                )
-            ),
-            database_account_offer_type=dict(
-                type='str',
-                disposition='/properties/databaseAccountOfferType',
-                required=true
-            ),
-            ip_range_filter=dict(
-                type='str',
-                disposition='/properties/ipRangeFilter'
-            ),
-            is_virtual_network_filter_enabled=dict(
-                type='boolean',
-                disposition='/properties/isVirtualNetworkFilterEnabled'
-            ),
-            enable_automatic_failover=dict(
-                type='boolean',
-                disposition='/properties/enableAutomaticFailover'
-            ),
-            capabilities=dict(
-                type='list',
-                disposition='/properties/*',
-                options=dict(
-                    name=dict(
-                        type='str'
-                    )
-                )
-            ),
-            virtual_network_rules=dict(
-                type='list',
-                disposition='/properties/virtualNetworkRules',
-                options=dict(
-                    id=dict(
-                        type='str'
-                    ),
-                    ignore_missing_vnet_service_endpoint=dict(
-                        type='boolean',
-                        disposition='ignoreMissingVNetServiceEndpoint'
-                    )
-                )
-            ),
-            enable_multiple_write_locations=dict(
-                type='boolean',
-                disposition='/properties/enableMultipleWriteLocations'
-            ),
-            enable_cassandra_connector=dict(
-                type='boolean',
-                disposition='/properties/enableCassandraConnector'
-            ),
-            connector_offer=dict(
-                type='str',
-                disposition='/properties/connectorOffer',
-                choices=['Small']
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.name = None
@@ -843,6 +773,9 @@ class AzureRMDatabaseAccounts(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.state_snapshot = None
+        self.wait = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -864,12 +797,12 @@ class AzureRMDatabaseAccounts(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
 
         resource_group = self.get_resource_group(self.resource_group)
@@ -877,19 +810,18 @@ class AzureRMDatabaseAccounts(AzureRMModuleBaseExt):
         if 'location' not in self.body:
             self.body['location'] = resource_group.location
 
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.name)
-
-        old_response = self.get_resource()
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}',
+                                 subscription_id=self.subscription_id,
+                                 resource_group=self.resource_group,
+                                 database_account_name=self.name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        if self.check_mode and self.state_snapshot:
+            old_response = get_snapshot_resource(self.state_snapshot, self.url, self.fail)
+        if old_response is None:
+            old_response = self.get_resource()
 
         if not old_response:
             self.log("DatabaseAccount instance doesn't exist")
@@ -904,12 +836,9 @@ class AzureRMDatabaseAccounts(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                self.results['modifiers'] = modifiers
-                self.results['compare'] = []
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -920,6 +849,9 @@ class AzureRMDatabaseAccounts(AzureRMModuleBaseExt):
                 return self.results
 
             response = self.create_update_resource()
+            if not self.wait:
+                self.results['id'] = self.url
+                response = None
 
             # if not old_response:
             self.results['changed'] = True
@@ -933,12 +865,13 @@ class AzureRMDatabaseAccounts(AzureRMModuleBaseExt):
             if self.check_mode:
                 return self.results
 
-            self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
+            response = self.delete_resource()
+            if not self.wait:
+                self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                           'DELETE',
+                                                                           self.query_parameters,
+                                                                           response)
+            response = None
         else:
             self.log('DatabaseAccount instance unchanged')
             self.results['changed'] = False
@@ -965,12 +898,18 @@ class AzureRMDatabaseAccounts(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               self.body,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout if self.wait else 0,
                                               30)
         except CloudError as exc:
             self.log('Error attempting to create the DatabaseAccount instance.')
             self.fail('Error creating the DatabaseAccount instance: {0}'.format(str(exc)))
 
+        if not self.wait:
+            self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                       'PUT',
+                                                                       self.query_parameters,
+                                                                       response)
+
         try:
             response = json.loads(response.text)
         except Exception:
@@ -988,13 +927,20 @@ class AzureRMDatabaseAccounts(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              0,
                                               30)
+            if self.wait:
+                self.mgmt_client.wait_for_deletion(self.url,
+                                                   self.query_parameters,
+                                                   self.header_parameters,
+                                                   response,
+                                                   self.polling_timeout,
+                                                   30)
         except CloudError as e:
             self.log('Error attempting to delete the DatabaseAccount instance.')
             self.fail('Error deleting the DatabaseAccount instance: {0}'.format(str(e)))
 
-        return True
+        return response
 
     def get_resource(self):
         # self.log('Checking if the DatabaseAccount instance {0} is present'.format(self.))
@@ -1006,10 +952,11 @@ class AzureRMDatabaseAccounts(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout,
                                               30)
+            response = json.loads(response.text)
             found = True
-            self.log("Response : {0}".format(response))
+            log_debug(self, 'Response : {0}', response)
             # self.log("DatabaseAccount instance : {0} found".format(response.name))
         except CloudError as e:
             self.log('Did not find the DatabaseAccount instance.')
@@ -1020,6 +967,8 @@ class AzureRMDatabaseAccounts(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMDatabaseAccounts()
 
 
@@ -279,6 +279,86 @@ options:
         The cassandra connector offer type for the Cosmos DB database C*
         account.
     type: str
+  max_items:
+    description:
+      - Maximum number of items returned by list operations.
+      - Next pages are not requested once this number of items was collected.
+    type: int
+  page_size:
+    description:
+      - Number of items requested per page, passed to list operations as C($top).
+    type: int
+  facets:
+    description:
+      - List of facets of the database account to get in one invocation.
+      - Selected facets are queried concurrently and returned keyed by facet name.
+      - When not specified, first facet which has all required options specified is returned.
+    type: list
+    choices:
+      - getmongodbcollectionthroughput
+      - getsqlcontainerthroughput
+      - getgremlingraphthroughput
+      - getcassandratablethroughput
+      - getmongodbcollection
+      - getsqlcontainer
+      - getcassandrakeyspacethroughput
+      - getsqldatabasethroughput
+      - getgremlindatabasethroughput
+      - getmongodbdatabasethroughput
+      - getcassandratable
+      - getgremlingraph
+      - gettablethroughput
+      - listmongodbcollections
+      - listsqlcontainers
+      - listcassandratables
+      - listgremlingraphs
+      - getsqldatabase
+      - getgremlindatabase
+      - getcassandrakeyspace
+      - getmongodbdatabase
+      - gettable
+      - listcassandrakeyspaces
+      - listgremlindatabases
+      - listsqldatabases
+      - listmongodbdatabases
+      - listtables
+      - listmetricdefinitions
+      - getreadonlykeys
+      - listmetrics
+      - listusages
+      - get
+      - listbyresourcegroup
+      - list
+  fields:
+    description:
+      - Fields to return for each item, as dot separated paths, for example C(properties.provisioningState).
+      - Entries which are not plain paths are evaluated as JMESPath expressions, which requires C(jmespath).
+      - Fields are selected as the response is decoded, by default all of them are returned.
+    type: list
+  backend:
+    description:
+      - Backend used to list resources when I(name) is not specified.
+      - C(resource_graph) lists resources of all I(subscriptions) and I(resource_groups) with a single Azure Resource Graph query.
+      - Resource Graph data may lag behind ARM and only top level properties are guaranteed to match.
+    type: str
+    choices:
+      - arm
+      - resource_graph
+    default: arm
+  subscriptions:
+    description:
+      - List of subscription IDs to query, instead of the subscription of the credentials.
+    type: list
+  resource_groups:
+    description:
+      - List of resource groups to query, instead of I(resource_group).
+    type: list
+  scopes:
+    description:
+      - List of scopes to query, each a dict of options of this module, for example parent resource names.
+      - Every combination of I(subscriptions), I(resource_groups) and I(scopes) is queried in parallel within a single task.
+      - Items of all scopes are merged, I(scopes) reports errors of every scope.
+    type: list
 extends_documentation_fragment:
   - azure
 author:
@@ -512,16 +592,76 @@ database_accounts:
           type: dict
           sample: null
 
+scopes:
+  description:
+    - Every scope queried, when I(subscriptions), I(resource_groups) or I(scopes) were specified, unless I(backend=resource_graph) listed them with a single query.
+  returned: when scopes specified
+  type: complex
+  contains:
+    scope:
+      description:
+        - Options which were set for the scope.
+      type: dict
+    error:
+      description:
+        - Error which occurred while querying the scope, null if the scope succeeded.
+      type: str
+
 '''
 
 import time
 import json
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_info_ext import run_parallel, get_projection, project, get_scope_plan, query_scopes, lists_with_resource_graph
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+from ansible.module_utils.azure_rm_common_log import log_debug
+from ansible.module_utils.azure_rm_common_url import build_url
 from copy import deepcopy
 from msrestazure.azure_exceptions import CloudError
 
 
+# facets in order of precedence, first one with all required options specified
+# is used when facets option is not specified
+FACETS = [
+    ('getmongodbcollectionthroughput', ['resource_group', 'account_name', 'database_name', 'name']),
+    ('getsqlcontainerthroughput', ['resource_group', 'account_name', 'database_name', 'container_name']),
+    ('getgremlingraphthroughput', ['resource_group', 'account_name', 'database_name', 'graph_name']),
+    ('getcassandratablethroughput', ['resource_group', 'account_name', 'keyspace_name', 'table_name']),
+    ('getmongodbcollection', ['resource_group', 'account_name', 'database_name', 'name']),
+    ('getsqlcontainer', ['resource_group', 'account_name', 'database_name', 'container_name']),
+    ('getcassandrakeyspacethroughput', ['resource_group', 'account_name', 'keyspace_name']),
+    ('getsqldatabasethroughput', ['resource_group', 'account_name', 'database_name']),
+    ('getgremlindatabasethroughput', ['resource_group', 'account_name', 'database_name']),
+    ('getmongodbdatabasethroughput', ['resource_group', 'account_name', 'database_name']),
+    ('getcassandratable', ['resource_group', 'account_name', 'keyspace_name', 'table_name']),
+    ('getgremlingraph', ['resource_group', 'account_name', 'database_name', 'graph_name']),
+    ('gettablethroughput', ['resource_group', 'account_name', 'table_name']),
+    ('listmongodbcollections', ['resource_group', 'account_name', 'database_name']),
+    ('listsqlcontainers', ['resource_group', 'account_name', 'database_name']),
+    ('listcassandratables', ['resource_group', 'account_name', 'keyspace_name']),
+    ('listgremlingraphs', ['resource_group', 'account_name', 'database_name']),
+    ('getsqldatabase', ['resource_group', 'account_name', 'database_name']),
+    ('getgremlindatabase', ['resource_group', 'account_name', 'database_name']),
+    ('getcassandrakeyspace', ['resource_group', 'account_name', 'keyspace_name']),
+    ('getmongodbdatabase', ['resource_group', 'account_name', 'database_name']),
+    ('gettable', ['resource_group', 'account_name', 'table_name']),
+    ('listcassandrakeyspaces', ['resource_group', 'account_name']),
+    ('listgremlindatabases', ['resource_group', 'account_name']),
+    ('listsqldatabases', ['resource_group', 'account_name']),
+    ('listmongodbdatabases', ['resource_group', 'account_name']),
+    ('listtables', ['resource_group', 'account_name']),
+    ('listmetricdefinitions', ['resource_group', 'account_name']),
+    ('getreadonlykeys', ['resource_group', 'account_name']),
+    ('listmetrics', ['resource_group', 'account_name']),
+    ('listusages', ['resource_group', 'account_name']),
+    ('get', ['resource_group', 'account_name']),
+    ('listbyresourcegroup', ['resource_group']),
+    ('list', [])
+]
+
+
 class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
     def __init__(self):
         self.module_arg_spec = dict(
@@ -548,6 +688,66 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
             ),
             name=dict(
                 type='str'
+            ),
+            max_items=dict(
+                type='int'
+            ),
+            page_size=dict(
+                type='int'
+            ),
+            facets=dict(
+                type='list',
+                choices=['getmongodbcollectionthroughput',
+                         'getsqlcontainerthroughput',
+                         'getgremlingraphthroughput',
+                         'getcassandratablethroughput',
+                         'getmongodbcollection',
+                         'getsqlcontainer',
+                         'getcassandrakeyspacethroughput',
+                         'getsqldatabasethroughput',
+                         'getgremlindatabasethroughput',
+                         'getmongodbdatabasethroughput',
+                         'getcassandratable',
+                         'getgremlingraph',
+                         'gettablethroughput',
+                         'listmongodbcollections',
+                         'listsqlcontainers',
+                         'listcassandratables',
+                         'listgremlingraphs',
+                         'getsqldatabase',
+                         'getgremlindatabase',
+                         'getcassandrakeyspace',
+                         'getmongodbdatabase',
+                         'gettable',
+                         'listcassandrakeyspaces',
+                         'listgremlindatabases',
+                         'listsqldatabases',
+                         'listmongodbdatabases',
+                         'listtables',
+                         'listmetricdefinitions',
+                         'getreadonlykeys',
+                         'listmetrics',
+                         'listusages',
+                         'get',
+                         'listbyresourcegroup',
+                         'list']
+            ),
+            fields=dict(
+                type='list'
+            ),
+            backend=dict(
+                type='str',
+                choices=['arm', 'resource_graph'],
+                default='arm'
+            ),
+            subscriptions=dict(
+                type='list'
+            ),
+            resource_groups=dict(
+                type='list'
+            ),
+            scopes=dict(
+                type='list'
             )
         )
 
@@ -570,6 +770,16 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.subscriptions = None
+        self.resource_groups = None
+        self.scopes = None
+        self.in_scope = False
+        self.backend = None
+        self.fields = None
+        self.projection = None
+        self.facets = None
+        self.max_items = None
+        self.page_size = None
         self.url = None
         self.status_code = [200]
 
@@ -586,171 +796,66 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
         for key in self.module_arg_spec:
             setattr(self, key, kwargs[key])
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
-
-        if (self.resource_group is not None and
-            self.account_name is not None and
-            self.database_name is not None and
-            self.name is not None):
-            self.results['database_accounts'] = self.format_item(self.getmongodbcollectionthroughput())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.database_name is not None and
-              self.container_name is not None):
-            self.results['database_accounts'] = self.format_item(self.getsqlcontainerthroughput())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.database_name is not None and
-              self.graph_name is not None):
-            self.results['database_accounts'] = self.format_item(self.getgremlingraphthroughput())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.keyspace_name is not None and
-              self.table_name is not None):
-            self.results['database_accounts'] = self.format_item(self.getcassandratablethroughput())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.database_name is not None and
-              self.name is not None):
-            self.results['database_accounts'] = self.format_item(self.getmongodbcollection())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.database_name is not None and
-              self.container_name is not None):
-            self.results['database_accounts'] = self.format_item(self.getsqlcontainer())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.database_name is not None):
-            self.results['database_accounts'] = self.format_item(self.getmongodbdatabasethroughput())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.keyspace_name is not None):
-            self.results['database_accounts'] = self.format_item(self.getcassandrakeyspacethroughput())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.database_name is not None):
-            self.results['database_accounts'] = self.format_item(self.getsqldatabasethroughput())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.database_name is not None):
-            self.results['database_accounts'] = self.format_item(self.getgremlindatabasethroughput())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.keyspace_name is not None and
-              self.table_name is not None):
-            self.results['database_accounts'] = self.format_item(self.getcassandratable())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.database_name is not None and
-              self.graph_name is not None):
-            self.results['database_accounts'] = self.format_item(self.getgremlingraph())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.table_name is not None):
-            self.results['database_accounts'] = self.format_item(self.gettablethroughput())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.database_name is not None):
-            self.results['database_accounts'] = self.format_item(self.listmongodbcollections())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.database_name is not None):
-            self.results['database_accounts'] = self.format_item(self.listsqlcontainers())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.database_name is not None):
-            self.results['database_accounts'] = self.format_item(self.listgremlingraphs())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.keyspace_name is not None):
-            self.results['database_accounts'] = self.format_item(self.listcassandratables())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.database_name is not None):
-            self.results['database_accounts'] = self.format_item(self.getsqldatabase())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.keyspace_name is not None):
-            self.results['database_accounts'] = self.format_item(self.getcassandrakeyspace())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.database_name is not None):
-            self.results['database_accounts'] = self.format_item(self.getmongodbdatabase())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.database_name is not None):
-            self.results['database_accounts'] = self.format_item(self.getgremlindatabase())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.table_name is not None):
-            self.results['database_accounts'] = self.format_item(self.gettable())
-        elif (self.resource_group is not None and
-              self.account_name is not None):
-            self.results['database_accounts'] = self.format_item(self.listmongodbdatabases())
-        elif (self.resource_group is not None and
-              self.account_name is not None):
-            self.results['database_accounts'] = self.format_item(self.listsqldatabases())
-        elif (self.resource_group is not None and
-              self.account_name is not None):
-            self.results['database_accounts'] = self.format_item(self.listgremlindatabases())
-        elif (self.resource_group is not None and
-              self.account_name is not None):
-            self.results['database_accounts'] = self.format_item(self.listcassandrakeyspaces())
-        elif (self.resource_group is not None and
-              self.account_name is not None):
-            self.results['database_accounts'] = self.format_item(self.listtables())
-        elif (self.resource_group is not None and
-              self.account_name is not None):
-            self.results['database_accounts'] = self.format_item(self.listmetricdefinitions())
-        elif (self.resource_group is not None and
-              self.account_name is not None):
-            self.results['database_accounts'] = self.format_item(self.getreadonlykeys())
-        elif (self.resource_group is not None and
-              self.account_name is not None):
-            self.results['database_accounts'] = self.format_item(self.listmetrics())
-        elif (self.resource_group is not None and
-              self.account_name is not None):
-            self.results['database_accounts'] = self.format_item(self.listusages())
-        elif (self.resource_group is not None and
-              self.account_name is not None):
-            self.results['database_accounts'] = self.format_item(self.get())
-        elif (self.resource_group is not None):
-            self.results['database_accounts'] = self.format_item(self.listbyresourcegroup())
+        self.projection = get_projection(self.fields, self.fail)
+
+        if lists_with_resource_graph(self, ['account_name', 'container_name', 'database_name', 'graph_name', 'keyspace_name', 'name', 'table_name', 'facets']):
+            # one Resource Graph query lists resources of all subscriptions and resource groups
+            self.resource_group = self.resource_groups or self.resource_group
+            self.query_info()
+        elif self.subscriptions or self.resource_groups or self.scopes:
+            plan = get_scope_plan(self.subscriptions, self.resource_groups, self.scopes, self.module_arg_spec, self.fail)
+            self.results['scopes'] = query_scopes(self, plan, AzureRMDatabaseAccountsInfo.query_info)
         else:
-            self.results['database_accounts'] = [self.format_item(self.list())]
+            self.query_info()
         return self.results
 
+    def query_info(self):
+        if self.facets:
+            self.results['database_accounts'] = self.get_facets()
+        else:
+            for facet, required in FACETS:
+                if all(getattr(self, option) is not None for option in required):
+                    self.results['database_accounts'] = self.format_item(getattr(self, facet)())
+                    break
+
+    def get_facets(self):
+        jobs = []
+        for facet, required in FACETS:
+            if facet not in self.facets:
+                continue
+            missing = [option for option in required if getattr(self, option) is None]
+            if missing:
+                self.fail('Facet {0} requires following options: {1}'.format(facet, ', '.join(missing)))
+            jobs.append((facet, getattr(self, facet), []))
+        # getters raise CloudError like in a scope, so failed facets are reported
+        in_scope = self.in_scope
+        self.in_scope = True
+        try:
+            results, errors = run_parallel(jobs)
+        finally:
+            self.in_scope = in_scope
+        if errors:
+            self.fail('Error getting facets: {0}'.format(errors))
+        return dict((facet, self.format_item(result)) for facet, result in results.items())
+
     def getmongodbcollectionthroughput(self):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}' +
-                    '/databases' +
-                    '/{{ database_name }}' +
-                    '/collections' +
-                    '/{{ collection_name }}' +
-                    '/settings' +
-                    '/{{ setting_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/apis/mongodb/databases/{{ database_name }}/collections/{{ collection_name }}/settings/throughput',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name,
+                            database_name=self.database_name,
+                            collection_name=self.name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            response = self.mgmt_client.query(url,
                                               'GET',
                                               self.query_parameters,
                                               self.header_parameters,
@@ -758,9 +863,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                               self.status_code,
                                               600,
                                               30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = project(json.loads(response.text), self.projection)
+            log_debug(self, 'Response : {0}', response)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
@@ -769,32 +876,18 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}' +
-                    '/databases' +
-                    '/{{ database_name }}' +
-                    '/containers' +
-                    '/{{ container_name }}' +
-                    '/settings' +
-                    '/{{ setting_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/apis/sql/databases/{{ database_name }}/containers/{{ container_name }}/settings/throughput',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name,
+                            database_name=self.database_name,
+                            container_name=self.container_name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            response = self.mgmt_client.query(url,
                                               'GET',
                                               self.query_parameters,
                                               self.header_parameters,
@@ -802,9 +895,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                               self.status_code,
                                               600,
                                               30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = project(json.loads(response.text), self.projection)
+            log_debug(self, 'Response : {0}', response)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
@@ -813,32 +908,18 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}' +
-                    '/databases' +
-                    '/{{ database_name }}' +
-                    '/graphs' +
-                    '/{{ graph_name }}' +
-                    '/settings' +
-                    '/{{ setting_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/apis/gremlin/databases/{{ database_name }}/graphs/{{ graph_name }}/settings/throughput',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name,
+                            database_name=self.database_name,
+                            graph_name=self.graph_name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            response = self.mgmt_client.query(url,
                                               'GET',
                                               self.query_parameters,
                                               self.header_parameters,
@@ -846,9 +927,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                               self.status_code,
                                               600,
                                               30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = project(json.loads(response.text), self.projection)
+            log_debug(self, 'Response : {0}', response)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
@@ -857,32 +940,18 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}' +
-                    '/keyspaces' +
-                    '/{{ keyspace_name }}' +
-                    '/tables' +
-                    '/{{ table_name }}' +
-                    '/settings' +
-                    '/{{ setting_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/apis/cassandra/keyspaces/{{ keyspace_name }}/tables/{{ table_name }}/settings/throughput',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name,
+                            keyspace_name=self.keyspace_name,
+                            table_name=self.table_name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            response = self.mgmt_client.query(url,
                                               'GET',
                                               self.query_parameters,
                                               self.header_parameters,
@@ -890,9 +959,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                               self.status_code,
                                               600,
                                               30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = project(json.loads(response.text), self.projection)
+            log_debug(self, 'Response : {0}', response)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
@@ -901,30 +972,18 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}' +
-                    '/databases' +
-                    '/{{ database_name }}' +
-                    '/collections' +
-                    '/{{ collection_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/apis/mongodb/databases/{{ database_name }}/collections/{{ collection_name }}',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name,
+                            database_name=self.database_name,
+                            collection_name=self.name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            response = self.mgmt_client.query(url,
                                               'GET',
                                               self.query_parameters,
                                               self.header_parameters,
@@ -932,9 +991,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                               self.status_code,
                                               600,
                                               30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = project(json.loads(response.text), self.projection)
+            log_debug(self, 'Response : {0}', response)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
@@ -943,30 +1004,18 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}' +
-                    '/databases' +
-                    '/{{ database_name }}' +
-                    '/containers' +
-                    '/{{ container_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/apis/sql/databases/{{ database_name }}/containers/{{ container_name }}',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name,
+                            database_name=self.database_name,
+                            container_name=self.container_name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            response = self.mgmt_client.query(url,
                                               'GET',
                                               self.query_parameters,
                                               self.header_parameters,
@@ -974,41 +1023,30 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                               self.status_code,
                                               600,
                                               30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = project(json.loads(response.text), self.projection)
+            log_debug(self, 'Response : {0}', response)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
 
-    def getmongodbdatabasethroughput(self):
+    def getcassandrakeyspacethroughput(self):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}' +
-                    '/databases' +
-                    '/{{ database_name }}' +
-                    '/settings' +
-                    '/{{ setting_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/apis/cassandra/keyspaces/{{ keyspace_name }}/settings/throughput',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name,
+                            keyspace_name=self.keyspace_name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            response = self.mgmt_client.query(url,
                                               'GET',
                                               self.query_parameters,
                                               self.header_parameters,
@@ -1016,41 +1054,30 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                               self.status_code,
                                               600,
                                               30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = project(json.loads(response.text), self.projection)
+            log_debug(self, 'Response : {0}', response)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
 
-    def getcassandrakeyspacethroughput(self):
+    def getsqldatabasethroughput(self):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}' +
-                    '/keyspaces' +
-                    '/{{ keyspace_name }}' +
-                    '/settings' +
-                    '/{{ setting_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/apis/sql/databases/{{ database_name }}/settings/throughput',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name,
+                            database_name=self.database_name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            response = self.mgmt_client.query(url,
                                               'GET',
                                               self.query_parameters,
                                               self.header_parameters,
@@ -1058,41 +1085,30 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                               self.status_code,
                                               600,
                                               30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = project(json.loads(response.text), self.projection)
+            log_debug(self, 'Response : {0}', response)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
 
-    def getsqldatabasethroughput(self):
+    def getgremlindatabasethroughput(self):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}' +
-                    '/databases' +
-                    '/{{ database_name }}' +
-                    '/settings' +
-                    '/{{ setting_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/apis/gremlin/databases/{{ database_name }}/settings/throughput',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name,
+                            database_name=self.database_name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            response = self.mgmt_client.query(url,
                                               'GET',
                                               self.query_parameters,
                                               self.header_parameters,
@@ -1100,41 +1116,30 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                               self.status_code,
                                               600,
                                               30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = project(json.loads(response.text), self.projection)
+            log_debug(self, 'Response : {0}', response)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
 
-    def getgremlindatabasethroughput(self):
+    def getmongodbdatabasethroughput(self):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}' +
-                    '/databases' +
-                    '/{{ database_name }}' +
-                    '/settings' +
-                    '/{{ setting_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/apis/mongodb/databases/{{ database_name }}/settings/throughput',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name,
+                            database_name=self.database_name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            response = self.mgmt_client.query(url,
                                               'GET',
                                               self.query_parameters,
                                               self.header_parameters,
@@ -1142,9 +1147,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                               self.status_code,
                                               600,
                                               30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = project(json.loads(response.text), self.projection)
+            log_debug(self, 'Response : {0}', response)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
@@ -1153,30 +1160,18 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}' +
-                    '/keyspaces' +
-                    '/{{ keyspace_name }}' +
-                    '/tables' +
-                    '/{{ table_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/apis/cassandra/keyspaces/{{ keyspace_name }}/tables/{{ table_name }}',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name,
+                            keyspace_name=self.keyspace_name,
+                            table_name=self.table_name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            response = self.mgmt_client.query(url,
                                               'GET',
                                               self.query_parameters,
                                               self.header_parameters,
@@ -1184,9 +1179,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                               self.status_code,
                                               600,
                                               30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = project(json.loads(response.text), self.projection)
+            log_debug(self, 'Response : {0}', response)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
@@ -1195,30 +1192,18 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}' +
-                    '/databases' +
-                    '/{{ database_name }}' +
-                    '/graphs' +
-                    '/{{ graph_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/apis/gremlin/databases/{{ database_name }}/graphs/{{ graph_name }}',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name,
+                            database_name=self.database_name,
+                            graph_name=self.graph_name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            response = self.mgmt_client.query(url,
                                               'GET',
                                               self.query_parameters,
                                               self.header_parameters,
@@ -1226,9 +1211,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                               self.status_code,
                                               600,
                                               30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = project(json.loads(response.text), self.projection)
+            log_debug(self, 'Response : {0}', response)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
@@ -1237,30 +1224,17 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}' +
-                    '/tables' +
-                    '/{{ table_name }}' +
-                    '/settings' +
-                    '/{{ setting_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/apis/table/tables/{{ table_name }}/settings/throughput',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name,
+                            table_name=self.table_name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            response = self.mgmt_client.query(url,
                                               'GET',
                                               self.query_parameters,
                                               self.header_parameters,
@@ -1268,9 +1242,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                               self.status_code,
                                               600,
                                               30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = project(json.loads(response.text), self.projection)
+            log_debug(self, 'Response : {0}', response)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
@@ -1279,39 +1255,29 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}' +
-                    '/databases' +
-                    '/{{ database_name }}' +
-                    '/collections')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/apis/mongodb/databases/{{ database_name }}/collections',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name,
+                            database_name=self.database_name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            results['temp_item'] = self.mgmt_client.query_list(url,
+                                                               'GET',
+                                                               self.query_parameters,
+                                                               self.header_parameters,
+                                                               None,
+                                                               self.status_code,
+                                                               self.max_items,
+                                                               self.page_size,
+                                                               self.projection)
+            log_debug(self, 'Response : {0}', results['temp_item'])
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
@@ -1320,121 +1286,91 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}' +
-                    '/databases' +
-                    '/{{ database_name }}' +
-                    '/containers')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/apis/sql/databases/{{ database_name }}/containers',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name,
+                            database_name=self.database_name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            results['temp_item'] = self.mgmt_client.query_list(url,
+                                                               'GET',
+                                                               self.query_parameters,
+                                                               self.header_parameters,
+                                                               None,
+                                                               self.status_code,
+                                                               self.max_items,
+                                                               self.page_size,
+                                                               self.projection)
+            log_debug(self, 'Response : {0}', results['temp_item'])
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
 
-    def listgremlingraphs(self):
+    def listcassandratables(self):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}' +
-                    '/databases' +
-                    '/{{ database_name }}' +
-                    '/graphs')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/apis/cassandra/keyspaces/{{ keyspace_name }}/tables',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name,
+                            keyspace_name=self.keyspace_name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            results['temp_item'] = self.mgmt_client.query_list(url,
+                                                               'GET',
+                                                               self.query_parameters,
+                                                               self.header_parameters,
+                                                               None,
+                                                               self.status_code,
+                                                               self.max_items,
+                                                               self.page_size,
+                                                               self.projection)
+            log_debug(self, 'Response : {0}', results['temp_item'])
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
 
-    def listcassandratables(self):
+    def listgremlingraphs(self):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}' +
-                    '/keyspaces' +
-                    '/{{ keyspace_name }}' +
-                    '/tables')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/apis/gremlin/databases/{{ database_name }}/graphs',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name,
+                            database_name=self.database_name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            results['temp_item'] = self.mgmt_client.query_list(url,
+                                                               'GET',
+                                                               self.query_parameters,
+                                                               self.header_parameters,
+                                                               None,
+                                                               self.status_code,
+                                                               self.max_items,
+                                                               self.page_size,
+                                                               self.projection)
+            log_debug(self, 'Response : {0}', results['temp_item'])
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
@@ -1443,28 +1379,17 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}' +
-                    '/databases' +
-                    '/{{ database_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/apis/sql/databases/{{ database_name }}',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name,
+                            database_name=self.database_name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            response = self.mgmt_client.query(url,
                                               'GET',
                                               self.query_parameters,
                                               self.header_parameters,
@@ -1472,39 +1397,30 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                               self.status_code,
                                               600,
                                               30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = project(json.loads(response.text), self.projection)
+            log_debug(self, 'Response : {0}', response)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
 
-    def getcassandrakeyspace(self):
+    def getgremlindatabase(self):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}' +
-                    '/keyspaces' +
-                    '/{{ keyspace_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/apis/gremlin/databases/{{ database_name }}',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name,
+                            database_name=self.database_name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            response = self.mgmt_client.query(url,
                                               'GET',
                                               self.query_parameters,
                                               self.header_parameters,
@@ -1512,39 +1428,30 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                               self.status_code,
                                               600,
                                               30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = project(json.loads(response.text), self.projection)
+            log_debug(self, 'Response : {0}', response)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
 
-    def getmongodbdatabase(self):
+    def getcassandrakeyspace(self):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}' +
-                    '/databases' +
-                    '/{{ database_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/apis/cassandra/keyspaces/{{ keyspace_name }}',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name,
+                            keyspace_name=self.keyspace_name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            response = self.mgmt_client.query(url,
                                               'GET',
                                               self.query_parameters,
                                               self.header_parameters,
@@ -1552,39 +1459,30 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                               self.status_code,
                                               600,
                                               30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = project(json.loads(response.text), self.projection)
+            log_debug(self, 'Response : {0}', response)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
 
-    def getgremlindatabase(self):
+    def getmongodbdatabase(self):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}' +
-                    '/databases' +
-                    '/{{ database_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/apis/mongodb/databases/{{ database_name }}',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name,
+                            database_name=self.database_name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            response = self.mgmt_client.query(url,
                                               'GET',
                                               self.query_parameters,
                                               self.header_parameters,
@@ -1592,9 +1490,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                               self.status_code,
                                               600,
                                               30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = project(json.loads(response.text), self.projection)
+            log_debug(self, 'Response : {0}', response)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
@@ -1603,28 +1503,17 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}' +
-                    '/tables' +
-                    '/{{ table_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/apis/table/tables/{{ table_name }}',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name,
+                            table_name=self.table_name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            response = self.mgmt_client.query(url,
                                               'GET',
                                               self.query_parameters,
                                               self.header_parameters,
@@ -1632,165 +1521,131 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                               self.status_code,
                                               600,
                                               30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = project(json.loads(response.text), self.projection)
+            log_debug(self, 'Response : {0}', response)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
 
-    def listmongodbdatabases(self):
+    def listcassandrakeyspaces(self):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}' +
-                    '/databases')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/apis/cassandra/keyspaces',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            results['temp_item'] = self.mgmt_client.query_list(url,
+                                                               'GET',
+                                                               self.query_parameters,
+                                                               self.header_parameters,
+                                                               None,
+                                                               self.status_code,
+                                                               self.max_items,
+                                                               self.page_size,
+                                                               self.projection)
+            log_debug(self, 'Response : {0}', results['temp_item'])
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
 
-    def listsqldatabases(self):
+    def listgremlindatabases(self):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}' +
-                    '/databases')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/apis/gremlin/databases',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            results['temp_item'] = self.mgmt_client.query_list(url,
+                                                               'GET',
+                                                               self.query_parameters,
+                                                               self.header_parameters,
+                                                               None,
+                                                               self.status_code,
+                                                               self.max_items,
+                                                               self.page_size,
+                                                               self.projection)
+            log_debug(self, 'Response : {0}', results['temp_item'])
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
 
-    def listgremlindatabases(self):
+    def listsqldatabases(self):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}' +
-                    '/databases')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/apis/sql/databases',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            results['temp_item'] = self.mgmt_client.query_list(url,
+                                                               'GET',
+                                                               self.query_parameters,
+                                                               self.header_parameters,
+                                                               None,
+                                                               self.status_code,
+                                                               self.max_items,
+                                                               self.page_size,
+                                                               self.projection)
+            log_debug(self, 'Response : {0}', results['temp_item'])
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
 
-    def listcassandrakeyspaces(self):
+    def listmongodbdatabases(self):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}' +
-                    '/keyspaces')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/apis/mongodb/databases',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            results['temp_item'] = self.mgmt_client.query_list(url,
+                                                               'GET',
+                                                               self.query_parameters,
+                                                               self.header_parameters,
+                                                               None,
+                                                               self.status_code,
+                                                               self.max_items,
+                                                               self.page_size,
+                                                               self.projection)
+            log_debug(self, 'Response : {0}', results['temp_item'])
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
@@ -1799,37 +1654,28 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}' +
-                    '/tables')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/apis/table/tables',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            results['temp_item'] = self.mgmt_client.query_list(url,
+                                                               'GET',
+                                                               self.query_parameters,
+                                                               self.header_parameters,
+                                                               None,
+                                                               self.status_code,
+                                                               self.max_items,
+                                                               self.page_size,
+                                                               self.projection)
+            log_debug(self, 'Response : {0}', results['temp_item'])
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
@@ -1838,35 +1684,28 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/metricDefinitions')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/metricDefinitions',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            results['temp_item'] = self.mgmt_client.query_list(url,
+                                                               'GET',
+                                                               self.query_parameters,
+                                                               self.header_parameters,
+                                                               None,
+                                                               self.status_code,
+                                                               self.max_items,
+                                                               self.page_size,
+                                                               self.projection)
+            log_debug(self, 'Response : {0}', results['temp_item'])
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
@@ -1875,25 +1714,16 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/readonlykeys')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/readonlykeys',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            response = self.mgmt_client.query(url,
                                               'GET',
                                               self.query_parameters,
                                               self.header_parameters,
@@ -1901,9 +1731,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                               self.status_code,
                                               600,
                                               30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = project(json.loads(response.text), self.projection)
+            log_debug(self, 'Response : {0}', response)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
@@ -1912,35 +1744,28 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/metrics')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/metrics',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            results['temp_item'] = self.mgmt_client.query_list(url,
+                                                               'GET',
+                                                               self.query_parameters,
+                                                               self.header_parameters,
+                                                               None,
+                                                               self.status_code,
+                                                               self.max_items,
+                                                               self.page_size,
+                                                               self.projection)
+            log_debug(self, 'Response : {0}', results['temp_item'])
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
@@ -1949,35 +1774,28 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}' +
-                    '/usages')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}/usages',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            results['temp_item'] = self.mgmt_client.query_list(url,
+                                                               'GET',
+                                                               self.query_parameters,
+                                                               self.header_parameters,
+                                                               None,
+                                                               self.status_code,
+                                                               self.max_items,
+                                                               self.page_size,
+                                                               self.projection)
+            log_debug(self, 'Response : {0}', results['temp_item'])
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
@@ -1986,24 +1804,16 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts' +
-                    '/{{ database_account_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts/{{ database_account_name }}',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group,
+                            database_account_name=self.account_name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            response = self.mgmt_client.query(url,
                                               'GET',
                                               self.query_parameters,
                                               self.header_parameters,
@@ -2011,9 +1821,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                               self.status_code,
                                               600,
                                               30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = project(json.loads(response.text), self.projection)
+            log_debug(self, 'Response : {0}', response)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
@@ -2021,34 +1833,43 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
     def listbyresourcegroup(self):
         response = None
         results = {}
+        if self.backend == 'resource_graph':
+            try:
+                results['temp_item'] = self.mgmt_client.query_resource_graph('Microsoft.DocumentDB/databaseAccounts',
+                                                                             self.subscriptions or [self.subscription_id],
+                                                                             self.resource_group,
+                                                                             self.header_parameters,
+                                                                             self.max_items,
+                                                                             self.page_size,
+                                                                             self.projection)
+            except CloudError as e:
+                if self.in_scope:
+                    raise
+                self.log('Could not list resources using Resource Graph.')
+            return results
+
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.DocumentDB/databaseAccounts',
+                            subscription_id=self.subscription_id,
+                            resource_group=self.resource_group)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            results['temp_item'] = self.mgmt_client.query_list(url,
+                                                               'GET',
+                                                               self.query_parameters,
+                                                               self.header_parameters,
+                                                               None,
+                                                               self.status_code,
+                                                               self.max_items,
+                                                               self.page_size,
+                                                               self.projection)
+            log_debug(self, 'Response : {0}', results['temp_item'])
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
@@ -2056,41 +1877,53 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
     def list(self):
         response = None
         results = {}
+        if self.backend == 'resource_graph':
+            try:
+                results['temp_item'] = self.mgmt_client.query_resource_graph('Microsoft.DocumentDB/databaseAccounts',
+                                                                             self.subscriptions or [self.subscription_id],
+                                                                             None,
+                                                                             self.header_parameters,
+                                                                             self.max_items,
+                                                                             self.page_size,
+                                                                             self.projection)
+            except CloudError as e:
+                if self.in_scope:
+                    raise
+                self.log('Could not list resources using Resource Graph.')
+            return results
+
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/providers' +
-                    '/Microsoft.DocumentDB' +
-                    '/databaseAccounts')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ database_account_name }}', self.database_account_name)
-        self.url = self.url.replace('{{ api_name }}', self.api_name)
-        self.url = self.url.replace('{{ database_name }}', self.database_name)
-        self.url = self.url.replace('{{ collection_name }}', self.collection_name)
-        self.url = self.url.replace('{{ setting_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+        try:
+            url = build_url('/subscriptions/{{ subscription_id }}/providers/Microsoft.DocumentDB/databaseAccounts',
+                            subscription_id=self.subscription_id)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        try:
+            results['temp_item'] = self.mgmt_client.query_list(url,
+                                                               'GET',
+                                                               self.query_parameters,
+                                                               self.header_parameters,
+                                                               None,
+                                                               self.status_code,
+                                                               self.max_items,
+                                                               self.page_size,
+                                                               self.projection)
+            log_debug(self, 'Response : {0}', results['temp_item'])
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
 
-    def format_item(item):
+    def format_item(self, item):
         return item
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMDatabaseAccountsInfo()
 
 
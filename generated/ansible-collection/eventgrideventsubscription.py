@@ -119,6 +119,24 @@ options:
     description:
       - Type of the resource
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure.rm.operation_info) to track progress.
+    type: bool
+    default: true
+  polling_timeout:
+    description:
+      - Maximum time in seconds to wait for long running operation to complete.
+      - Status is polled as indicated by C(Azure-AsyncOperation), C(Location) and C(Retry-After) headers.
+    type: int
+    default: 600
+  state_snapshot:
+    description:
+      - Path of state snapshot exported by M(azure.rm.statesnapshot).
+      - In check mode current state of the instance is taken from the snapshot instead of Azure, if the snapshot covers it.
+      - Instances of resource types, subscriptions or resource groups not exported to the snapshot are read from Azure.
+    type: path
   state:
     description:
       - Assert the state of the EventSubscription.
@@ -451,13 +469,26 @@ properties:
       type: dict
       sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_compare import get_comparator, create_merge_patch
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+from ansible.module_utils.azure_rm_common_log import log_debug
+from ansible.module_utils.azure_rm_common_snapshot import get_snapshot_resource
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -466,78 +497,29 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "scope": {"type": "str", "updatable": false, "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "eventSubscriptionName", "required": true},
+    "destination": {"type": "dict", "disposition": "/properties/*"},
+    "filter": {"type": "dict", "disposition": "/properties/*", "options": {"subject_begins_with": {"type": "str", "disposition": "subjectBeginsWith"}, "subject_ends_with": {"type": "str", "disposition": "subjectEndsWith"}, "included_event_types": {"type": "list", "disposition": "includedEventTypes"}, "is_subject_case_sensitive": {"type": "boolean", "disposition": "isSubjectCaseSensitive"}}},
+    "labels": {"type": "list", "disposition": "/properties/*"},
+    "retry_policy": {"type": "dict", "disposition": "/properties/retryPolicy", "options": {"max_delivery_attempts": {"type": "number", "disposition": "maxDeliveryAttempts"}, "event_time_to_live_in_minutes": {"type": "number", "disposition": "eventTimeToLiveInMinutes"}}},
+    "dead_letter_destination": {"type": "dict", "disposition": "/properties/deadLetterDestination"},
+    "wait": {"type": "bool", "default": true},
+    "polling_timeout": {"type": "int", "default": 600},
+    "state_snapshot": {"type": "path"},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMEventSubscriptions(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            scope=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='eventSubscriptionName',
-                required=true
-            ),
-            destination=dict(
-                type='dict',
-                disposition='/properties/*'
-            ),
-            filter=dict(
-                type='dict',
-                disposition='/properties/*',
-                options=dict(
-                    subject_begins_with=dict(
-                        type='str',
-                        disposition='subjectBeginsWith'
-                    ),
-                    subject_ends_with=dict(
-                        type='str',
-                        disposition='subjectEndsWith'
-                    ),
-                    included_event_types=dict(
-                        type='list',
-                        disposition='includedEventTypes'
-                    ),
-                    is_subject_case_sensitive=dict(
-                        type='boolean',
-                        disposition='isSubjectCaseSensitive'
-                    )
-                )
-            ),
-            labels=dict(
-                type='list',
-                disposition='/properties/*'
-            ),
-            retry_policy=dict(
-                type='dict',
-                disposition='/properties/retryPolicy',
-                options=dict(
-                    max_delivery_attempts=dict(
-                        type='number',
-                        disposition='maxDeliveryAttempts'
-                    ),
-                    event_time_to_live_in_minutes=dict(
-                        type='number',
-                        disposition='eventTimeToLiveInMinutes'
-                    )
-                )
-            ),
-            dead_letter_destination=dict(
-                type='dict',
-                disposition='/properties/deadLetterDestination'
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.scope = None
         self.name = None
@@ -548,6 +530,9 @@ class AzureRMEventSubscriptions(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.state_snapshot = None
+        self.wait = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -569,12 +554,12 @@ class AzureRMEventSubscriptions(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
 
         self.url = ('/{scope}' +
@@ -585,7 +570,10 @@ class AzureRMEventSubscriptions(AzureRMModuleBaseExt):
         self.url = self.url.replace('{{ {scope}_name }}', self.{scope}_name)
         self.url = self.url.replace('{{ microsoft.event_grid_name }}', self.name)
 
-        old_response = self.get_resource()
+        if self.check_mode and self.state_snapshot:
+            old_response = get_snapshot_resource(self.state_snapshot, self.url, self.fail)
+        if old_response is None:
+            old_response = self.get_resource()
 
         if not old_response:
             self.log("EventSubscription instance doesn't exist")
@@ -600,12 +588,9 @@ class AzureRMEventSubscriptions(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                self.results['modifiers'] = modifiers
-                self.results['compare'] = []
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -616,6 +601,9 @@ class AzureRMEventSubscriptions(AzureRMModuleBaseExt):
                 return self.results
 
             response = self.create_update_resource()
+            if not self.wait:
+                self.results['id'] = self.url
+                response = None
 
             # if not old_response:
             self.results['changed'] = True
@@ -629,12 +617,13 @@ class AzureRMEventSubscriptions(AzureRMModuleBaseExt):
             if self.check_mode:
                 return self.results
 
-            self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
+            response = self.delete_resource()
+            if not self.wait:
+                self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                           'DELETE',
+                                                                           self.query_parameters,
+                                                                           response)
+            response = None
         else:
             self.log('EventSubscription instance unchanged')
             self.results['changed'] = False
@@ -652,18 +641,36 @@ class AzureRMEventSubscriptions(AzureRMModuleBaseExt):
         # self.log('Creating / Updating the EventSubscription instance {0}'.format(self.))
 
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'PUT',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              self.body,
-                                              self.status_code,
-                                              600,
-                                              30)
+            if self.to_do == Actions.Create:
+                response = self.mgmt_client.query(self.url,
+                                                  'PUT',
+                                                  self.query_parameters,
+                                                  self.header_parameters,
+                                                  self.body,
+                                                  self.status_code,
+                                                  self.polling_timeout if self.wait else 0,
+                                                  30)
+            else:
+                header_parameters = dict(self.header_parameters)
+                header_parameters['If-Match'] = '*'
+                response = self.mgmt_client.query(self.url,
+                                                  'PATCH',
+                                                  self.query_parameters,
+                                                  header_parameters,
+                                                  create_merge_patch(self.body, self.results['compare']),
+                                                  self.status_code,
+                                                  self.polling_timeout if self.wait else 0,
+                                                  30)
         except CloudError as exc:
             self.log('Error attempting to create the EventSubscription instance.')
             self.fail('Error creating the EventSubscription instance: {0}'.format(str(exc)))
 
+        if not self.wait:
+            self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                       'PUT' if self.to_do == Actions.Create else 'PATCH',
+                                                                       self.query_parameters,
+                                                                       response)
+
         try:
             response = json.loads(response.text)
         except Exception:
@@ -681,13 +688,20 @@ class AzureRMEventSubscriptions(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              0,
                                               30)
+            if self.wait:
+                self.mgmt_client.wait_for_deletion(self.url,
+                                                   self.query_parameters,
+                                                   self.header_parameters,
+                                                   response,
+                                                   self.polling_timeout,
+                                                   30)
         except CloudError as e:
             self.log('Error attempting to delete the EventSubscription instance.')
             self.fail('Error deleting the EventSubscription instance: {0}'.format(str(e)))
 
-        return True
+        return response
 
     def get_resource(self):
         # self.log('Checking if the EventSubscription instance {0} is present'.format(self.))
@@ -699,10 +713,11 @@ class AzureRMEventSubscriptions(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout,
                                               30)
+            response = json.loads(response.text)
             found = True
-            self.log("Response : {0}".format(response))
+            log_debug(self, 'Response : {0}', response)
             # self.log("EventSubscription instance : {0} found".format(response.name))
         except CloudError as e:
             self.log('Did not find the EventSubscription instance.')
@@ -713,6 +728,8 @@ class AzureRMEventSubscriptions(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMEventSubscriptions()
 
 
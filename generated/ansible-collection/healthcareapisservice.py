@@ -99,6 +99,24 @@ options:
     description:
       - The resource type.
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure.rm.operation_info) to track progress.
+    type: bool
+    default: true
+  polling_timeout:
+    description:
+      - Maximum time in seconds to wait for long running operation to complete.
+      - Status is polled as indicated by C(Azure-AsyncOperation), C(Location) and C(Retry-After) headers.
+    type: int
+    default: 1800
+  state_snapshot:
+    description:
+      - Path of state snapshot exported by M(azure.rm.statesnapshot).
+      - In check mode current state of the instance is taken from the snapshot instead of Azure, if the snapshot covers it.
+      - Instances of resource types, subscriptions or resource groups not exported to the snapshot are read from Azure.
+    type: path
   state:
     description:
       - Assert the state of the Service.
@@ -311,13 +329,27 @@ properties:
           type: boolean
           sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_compare import get_comparator, create_merge_patch
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+from ansible.module_utils.azure_rm_common_log import log_debug
+from ansible.module_utils.azure_rm_common_snapshot import get_snapshot_resource
+from ansible.module_utils.azure_rm_common_url import build_url
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -326,92 +358,37 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resourceGroupName", "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "resourceName", "required": true},
+    "kind": {"type": "str", "updatable": false, "disposition": "/", "choices": ["fhir", "fhir-Stu3", "fhir-R4"], "required": true},
+    "location": {"type": "str", "updatable": false, "disposition": "/", "required": true},
+    "etag": {"type": "str", "updatable": false, "disposition": "/"},
+    "access_policies_object_id": {"type": "str", "disposition": "/properties/accessPolicies/objectId", "required": true},
+    "cosmos_db_offer_throughput": {"type": "number", "disposition": "/properties/cosmosDbConfiguration/offerThroughput"},
+    "authentication_authority": {"type": "str", "disposition": "/properties/authenticationConfiguration/authority"},
+    "authentication_audience": {"type": "str", "disposition": "/properties/authenticationConfiguration/audience"},
+    "authentication_smart_proxy_enabled": {"type": "boolean", "disposition": "/properties/authenticationConfiguration/smartProxyEnabled"},
+    "cors_origins": {"type": "list", "disposition": "/properties/corsConfiguration/origins"},
+    "cors_headers": {"type": "list", "disposition": "/properties/corsConfiguration/headers"},
+    "cors_methods": {"type": "list", "disposition": "/properties/corsConfiguration/methods"},
+    "cors_max_age": {"type": "number", "disposition": "/properties/corsConfiguration/maxAge"},
+    "cors_allow_credentials": {"type": "boolean", "disposition": "/properties/corsConfiguration/allowCredentials"},
+    "wait": {"type": "bool", "default": true},
+    "polling_timeout": {"type": "int", "default": 1800},
+    "state_snapshot": {"type": "path"},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMServices(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resourceGroupName',
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='resourceName',
-                required=true
-            ),
-            kind=dict(
-                type='str',
-                updatable=False,
-                disposition='/',
-                choices=['fhir',
-                         'fhir-Stu3',
-                         'fhir-R4'],
-                required=true
-            ),
-            location=dict(
-                type='str',
-                updatable=False,
-                disposition='/',
-                required=true
-            ),
-            etag=dict(
-                type='str',
-                updatable=False,
-                disposition='/'
-            ),
-            access_policies_object_id=dict(
-                type='str',
-                disposition='/properties/accessPolicies/objectId',
-                required=true
-            ),
-            cosmos_db_offer_throughput=dict(
-                type='number',
-                disposition='/properties/cosmosDbConfiguration/offerThroughput'
-            ),
-            authentication_authority=dict(
-                type='str',
-                disposition='/properties/authenticationConfiguration/authority'
-            ),
-            authentication_audience=dict(
-                type='str',
-                disposition='/properties/authenticationConfiguration/audience'
-            ),
-            authentication_smart_proxy_enabled=dict(
-                type='boolean',
-                disposition='/properties/authenticationConfiguration/smartProxyEnabled'
-            ),
-            cors_origins=dict(
-                type='list',
-                disposition='/properties/corsConfiguration/origins'
-            ),
-            cors_headers=dict(
-                type='list',
-                disposition='/properties/corsConfiguration/headers'
-            ),
-            cors_methods=dict(
-                type='list',
-                disposition='/properties/corsConfiguration/methods'
-            ),
-            cors_max_age=dict(
-                type='number',
-                disposition='/properties/corsConfiguration/maxAge'
-            ),
-            cors_allow_credentials=dict(
-                type='boolean',
-                disposition='/properties/corsConfiguration/allowCredentials'
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.name = None
@@ -422,6 +399,9 @@ class AzureRMServices(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.state_snapshot = None
+        self.wait = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -443,12 +423,12 @@ class AzureRMServices(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
 
         resource_group = self.get_resource_group(self.resource_group)
@@ -456,19 +436,18 @@ class AzureRMServices(AzureRMModuleBaseExt):
         if 'location' not in self.body:
             self.body['location'] = resource_group.location
 
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.HealthcareApis' +
-                    '/services' +
-                    '/{{ service_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ service_name }}', self.name)
-
-        old_response = self.get_resource()
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.HealthcareApis/services/{{ service_name }}',
+                                 subscription_id=self.subscription_id,
+                                 resource_group=self.resource_group,
+                                 service_name=self.name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        if self.check_mode and self.state_snapshot:
+            old_response = get_snapshot_resource(self.state_snapshot, self.url, self.fail)
+        if old_response is None:
+            old_response = self.get_resource()
 
         if not old_response:
             self.log("Service instance doesn't exist")
@@ -483,12 +462,9 @@ class AzureRMServices(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                self.results['modifiers'] = modifiers
-                self.results['compare'] = []
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -499,6 +475,9 @@ class AzureRMServices(AzureRMModuleBaseExt):
                 return self.results
 
             response = self.create_update_resource()
+            if not self.wait:
+                self.results['id'] = self.url
+                response = None
 
             # if not old_response:
             self.results['changed'] = True
@@ -512,12 +491,13 @@ class AzureRMServices(AzureRMModuleBaseExt):
             if self.check_mode:
                 return self.results
 
-            self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
+            response = self.delete_resource()
+            if not self.wait:
+                self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                           'DELETE',
+                                                                           self.query_parameters,
+                                                                           response)
+            response = None
         else:
             self.log('Service instance unchanged')
             self.results['changed'] = False
@@ -530,7 +510,7 @@ class AzureRMServices(AzureRMModuleBaseExt):
            self.results["kind"] = response["kind"]
            self.results["location"] = response["location"]
            self.results["tags"] = response["tags"]
-           self.results["etag"] = response["etag"]
+           self.results["etag"] = response.get("etag")
            self.results["properties"] = response["properties"]
 
         return self.results
@@ -539,18 +519,36 @@ class AzureRMServices(AzureRMModuleBaseExt):
         # self.log('Creating / Updating the Service instance {0}'.format(self.))
 
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'PUT',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              self.body,
-                                              self.status_code,
-                                              600,
-                                              30)
+            if self.to_do == Actions.Create:
+                response = self.mgmt_client.query(self.url,
+                                                  'PUT',
+                                                  self.query_parameters,
+                                                  self.header_parameters,
+                                                  self.body,
+                                                  self.status_code,
+                                                  self.polling_timeout if self.wait else 0,
+                                                  30)
+            else:
+                header_parameters = dict(self.header_parameters)
+                header_parameters['If-Match'] = '*'
+                response = self.mgmt_client.query(self.url,
+                                                  'PATCH',
+                                                  self.query_parameters,
+                                                  header_parameters,
+                                                  create_merge_patch(self.body, self.results['compare']),
+                                                  self.status_code,
+                                                  self.polling_timeout if self.wait else 0,
+                                                  30)
         except CloudError as exc:
             self.log('Error attempting to create the Service instance.')
             self.fail('Error creating the Service instance: {0}'.format(str(exc)))
 
+        if not self.wait:
+            self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                       'PUT' if self.to_do == Actions.Create else 'PATCH',
+                                                                       self.query_parameters,
+                                                                       response)
+
         try:
             response = json.loads(response.text)
         except Exception:
@@ -568,13 +566,20 @@ class AzureRMServices(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              0,
                                               30)
+            if self.wait:
+                self.mgmt_client.wait_for_deletion(self.url,
+                                                   self.query_parameters,
+                                                   self.header_parameters,
+                                                   response,
+                                                   self.polling_timeout,
+                                                   30)
         except CloudError as e:
             self.log('Error attempting to delete the Service instance.')
             self.fail('Error deleting the Service instance: {0}'.format(str(e)))
 
-        return True
+        return response
 
     def get_resource(self):
         # self.log('Checking if the Service instance {0} is present'.format(self.))
@@ -586,10 +591,11 @@ class AzureRMServices(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout,
                                               30)
+            response = json.loads(response.text)
             found = True
-            self.log("Response : {0}".format(response))
+            log_debug(self, 'Response : {0}', response)
             # self.log("Service instance : {0} found".format(response.name))
         except CloudError as e:
             self.log('Did not find the Service instance.')
@@ -600,6 +606,8 @@ class AzureRMServices(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMServices()
 
 
@@ -138,6 +138,24 @@ options:
     description:
       - Resource type
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure.rm.operation_info) to track progress.
+    type: bool
+    default: true
+  polling_timeout:
+    description:
+      - Maximum time in seconds to wait for long running operation to complete.
+      - Status is polled as indicated by C(Azure-AsyncOperation), C(Location) and C(Retry-After) headers.
+    type: int
+    default: 600
+  state_snapshot:
+    description:
+      - Path of state snapshot exported by M(azure.rm.statesnapshot).
+      - In check mode current state of the instance is taken from the snapshot instead of Azure, if the snapshot covers it.
+      - Instances of resource types, subscriptions or resource groups not exported to the snapshot are read from Azure.
+    type: path
   state:
     description:
       - Assert the state of the Rule.
@@ -355,13 +373,27 @@ properties:
           type: boolean
           sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+from ansible.module_utils.azure_rm_common_log import log_debug
+from ansible.module_utils.azure_rm_common_snapshot import get_snapshot_resource
+from ansible.module_utils.azure_rm_common_url import build_url
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -370,127 +402,31 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resourceGroupName", "required": true},
+    "namespace_name": {"type": "str", "updatable": false, "disposition": "namespaceName", "required": true},
+    "topic_name": {"type": "str", "updatable": false, "disposition": "topicName", "required": true},
+    "subscription_name": {"type": "str", "updatable": false, "disposition": "subscriptionName", "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "ruleName", "required": true},
+    "action": {"type": "dict", "disposition": "/properties/*", "options": {"sql_expression": {"type": "str", "disposition": "sqlExpression"}, "compatibility_level": {"type": "number", "disposition": "compatibilityLevel"}, "requires_preprocessing": {"type": "boolean", "disposition": "requiresPreprocessing"}}},
+    "filter_type": {"type": "str", "disposition": "/properties/filterType", "choices": ["SqlFilter", "CorrelationFilter"]},
+    "sql_filter": {"type": "dict", "disposition": "/properties/sqlFilter", "options": {"sql_expression": {"type": "str", "disposition": "sqlExpression"}, "requires_preprocessing": {"type": "boolean", "disposition": "requiresPreprocessing"}}},
+    "correlation_filter": {"type": "dict", "disposition": "/properties/correlationFilter", "options": {"correlation_id": {"type": "str", "disposition": "correlationId"}, "message_id": {"type": "str", "disposition": "messageId"}, "to": {"type": "str"}, "reply_to": {"type": "str", "disposition": "replyTo"}, "label": {"type": "str"}, "session_id": {"type": "str", "disposition": "sessionId"}, "reply_to_session_id": {"type": "str", "disposition": "replyToSessionId"}, "content_type": {"type": "str", "disposition": "contentType"}, "requires_preprocessing": {"type": "boolean", "disposition": "requiresPreprocessing"}}},
+    "wait": {"type": "bool", "default": true},
+    "polling_timeout": {"type": "int", "default": 600},
+    "state_snapshot": {"type": "path"},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMRules(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resourceGroupName',
-                required=true
-            ),
-            namespace_name=dict(
-                type='str',
-                updatable=False,
-                disposition='namespaceName',
-                required=true
-            ),
-            topic_name=dict(
-                type='str',
-                updatable=False,
-                disposition='topicName',
-                required=true
-            ),
-            subscription_name=dict(
-                type='str',
-                updatable=False,
-                disposition='subscriptionName',
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='ruleName',
-                required=true
-            ),
-            action=dict(
-                type='dict',
-                disposition='/properties/*',
-                options=dict(
-                    sql_expression=dict(
-                        type='str',
-                        disposition='sqlExpression'
-                    ),
-                    compatibility_level=dict(
-                        type='number',
-                        disposition='compatibilityLevel'
-                    ),
-                    requires_preprocessing=dict(
-                        type='boolean',
-                        disposition='requiresPreprocessing'
-                    )
-                )
-            ),
-            filter_type=dict(
-                type='str',
-                disposition='/properties/filterType',
-                choices=['SqlFilter',
-                         'CorrelationFilter']
-            ),
-            sql_filter=dict(
-                type='dict',
-                disposition='/properties/sqlFilter',
-                options=dict(
-                    sql_expression=dict(
-                        type='str',
-                        disposition='sqlExpression'
-                    ),
-                    requires_preprocessing=dict(
-                        type='boolean',
-                        disposition='requiresPreprocessing'
-                    )
-                )
-            ),
-            correlation_filter=dict(
-                type='dict',
-                disposition='/properties/correlationFilter',
-                options=dict(
-                    correlation_id=dict(
-                        type='str',
-                        disposition='correlationId'
-                    ),
-                    message_id=dict(
-                        type='str',
-                        disposition='messageId'
-                    ),
-                    to=dict(
-                        type='str'
-                    ),
-                    reply_to=dict(
-                        type='str',
-                        disposition='replyTo'
-                    ),
-                    label=dict(
-                        type='str'
-                    ),
-                    session_id=dict(
-                        type='str',
-                        disposition='sessionId'
-                    ),
-                    reply_to_session_id=dict(
-                        type='str',
-                        disposition='replyToSessionId'
-                    ),
-                    content_type=dict(
-                        type='str',
-                        disposition='contentType'
-                    ),
-                    requires_preprocessing=dict(
-                        type='boolean',
-                        disposition='requiresPreprocessing'
-                    )
-                )
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.namespace_name = None
@@ -504,6 +440,9 @@ class AzureRMRules(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.state_snapshot = None
+        self.wait = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -525,38 +464,31 @@ class AzureRMRules(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
 
         resource_group = self.get_resource_group(self.resource_group)
 
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.ServiceBus' +
-                    '/namespaces' +
-                    '/{{ namespace_name }}' +
-                    '/topics' +
-                    '/{{ topic_name }}' +
-                    '/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/rules' +
-                    '/{{ rule_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ namespace_name }}', self.namespace_name)
-        self.url = self.url.replace('{{ topic_name }}', self.topic_name)
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ rule_name }}', self.name)
-
-        old_response = self.get_resource()
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.ServiceBus/namespaces/{{ namespace_name }}/topics/{{ topic_name }}/subscriptions/{{ subscription_name }}/rules/{{ rule_name }}',
+                                 subscription_id=self.subscription_id,
+                                 resource_group=self.resource_group,
+                                 namespace_name=self.namespace_name,
+                                 topic_name=self.topic_name,
+                                 subscription_name=self.subscription_name,
+                                 rule_name=self.name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        if self.check_mode and self.state_snapshot:
+            old_response = get_snapshot_resource(self.state_snapshot, self.url, self.fail)
+        if old_response is None:
+            old_response = self.get_resource()
 
         if not old_response:
             self.log("Rule instance doesn't exist")
@@ -571,12 +503,9 @@ class AzureRMRules(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                self.results['modifiers'] = modifiers
-                self.results['compare'] = []
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -587,6 +516,9 @@ class AzureRMRules(AzureRMModuleBaseExt):
                 return self.results
 
             response = self.create_update_resource()
+            if not self.wait:
+                self.results['id'] = self.url
+                response = None
 
             # if not old_response:
             self.results['changed'] = True
@@ -600,12 +532,13 @@ class AzureRMRules(AzureRMModuleBaseExt):
             if self.check_mode:
                 return self.results
 
-            self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
+            response = self.delete_resource()
+            if not self.wait:
+                self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                           'DELETE',
+                                                                           self.query_parameters,
+                                                                           response)
+            response = None
         else:
             self.log('Rule instance unchanged')
             self.results['changed'] = False
@@ -629,12 +562,18 @@ class AzureRMRules(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               self.body,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout if self.wait else 0,
                                               30)
         except CloudError as exc:
             self.log('Error attempting to create the Rule instance.')
             self.fail('Error creating the Rule instance: {0}'.format(str(exc)))
 
+        if not self.wait:
+            self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                       'PUT',
+                                                                       self.query_parameters,
+                                                                       response)
+
         try:
             response = json.loads(response.text)
         except Exception:
@@ -652,13 +591,20 @@ class AzureRMRules(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              0,
                                               30)
+            if self.wait:
+                self.mgmt_client.wait_for_deletion(self.url,
+                                                   self.query_parameters,
+                                                   self.header_parameters,
+                                                   response,
+                                                   self.polling_timeout,
+                                                   30)
         except CloudError as e:
             self.log('Error attempting to delete the Rule instance.')
             self.fail('Error deleting the Rule instance: {0}'.format(str(e)))
 
-        return True
+        return response
 
     def get_resource(self):
         # self.log('Checking if the Rule instance {0} is present'.format(self.))
@@ -670,10 +616,11 @@ class AzureRMRules(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout,
                                               30)
+            response = json.loads(response.text)
             found = True
-            self.log("Response : {0}".format(response))
+            log_debug(self, 'Response : {0}', response)
             # self.log("Rule instance : {0} found".format(response.name))
         except CloudError as e:
             self.log('Did not find the Rule instance.')
@@ -684,6 +631,8 @@ class AzureRMRules(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMRules()
 
 
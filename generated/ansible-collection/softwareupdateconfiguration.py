@@ -320,6 +320,24 @@ options:
     description:
       - Resource type
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure.rm.operation_info) to track progress.
+    type: bool
+    default: true
+  polling_timeout:
+    description:
+      - Maximum time in seconds to wait for long running operation to complete.
+      - Status is polled as indicated by C(Azure-AsyncOperation), C(Location) and C(Retry-After) headers.
+    type: int
+    default: 600
+  state_snapshot:
+    description:
+      - Path of state snapshot exported by M(azure.rm.statesnapshot).
+      - In check mode current state of the instance is taken from the snapshot instead of Azure, if the snapshot covers it.
+      - Instances of resource types, subscriptions or resource groups not exported to the snapshot are read from Azure.
+    type: path
   state:
     description:
       - Assert the state of the SoftwareUpdateConfiguration.
@@ -826,13 +844,27 @@ properties:
               type: str
               sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+from ansible.module_utils.azure_rm_common_log import log_debug
+from ansible.module_utils.azure_rm_common_snapshot import get_snapshot_resource
+from ansible.module_utils.azure_rm_common_url import build_url
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -841,295 +873,30 @@ except ImportError:
     pass
 
 
+ARG_SPEC = r'''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resourceGroupName", "required": true},
+    "automation_account_name": {"type": "str", "updatable": false, "disposition": "automationAccountName", "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "softwareUpdateConfigurationName", "required": true},
+    "client_request_id": {"type": "str", "updatable": false, "disposition": "clientRequestId"},
+    "update_configuration": {"type": "dict", "disposition": "/properties/updateConfiguration", "required": true, "options": {"operating_system": {"type": "str", "disposition": "operatingSystem", "choices": ["Windows", "Linux"], "required": true}, "windows": {"type": "dict", "options": {"included_update_classifications": {"type": "str", "disposition": "includedUpdateClassifications", "choices": ["Unclassified", "Critical", "Security", "UpdateRollup", "FeaturePack", "ServicePack", "Definition", "Tools", "Updates"]}, "excluded_kb_numbers": {"type": "list", "disposition": "excludedKbNumbers"}, "included_kb_numbers": {"type": "list", "disposition": "includedKbNumbers"}, "reboot_setting": {"type": "str", "disposition": "rebootSetting"}}}, "linux": {"type": "dict", "options": {"included_package_classifications": {"type": "str", "disposition": "includedPackageClassifications", "choices": ["Unclassified", "Critical", "Security", "Other"]}, "excluded_package_name_masks": {"type": "list", "disposition": "excludedPackageNameMasks"}, "included_package_name_masks": {"type": "list", "disposition": "includedPackageNameMasks"}, "reboot_setting": {"type": "str", "disposition": "rebootSetting"}}}, "duration": {"type": "unknown-primary[timeSpan]"}, "azure_virtual_machines": {"type": "raw", "disposition": "azureVirtualMachines", "pattern": "//subscriptions/5ae68d89-69a4-454f-b5ce-e443cc4e0067/resourceGroups/myresources/providers/Microsoft.Compute/virtualMachines/vm-03"}, "non_azure_computer_names": {"type": "list", "disposition": "nonAzureComputerNames"}, "targets": {"type": "dict", "options": {"azure_queries": {"type": "list", "disposition": "azureQueries", "options": {"scope": {"type": "raw", "pattern": "//subscriptions/5ae68d89-69a4-454f-b5ce-e443cc4e0067"}, "locations": {"type": "list"}, "tag_settings": {"type": "dict", "disposition": "tagSettings"}}}, "non_azure_queries": {"type": "list", "disposition": "nonAzureQueries", "options": {"function_alias": {"type": "str", "disposition": "functionAlias"}, "workspace_id": {"type": "str", "disposition": "workspaceId"}}}}}}},
+    "schedule_info": {"type": "dict", "disposition": "/properties/scheduleInfo", "required": true, "options": {"start_time": {"type": "datetime", "disposition": "startTime"}, "expiry_time": {"type": "datetime", "disposition": "expiryTime"}, "expiry_time_offset_minutes": {"type": "number", "disposition": "expiryTimeOffsetMinutes"}, "is_enabled": {"type": "boolean", "disposition": "isEnabled"}, "next_run": {"type": "datetime", "disposition": "nextRun"}, "next_run_offset_minutes": {"type": "number", "disposition": "nextRunOffsetMinutes"}, "interval": {"type": "number"}, "frequency": {"type": "str", "choices": ["OneTime", "Day", "Hour", "Week", "Month", "Minute"]}, "time_zone": {"type": "str", "disposition": "timeZone"}, "advanced_schedule": {"type": "dict", "disposition": "advancedSchedule", "options": {"week_days": {"type": "list", "disposition": "weekDays"}, "month_days": {"type": "list", "disposition": "monthDays"}, "monthly_occurrences": {"type": "list", "disposition": "monthlyOccurrences", "options": {"occurrence": {"type": "number"}, "day": {"type": "str", "choices": ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]}}}}}, "creation_time": {"type": "datetime", "disposition": "creationTime"}, "last_modified_time": {"type": "datetime", "disposition": "lastModifiedTime"}, "description": {"type": "str"}}},
+    "error": {"type": "dict", "disposition": "/properties/*", "options": {"code": {"type": "str"}, "message": {"type": "str"}}},
+    "tasks": {"type": "dict", "disposition": "/properties/*", "options": {"pre_task": {"type": "dict", "disposition": "preTask", "options": {"parameters": {"type": "unknown[DictionaryType {\"$id\":\"355\",\"$type\":\"DictionaryType\",\"valueType\":{\"$id\":\"356\",\"$type\":\"PrimaryType\",\"knownPrimaryType\":\"string\",\"name\":{\"$id\":\"357\",\"fixed\":false,\"raw\":\"String\"},\"deprecated\":false},\"supportsAdditionalProperties\":false,\"name\":{\"$id\":\"358\",\"fixed\":false},\"deprecated\":false}]"}, "source": {"type": "str"}}}, "post_task": {"type": "dict", "disposition": "postTask", "options": {"parameters": {"type": "unknown[DictionaryType {\"$id\":\"355\",\"$type\":\"DictionaryType\",\"valueType\":{\"$id\":\"356\",\"$type\":\"PrimaryType\",\"knownPrimaryType\":\"string\",\"name\":{\"$id\":\"357\",\"fixed\":false,\"raw\":\"String\"},\"deprecated\":false},\"supportsAdditionalProperties\":false,\"name\":{\"$id\":\"358\",\"fixed\":false},\"deprecated\":false}]"}, "source": {"type": "str"}}}}},
+    "wait": {"type": "bool", "default": true},
+    "polling_timeout": {"type": "int", "default": 600},
+    "state_snapshot": {"type": "path"},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMSoftwareUpdateConfigurations(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resourceGroupName',
-                required=true
-            ),
-            automation_account_name=dict(
-                type='str',
-                updatable=False,
-                disposition='automationAccountName',
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='softwareUpdateConfigurationName',
-                required=true
-            ),
-            client_request_id=dict(
-                type='str',
-                updatable=False,
-                disposition='clientRequestId'
-            ),
-            update_configuration=dict(
-                type='dict',
-                disposition='/properties/updateConfiguration',
-                required=true,
-                options=dict(
-                    operating_system=dict(
-                        type='str',
-                        disposition='operatingSystem',
-                        choices=['Windows',
-                                 'Linux'],
-                        required=true
-                    ),
-                    windows=dict(
-                        type='dict',
-                        options=dict(
-                            included_update_classifications=dict(
-                                type='str',
-                                disposition='includedUpdateClassifications',
-                                choices=['Unclassified',
-                                         'Critical',
-                                         'Security',
-                                         'UpdateRollup',
-                                         'FeaturePack',
-                                         'ServicePack',
-                                         'Definition',
-                                         'Tools',
-                                         'Updates']
-                            ),
-                            excluded_kb_numbers=dict(
-                                type='list',
-                                disposition='excludedKbNumbers'
-                            ),
-                            included_kb_numbers=dict(
-                                type='list',
-                                disposition='includedKbNumbers'
-                            ),
-                            reboot_setting=dict(
-                                type='str',
-                                disposition='rebootSetting'
-                            )
-                        )
-                    ),
-                    linux=dict(
-                        type='dict',
-                        options=dict(
-                            included_package_classifications=dict(
-                                type='str',
-                                disposition='includedPackageClassifications',
-                                choices=['Unclassified',
-                                         'Critical',
-                                         'Security',
-                                         'Other']
-                            ),
-                            excluded_package_name_masks=dict(
-                                type='list',
-                                disposition='excludedPackageNameMasks'
-                            ),
-                            included_package_name_masks=dict(
-                                type='list',
-                                disposition='includedPackageNameMasks'
-                            ),
-                            reboot_setting=dict(
-                                type='str',
-                                disposition='rebootSetting'
-                            )
-                        )
-                    ),
-                    duration=dict(
-                        type='unknown-primary[timeSpan]'
-                    ),
-                    azure_virtual_machines=dict(
-                        type='raw',
-                        disposition='azureVirtualMachines',
-                        pattern=('//subscriptions/5ae68d89-69a4-454f-b5ce-e443cc4e0067'
-                                 '/resourceGroups/myresources/providers/Microsoft.Compute'
-                                 '/virtualMachines/vm-03')
-                    ),
-                    non_azure_computer_names=dict(
-                        type='list',
-                        disposition='nonAzureComputerNames'
-                    ),
-                    targets=dict(
-                        type='dict',
-                        options=dict(
-                            azure_queries=dict(
-                                type='list',
-                                disposition='azureQueries',
-                                options=dict(
-                                    scope=dict(
-                                        type='raw',
-                                        pattern=('//subscriptions'
-                                                 '/5ae68d89-69a4-454f-b5ce-e443cc4e0067')
-                                    ),
-                                    locations=dict(
-                                        type='list'
-                                    ),
-                                    tag_settings=dict(
-                                        type='dict',
-                                        disposition='tagSettings'
-                                    )
-                                )
-                            ),
-                            non_azure_queries=dict(
-                                type='list',
-                                disposition='nonAzureQueries',
-                                options=dict(
-                                    function_alias=dict(
-                                        type='str',
-                                        disposition='functionAlias'
-                                    ),
-                                    workspace_id=dict(
-                                        type='str',
-                                        disposition='workspaceId'
-                                    )
-                                )
-                            )
-                        )
-                    )
-                )
-            ),
-            schedule_info=dict(
-                type='dict',
-                disposition='/properties/scheduleInfo',
-                required=true,
-                options=dict(
-                    start_time=dict(
-                        type='datetime',
-                        disposition='startTime'
-                    ),
-                    expiry_time=dict(
-                        type='datetime',
-                        disposition='expiryTime'
-                    ),
-                    expiry_time_offset_minutes=dict(
-                        type='number',
-                        disposition='expiryTimeOffsetMinutes'
-                    ),
-                    is_enabled=dict(
-                        type='boolean',
-                        disposition='isEnabled'
-                    ),
-                    next_run=dict(
-                        type='datetime',
-                        disposition='nextRun'
-                    ),
-                    next_run_offset_minutes=dict(
-                        type='number',
-                        disposition='nextRunOffsetMinutes'
-                    ),
-                    interval=dict(
-                        type='number'
-                    ),
-                    frequency=dict(
-                        type='str',
-                        choices=['OneTime',
-                                 'Day',
-                                 'Hour',
-                                 'Week',
-                                 'Month',
-                                 'Minute']
-                    ),
-                    time_zone=dict(
-                        type='str',
-                        disposition='timeZone'
-                    ),
-                    advanced_schedule=dict(
-                        type='dict',
-                        disposition='advancedSchedule',
-                        options=dict(
-                            week_days=dict(
-                                type='list',
-                                disposition='weekDays'
-                            ),
-                            month_days=dict(
-                                type='list',
-                                disposition='monthDays'
-                            ),
-                            monthly_occurrences=dict(
-                                type='list',
-                                disposition='monthlyOccurrences',
-                                options=dict(
-                                    occurrence=dict(
-                                        type='number'
-                                    ),
-                                    day=dict(
-                                        type='str',
-                                        choices=['Monday',
-                                                 'Tuesday',
-                                                 'Wednesday',
-                                                 'Thursday',
-                                                 'Friday',
-                                                 'Saturday',
-                                                 'Sunday']
-                                    )
-                                )
-                            )
-                        )
-                    ),
-                    creation_time=dict(
-                        type='datetime',
-                        disposition='creationTime'
-                    ),
-                    last_modified_time=dict(
-                        type='datetime',
-                        disposition='lastModifiedTime'
-                    ),
-                    description=dict(
-                        type='str'
-                    )
-                )
-            ),
-            error=dict(
-                type='dict',
-                disposition='/properties/*',
-                options=dict(
-                    code=dict(
-                        type='str'
-                    ),
-                    message=dict(
-                        type='str'
-                    )
-                )
-            ),
-            tasks=dict(
-                type='dict',
-                disposition='/properties/*',
-                options=dict(
-                    pre_task=dict(
-                        type='dict',
-                        disposition='preTask',
-                        options=dict(
-                            parameters=dict(
-                                type='unknown[DictionaryType {"$id":"355","$type":"DictionaryType","valueType":{"$id":"356","$type":"PrimaryType","knownPrimaryType":"string","name":{"$id":"357","fixed":false,"raw":"String"},"deprecated":false},"supportsAdditionalProperties":false,"name":{"$id":"358","fixed":false},"deprecated":false}]'
-                            ),
-                            source=dict(
-                                type='str'
-                            )
-                        )
-                    ),
-                    post_task=dict(
-                        type='dict',
-                        disposition='postTask',
-                        options=dict(
-                            parameters=dict(
-                                type='unknown[DictionaryType {"$id":"355","$type":"DictionaryType","valueType":{"$id":"356","$type":"PrimaryType","knownPrimaryType":"string","name":{"$id":"357","fixed":false,"raw":"String"},"deprecated":false},"supportsAdditionalProperties":false,"name":{"$id":"358","fixed":false},"deprecated":false}]'
-                            ),
-                            source=dict(
-                                type='str'
-                            )
-                        )
-                    )
-                )
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.automation_account_name = None
@@ -1142,6 +909,9 @@ class AzureRMSoftwareUpdateConfigurations(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.state_snapshot = None
+        self.wait = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -1163,32 +933,29 @@ class AzureRMSoftwareUpdateConfigurations(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
 
         resource_group = self.get_resource_group(self.resource_group)
 
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.Automation' +
-                    '/automationAccounts' +
-                    '/{{ automation_account_name }}' +
-                    '/softwareUpdateConfigurations' +
-                    '/{{ software_update_configuration_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ automation_account_name }}', self.automation_account_name)
-        self.url = self.url.replace('{{ software_update_configuration_name }}', self.name)
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.Automation/automationAccounts/{{ automation_account_name }}/softwareUpdateConfigurations/{{ software_update_configuration_name }}',
+                                 subscription_id=self.subscription_id,
+                                 resource_group=self.resource_group,
+                                 automation_account_name=self.automation_account_name,
+                                 software_update_configuration_name=self.name)
+        except ValueError as exc:
+            self.fail(str(exc))
 
-        old_response = self.get_resource()
+        if self.check_mode and self.state_snapshot:
+            old_response = get_snapshot_resource(self.state_snapshot, self.url, self.fail)
+        if old_response is None:
+            old_response = self.get_resource()
 
         if not old_response:
             self.log("SoftwareUpdateConfiguration instance doesn't exist")
@@ -1203,12 +970,9 @@ class AzureRMSoftwareUpdateConfigurations(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                self.results['modifiers'] = modifiers
-                self.results['compare'] = []
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -1219,6 +983,9 @@ class AzureRMSoftwareUpdateConfigurations(AzureRMModuleBaseExt):
                 return self.results
 
             response = self.create_update_resource()
+            if not self.wait:
+                self.results['id'] = self.url
+                response = None
 
             # if not old_response:
             self.results['changed'] = True
@@ -1232,12 +999,13 @@ class AzureRMSoftwareUpdateConfigurations(AzureRMModuleBaseExt):
             if self.check_mode:
                 return self.results
 
-            self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
+            response = self.delete_resource()
+            if not self.wait:
+                self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                           'DELETE',
+                                                                           self.query_parameters,
+                                                                           response)
+            response = None
         else:
             self.log('SoftwareUpdateConfiguration instance unchanged')
             self.results['changed'] = False
@@ -1262,7 +1030,7 @@ class AzureRMSoftwareUpdateConfigurations(AzureRMModuleBaseExt):
                                                   self.header_parameters,
                                                   self.body,
                                                   self.status_code,
-                                                  600,
+                                                  self.polling_timeout if self.wait else 0,
                                                   30)
             else:
                 response = self.mgmt_client.query(self.url,
@@ -1271,12 +1039,18 @@ class AzureRMSoftwareUpdateConfigurations(AzureRMModuleBaseExt):
                                                   self.header_parameters,
                                                   self.body,
                                                   self.status_code,
-                                                  600,
+                                                  self.polling_timeout if self.wait else 0,
                                                   30)
         except CloudError as exc:
             self.log('Error attempting to create the SoftwareUpdateConfiguration instance.')
             self.fail('Error creating the SoftwareUpdateConfiguration instance: {0}'.format(str(exc)))
 
+        if not self.wait:
+            self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                       'PUT',
+                                                                       self.query_parameters,
+                                                                       response)
+
         try:
             response = json.loads(response.text)
         except Exception:
@@ -1294,13 +1068,20 @@ class AzureRMSoftwareUpdateConfigurations(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              0,
                                               30)
+            if self.wait:
+                self.mgmt_client.wait_for_deletion(self.url,
+                                                   self.query_parameters,
+                                                   self.header_parameters,
+                                                   response,
+                                                   self.polling_timeout,
+                                                   30)
         except CloudError as e:
             self.log('Error attempting to delete the SoftwareUpdateConfiguration instance.')
             self.fail('Error deleting the SoftwareUpdateConfiguration instance: {0}'.format(str(e)))
 
-        return True
+        return response
 
     def get_resource(self):
         # self.log('Checking if the SoftwareUpdateConfiguration instance {0} is present'.format(self.))
@@ -1312,10 +1093,11 @@ class AzureRMSoftwareUpdateConfigurations(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout,
                                               30)
+            response = json.loads(response.text)
             found = True
-            self.log("Response : {0}".format(response))
+            log_debug(self, 'Response : {0}', response)
             # self.log("SoftwareUpdateConfiguration instance : {0} found".format(response.name))
         except CloudError as e:
             self.log('Did not find the SoftwareUpdateConfiguration instance.')
@@ -1326,6 +1108,8 @@ class AzureRMSoftwareUpdateConfigurations(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMSoftwareUpdateConfigurations()
 
 
@@ -0,0 +1,168 @@
+#!/usr/bin/python
+#
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+
+DOCUMENTATION = '''
+---
+module: statesnapshot
+version_added: '2.9'
+short_description: Export state of resources to a snapshot file.
+description:
+  - Export current state of resources with Azure Resource Graph queries to a local snapshot file.
+  - Modules run in check mode with I(state_snapshot) set to the file compare with the snapshot instead of reading each resource from Azure.
+  - Resource Graph contains tracked resources and some of their child resources, modules read resources of types not covered by the snapshot from Azure.
+  - Nothing is written in check mode, run the task with C(check_mode=false) to export snapshot for a check mode run.
+options:
+  path:
+    description:
+      - Path of the snapshot file to write.
+    required: true
+    type: path
+  subscriptions:
+    description:
+      - List of subscription IDs to export.
+      - Defaults to the subscription of the credentials.
+    type: list
+  resource_groups:
+    description:
+      - List of resource groups to export, all resource groups are exported if not specified.
+    type: list
+  resource_types:
+    description:
+      - List of resource types to export, like C(Microsoft.Batch/batchAccounts).
+      - All resource types are exported if not specified, the snapshot then covers only types it contains.
+      - Child resource types, like C(Microsoft.Batch/batchAccounts/pools), are covered only if the snapshot contains resources of the type, as most of them are not in Resource Graph.
+    type: list
+extends_documentation_fragment:
+  - azure
+author:
+  - Zim Kalinowski (@zikalino)
+
+'''
+
+EXAMPLES = '''
+- name: Export state of resources in resource group
+  azure.rm.statesnapshot:
+    path: /tmp/myResourceGroup.json
+    resource_groups:
+      - myResourceGroup
+  check_mode: false
+
+- name: Preview changes of pool using the snapshot
+  azure.rm.batchpool:
+    resource_group: myResourceGroup
+    account_name: myBatchAccount
+    name: myPool
+    vm_size: STANDARD_D4
+    state_snapshot: /tmp/myResourceGroup.json
+  check_mode: true
+
+'''
+
+RETURN = '''
+path:
+  description:
+    - Path of the snapshot file.
+  returned: always
+  type: str
+  sample: /tmp/myResourceGroup.json
+count:
+  description:
+    - Number of exported resources.
+  returned: always
+  type: int
+  sample: 120
+
+'''
+
+from ansible.module_utils.azure_rm_common import AzureRMModuleBase
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_snapshot import write_snapshot
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+try:
+    from msrestazure.azure_exceptions import CloudError
+except ImportError:
+    # this is handled in azure_rm_common
+    pass
+
+
+class AzureRMStateSnapshot(AzureRMModuleBase):
+    def __init__(self):
+        self.module_arg_spec = dict(
+            path=dict(
+                type='path',
+                required=True
+            ),
+            subscriptions=dict(
+                type='list'
+            ),
+            resource_groups=dict(
+                type='list'
+            ),
+            resource_types=dict(
+                type='list'
+            )
+        )
+
+        self.path = None
+        self.subscriptions = None
+        self.resource_groups = None
+        self.resource_types = None
+
+        self.results = dict(changed=False)
+        self.mgmt_client = None
+        self.header_parameters = {}
+        self.header_parameters['Content-Type'] = 'application/json; charset=utf-8'
+
+        super(AzureRMStateSnapshot, self).__init__(self.module_arg_spec, supports_check_mode=True, supports_tags=False)
+
+    def exec_module(self, **kwargs):
+
+        for key in self.module_arg_spec:
+            setattr(self, key, kwargs[key])
+
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
+                                                    base_url=self._cloud_environment.endpoints.resource_manager)
+
+        subscriptions = self.subscriptions or [self.subscription_id]
+        try:
+            response = self.mgmt_client.query_resource_graph(self.resource_types,
+                                                             subscriptions,
+                                                             self.resource_groups,
+                                                             self.header_parameters)
+        except CloudError as exc:
+            self.fail('Error exporting resources: {0}'.format(str(exc)))
+
+        self.results['path'] = self.path
+        self.results['count'] = len(response['value'])
+        self.results['changed'] = True
+        if self.check_mode:
+            return self.results
+
+        try:
+            write_snapshot(self.path, response['value'], subscriptions, self.resource_groups, self.resource_types)
+        except (IOError, OSError) as exc:
+            self.fail('Error writing snapshot {0}: {1}'.format(self.path, str(exc)))
+        return self.results
+
+
+def main():
+    enable_token_cache()
+    enable_perf()
+    AzureRMStateSnapshot()
+
+
+if __name__ == '__main__':
+    main()
@@ -24,16 +24,17 @@ options:
   region_id:
     description:
       - 'The region Id (westus, eastus)'
-    required: true
+      - Required unless set by I(scopes).
     type: str
   pc_name:
     description:
       - The private cloud name
-    required: true
+      - Required unless set by I(scopes).
     type: str
   name:
     description:
       - '{virtualMachineTemplateName}'
+      - Required unless set by I(scopes).
     type: str
   id:
     description:
@@ -205,6 +206,22 @@ options:
     description:
       - '{resourceProviderNamespace}/{resourceType}'
     type: str
+  fields:
+    description:
+      - Fields to return for each item, as dot separated paths, for example C(properties.provisioningState).
+      - Entries which are not plain paths are evaluated as JMESPath expressions, which requires C(jmespath).
+      - Fields are selected as the response is decoded, by default all of them are returned.
+    type: list
+  subscriptions:
+    description:
+      - List of subscription IDs to query, instead of the subscription of the credentials.
+    type: list
+  scopes:
+    description:
+      - List of scopes to query, each a dict of options of this module, for example parent resource names.
+      - Every combination of I(subscriptions), I(resource_groups) and I(scopes) is queried in parallel within a single task.
+      - Items of all scopes are merged, I(scopes) reports errors of every scope.
+    type: list
 extends_documentation_fragment:
   - azure
 author:
@@ -265,12 +282,32 @@ virtual_machine_template_by_pc:
           type: str
           sample: null
 
+scopes:
+  description:
+    - Every scope queried, when I(subscriptions), I(resource_groups) or I(scopes) were specified.
+  returned: when scopes specified
+  type: complex
+  contains:
+    scope:
+      description:
+        - Options which were set for the scope.
+      type: dict
+    error:
+      description:
+        - Error which occurred while querying the scope, null if the scope succeeded.
+      type: str
+
 '''
 
 import time
 import json
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_info_ext import get_projection, project, get_scope_plan, query_scopes, check_required_options
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+from ansible.module_utils.azure_rm_common_log import log_debug
+from ansible.module_utils.azure_rm_common_url import build_url
 from copy import deepcopy
 from msrestazure.azure_exceptions import CloudError
 
@@ -279,16 +316,22 @@ class AzureRMVirtualMachineTemplateByPCInfo(AzureRMModuleBase):
     def __init__(self):
         self.module_arg_spec = dict(
             region_id=dict(
-                type='str',
-                required=true
+                type='str'
             ),
             pc_name=dict(
-                type='str',
-                required=true
+                type='str'
             ),
             name=dict(
-                type='str',
-                required=true
+                type='str'
+            ),
+            fields=dict(
+                type='list'
+            ),
+            subscriptions=dict(
+                type='list'
+            ),
+            scopes=dict(
+                type='list'
             )
         )
 
@@ -304,6 +347,11 @@ class AzureRMVirtualMachineTemplateByPCInfo(AzureRMModuleBase):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.subscriptions = None
+        self.scopes = None
+        self.in_scope = False
+        self.fields = None
+        self.projection = None
         self.url = None
         self.status_code = [200]
 
@@ -320,33 +368,37 @@ class AzureRMVirtualMachineTemplateByPCInfo(AzureRMModuleBase):
         for key in self.module_arg_spec:
             setattr(self, key, kwargs[key])
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.projection = get_projection(self.fields, self.fail)
 
+        if self.subscriptions or self.scopes:
+            plan = get_scope_plan(self.subscriptions, None, self.scopes, self.module_arg_spec, self.fail)
+            check_required_options(self, plan, ['region_id', 'pc_name', 'name'])
+            self.results['scopes'] = query_scopes(self, plan, AzureRMVirtualMachineTemplateByPCInfo.query_info)
+        else:
+            check_required_options(self, None, ['region_id', 'pc_name', 'name'])
+            self.query_info()
+        return self.results
+
+    def query_info(self):
         if (self.region_id is not None and
             self.pc_name is not None and
             self.name is not None):
             self.results['virtual_machine_template_by_pc'] = self.format_item(self.get())
-        return self.results
 
     def get(self):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/providers' +
-                    '/Microsoft.VMwareCloudSimple' +
-                    '/locations' +
-                    '/{{ location_name }}' +
-                    '/privateClouds' +
-                    '/{{ private_cloud_name }}' +
-                    '/virtualMachineTemplates' +
-                    '/{{ virtual_machine_template_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ location_name }}', self.location_name)
-        self.url = self.url.replace('{{ private_cloud_name }}', self.private_cloud_name)
-        self.url = self.url.replace('{{ virtual_machine_template_name }}', self.name)
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/providers/Microsoft.VMwareCloudSimple/locations/{{ location_name }}/privateClouds/{{ private_cloud_name }}/virtualMachineTemplates/{{ virtual_machine_template_name }}',
+                                 subscription_id=self.subscription_id,
+                                 location_name=self.region_id,
+                                 private_cloud_name=self.pc_name,
+                                 virtual_machine_template_name=self.name)
+        except ValueError as exc:
+            self.fail(str(exc))
 
         try:
             response = self.mgmt_client.query(self.url,
@@ -357,18 +409,22 @@ class AzureRMVirtualMachineTemplateByPCInfo(AzureRMModuleBase):
                                               self.status_code,
                                               600,
                                               30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = project(json.loads(response.text), self.projection)
+            log_debug(self, 'Response : {0}', response)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
 
-    def format_item(item):
+    def format_item(self, item):
         return item
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMVirtualMachineTemplateByPCInfo()
 
 
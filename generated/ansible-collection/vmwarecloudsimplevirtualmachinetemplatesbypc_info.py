@@ -24,17 +24,17 @@ options:
   pc_name:
     description:
       - The private cloud name
-    required: true
+      - Required unless set by I(scopes).
     type: str
   region_id:
     description:
       - 'The region Id (westus, eastus)'
-    required: true
+      - Required unless set by I(scopes).
     type: str
   name:
     description:
       - Resource pool used to derive vSphere cluster which contains VM templates
-    required: true
+      - Required unless set by I(scopes).
     type: str
   next_link:
     description:
@@ -215,6 +215,31 @@ options:
         description:
           - '{resourceProviderNamespace}/{resourceType}'
         type: str
+  max_items:
+    description:
+      - Maximum number of items returned by list operations.
+      - Next pages are not requested once this number of items was collected.
+    type: int
+  page_size:
+    description:
+      - Number of items requested per page, passed to list operations as C($top).
+    type: int
+  fields:
+    description:
+      - Fields to return for each item, as dot separated paths, for example C(properties.provisioningState).
+      - Entries which are not plain paths are evaluated as JMESPath expressions, which requires C(jmespath).
+      - Fields are selected as the response is decoded, by default all of them are returned.
+    type: list
+  subscriptions:
+    description:
+      - List of subscription IDs to query, instead of the subscription of the credentials.
+    type: list
+  scopes:
+    description:
+      - List of scopes to query, each a dict of options of this module, for example parent resource names.
+      - Every combination of I(subscriptions), I(resource_groups) and I(scopes) is queried in parallel within a single task.
+      - Items of all scopes are merged, I(scopes) reports errors of every scope.
+    type: list
 extends_documentation_fragment:
   - azure
 author:
@@ -514,12 +539,32 @@ virtual_machine_templates_by_pc:
               type: str
               sample: null
 
+scopes:
+  description:
+    - Every scope queried, when I(subscriptions), I(resource_groups) or I(scopes) were specified.
+  returned: when scopes specified
+  type: complex
+  contains:
+    scope:
+      description:
+        - Options which were set for the scope.
+      type: dict
+    error:
+      description:
+        - Error which occurred while querying the scope, null if the scope succeeded.
+      type: str
+
 '''
 
 import time
 import json
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_info_ext import get_projection, project, get_scope_plan, query_scopes, check_required_options
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+from ansible.module_utils.azure_rm_common_log import log_debug
+from ansible.module_utils.azure_rm_common_url import build_url
 from copy import deepcopy
 from msrestazure.azure_exceptions import CloudError
 
@@ -528,19 +573,31 @@ class AzureRMVirtualMachineTemplatesByPCInfo(AzureRMModuleBase):
     def __init__(self):
         self.module_arg_spec = dict(
             pc_name=dict(
-                type='str',
-                required=true
+                type='str'
             ),
             region_id=dict(
-                type='str',
-                required=true
+                type='str'
             ),
             name=dict(
                 type='raw',
-                required=true,
                 pattern=('//subscriptions/{{ subscription_id }}/providers'
                          '/Microsoft.VMwareCloudSimple/locations/{{ location_name }}'
                          '/privateClouds/{{ private_cloud_name }}/resourcePools/{{ name }}')
+            ),
+            max_items=dict(
+                type='int'
+            ),
+            page_size=dict(
+                type='int'
+            ),
+            fields=dict(
+                type='list'
+            ),
+            subscriptions=dict(
+                type='list'
+            ),
+            scopes=dict(
+                type='list'
             )
         )
 
@@ -553,6 +610,13 @@ class AzureRMVirtualMachineTemplatesByPCInfo(AzureRMModuleBase):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.subscriptions = None
+        self.scopes = None
+        self.in_scope = False
+        self.fields = None
+        self.projection = None
+        self.max_items = None
+        self.page_size = None
         self.url = None
         self.status_code = [200]
 
@@ -569,53 +633,62 @@ class AzureRMVirtualMachineTemplatesByPCInfo(AzureRMModuleBase):
         for key in self.module_arg_spec:
             setattr(self, key, kwargs[key])
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.projection = get_projection(self.fields, self.fail)
+
+        if self.subscriptions or self.scopes:
+            plan = get_scope_plan(self.subscriptions, None, self.scopes, self.module_arg_spec, self.fail)
+            check_required_options(self, plan, ['pc_name', 'region_id', 'name'])
+            self.results['scopes'] = query_scopes(self, plan, AzureRMVirtualMachineTemplatesByPCInfo.query_info)
+        else:
+            check_required_options(self, None, ['pc_name', 'region_id', 'name'])
+            self.query_info()
+        return self.results
 
+    def query_info(self):
         if (self.pc_name is not None and
             self.region_id is not None and
             self.name is not None):
             self.results['virtual_machine_templates_by_pc'] = self.format_item(self.list())
-        return self.results
 
     def list(self):
         response = None
         results = {}
         # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/providers' +
-                    '/Microsoft.VMwareCloudSimple' +
-                    '/locations' +
-                    '/{{ location_name }}' +
-                    '/privateClouds' +
-                    '/{{ private_cloud_name }}' +
-                    '/virtualMachineTemplates')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ location_name }}', self.location_name)
-        self.url = self.url.replace('{{ private_cloud_name }}', self.name)
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/providers/Microsoft.VMwareCloudSimple/locations/{{ location_name }}/privateClouds/{{ private_cloud_name }}/virtualMachineTemplates',
+                                 subscription_id=self.subscription_id,
+                                 location_name=self.region_id,
+                                 private_cloud_name=self.name)
+        except ValueError as exc:
+            self.fail(str(exc))
 
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            results['temp_item'] = self.mgmt_client.query_list(self.url,
+                                                               'GET',
+                                                               self.query_parameters,
+                                                               self.header_parameters,
+                                                               None,
+                                                               self.status_code,
+                                                               self.max_items,
+                                                               self.page_size,
+                                                               self.projection)
+            log_debug(self, 'Response : {0}', results['temp_item'])
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
 
-    def format_item(item):
+    def format_item(self, item):
         return item
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMVirtualMachineTemplatesByPCInfo()
 
 
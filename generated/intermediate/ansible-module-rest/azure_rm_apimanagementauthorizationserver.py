@@ -157,6 +157,24 @@ options:
     description:
       - Resource type for API Management resource.
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
+  polling_timeout:
+    description:
+      - Maximum time in seconds to wait for long running operation to complete.
+      - Status is polled as indicated by C(Azure-AsyncOperation), C(Location) and C(Retry-After) headers.
+    type: int
+    default: 600
+  state_snapshot:
+    description:
+      - Path of state snapshot exported by M(azure_rm_statesnapshot).
+      - In check mode current state of the instance is taken from the snapshot instead of Azure, if the snapshot covers it.
+      - Instances of resource types, subscriptions or resource groups not exported to the snapshot are read from Azure.
+    type: path
   state:
     description:
       - Assert the state of the AuthorizationServer.
@@ -384,13 +402,27 @@ properties:
       type: str
       sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_compare import get_comparator, create_merge_patch
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+from ansible.module_utils.azure_rm_common_log import log_debug
+from ansible.module_utils.azure_rm_common_snapshot import get_snapshot_resource
+from ansible.module_utils.azure_rm_common_url import build_url
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -399,131 +431,41 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resourceGroupName", "required": true},
+    "service_name": {"type": "str", "updatable": false, "disposition": "serviceName", "required": true},
+    "authsid": {"type": "str", "updatable": false, "required": true},
+    "description": {"type": "str", "disposition": "/properties/*"},
+    "authorization_methods": {"type": "list", "disposition": "/properties/authorizationMethods", "choices": ["HEAD", "OPTIONS", "TRACE", "GET", "POST", "PUT", "PATCH", "DELETE"]},
+    "client_authentication_method": {"type": "list", "disposition": "/properties/clientAuthenticationMethod", "choices": ["Basic", "Body"]},
+    "token_body_parameters": {"type": "list", "disposition": "/properties/tokenBodyParameters", "options": {"name": {"type": "str", "required": true}, "value": {"type": "str", "required": true}}},
+    "token_endpoint": {"type": "str", "disposition": "/properties/tokenEndpoint"},
+    "support_state": {"type": "boolean", "disposition": "/properties/supportState"},
+    "default_scope": {"type": "str", "disposition": "/properties/defaultScope"},
+    "bearer_token_sending_methods": {"type": "list", "disposition": "/properties/bearerTokenSendingMethods", "choices": ["authorizationHeader", "query"]},
+    "client_secret": {"type": "str", "disposition": "/properties/clientSecret"},
+    "resource_owner_username": {"type": "str", "disposition": "/properties/resourceOwnerUsername"},
+    "resource_owner_password": {"type": "str", "disposition": "/properties/resourceOwnerPassword"},
+    "display_name": {"type": "str", "disposition": "/properties/displayName", "required": true},
+    "client_registration_endpoint": {"type": "str", "disposition": "/properties/clientRegistrationEndpoint", "required": true},
+    "authorization_endpoint": {"type": "str", "disposition": "/properties/authorizationEndpoint", "required": true},
+    "grant_types": {"type": "list", "disposition": "/properties/grantTypes", "choices": ["authorizationCode", "implicit", "resourceOwnerPassword", "clientCredentials"], "required": true},
+    "client_id": {"type": "str", "disposition": "/properties/clientId", "required": true},
+    "wait": {"type": "bool", "default": true},
+    "polling_timeout": {"type": "int", "default": 600},
+    "state_snapshot": {"type": "path"},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMAuthorizationServer(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resourceGroupName',
-                required=true
-            ),
-            service_name=dict(
-                type='str',
-                updatable=False,
-                disposition='serviceName',
-                required=true
-            ),
-            authsid=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            description=dict(
-                type='str',
-                disposition='/properties/*'
-            ),
-            authorization_methods=dict(
-                type='list',
-                disposition='/properties/authorizationMethods',
-                choices=['HEAD',
-                         'OPTIONS',
-                         'TRACE',
-                         'GET',
-                         'POST',
-                         'PUT',
-                         'PATCH',
-                         'DELETE']
-            ),
-            client_authentication_method=dict(
-                type='list',
-                disposition='/properties/clientAuthenticationMethod',
-                choices=['Basic',
-                         'Body']
-            ),
-            token_body_parameters=dict(
-                type='list',
-                disposition='/properties/tokenBodyParameters',
-                options=dict(
-                    name=dict(
-                        type='str',
-                        required=true
-                    ),
-                    value=dict(
-                        type='str',
-                        required=true
-                    )
-                )
-            ),
-            token_endpoint=dict(
-                type='str',
-                disposition='/properties/tokenEndpoint'
-            ),
-            support_state=dict(
-                type='boolean',
-                disposition='/properties/supportState'
-            ),
-            default_scope=dict(
-                type='str',
-                disposition='/properties/defaultScope'
-            ),
-            bearer_token_sending_methods=dict(
-                type='list',
-                disposition='/properties/bearerTokenSendingMethods',
-                choices=['authorizationHeader',
-                         'query']
-            ),
-            client_secret=dict(
-                type='str',
-                disposition='/properties/clientSecret'
-            ),
-            resource_owner_username=dict(
-                type='str',
-                disposition='/properties/resourceOwnerUsername'
-            ),
-            resource_owner_password=dict(
-                type='str',
-                disposition='/properties/resourceOwnerPassword'
-            ),
-            display_name=dict(
-                type='str',
-                disposition='/properties/displayName',
-                required=true
-            ),
-            client_registration_endpoint=dict(
-                type='str',
-                disposition='/properties/clientRegistrationEndpoint',
-                required=true
-            ),
-            authorization_endpoint=dict(
-                type='str',
-                disposition='/properties/authorizationEndpoint',
-                required=true
-            ),
-            grant_types=dict(
-                type='list',
-                disposition='/properties/grantTypes',
-                choices=['authorizationCode',
-                         'implicit',
-                         'resourceOwnerPassword',
-                         'clientCredentials'],
-                required=true
-            ),
-            client_id=dict(
-                type='str',
-                disposition='/properties/clientId',
-                required=true
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.service_name = None
@@ -535,6 +477,9 @@ class AzureRMAuthorizationServer(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.state_snapshot = None
+        self.wait = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -556,32 +501,29 @@ class AzureRMAuthorizationServer(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
 
         resource_group = self.get_resource_group(self.resource_group)
 
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.ApiManagement' +
-                    '/service' +
-                    '/{{ service_name }}' +
-                    '/authorizationServers' +
-                    '/{{ authorization_server_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ service_name }}', self.service_name)
-        self.url = self.url.replace('{{ authorization_server_name }}', self.name)
-
-        old_response = self.get_resource()
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.ApiManagement/service/{{ service_name }}/authorizationServers/{{ authorization_server_name }}',
+                                 subscription_id=self.subscription_id,
+                                 resource_group=self.resource_group,
+                                 service_name=self.service_name,
+                                 authorization_server_name=self.name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        if self.check_mode and self.state_snapshot:
+            old_response = get_snapshot_resource(self.state_snapshot, self.url, self.fail)
+        if old_response is None:
+            old_response = self.get_resource()
 
         if not old_response:
             self.log("AuthorizationServer instance doesn't exist")
@@ -596,12 +538,9 @@ class AzureRMAuthorizationServer(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                self.results['modifiers'] = modifiers
-                self.results['compare'] = []
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -612,6 +551,9 @@ class AzureRMAuthorizationServer(AzureRMModuleBaseExt):
                 return self.results
 
             response = self.create_update_resource()
+            if not self.wait:
+                self.results['id'] = self.url
+                response = None
 
             # if not old_response:
             self.results['changed'] = True
@@ -625,12 +567,13 @@ class AzureRMAuthorizationServer(AzureRMModuleBaseExt):
             if self.check_mode:
                 return self.results
 
-            self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
+            response = self.delete_resource()
+            if not self.wait:
+                self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                           'DELETE',
+                                                                           self.query_parameters,
+                                                                           response)
+            response = None
         else:
             self.log('AuthorizationServer instance unchanged')
             self.results['changed'] = False
@@ -648,18 +591,36 @@ class AzureRMAuthorizationServer(AzureRMModuleBaseExt):
         # self.log('Creating / Updating the AuthorizationServer instance {0}'.format(self.))
 
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'PUT',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              self.body,
-                                              self.status_code,
-                                              600,
-                                              30)
+            if self.to_do == Actions.Create:
+                response = self.mgmt_client.query(self.url,
+                                                  'PUT',
+                                                  self.query_parameters,
+                                                  self.header_parameters,
+                                                  self.body,
+                                                  self.status_code,
+                                                  self.polling_timeout if self.wait else 0,
+                                                  30)
+            else:
+                header_parameters = dict(self.header_parameters)
+                header_parameters['If-Match'] = '*'
+                response = self.mgmt_client.query(self.url,
+                                                  'PATCH',
+                                                  self.query_parameters,
+                                                  header_parameters,
+                                                  create_merge_patch(self.body, self.results['compare']),
+                                                  self.status_code,
+                                                  self.polling_timeout if self.wait else 0,
+                                                  30)
         except CloudError as exc:
             self.log('Error attempting to create the AuthorizationServer instance.')
             self.fail('Error creating the AuthorizationServer instance: {0}'.format(str(exc)))
 
+        if not self.wait:
+            self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                       'PUT' if self.to_do == Actions.Create else 'PATCH',
+                                                                       self.query_parameters,
+                                                                       response)
+
         try:
             response = json.loads(response.text)
         except Exception:
@@ -677,13 +638,20 @@ class AzureRMAuthorizationServer(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              0,
                                               30)
+            if self.wait:
+                self.mgmt_client.wait_for_deletion(self.url,
+                                                   self.query_parameters,
+                                                   self.header_parameters,
+                                                   response,
+                                                   self.polling_timeout,
+                                                   30)
         except CloudError as e:
             self.log('Error attempting to delete the AuthorizationServer instance.')
             self.fail('Error deleting the AuthorizationServer instance: {0}'.format(str(e)))
 
-        return True
+        return response
 
     def get_resource(self):
         # self.log('Checking if the AuthorizationServer instance {0} is present'.format(self.))
@@ -695,10 +663,11 @@ class AzureRMAuthorizationServer(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout,
                                               30)
+            response = json.loads(response.text)
             found = True
-            self.log("Response : {0}".format(response))
+            log_debug(self, 'Response : {0}', response)
             # self.log("AuthorizationServer instance : {0} found".format(response.name))
         except CloudError as e:
             self.log('Did not find the AuthorizationServer instance.')
@@ -709,6 +678,8 @@ class AzureRMAuthorizationServer(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMAuthorizationServer()
 
 
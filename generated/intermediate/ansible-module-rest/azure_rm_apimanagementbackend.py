@@ -186,6 +186,24 @@ options:
     description:
       - Resource type for API Management resource.
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
+  polling_timeout:
+    description:
+      - Maximum time in seconds to wait for long running operation to complete.
+      - Status is polled as indicated by C(Azure-AsyncOperation), C(Location) and C(Retry-After) headers.
+    type: int
+    default: 600
+  state_snapshot:
+    description:
+      - Path of state snapshot exported by M(azure_rm_statesnapshot).
+      - In check mode current state of the instance is taken from the snapshot instead of Azure, if the snapshot covers it.
+      - Instances of resource types, subscriptions or resource groups not exported to the snapshot are read from Azure.
+    type: path
   state:
     description:
       - Assert the state of the Backend.
@@ -485,13 +503,27 @@ properties:
       type: str
       sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_compare import get_comparator, create_merge_patch
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+from ansible.module_utils.azure_rm_common_log import log_debug
+from ansible.module_utils.azure_rm_common_snapshot import get_snapshot_resource
+from ansible.module_utils.azure_rm_common_url import build_url
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -500,157 +532,34 @@ except ImportError:
     pass
 
 
+ARG_SPEC = r'''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resourceGroupName", "required": true},
+    "service_name": {"type": "str", "updatable": false, "disposition": "serviceName", "required": true},
+    "backend_id": {"type": "str", "updatable": false, "disposition": "backendId", "required": true},
+    "title": {"type": "str", "disposition": "/properties/*"},
+    "description": {"type": "str", "disposition": "/properties/*"},
+    "resource_id": {"type": "str", "disposition": "/properties/resourceId"},
+    "service_fabric_cluster": {"type": "dict", "disposition": "/properties/properties/serviceFabricCluster", "options": {"client_certificatethumbprint": {"type": "str", "disposition": "clientCertificatethumbprint", "required": true}, "max_partition_resolution_retries": {"type": "number", "disposition": "maxPartitionResolutionRetries"}, "management_endpoints": {"type": "list", "disposition": "managementEndpoints", "required": true}, "server_certificate_thumbprints": {"type": "list", "disposition": "serverCertificateThumbprints"}, "server_x509names": {"type": "list", "disposition": "serverX509Names", "options": {"name": {"type": "str"}, "issuer_certificate_thumbprint": {"type": "str", "disposition": "issuerCertificateThumbprint"}}}}},
+    "credentials": {"type": "dict", "disposition": "/properties/*", "options": {"certificate": {"type": "list"}, "query": {"type": "unknown[DictionaryType {\"$id\":\"1845\",\"$type\":\"DictionaryType\",\"valueType\":{\"$id\":\"1846\",\"$type\":\"SequenceType\",\"elementType\":{\"$id\":\"1847\",\"$type\":\"PrimaryType\",\"knownPrimaryType\":\"string\",\"name\":{\"$id\":\"1848\",\"fixed\":false,\"raw\":\"String\"},\"deprecated\":false},\"name\":{\"$id\":\"1849\",\"fixed\":false},\"deprecated\":false},\"supportsAdditionalProperties\":false,\"name\":{\"$id\":\"1850\",\"fixed\":false},\"deprecated\":false}]"}, "header": {"type": "unknown[DictionaryType {\"$id\":\"1855\",\"$type\":\"DictionaryType\",\"valueType\":{\"$id\":\"1856\",\"$type\":\"SequenceType\",\"elementType\":{\"$id\":\"1857\",\"$type\":\"PrimaryType\",\"knownPrimaryType\":\"string\",\"name\":{\"$id\":\"1858\",\"fixed\":false,\"raw\":\"String\"},\"deprecated\":false},\"name\":{\"$id\":\"1859\",\"fixed\":false},\"deprecated\":false},\"supportsAdditionalProperties\":false,\"name\":{\"$id\":\"1860\",\"fixed\":false},\"deprecated\":false}]"}, "authorization": {"type": "dict", "options": {"scheme": {"type": "str", "required": true}, "parameter": {"type": "str", "required": true}}}}},
+    "proxy": {"type": "dict", "disposition": "/properties/*", "options": {"url": {"type": "str", "required": true}, "username": {"type": "str"}, "password": {"type": "str", "no_log": true}}},
+    "tls": {"type": "dict", "disposition": "/properties/*", "options": {"validate_certificate_chain": {"type": "boolean", "disposition": "validateCertificateChain"}, "validate_certificate_name": {"type": "boolean", "disposition": "validateCertificateName"}}},
+    "url": {"type": "str", "disposition": "/properties/*", "required": true},
+    "protocol": {"type": "str", "disposition": "/properties/*", "choices": ["http", "soap"], "required": true},
+    "wait": {"type": "bool", "default": true},
+    "polling_timeout": {"type": "int", "default": 600},
+    "state_snapshot": {"type": "path"},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMBackend(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resourceGroupName',
-                required=true
-            ),
-            service_name=dict(
-                type='str',
-                updatable=False,
-                disposition='serviceName',
-                required=true
-            ),
-            backend_id=dict(
-                type='str',
-                updatable=False,
-                disposition='backendId',
-                required=true
-            ),
-            title=dict(
-                type='str',
-                disposition='/properties/*'
-            ),
-            description=dict(
-                type='str',
-                disposition='/properties/*'
-            ),
-            resource_id=dict(
-                type='str',
-                disposition='/properties/resourceId'
-            ),
-            service_fabric_cluster=dict(
-                type='dict',
-                disposition='/properties/properties/serviceFabricCluster',
-                options=dict(
-                    client_certificatethumbprint=dict(
-                        type='str',
-                        disposition='clientCertificatethumbprint',
-                        required=true
-                    ),
-                    max_partition_resolution_retries=dict(
-                        type='number',
-                        disposition='maxPartitionResolutionRetries'
-                    ),
-                    management_endpoints=dict(
-                        type='list',
-                        disposition='managementEndpoints',
-                        required=true
-                    ),
-                    server_certificate_thumbprints=dict(
-                        type='list',
-                        disposition='serverCertificateThumbprints'
-                    ),
-                    server_x509names=dict(
-                        type='list',
-                        disposition='serverX509Names',
-                        options=dict(
-                            name=dict(
-                                type='str'
-                            ),
-                            issuer_certificate_thumbprint=dict(
-                                type='str',
-                                disposition='issuerCertificateThumbprint'
-                            )
-                        )
-                    )
-                )
-            ),
-            credentials=dict(
-                type='dict',
-                disposition='/properties/*',
-                options=dict(
-                    certificate=dict(
-                        type='list'
-                    ),
-                    query=dict(
-                        type='unknown[DictionaryType {"$id":"1845","$type":"DictionaryType","valueType":{"$id":"1846","$type":"SequenceType","elementType":{"$id":"1847","$type":"PrimaryType","knownPrimaryType":"string","name":{"$id":"1848","fixed":false,"raw":"String"},"deprecated":false},"name":{"$id":"1849","fixed":false},"deprecated":false},"supportsAdditionalProperties":false,"name":{"$id":"1850","fixed":false},"deprecated":false}]'
-                    ),
-                    header=dict(
-                        type='unknown[DictionaryType {"$id":"1855","$type":"DictionaryType","valueType":{"$id":"1856","$type":"SequenceType","elementType":{"$id":"1857","$type":"PrimaryType","knownPrimaryType":"string","name":{"$id":"1858","fixed":false,"raw":"String"},"deprecated":false},"name":{"$id":"1859","fixed":false},"deprecated":false},"supportsAdditionalProperties":false,"name":{"$id":"1860","fixed":false},"deprecated":false}]'
-                    ),
-                    authorization=dict(
-                        type='dict',
-                        options=dict(
-                            scheme=dict(
-                                type='str',
-                                required=true
-                            ),
-                            parameter=dict(
-                                type='str',
-                                required=true
-                            )
-                        )
-                    )
-                )
-            ),
-            proxy=dict(
-                type='dict',
-                disposition='/properties/*',
-                options=dict(
-                    url=dict(
-                        type='str',
-                        required=true
-                    ),
-                    username=dict(
-                        type='str'
-                    ),
-                    password=dict(
-                        type='str',
-                        no_log=True
-                    )
-                )
-            ),
-            tls=dict(
-                type='dict',
-                disposition='/properties/*',
-                options=dict(
-                    validate_certificate_chain=dict(
-                        type='boolean',
-                        disposition='validateCertificateChain'
-                    ),
-                    validate_certificate_name=dict(
-                        type='boolean',
-                        disposition='validateCertificateName'
-                    )
-                )
-            ),
-            url=dict(
-                type='str',
-                disposition='/properties/*',
-                required=true
-            ),
-            protocol=dict(
-                type='str',
-                disposition='/properties/*',
-                choices=['http',
-                         'soap'],
-                required=true
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.service_name = None
@@ -662,6 +571,9 @@ class AzureRMBackend(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.state_snapshot = None
+        self.wait = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -683,32 +595,29 @@ class AzureRMBackend(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
 
         resource_group = self.get_resource_group(self.resource_group)
 
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.ApiManagement' +
-                    '/service' +
-                    '/{{ service_name }}' +
-                    '/backends' +
-                    '/{{ backend_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ service_name }}', self.service_name)
-        self.url = self.url.replace('{{ backend_name }}', self.name)
-
-        old_response = self.get_resource()
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.ApiManagement/service/{{ service_name }}/backends/{{ backend_name }}',
+                                 subscription_id=self.subscription_id,
+                                 resource_group=self.resource_group,
+                                 service_name=self.service_name,
+                                 backend_name=self.name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        if self.check_mode and self.state_snapshot:
+            old_response = get_snapshot_resource(self.state_snapshot, self.url, self.fail)
+        if old_response is None:
+            old_response = self.get_resource()
 
         if not old_response:
             self.log("Backend instance doesn't exist")
@@ -723,12 +632,9 @@ class AzureRMBackend(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                self.results['modifiers'] = modifiers
-                self.results['compare'] = []
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -739,6 +645,9 @@ class AzureRMBackend(AzureRMModuleBaseExt):
                 return self.results
 
             response = self.create_update_resource()
+            if not self.wait:
+                self.results['id'] = self.url
+                response = None
 
             # if not old_response:
             self.results['changed'] = True
@@ -752,12 +661,13 @@ class AzureRMBackend(AzureRMModuleBaseExt):
             if self.check_mode:
                 return self.results
 
-            self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
+            response = self.delete_resource()
+            if not self.wait:
+                self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                           'DELETE',
+                                                                           self.query_parameters,
+                                                                           response)
+            response = None
         else:
             self.log('Backend instance unchanged')
             self.results['changed'] = False
@@ -775,18 +685,36 @@ class AzureRMBackend(AzureRMModuleBaseExt):
         # self.log('Creating / Updating the Backend instance {0}'.format(self.))
 
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'PUT',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              self.body,
-                                              self.status_code,
-                                              600,
-                                              30)
+            if self.to_do == Actions.Create:
+                response = self.mgmt_client.query(self.url,
+                                                  'PUT',
+                                                  self.query_parameters,
+                                                  self.header_parameters,
+                                                  self.body,
+                                                  self.status_code,
+                                                  self.polling_timeout if self.wait else 0,
+                                                  30)
+            else:
+                header_parameters = dict(self.header_parameters)
+                header_parameters['If-Match'] = '*'
+                response = self.mgmt_client.query(self.url,
+                                                  'PATCH',
+                                                  self.query_parameters,
+                                                  header_parameters,
+                                                  create_merge_patch(self.body, self.results['compare']),
+                                                  self.status_code,
+                                                  self.polling_timeout if self.wait else 0,
+                                                  30)
         except CloudError as exc:
             self.log('Error attempting to create the Backend instance.')
             self.fail('Error creating the Backend instance: {0}'.format(str(exc)))
 
+        if not self.wait:
+            self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                       'PUT' if self.to_do == Actions.Create else 'PATCH',
+                                                                       self.query_parameters,
+                                                                       response)
+
         try:
             response = json.loads(response.text)
         except Exception:
@@ -804,13 +732,20 @@ class AzureRMBackend(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              0,
                                               30)
+            if self.wait:
+                self.mgmt_client.wait_for_deletion(self.url,
+                                                   self.query_parameters,
+                                                   self.header_parameters,
+                                                   response,
+                                                   self.polling_timeout,
+                                                   30)
         except CloudError as e:
             self.log('Error attempting to delete the Backend instance.')
             self.fail('Error deleting the Backend instance: {0}'.format(str(e)))
 
-        return True
+        return response
 
     def get_resource(self):
         # self.log('Checking if the Backend instance {0} is present'.format(self.))
@@ -822,10 +757,11 @@ class AzureRMBackend(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout,
                                               30)
+            response = json.loads(response.text)
             found = True
-            self.log("Response : {0}".format(response))
+            log_debug(self, 'Response : {0}', response)
             # self.log("Backend instance : {0} found".format(response.name))
         except CloudError as e:
             self.log('Did not find the Backend instance.')
@@ -836,6 +772,8 @@ class AzureRMBackend(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMBackend()
 
 
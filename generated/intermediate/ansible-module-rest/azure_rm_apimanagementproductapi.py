@@ -214,6 +214,24 @@ options:
             Name of HTTP header parameter that indicates the API Version if
             versioningScheme is set to `header`.
         type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
+  polling_timeout:
+    description:
+      - Maximum time in seconds to wait for long running operation to complete.
+      - Status is polled as indicated by C(Azure-AsyncOperation), C(Location) and C(Retry-After) headers.
+    type: int
+    default: 600
+  state_snapshot:
+    description:
+      - Path of state snapshot exported by M(azure_rm_statesnapshot).
+      - In check mode current state of the instance is taken from the snapshot instead of Azure, if the snapshot covers it.
+      - Instances of resource types, subscriptions or resource groups not exported to the snapshot are read from Azure.
+    type: path
   state:
     description:
       - Assert the state of the ProductApi.
@@ -274,13 +292,27 @@ properties:
   type: dict
   sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+from ansible.module_utils.azure_rm_common_log import log_debug
+from ansible.module_utils.azure_rm_common_snapshot import get_snapshot_resource
+from ansible.module_utils.azure_rm_common_url import build_url
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -289,188 +321,44 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resourceGroupName", "required": true},
+    "service_name": {"type": "str", "updatable": false, "disposition": "serviceName", "required": true},
+    "product_id": {"type": "str", "updatable": false, "disposition": "productId", "required": true},
+    "api_id": {"type": "str", "updatable": false, "disposition": "apiId", "required": true},
+    "description": {"type": "str", "disposition": "/properties/*"},
+    "authentication_settings": {"type": "dict", "disposition": "/properties/authenticationSettings", "options": {"o_auth2": {"type": "dict", "disposition": "oAuth2", "options": {"authorization_server_id": {"type": "str", "disposition": "authorizationServerId"}, "scope": {"type": "str"}}}, "openid": {"type": "dict", "options": {"openid_provider_id": {"type": "str", "disposition": "openidProviderId"}, "bearer_token_sending_methods": {"type": "list", "disposition": "bearerTokenSendingMethods", "choices": ["authorizationHeader", "query"]}}}, "subscription_key_required": {"type": "boolean", "disposition": "subscriptionKeyRequired"}}},
+    "subscription_key_parameter_names": {"type": "dict", "disposition": "/properties/subscriptionKeyParameterNames", "options": {"header": {"type": "str"}, "query": {"type": "str"}}},
+    "type": {"type": "str", "disposition": "/properties/*", "choices": ["http", "soap"]},
+    "api_revision": {"type": "str", "disposition": "/properties/apiRevision"},
+    "api_version": {"type": "str", "disposition": "/properties/apiVersion"},
+    "is_current": {"type": "boolean", "disposition": "/properties/isCurrent"},
+    "is_online": {"type": "boolean", "disposition": "/properties/isOnline"},
+    "api_revision_description": {"type": "str", "disposition": "/properties/apiRevisionDescription"},
+    "api_version_description": {"type": "str", "disposition": "/properties/apiVersionDescription"},
+    "api_version_set_id": {"type": "str", "disposition": "/properties/apiVersionSetId"},
+    "subscription_required": {"type": "boolean", "disposition": "/properties/subscriptionRequired"},
+    "source_api_id": {"type": "str", "disposition": "/properties/sourceApiId"},
+    "display_name": {"type": "str", "disposition": "/properties/displayName"},
+    "service_url": {"type": "str", "disposition": "/properties/serviceUrl"},
+    "path": {"type": "str", "disposition": "/properties/*", "required": true},
+    "protocols": {"type": "list", "disposition": "/properties/*", "choices": ["http", "https"]},
+    "api_version_set": {"type": "dict", "disposition": "/properties/apiVersionSet", "options": {"id": {"type": "str"}, "name": {"type": "str"}, "description": {"type": "str"}, "versioning_scheme": {"type": "str", "disposition": "versioningScheme", "choices": ["Segment", "Query", "Header"]}, "version_query_name": {"type": "str", "disposition": "versionQueryName"}, "version_header_name": {"type": "str", "disposition": "versionHeaderName"}}},
+    "wait": {"type": "bool", "default": true},
+    "polling_timeout": {"type": "int", "default": 600},
+    "state_snapshot": {"type": "path"},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMProductApi(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resourceGroupName',
-                required=true
-            ),
-            service_name=dict(
-                type='str',
-                updatable=False,
-                disposition='serviceName',
-                required=true
-            ),
-            product_id=dict(
-                type='str',
-                updatable=False,
-                disposition='productId',
-                required=true
-            ),
-            api_id=dict(
-                type='str',
-                updatable=False,
-                disposition='apiId',
-                required=true
-            ),
-            description=dict(
-                type='str',
-                disposition='/properties/*'
-            ),
-            authentication_settings=dict(
-                type='dict',
-                disposition='/properties/authenticationSettings',
-                options=dict(
-                    o_auth2=dict(
-                        type='dict',
-                        disposition='oAuth2',
-                        options=dict(
-                            authorization_server_id=dict(
-                                type='str',
-                                disposition='authorizationServerId'
-                            ),
-                            scope=dict(
-                                type='str'
-                            )
-                        )
-                    ),
-                    openid=dict(
-                        type='dict',
-                        options=dict(
-                            openid_provider_id=dict(
-                                type='str',
-                                disposition='openidProviderId'
-                            ),
-                            bearer_token_sending_methods=dict(
-                                type='list',
-                                disposition='bearerTokenSendingMethods',
-                                choices=['authorizationHeader',
-                                         'query']
-                            )
-                        )
-                    ),
-                    subscription_key_required=dict(
-                        type='boolean',
-                        disposition='subscriptionKeyRequired'
-                    )
-                )
-            ),
-            subscription_key_parameter_names=dict(
-                type='dict',
-                disposition='/properties/subscriptionKeyParameterNames',
-                options=dict(
-                    header=dict(
-                        type='str'
-                    ),
-                    query=dict(
-                        type='str'
-                    )
-                )
-            ),
-            type=dict(
-                type='str',
-                disposition='/properties/*',
-                choices=['http',
-                         'soap']
-            ),
-            api_revision=dict(
-                type='str',
-                disposition='/properties/apiRevision'
-            ),
-            api_version=dict(
-                type='str',
-                disposition='/properties/apiVersion'
-            ),
-            is_current=dict(
-                type='boolean',
-                disposition='/properties/isCurrent'
-            ),
-            is_online=dict(
-                type='boolean',
-                disposition='/properties/isOnline'
-            ),
-            api_revision_description=dict(
-                type='str',
-                disposition='/properties/apiRevisionDescription'
-            ),
-            api_version_description=dict(
-                type='str',
-                disposition='/properties/apiVersionDescription'
-            ),
-            api_version_set_id=dict(
-                type='str',
-                disposition='/properties/apiVersionSetId'
-            ),
-            subscription_required=dict(
-                type='boolean',
-                disposition='/properties/subscriptionRequired'
-            ),
-            source_api_id=dict(
-                type='str',
-                disposition='/properties/sourceApiId'
-            ),
-            display_name=dict(
-                type='str',
-                disposition='/properties/displayName'
-            ),
-            service_url=dict(
-                type='str',
-                disposition='/properties/serviceUrl'
-            ),
-            path=dict(
-                type='str',
-                disposition='/properties/*',
-                required=true
-            ),
-            protocols=dict(
-                type='list',
-                disposition='/properties/*',
-                choices=['http',
-                         'https']
-            ),
-            api_version_set=dict(
-                type='dict',
-                disposition='/properties/apiVersionSet',
-                options=dict(
-                    id=dict(
-                        type='str'
-                    ),
-                    name=dict(
-                        type='str'
-                    ),
-                    description=dict(
-                        type='str'
-                    ),
-                    versioning_scheme=dict(
-                        type='str',
-                        disposition='versioningScheme',
-                        choices=['Segment',
-                                 'Query',
-                                 'Header']
-                    ),
-                    version_query_name=dict(
-                        type='str',
-                        disposition='versionQueryName'
-                    ),
-                    version_header_name=dict(
-                        type='str',
-                        disposition='versionHeaderName'
-                    )
-                )
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.service_name = None
@@ -484,6 +372,9 @@ class AzureRMProductApi(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.state_snapshot = None
+        self.wait = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -505,35 +396,30 @@ class AzureRMProductApi(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
 
         resource_group = self.get_resource_group(self.resource_group)
 
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.ApiManagement' +
-                    '/service' +
-                    '/{{ service_name }}' +
-                    '/products' +
-                    '/{{ product_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ service_name }}', self.service_name)
-        self.url = self.url.replace('{{ product_name }}', self.product_name)
-        self.url = self.url.replace('{{ api_name }}', self.name)
-
-        old_response = self.get_resource()
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.ApiManagement/service/{{ service_name }}/products/{{ product_name }}/apis/{{ api_name }}',
+                                 subscription_id=self.subscription_id,
+                                 resource_group=self.resource_group,
+                                 service_name=self.service_name,
+                                 product_name=self.product_id,
+                                 api_name=self.name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        if self.check_mode and self.state_snapshot:
+            old_response = get_snapshot_resource(self.state_snapshot, self.url, self.fail)
+        if old_response is None:
+            old_response = self.get_resource()
 
         if not old_response:
             self.log("ProductApi instance doesn't exist")
@@ -548,12 +434,9 @@ class AzureRMProductApi(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                self.results['modifiers'] = modifiers
-                self.results['compare'] = []
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -564,6 +447,9 @@ class AzureRMProductApi(AzureRMModuleBaseExt):
                 return self.results
 
             response = self.create_update_resource()
+            if not self.wait:
+                self.results['id'] = self.url
+                response = None
 
             # if not old_response:
             self.results['changed'] = True
@@ -577,12 +463,13 @@ class AzureRMProductApi(AzureRMModuleBaseExt):
             if self.check_mode:
                 return self.results
 
-            self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
+            response = self.delete_resource()
+            if not self.wait:
+                self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                           'DELETE',
+                                                                           self.query_parameters,
+                                                                           response)
+            response = None
         else:
             self.log('ProductApi instance unchanged')
             self.results['changed'] = False
@@ -606,12 +493,18 @@ class AzureRMProductApi(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               self.body,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout if self.wait else 0,
                                               30)
         except CloudError as exc:
             self.log('Error attempting to create the ProductApi instance.')
             self.fail('Error creating the ProductApi instance: {0}'.format(str(exc)))
 
+        if not self.wait:
+            self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                       'PUT',
+                                                                       self.query_parameters,
+                                                                       response)
+
         try:
             response = json.loads(response.text)
         except Exception:
@@ -629,13 +522,20 @@ class AzureRMProductApi(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              0,
                                               30)
+            if self.wait:
+                self.mgmt_client.wait_for_deletion(self.url,
+                                                   self.query_parameters,
+                                                   self.header_parameters,
+                                                   response,
+                                                   self.polling_timeout,
+                                                   30)
         except CloudError as e:
             self.log('Error attempting to delete the ProductApi instance.')
             self.fail('Error deleting the ProductApi instance: {0}'.format(str(e)))
 
-        return True
+        return response
 
     def get_resource(self):
         # self.log('Checking if the ProductApi instance {0} is present'.format(self.))
@@ -647,10 +547,11 @@ class AzureRMProductApi(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout,
                                               30)
+            response = json.loads(response.text)
             found = True
-            self.log("Response : {0}".format(response))
+            log_debug(self, 'Response : {0}', response)
             # self.log("ProductApi instance : {0} found".format(response.name))
         except CloudError as e:
             self.log('Did not find the ProductApi instance.')
@@ -661,6 +562,8 @@ class AzureRMProductApi(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMProductApi()
 
 
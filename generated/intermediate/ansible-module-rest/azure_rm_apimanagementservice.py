@@ -405,6 +405,24 @@ options:
     description:
       - ETag of the resource.
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
+  polling_timeout:
+    description:
+      - Maximum time in seconds to wait for long running operation to complete.
+      - Status is polled as indicated by C(Azure-AsyncOperation), C(Location) and C(Retry-After) headers.
+    type: int
+    default: 3600
+  state_snapshot:
+    description:
+      - Path of state snapshot exported by M(azure_rm_statesnapshot).
+      - In check mode current state of the instance is taken from the snapshot instead of Azure, if the snapshot covers it.
+      - Instances of resource types, subscriptions or resource groups not exported to the snapshot are read from Azure.
+    type: path
   state:
     description:
       - Assert the state of the ApiManagementService.
@@ -1047,13 +1065,27 @@ etag:
   type: str
   sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_compare import get_comparator, create_merge_patch
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+from ansible.module_utils.azure_rm_common_log import log_debug
+from ansible.module_utils.azure_rm_common_snapshot import get_snapshot_resource
+from ansible.module_utils.azure_rm_common_url import build_url
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -1062,242 +1094,38 @@ except ImportError:
     pass
 
 
+ARG_SPEC = r'''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resourceGroupName", "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "serviceName", "required": true},
+    "notification_sender_email": {"type": "str", "disposition": "/properties/notificationSenderEmail"},
+    "hostname_configurations": {"type": "list", "disposition": "/properties/hostnameConfigurations", "options": {"type": {"type": "str", "choices": ["Proxy", "Portal", "Management", "Scm", "DeveloperPortal"], "required": true}, "host_name": {"type": "str", "disposition": "hostName", "required": true}, "key_vault_id": {"type": "str", "disposition": "keyVaultId"}, "encoded_certificate": {"type": "str", "disposition": "encodedCertificate"}, "certificate_password": {"type": "str", "disposition": "certificatePassword"}, "default_ssl_binding": {"type": "boolean", "disposition": "defaultSslBinding"}, "negotiate_client_certificate": {"type": "boolean", "disposition": "negotiateClientCertificate"}, "certificate": {"type": "dict", "options": {"expiry": {"type": "datetime", "required": true}, "thumbprint": {"type": "str", "required": true}, "subject": {"type": "str", "required": true}}}}},
+    "virtual_network_configuration": {"type": "dict", "disposition": "/properties/virtualNetworkConfiguration", "options": {"subnet_resource_id": {"type": "raw", "disposition": "subnetResourceId", "pattern": "//subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.Network/virtualNetworks/{{ virtual_network_name }}/subnets/{{ name }}"}}},
+    "additional_locations": {"type": "list", "disposition": "/properties/additionalLocations", "options": {"location": {"type": "str", "updatable": false, "required": true}, "sku": {"type": "dict", "required": true, "options": {"name": {"type": "str", "choices": ["Developer", "Standard", "Premium", "Basic", "Consumption"], "required": true}, "capacity": {"type": "number"}}}, "virtual_network_configuration": {"type": "dict", "disposition": "virtualNetworkConfiguration", "options": {"subnet_resource_id": {"type": "raw", "disposition": "subnetResourceId", "pattern": "//subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.Network/virtualNetworks/{{ virtual_network_name }}/subnets/{{ name }}"}}}}},
+    "custom_properties": {"type": "unknown[DictionaryType {\"$id\":\"2519\",\"$type\":\"DictionaryType\",\"valueType\":{\"$id\":\"2520\",\"$type\":\"PrimaryType\",\"knownPrimaryType\":\"string\",\"name\":{\"$id\":\"2521\",\"fixed\":false,\"raw\":\"String\"},\"deprecated\":false},\"supportsAdditionalProperties\":false,\"name\":{\"$id\":\"2522\",\"fixed\":false},\"deprecated\":false}]", "disposition": "/properties/customProperties"},
+    "certificates": {"type": "list", "disposition": "/properties/*", "options": {"encoded_certificate": {"type": "str", "disposition": "encodedCertificate"}, "certificate_password": {"type": "str", "disposition": "certificatePassword"}, "store_name": {"type": "str", "disposition": "storeName", "choices": ["CertificateAuthority", "Root"], "required": true}, "certificate": {"type": "dict", "options": {"expiry": {"type": "datetime", "required": true}, "thumbprint": {"type": "str", "required": true}, "subject": {"type": "str", "required": true}}}}},
+    "enable_client_certificate": {"type": "boolean", "disposition": "/properties/enableClientCertificate"},
+    "virtual_network_type": {"type": "str", "disposition": "/properties/virtualNetworkType", "choices": ["None", "External", "Internal"]},
+    "publisher_email": {"type": "str", "disposition": "/properties/publisherEmail", "required": true},
+    "publisher_name": {"type": "str", "disposition": "/properties/publisherName", "required": true},
+    "sku_name": {"type": "str", "disposition": "/sku/name", "choices": ["Developer", "Standard", "Premium", "Basic", "Consumption"], "required": true},
+    "sku_capacity": {"type": "number", "disposition": "/sku/capacity"},
+    "identity": {"type": "dict", "disposition": "/", "options": {"type": {"type": "str", "required": true}}},
+    "location": {"type": "str", "updatable": false, "disposition": "/", "required": true},
+    "wait": {"type": "bool", "default": true},
+    "polling_timeout": {"type": "int", "default": 3600},
+    "state_snapshot": {"type": "path"},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMApiManagementService(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resourceGroupName',
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='serviceName',
-                required=true
-            ),
-            notification_sender_email=dict(
-                type='str',
-                disposition='/properties/notificationSenderEmail'
-            ),
-            hostname_configurations=dict(
-                type='list',
-                disposition='/properties/hostnameConfigurations',
-                options=dict(
-                    type=dict(
-                        type='str',
-                        choices=['Proxy',
-                                 'Portal',
-                                 'Management',
-                                 'Scm',
-                                 'DeveloperPortal'],
-                        required=true
-                    ),
-                    host_name=dict(
-                        type='str',
-                        disposition='hostName',
-                        required=true
-                    ),
-                    key_vault_id=dict(
-                        type='str',
-                        disposition='keyVaultId'
-                    ),
-                    encoded_certificate=dict(
-                        type='str',
-                        disposition='encodedCertificate'
-                    ),
-                    certificate_password=dict(
-                        type='str',
-                        disposition='certificatePassword'
-                    ),
-                    default_ssl_binding=dict(
-                        type='boolean',
-                        disposition='defaultSslBinding'
-                    ),
-                    negotiate_client_certificate=dict(
-                        type='boolean',
-                        disposition='negotiateClientCertificate'
-                    ),
-                    certificate=dict(
-                        type='dict',
-                        options=dict(
-                            expiry=dict(
-                                type='datetime',
-                                required=true
-                            ),
-                            thumbprint=dict(
-                                type='str',
-                                required=true
-                            ),
-                            subject=dict(
-                                type='str',
-                                required=true
-                            )
-                        )
-                    )
-                )
-            ),
-            virtual_network_configuration=dict(
-                type='dict',
-                disposition='/properties/virtualNetworkConfiguration',
-                options=dict(
-                    subnet_resource_id=dict(
-                        type='raw',
-                        disposition='subnetResourceId',
-                        pattern=('//subscriptions/{{ subscription_id }}/resourceGroups'
-                                 '/{{ resource_group }}/providers/Microsoft.Network'
-                                 '/virtualNetworks/{{ virtual_network_name }}/subnets'
-                                 '/{{ name }}')
-                    )
-                )
-            ),
-            additional_locations=dict(
-                type='list',
-                disposition='/properties/additionalLocations',
-                options=dict(
-                    location=dict(
-                        type='str',
-                        updatable=False,
-                        required=true
-                    ),
-                    sku=dict(
-                        type='dict',
-                        required=true,
-                        options=dict(
-                            name=dict(
-                                type='str',
-                                choices=['Developer',
-                                         'Standard',
-                                         'Premium',
-                                         'Basic',
-                                         'Consumption'],
-                                required=true
-                            ),
-                            capacity=dict(
-                                type='number'
-                            )
-                        )
-                    ),
-                    virtual_network_configuration=dict(
-                        type='dict',
-                        disposition='virtualNetworkConfiguration',
-                        options=dict(
-                            subnet_resource_id=dict(
-                                type='raw',
-                                disposition='subnetResourceId',
-                                pattern=('//subscriptions/{{ subscription_id }}'
-                                         '/resourceGroups/{{ resource_group }}/providers'
-                                         '/Microsoft.Network/virtualNetworks'
-                                         '/{{ virtual_network_name }}/subnets/{{ name }}')
-                            )
-                        )
-                    )
-                )
-            ),
-            custom_properties=dict(
-                type='unknown[DictionaryType {"$id":"2519","$type":"DictionaryType","valueType":{"$id":"2520","$type":"PrimaryType","knownPrimaryType":"string","name":{"$id":"2521","fixed":false,"raw":"String"},"deprecated":false},"supportsAdditionalProperties":false,"name":{"$id":"2522","fixed":false},"deprecated":false}]',
-                disposition='/properties/customProperties'
-            ),
-            certificates=dict(
-                type='list',
-                disposition='/properties/*',
-                options=dict(
-                    encoded_certificate=dict(
-                        type='str',
-                        disposition='encodedCertificate'
-                    ),
-                    certificate_password=dict(
-                        type='str',
-                        disposition='certificatePassword'
-                    ),
-                    store_name=dict(
-                        type='str',
-                        disposition='storeName',
-                        choices=['CertificateAuthority',
-                                 'Root'],
-                        required=true
-                    ),
-                    certificate=dict(
-                        type='dict',
-                        options=dict(
-                            expiry=dict(
-                                type='datetime',
-                                required=true
-                            ),
-                            thumbprint=dict(
-                                type='str',
-                                required=true
-                            ),
-                            subject=dict(
-                                type='str',
-                                required=true
-                            )
-                        )
-                    )
-                )
-            ),
-            enable_client_certificate=dict(
-                type='boolean',
-                disposition='/properties/enableClientCertificate'
-            ),
-            virtual_network_type=dict(
-                type='str',
-                disposition='/properties/virtualNetworkType',
-                choices=['None',
-                         'External',
-                         'Internal']
-            ),
-            publisher_email=dict(
-                type='str',
-                disposition='/properties/publisherEmail',
-                required=true
-            ),
-            publisher_name=dict(
-                type='str',
-                disposition='/properties/publisherName',
-                required=true
-            ),
-            sku_name=dict(
-                type='str',
-                disposition='/sku/name',
-                choices=['Developer',
-                         'Standard',
-                         'Premium',
-                         'Basic',
-                         'Consumption'],
-                required=true
-            ),
-            sku_capacity=dict(
-                type='number',
-                disposition='/sku/capacity'
-            ),
-            identity=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    type=dict(
-                        type='str',
-                        required=true
-                    )
-                )
-            ),
-            location=dict(
-                type='str',
-                updatable=False,
-                disposition='/',
-                required=true
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.name = None
@@ -1309,6 +1137,9 @@ class AzureRMApiManagementService(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.state_snapshot = None
+        self.wait = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -1330,12 +1161,12 @@ class AzureRMApiManagementService(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
 
         resource_group = self.get_resource_group(self.resource_group)
@@ -1343,19 +1174,18 @@ class AzureRMApiManagementService(AzureRMModuleBaseExt):
         if 'location' not in self.body:
             self.body['location'] = resource_group.location
 
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.ApiManagement' +
-                    '/service' +
-                    '/{{ service_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ service_name }}', self.name)
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.ApiManagement/service/{{ service_name }}',
+                                 subscription_id=self.subscription_id,
+                                 resource_group=self.resource_group,
+                                 service_name=self.name)
+        except ValueError as exc:
+            self.fail(str(exc))
 
-        old_response = self.get_resource()
+        if self.check_mode and self.state_snapshot:
+            old_response = get_snapshot_resource(self.state_snapshot, self.url, self.fail)
+        if old_response is None:
+            old_response = self.get_resource()
 
         if not old_response:
             self.log("ApiManagementService instance doesn't exist")
@@ -1370,12 +1200,9 @@ class AzureRMApiManagementService(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                self.results['modifiers'] = modifiers
-                self.results['compare'] = []
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -1386,6 +1213,9 @@ class AzureRMApiManagementService(AzureRMModuleBaseExt):
                 return self.results
 
             response = self.create_update_resource()
+            if not self.wait:
+                self.results['id'] = self.url
+                response = None
 
             # if not old_response:
             self.results['changed'] = True
@@ -1399,12 +1229,13 @@ class AzureRMApiManagementService(AzureRMModuleBaseExt):
             if self.check_mode:
                 return self.results
 
-            self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
+            response = self.delete_resource()
+            if not self.wait:
+                self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                           'DELETE',
+                                                                           self.query_parameters,
+                                                                           response)
+            response = None
         else:
             self.log('ApiManagementService instance unchanged')
             self.results['changed'] = False
@@ -1419,7 +1250,7 @@ class AzureRMApiManagementService(AzureRMModuleBaseExt):
            self.results["sku"] = response["sku"]
            self.results["identity"] = response["identity"]
            self.results["location"] = response["location"]
-           self.results["etag"] = response["etag"]
+           self.results["etag"] = response.get("etag")
 
         return self.results
 
@@ -1427,18 +1258,36 @@ class AzureRMApiManagementService(AzureRMModuleBaseExt):
         # self.log('Creating / Updating the ApiManagementService instance {0}'.format(self.))
 
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'PUT',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              self.body,
-                                              self.status_code,
-                                              600,
-                                              30)
+            if self.to_do == Actions.Create:
+                response = self.mgmt_client.query(self.url,
+                                                  'PUT',
+                                                  self.query_parameters,
+                                                  self.header_parameters,
+                                                  self.body,
+                                                  self.status_code,
+                                                  self.polling_timeout if self.wait else 0,
+                                                  30)
+            else:
+                header_parameters = dict(self.header_parameters)
+                header_parameters['If-Match'] = '*'
+                response = self.mgmt_client.query(self.url,
+                                                  'PATCH',
+                                                  self.query_parameters,
+                                                  header_parameters,
+                                                  create_merge_patch(self.body, self.results['compare']),
+                                                  self.status_code,
+                                                  self.polling_timeout if self.wait else 0,
+                                                  30)
         except CloudError as exc:
             self.log('Error attempting to create the ApiManagementService instance.')
             self.fail('Error creating the ApiManagementService instance: {0}'.format(str(exc)))
 
+        if not self.wait:
+            self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                       'PUT' if self.to_do == Actions.Create else 'PATCH',
+                                                                       self.query_parameters,
+                                                                       response)
+
         try:
             response = json.loads(response.text)
         except Exception:
@@ -1456,13 +1305,20 @@ class AzureRMApiManagementService(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              0,
                                               30)
+            if self.wait:
+                self.mgmt_client.wait_for_deletion(self.url,
+                                                   self.query_parameters,
+                                                   self.header_parameters,
+                                                   response,
+                                                   self.polling_timeout,
+                                                   30)
         except CloudError as e:
             self.log('Error attempting to delete the ApiManagementService instance.')
             self.fail('Error deleting the ApiManagementService instance: {0}'.format(str(e)))
 
-        return True
+        return response
 
     def get_resource(self):
         # self.log('Checking if the ApiManagementService instance {0} is present'.format(self.))
@@ -1474,10 +1330,11 @@ class AzureRMApiManagementService(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout,
                                               30)
+            response = json.loads(response.text)
             found = True
-            self.log("Response : {0}".format(response))
+            log_debug(self, 'Response : {0}', response)
             # self.log("ApiManagementService instance : {0} found".format(response.name))
         except CloudError as e:
             self.log('Did not find the ApiManagementService instance.')
@@ -1488,6 +1345,8 @@ class AzureRMApiManagementService(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMApiManagementService()
 
 
@@ -954,6 +954,24 @@ options:
     description:
       - 'The ETag of the resource, used for concurrency statements.'
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
+  polling_timeout:
+    description:
+      - Maximum time in seconds to wait for long running operation to complete.
+      - Status is polled as indicated by C(Azure-AsyncOperation), C(Location) and C(Retry-After) headers.
+    type: int
+    default: 1800
+  state_snapshot:
+    description:
+      - Path of state snapshot exported by M(azure_rm_statesnapshot).
+      - In check mode current state of the instance is taken from the snapshot instead of Azure, if the snapshot covers it.
+      - Instances of resource types, subscriptions or resource groups not exported to the snapshot are read from Azure.
+    type: path
   state:
     description:
       - Assert the state of the Pool.
@@ -2381,13 +2399,27 @@ properties:
                   type: dict
                   sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_compare import get_comparator, create_merge_patch
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+from ansible.module_utils.azure_rm_common_log import log_debug
+from ansible.module_utils.azure_rm_common_snapshot import get_snapshot_resource
+from ansible.module_utils.azure_rm_common_url import build_url
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -2396,522 +2428,39 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resourceGroupName", "required": true},
+    "account_name": {"type": "str", "updatable": false, "disposition": "accountName", "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "poolName", "required": true},
+    "display_name": {"type": "str", "disposition": "/properties/displayName"},
+    "vm_size": {"type": "str", "disposition": "/properties/vmSize"},
+    "deployment_configuration": {"type": "dict", "disposition": "/properties/deploymentConfiguration", "options": {"cloud_service_configuration": {"type": "dict", "disposition": "cloudServiceConfiguration", "options": {"os_family": {"type": "str", "disposition": "osFamily", "required": true}, "os_version": {"type": "str", "disposition": "osVersion"}}}, "virtual_machine_configuration": {"type": "dict", "disposition": "virtualMachineConfiguration", "options": {"image_reference": {"type": "dict", "disposition": "imageReference", "required": true, "options": {"publisher": {"type": "str"}, "offer": {"type": "str"}, "sku": {"type": "str"}, "version": {"type": "str"}, "id": {"type": "raw", "pattern": "//subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.Compute/images/{{ name }}"}}}, "node_agent_sku_id": {"type": "str", "disposition": "nodeAgentSkuId", "required": true}, "windows_configuration": {"type": "dict", "disposition": "windowsConfiguration", "options": {"enable_automatic_updates": {"type": "boolean", "disposition": "enableAutomaticUpdates"}}}, "data_disks": {"type": "list", "disposition": "dataDisks", "options": {"lun": {"type": "number", "required": true}, "caching": {"type": "str", "choices": ["None", "ReadOnly", "ReadWrite"]}, "disk_size_gb": {"type": "number", "disposition": "diskSizeGB", "required": true}, "storage_account_type": {"type": "str", "disposition": "storageAccountType", "choices": ["Standard_LRS", "Premium_LRS"]}}}, "license_type": {"type": "str", "disposition": "licenseType"}, "container_configuration": {"type": "dict", "disposition": "containerConfiguration", "options": {"type": {"type": "str", "required": true}, "container_image_names": {"type": "list", "disposition": "containerImageNames"}, "container_registries": {"type": "list", "disposition": "containerRegistries"}}}}}}},
+    "scale_settings": {"type": "dict", "disposition": "/properties/scaleSettings", "options": {"fixed_scale": {"type": "dict", "disposition": "fixedScale", "options": {"resize_timeout": {"type": "unknown-primary[timeSpan]", "disposition": "resizeTimeout"}, "target_dedicated_nodes": {"type": "number", "disposition": "targetDedicatedNodes"}, "target_low_priority_nodes": {"type": "number", "disposition": "targetLowPriorityNodes"}, "node_deallocation_option": {"type": "str", "disposition": "nodeDeallocationOption", "choices": ["Requeue", "Terminate", "TaskCompletion", "RetainedData"]}}}, "auto_scale": {"type": "dict", "disposition": "autoScale", "options": {"formula": {"type": "str", "required": true}, "evaluation_interval": {"type": "unknown-primary[timeSpan]", "disposition": "evaluationInterval"}}}}},
+    "inter_node_communication": {"type": "str", "disposition": "/properties/interNodeCommunication", "choices": ["Enabled", "Disabled"]},
+    "network_configuration": {"type": "dict", "disposition": "/properties/networkConfiguration", "options": {"subnet_id": {"type": "raw", "disposition": "subnetId", "pattern": "//subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.Network/virtualNetworks/{{ virtual_network_name }}/subnets/{{ name }}"}, "endpoint_configuration": {"type": "dict", "disposition": "endpointConfiguration", "options": {"inbound_nat_pools": {"type": "list", "disposition": "inboundNatPools", "required": true, "options": {"name": {"type": "str", "required": true}, "protocol": {"type": "str", "choices": ["TCP", "UDP"], "required": true}, "backend_port": {"type": "number", "disposition": "backendPort", "required": true}, "frontend_port_range_start": {"type": "number", "disposition": "frontendPortRangeStart", "required": true}, "frontend_port_range_end": {"type": "number", "disposition": "frontendPortRangeEnd", "required": true}, "network_security_group_rules": {"type": "list", "disposition": "networkSecurityGroupRules"}}}}}}},
+    "max_tasks_per_node": {"type": "number", "disposition": "/properties/maxTasksPerNode"},
+    "task_scheduling_policy": {"type": "dict", "disposition": "/properties/taskSchedulingPolicy", "options": {"node_fill_type": {"type": "str", "disposition": "nodeFillType", "choices": ["Spread", "Pack"], "required": true}}},
+    "user_accounts": {"type": "list", "disposition": "/properties/userAccounts", "options": {"name": {"type": "str", "required": true}, "password": {"type": "str", "no_log": true, "required": true}, "elevation_level": {"type": "str", "disposition": "elevationLevel", "choices": ["NonAdmin", "Admin"]}, "linux_user_configuration": {"type": "dict", "disposition": "linuxUserConfiguration", "options": {"uid": {"type": "number"}, "gid": {"type": "number"}, "ssh_private_key": {"type": "str", "disposition": "sshPrivateKey"}}}, "windows_user_configuration": {"type": "dict", "disposition": "windowsUserConfiguration", "options": {"login_mode": {"type": "str", "disposition": "loginMode", "choices": ["Batch", "Interactive"]}}}}},
+    "metadata": {"type": "list", "disposition": "/properties/*", "options": {"name": {"type": "str", "required": true}, "value": {"type": "str", "required": true}}},
+    "start_task": {"type": "dict", "disposition": "/properties/startTask", "options": {"command_line": {"type": "str", "disposition": "commandLine"}, "resource_files": {"type": "list", "disposition": "resourceFiles", "options": {"auto_storage_container_name": {"type": "str", "disposition": "autoStorageContainerName"}, "storage_container_url": {"type": "str", "disposition": "storageContainerUrl"}, "http_url": {"type": "str", "disposition": "httpUrl"}, "blob_prefix": {"type": "str", "disposition": "blobPrefix"}, "file_path": {"type": "str", "disposition": "filePath"}, "file_mode": {"type": "str", "disposition": "fileMode"}}}, "environment_settings": {"type": "list", "disposition": "environmentSettings", "options": {"name": {"type": "str", "required": true}, "value": {"type": "str"}}}, "user_identity": {"type": "dict", "disposition": "userIdentity", "options": {"user_name": {"type": "str", "disposition": "userName"}, "auto_user": {"type": "dict", "disposition": "autoUser", "options": {"scope": {"type": "str", "choices": ["Task", "Pool"]}, "elevation_level": {"type": "str", "disposition": "elevationLevel", "choices": ["NonAdmin", "Admin"]}}}}}, "max_task_retry_count": {"type": "number", "disposition": "maxTaskRetryCount"}, "wait_for_success": {"type": "boolean", "disposition": "waitForSuccess"}, "container_settings": {"type": "dict", "disposition": "containerSettings", "options": {"container_run_options": {"type": "str", "disposition": "containerRunOptions"}, "image_name": {"type": "str", "disposition": "imageName", "required": true}, "registry": {"type": "dict", "options": {"registry_server": {"type": "str", "disposition": "registryServer"}, "username": {"type": "str", "required": true}, "password": {"type": "str", "no_log": true, "required": true}}}}}}},
+    "certificates": {"type": "list", "disposition": "/properties/*", "options": {"id": {"type": "raw", "required": true, "pattern": "//subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.Batch/batchAccounts/{{ batch_account_name }}/pools/{{ pool_name }}/certificates/{{ name }}"}, "store_location": {"type": "str", "disposition": "storeLocation", "choices": ["CurrentUser", "LocalMachine"]}, "store_name": {"type": "str", "disposition": "storeName"}, "visibility": {"type": "list", "choices": ["StartTask", "Task", "RemoteUser"]}}},
+    "application_packages": {"type": "list", "disposition": "/properties/applicationPackages", "options": {"id": {"type": "raw", "required": true, "pattern": "//subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.Batch/batchAccounts/{{ batch_account_name }}/pools/{{ pool_name }}/applications/{{ name }}"}, "version": {"type": "str"}}},
+    "application_licenses": {"type": "list", "disposition": "/properties/applicationLicenses"},
+    "wait": {"type": "bool", "default": true},
+    "polling_timeout": {"type": "int", "default": 1800},
+    "state_snapshot": {"type": "path"},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMPool(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resourceGroupName',
-                required=true
-            ),
-            account_name=dict(
-                type='str',
-                updatable=False,
-                disposition='accountName',
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='poolName',
-                required=true
-            ),
-            display_name=dict(
-                type='str',
-                disposition='/properties/displayName'
-            ),
-            vm_size=dict(
-                type='str',
-                disposition='/properties/vmSize'
-            ),
-            deployment_configuration=dict(
-                type='dict',
-                disposition='/properties/deploymentConfiguration',
-                options=dict(
-                    cloud_service_configuration=dict(
-                        type='dict',
-                        disposition='cloudServiceConfiguration',
-                        options=dict(
-                            os_family=dict(
-                                type='str',
-                                disposition='osFamily',
-                                required=true
-                            ),
-                            os_version=dict(
-                                type='str',
-                                disposition='osVersion'
-                            )
-                        )
-                    ),
-                    virtual_machine_configuration=dict(
-                        type='dict',
-                        disposition='virtualMachineConfiguration',
-                        options=dict(
-                            image_reference=dict(
-                                type='dict',
-                                disposition='imageReference',
-                                required=true,
-                                options=dict(
-                                    publisher=dict(
-                                        type='str'
-                                    ),
-                                    offer=dict(
-                                        type='str'
-                                    ),
-                                    sku=dict(
-                                        type='str'
-                                    ),
-                                    version=dict(
-                                        type='str'
-                                    ),
-                                    id=dict(
-                                        type='raw',
-                                        pattern=('//subscriptions/{{ subscription_id }}'
-                                                 '/resourceGroups/{{ resource_group }}'
-                                                 '/providers/Microsoft.Compute/images'
-                                                 '/{{ name }}')
-                                    )
-                                )
-                            ),
-                            node_agent_sku_id=dict(
-                                type='str',
-                                disposition='nodeAgentSkuId',
-                                required=true
-                            ),
-                            windows_configuration=dict(
-                                type='dict',
-                                disposition='windowsConfiguration',
-                                options=dict(
-                                    enable_automatic_updates=dict(
-                                        type='boolean',
-                                        disposition='enableAutomaticUpdates'
-                                    )
-                                )
-                            ),
-                            data_disks=dict(
-                                type='list',
-                                disposition='dataDisks',
-                                options=dict(
-                                    lun=dict(
-                                        type='number',
-                                        required=true
-                                    ),
-                                    caching=dict(
-                                        type='str',
-                                        choices=['None',
-                                                 'ReadOnly',
-                                                 'ReadWrite']
-                                    ),
-                                    disk_size_gb=dict(
-                                        type='number',
-                                        disposition='diskSizeGB',
-                                        required=true
-                                    ),
-                                    storage_account_type=dict(
-                                        type='str',
-                                        disposition='storageAccountType',
-                                        choices=['Standard_LRS',
-                                                 'Premium_LRS']
-                                    )
-                                )
-                            ),
-                            license_type=dict(
-                                type='str',
-                                disposition='licenseType'
-                            ),
-                            container_configuration=dict(
-                                type='dict',
-                                disposition='containerConfiguration',
-                                options=dict(
-                                    type=dict(
-                                        type='str',
-                                        required=true
-                                    ),
-                                    container_image_names=dict(
-                                        type='list',
-                                        disposition='containerImageNames'
-                                    ),
-                                    container_registries=dict(
-                                        type='list',
-                                        disposition='containerRegistries'
-                                    )
-                                )
-                            )
-                        )
-                    )
-                )
-            ),
-            scale_settings=dict(
-                type='dict',
-                disposition='/properties/scaleSettings',
-                options=dict(
-                    fixed_scale=dict(
-                        type='dict',
-                        disposition='fixedScale',
-                        options=dict(
-                            resize_timeout=dict(
-                                type='unknown-primary[timeSpan]',
-                                disposition='resizeTimeout'
-                            ),
-                            target_dedicated_nodes=dict(
-                                type='number',
-                                disposition='targetDedicatedNodes'
-                            ),
-                            target_low_priority_nodes=dict(
-                                type='number',
-                                disposition='targetLowPriorityNodes'
-                            ),
-                            node_deallocation_option=dict(
-                                type='str',
-                                disposition='nodeDeallocationOption',
-                                choices=['Requeue',
-                                         'Terminate',
-                                         'TaskCompletion',
-                                         'RetainedData']
-                            )
-                        )
-                    ),
-                    auto_scale=dict(
-                        type='dict',
-                        disposition='autoScale',
-                        options=dict(
-                            formula=dict(
-                                type='str',
-                                required=true
-                            ),
-                            evaluation_interval=dict(
-                                type='unknown-primary[timeSpan]',
-                                disposition='evaluationInterval'
-                            )
-                        )
-                    )
-                )
-            ),
-            inter_node_communication=dict(
-                type='str',
-                disposition='/properties/interNodeCommunication',
-                choices=['Enabled',
-                         'Disabled']
-            ),
-            network_configuration=dict(
-                type='dict',
-                disposition='/properties/networkConfiguration',
-                options=dict(
-                    subnet_id=dict(
-                        type='raw',
-                        disposition='subnetId',
-                        pattern=('//subscriptions/{{ subscription_id }}/resourceGroups'
-                                 '/{{ resource_group }}/providers/Microsoft.Network'
-                                 '/virtualNetworks/{{ virtual_network_name }}/subnets'
-                                 '/{{ name }}')
-                    ),
-                    endpoint_configuration=dict(
-                        type='dict',
-                        disposition='endpointConfiguration',
-                        options=dict(
-                            inbound_nat_pools=dict(
-                                type='list',
-                                disposition='inboundNatPools',
-                                required=true,
-                                options=dict(
-                                    name=dict(
-                                        type='str',
-                                        required=true
-                                    ),
-                                    protocol=dict(
-                                        type='str',
-                                        choices=['TCP',
-                                                 'UDP'],
-                                        required=true
-                                    ),
-                                    backend_port=dict(
-                                        type='number',
-                                        disposition='backendPort',
-                                        required=true
-                                    ),
-                                    frontend_port_range_start=dict(
-                                        type='number',
-                                        disposition='frontendPortRangeStart',
-                                        required=true
-                                    ),
-                                    frontend_port_range_end=dict(
-                                        type='number',
-                                        disposition='frontendPortRangeEnd',
-                                        required=true
-                                    ),
-                                    network_security_group_rules=dict(
-                                        type='list',
-                                        disposition='networkSecurityGroupRules'
-                                    )
-                                )
-                            )
-                        )
-                    )
-                )
-            ),
-            max_tasks_per_node=dict(
-                type='number',
-                disposition='/properties/maxTasksPerNode'
-            ),
-            task_scheduling_policy=dict(
-                type='dict',
-                disposition='/properties/taskSchedulingPolicy',
-                options=dict(
-                    node_fill_type=dict(
-                        type='str',
-                        disposition='nodeFillType',
-                        choices=['Spread',
-                                 'Pack'],
-                        required=true
-                    )
-                )
-            ),
-            user_accounts=dict(
-                type='list',
-                disposition='/properties/userAccounts',
-                options=dict(
-                    name=dict(
-                        type='str',
-                        required=true
-                    ),
-                    password=dict(
-                        type='str',
-                        no_log=True,
-                        required=true
-                    ),
-                    elevation_level=dict(
-                        type='str',
-                        disposition='elevationLevel',
-                        choices=['NonAdmin',
-                                 'Admin']
-                    ),
-                    linux_user_configuration=dict(
-                        type='dict',
-                        disposition='linuxUserConfiguration',
-                        options=dict(
-                            uid=dict(
-                                type='number'
-                            ),
-                            gid=dict(
-                                type='number'
-                            ),
-                            ssh_private_key=dict(
-                                type='str',
-                                disposition='sshPrivateKey'
-                            )
-                        )
-                    ),
-                    windows_user_configuration=dict(
-                        type='dict',
-                        disposition='windowsUserConfiguration',
-                        options=dict(
-                            login_mode=dict(
-                                type='str',
-                                disposition='loginMode',
-                                choices=['Batch',
-                                         'Interactive']
-                            )
-                        )
-                    )
-                )
-            ),
-            metadata=dict(
-                type='list',
-                disposition='/properties/*',
-                options=dict(
-                    name=dict(
-                        type='str',
-                        required=true
-                    ),
-                    value=dict(
-                        type='str',
-                        required=true
-                    )
-                )
-            ),
-            start_task=dict(
-                type='dict',
-                disposition='/properties/startTask',
-                options=dict(
-                    command_line=dict(
-                        type='str',
-                        disposition='commandLine'
-                    ),
-                    resource_files=dict(
-                        type='list',
-                        disposition='resourceFiles',
-                        options=dict(
-                            auto_storage_container_name=dict(
-                                type='str',
-                                disposition='autoStorageContainerName'
-                            ),
-                            storage_container_url=dict(
-                                type='str',
-                                disposition='storageContainerUrl'
-                            ),
-                            http_url=dict(
-                                type='str',
-                                disposition='httpUrl'
-                            ),
-                            blob_prefix=dict(
-                                type='str',
-                                disposition='blobPrefix'
-                            ),
-                            file_path=dict(
-                                type='str',
-                                disposition='filePath'
-                            ),
-                            file_mode=dict(
-                                type='str',
-                                disposition='fileMode'
-                            )
-                        )
-                    ),
-                    environment_settings=dict(
-                        type='list',
-                        disposition='environmentSettings',
-                        options=dict(
-                            name=dict(
-                                type='str',
-                                required=true
-                            ),
-                            value=dict(
-                                type='str'
-                            )
-                        )
-                    ),
-                    user_identity=dict(
-                        type='dict',
-                        disposition='userIdentity',
-                        options=dict(
-                            user_name=dict(
-                                type='str',
-                                disposition='userName'
-                            ),
-                            auto_user=dict(
-                                type='dict',
-                                disposition='autoUser',
-                                options=dict(
-                                    scope=dict(
-                                        type='str',
-                                        choices=['Task',
-                                                 'Pool']
-                                    ),
-                                    elevation_level=dict(
-                                        type='str',
-                                        disposition='elevationLevel',
-                                        choices=['NonAdmin',
-                                                 'Admin']
-                                    )
-                                )
-                            )
-                        )
-                    ),
-                    max_task_retry_count=dict(
-                        type='number',
-                        disposition='maxTaskRetryCount'
-                    ),
-                    wait_for_success=dict(
-                        type='boolean',
-                        disposition='waitForSuccess'
-                    ),
-                    container_settings=dict(
-                        type='dict',
-                        disposition='containerSettings',
-                        options=dict(
-                            container_run_options=dict(
-                                type='str',
-                                disposition='containerRunOptions'
-                            ),
-                            image_name=dict(
-                                type='str',
-                                disposition='imageName',
-                                required=true
-                            ),
-                            registry=dict(
-                                type='dict',
-                                options=dict(
-                                    registry_server=dict(
-                                        type='str',
-                                        disposition='registryServer'
-                                    ),
-                                    username=dict(
-                                        type='str',
-                                        required=true
-                                    ),
-                                    password=dict(
-                                        type='str',
-                                        no_log=True,
-                                        required=true
-                                    )
-                                )
-                            )
-                        )
-                    )
-                )
-            ),
-            certificates=dict(
-                type='list',
-                disposition='/properties/*',
-                options=dict(
-                    id=dict(
-                        type='raw',
-                        required=true,
-                        pattern=('//subscriptions/{{ subscription_id }}/resourceGroups'
-                                 '/{{ resource_group }}/providers/Microsoft.Batch'
-                                 '/batchAccounts/{{ batch_account_name }}/pools'
-                                 '/{{ pool_name }}/certificates/{{ name }}')
-                    ),
-                    store_location=dict(
-                        type='str',
-                        disposition='storeLocation',
-                        choices=['CurrentUser',
-                                 'LocalMachine']
-                    ),
-                    store_name=dict(
-                        type='str',
-                        disposition='storeName'
-                    ),
-                    visibility=dict(
-                        type='list',
-                        choices=['StartTask',
-                                 'Task',
-                                 'RemoteUser']
-                    )
-                )
-            ),
-            application_packages=dict(
-                type='list',
-                disposition='/properties/applicationPackages',
-                options=dict(
-                    id=dict(
-                        type='raw',
-                        required=true,
-                        pattern=('//subscriptions/{{ subscription_id }}/resourceGroups'
-                                 '/{{ resource_group }}/providers/Microsoft.Batch'
-                                 '/batchAccounts/{{ batch_account_name }}/pools'
-                                 '/{{ pool_name }}/applications/{{ name }}')
-                    ),
-                    version=dict(
-                        type='str'
-                    )
-                )
-            ),
-            application_licenses=dict(
-                type='list',
-                disposition='/properties/applicationLicenses'
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.account_name = None
@@ -2922,6 +2471,9 @@ class AzureRMPool(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.state_snapshot = None
+        self.wait = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -2943,32 +2495,29 @@ class AzureRMPool(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
 
         resource_group = self.get_resource_group(self.resource_group)
 
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.Batch' +
-                    '/batchAccounts' +
-                    '/{{ batch_account_name }}' +
-                    '/pools' +
-                    '/{{ pool_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ batch_account_name }}', self.batch_account_name)
-        self.url = self.url.replace('{{ pool_name }}', self.name)
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.Batch/batchAccounts/{{ batch_account_name }}/pools/{{ pool_name }}',
+                                 subscription_id=self.subscription_id,
+                                 resource_group=self.resource_group,
+                                 batch_account_name=self.account_name,
+                                 pool_name=self.name)
+        except ValueError as exc:
+            self.fail(str(exc))
 
-        old_response = self.get_resource()
+        if self.check_mode and self.state_snapshot:
+            old_response = get_snapshot_resource(self.state_snapshot, self.url, self.fail)
+        if old_response is None:
+            old_response = self.get_resource()
 
         if not old_response:
             self.log("Pool instance doesn't exist")
@@ -2983,12 +2532,9 @@ class AzureRMPool(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                self.results['modifiers'] = modifiers
-                self.results['compare'] = []
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -2999,6 +2545,9 @@ class AzureRMPool(AzureRMModuleBaseExt):
                 return self.results
 
             response = self.create_update_resource()
+            if not self.wait:
+                self.results['id'] = self.url
+                response = None
 
             # if not old_response:
             self.results['changed'] = True
@@ -3012,12 +2561,13 @@ class AzureRMPool(AzureRMModuleBaseExt):
             if self.check_mode:
                 return self.results
 
-            self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
+            response = self.delete_resource()
+            if not self.wait:
+                self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                           'DELETE',
+                                                                           self.query_parameters,
+                                                                           response)
+            response = None
         else:
             self.log('Pool instance unchanged')
             self.results['changed'] = False
@@ -3027,7 +2577,7 @@ class AzureRMPool(AzureRMModuleBaseExt):
            self.results["id"] = response["id"]
            self.results["name"] = response["name"]
            self.results["type"] = response["type"]
-           self.results["etag"] = response["etag"]
+           self.results["etag"] = response.get("etag")
            self.results["properties"] = response["properties"]
 
         return self.results
@@ -3043,21 +2593,29 @@ class AzureRMPool(AzureRMModuleBaseExt):
                                                   self.header_parameters,
                                                   self.body,
                                                   self.status_code,
-                                                  600,
+                                                  self.polling_timeout if self.wait else 0,
                                                   30)
             else:
+                header_parameters = dict(self.header_parameters)
+                header_parameters['If-Match'] = '*'
                 response = self.mgmt_client.query(self.url,
-                                                  'PUT',
+                                                  'PATCH',
                                                   self.query_parameters,
-                                                  self.header_parameters,
-                                                  self.body,
+                                                  header_parameters,
+                                                  create_merge_patch(self.body, self.results['compare']),
                                                   self.status_code,
-                                                  600,
+                                                  self.polling_timeout if self.wait else 0,
                                                   30)
         except CloudError as exc:
             self.log('Error attempting to create the Pool instance.')
             self.fail('Error creating the Pool instance: {0}'.format(str(exc)))
 
+        if not self.wait:
+            self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                       'PUT' if self.to_do == Actions.Create else 'PATCH',
+                                                                       self.query_parameters,
+                                                                       response)
+
         try:
             response = json.loads(response.text)
         except Exception:
@@ -3075,13 +2633,20 @@ class AzureRMPool(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              0,
                                               30)
+            if self.wait:
+                self.mgmt_client.wait_for_deletion(self.url,
+                                                   self.query_parameters,
+                                                   self.header_parameters,
+                                                   response,
+                                                   self.polling_timeout,
+                                                   30)
         except CloudError as e:
             self.log('Error attempting to delete the Pool instance.')
             self.fail('Error deleting the Pool instance: {0}'.format(str(e)))
 
-        return True
+        return response
 
     def get_resource(self):
         # self.log('Checking if the Pool instance {0} is present'.format(self.))
@@ -3093,10 +2658,11 @@ class AzureRMPool(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout,
                                               30)
+            response = json.loads(response.text)
             found = True
-            self.log("Response : {0}".format(response))
+            log_debug(self, 'Response : {0}', response)
             # self.log("Pool instance : {0} found".format(response.name))
         except CloudError as e:
             self.log('Did not find the Pool instance.')
@@ -3107,6 +2673,8 @@ class AzureRMPool(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMPool()
 
 
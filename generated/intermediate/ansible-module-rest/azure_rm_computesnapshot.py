@@ -193,6 +193,24 @@ options:
     description:
       - Unused. Always Null.
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
+  polling_timeout:
+    description:
+      - Maximum time in seconds to wait for long running operation to complete.
+      - Status is polled as indicated by C(Azure-AsyncOperation), C(Location) and C(Retry-After) headers.
+    type: int
+    default: 600
+  state_snapshot:
+    description:
+      - Path of state snapshot exported by M(azure_rm_statesnapshot).
+      - In check mode current state of the instance is taken from the snapshot instead of Azure, if the snapshot covers it.
+      - Instances of resource types, subscriptions or resource groups not exported to the snapshot are read from Azure.
+    type: path
   state:
     description:
       - Assert the state of the Snapshot.
@@ -490,13 +508,27 @@ properties:
       type: str
       sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_compare import get_comparator, create_merge_patch
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+from ansible.module_utils.azure_rm_common_log import log_debug
+from ansible.module_utils.azure_rm_common_snapshot import get_snapshot_resource
+from ansible.module_utils.azure_rm_common_url import build_url
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -505,157 +537,31 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resourceGroupName", "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "snapshotName", "required": true},
+    "location": {"type": "str", "updatable": false, "disposition": "/", "required": true},
+    "sku": {"type": "dict", "disposition": "/", "options": {"name": {"type": "str", "choices": ["Standard_LRS", "Premium_LRS", "Standard_ZRS"]}}},
+    "os_type": {"type": "str", "disposition": "/properties/osType", "choices": ["Windows", "Linux"]},
+    "hyper_vgeneration": {"type": "str", "disposition": "/properties/hyperVGeneration", "choices": ["V1", "V2"]},
+    "creation_data": {"type": "dict", "disposition": "/properties/creationData", "required": true, "options": {"create_option": {"type": "str", "disposition": "createOption", "choices": ["Empty", "Attach", "FromImage", "Import", "Copy", "Restore", "Upload"], "required": true}, "storage_account_id": {"type": "str", "disposition": "storageAccountId"}, "image_reference": {"type": "dict", "disposition": "imageReference", "options": {"id": {"type": "str", "required": true}, "lun": {"type": "number"}}}, "source_uri": {"type": "str", "disposition": "sourceUri"}, "source_resource_id": {"type": "str", "disposition": "sourceResourceId"}}},
+    "disk_size_gb": {"type": "number", "disposition": "/properties/diskSizeGB"},
+    "encryption_settings_collection": {"type": "dict", "disposition": "/properties/encryptionSettingsCollection", "options": {"enabled": {"type": "boolean", "required": true}, "encryption_settings": {"type": "list", "disposition": "encryptionSettings", "options": {"disk_encryption_key": {"type": "dict", "disposition": "diskEncryptionKey", "options": {"source_vault": {"type": "dict", "disposition": "sourceVault", "required": true}, "secret_url": {"type": "str", "disposition": "secretUrl", "required": true}}}, "key_encryption_key": {"type": "dict", "disposition": "keyEncryptionKey", "options": {"source_vault": {"type": "dict", "disposition": "sourceVault", "required": true}, "key_url": {"type": "str", "disposition": "keyUrl", "required": true}}}}}}},
+    "wait": {"type": "bool", "default": true},
+    "polling_timeout": {"type": "int", "default": 600},
+    "state_snapshot": {"type": "path"},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMSnapshots(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resourceGroupName',
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='snapshotName',
-                required=true
-            ),
-            location=dict(
-                type='str',
-                updatable=False,
-                disposition='/',
-                required=true
-            ),
-            sku=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    name=dict(
-                        type='str',
-                        choices=['Standard_LRS',
-                                 'Premium_LRS',
-                                 'Standard_ZRS']
-                    )
-                )
-            ),
-            os_type=dict(
-                type='str',
-                disposition='/properties/osType',
-                choices=['Windows',
-                         'Linux']
-            ),
-            hyper_vgeneration=dict(
-                type='str',
-                disposition='/properties/hyperVGeneration',
-                choices=['V1',
-                         'V2']
-            ),
-            creation_data=dict(
-                type='dict',
-                disposition='/properties/creationData',
-                required=true,
-                options=dict(
-                    create_option=dict(
-                        type='str',
-                        disposition='createOption',
-                        choices=['Empty',
-                                 'Attach',
-                                 'FromImage',
-                                 'Import',
-                                 'Copy',
-                                 'Restore',
-                                 'Upload'],
-                        required=true
-                    ),
-                    storage_account_id=dict(
-                        type='str',
-                        disposition='storageAccountId'
-                    ),
-                    image_reference=dict(
-                        type='dict',
-                        disposition='imageReference',
-                        options=dict(
-                            id=dict(
-                                type='str',
-                                required=true
-                            ),
-                            lun=dict(
-                                type='number'
-                            )
-                        )
-                    ),
-                    source_uri=dict(
-                        type='str',
-                        disposition='sourceUri'
-                    ),
-                    source_resource_id=dict(
-                        type='str',
-                        disposition='sourceResourceId'
-                    )
-                )
-            ),
-            disk_size_gb=dict(
-                type='number',
-                disposition='/properties/diskSizeGB'
-            ),
-            encryption_settings_collection=dict(
-                type='dict',
-                disposition='/properties/encryptionSettingsCollection',
-                options=dict(
-                    enabled=dict(
-                        type='boolean',
-                        required=true
-                    ),
-                    encryption_settings=dict(
-                        type='list',
-                        disposition='encryptionSettings',
-                        options=dict(
-                            disk_encryption_key=dict(
-                                type='dict',
-                                disposition='diskEncryptionKey',
-                                options=dict(
-                                    source_vault=dict(
-                                        type='dict',
-                                        disposition='sourceVault',
-                                        required=true
-                                    ),
-                                    secret_url=dict(
-                                        type='str',
-                                        disposition='secretUrl',
-                                        required=true
-                                    )
-                                )
-                            ),
-                            key_encryption_key=dict(
-                                type='dict',
-                                disposition='keyEncryptionKey',
-                                options=dict(
-                                    source_vault=dict(
-                                        type='dict',
-                                        disposition='sourceVault',
-                                        required=true
-                                    ),
-                                    key_url=dict(
-                                        type='str',
-                                        disposition='keyUrl',
-                                        required=true
-                                    )
-                                )
-                            )
-                        )
-                    )
-                )
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.name = None
@@ -667,6 +573,9 @@ class AzureRMSnapshots(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.state_snapshot = None
+        self.wait = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -688,12 +597,12 @@ class AzureRMSnapshots(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
 
         resource_group = self.get_resource_group(self.resource_group)
@@ -701,19 +610,18 @@ class AzureRMSnapshots(AzureRMModuleBaseExt):
         if 'location' not in self.body:
             self.body['location'] = resource_group.location
 
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.Compute' +
-                    '/snapshots' +
-                    '/{{ snapshot_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ snapshot_name }}', self.name)
-
-        old_response = self.get_resource()
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.Compute/snapshots/{{ snapshot_name }}',
+                                 subscription_id=self.subscription_id,
+                                 resource_group=self.resource_group,
+                                 snapshot_name=self.name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        if self.check_mode and self.state_snapshot:
+            old_response = get_snapshot_resource(self.state_snapshot, self.url, self.fail)
+        if old_response is None:
+            old_response = self.get_resource()
 
         if not old_response:
             self.log("Snapshot instance doesn't exist")
@@ -728,12 +636,9 @@ class AzureRMSnapshots(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                self.results['modifiers'] = modifiers
-                self.results['compare'] = []
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -744,6 +649,9 @@ class AzureRMSnapshots(AzureRMModuleBaseExt):
                 return self.results
 
             response = self.create_update_resource()
+            if not self.wait:
+                self.results['id'] = self.url
+                response = None
 
             # if not old_response:
             self.results['changed'] = True
@@ -757,12 +665,13 @@ class AzureRMSnapshots(AzureRMModuleBaseExt):
             if self.check_mode:
                 return self.results
 
-            self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
+            response = self.delete_resource()
+            if not self.wait:
+                self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                           'DELETE',
+                                                                           self.query_parameters,
+                                                                           response)
+            response = None
         else:
             self.log('Snapshot instance unchanged')
             self.results['changed'] = False
@@ -774,7 +683,7 @@ class AzureRMSnapshots(AzureRMModuleBaseExt):
            self.results["type"] = response["type"]
            self.results["location"] = response["location"]
            self.results["tags"] = response["tags"]
-           self.results["managed_by"] = response["managed_by"]
+           self.results["managed_by"] = response.get("managed_by")
            self.results["sku"] = response["sku"]
            self.results["properties"] = response["properties"]
 
@@ -784,18 +693,36 @@ class AzureRMSnapshots(AzureRMModuleBaseExt):
         # self.log('Creating / Updating the Snapshot instance {0}'.format(self.))
 
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'PUT',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              self.body,
-                                              self.status_code,
-                                              600,
-                                              30)
+            if self.to_do == Actions.Create:
+                response = self.mgmt_client.query(self.url,
+                                                  'PUT',
+                                                  self.query_parameters,
+                                                  self.header_parameters,
+                                                  self.body,
+                                                  self.status_code,
+                                                  self.polling_timeout if self.wait else 0,
+                                                  30)
+            else:
+                header_parameters = dict(self.header_parameters)
+                header_parameters['If-Match'] = '*'
+                response = self.mgmt_client.query(self.url,
+                                                  'PATCH',
+                                                  self.query_parameters,
+                                                  header_parameters,
+                                                  create_merge_patch(self.body, self.results['compare']),
+                                                  self.status_code,
+                                                  self.polling_timeout if self.wait else 0,
+                                                  30)
         except CloudError as exc:
             self.log('Error attempting to create the Snapshot instance.')
             self.fail('Error creating the Snapshot instance: {0}'.format(str(exc)))
 
+        if not self.wait:
+            self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                       'PUT' if self.to_do == Actions.Create else 'PATCH',
+                                                                       self.query_parameters,
+                                                                       response)
+
         try:
             response = json.loads(response.text)
         except Exception:
@@ -813,13 +740,20 @@ class AzureRMSnapshots(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              0,
                                               30)
+            if self.wait:
+                self.mgmt_client.wait_for_deletion(self.url,
+                                                   self.query_parameters,
+                                                   self.header_parameters,
+                                                   response,
+                                                   self.polling_timeout,
+                                                   30)
         except CloudError as e:
             self.log('Error attempting to delete the Snapshot instance.')
             self.fail('Error deleting the Snapshot instance: {0}'.format(str(e)))
 
-        return True
+        return response
 
     def get_resource(self):
         # self.log('Checking if the Snapshot instance {0} is present'.format(self.))
@@ -831,10 +765,11 @@ class AzureRMSnapshots(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout,
                                               30)
+            response = json.loads(response.text)
             found = True
-            self.log("Response : {0}".format(response))
+            log_debug(self, 'Response : {0}', response)
             # self.log("Snapshot instance : {0} found".format(response.name))
         except CloudError as e:
             self.log('Did not find the Snapshot instance.')
@@ -845,6 +780,8 @@ class AzureRMSnapshots(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMSnapshots()
 
 
@@ -355,6 +355,24 @@ options:
     description:
       - Resource type.
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
+  polling_timeout:
+    description:
+      - Maximum time in seconds to wait for long running operation to complete.
+      - Status is polled as indicated by C(Azure-AsyncOperation), C(Location) and C(Retry-After) headers.
+    type: int
+    default: 1800
+  state_snapshot:
+    description:
+      - Path of state snapshot exported by M(azure_rm_statesnapshot).
+      - In check mode current state of the instance is taken from the snapshot instead of Azure, if the snapshot covers it.
+      - Instances of resource types, subscriptions or resource groups not exported to the snapshot are read from Azure.
+    type: path
   state:
     description:
       - Assert the state of the FrontDoor.
@@ -1010,13 +1028,27 @@ properties:
       type: str
       sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+from ansible.module_utils.azure_rm_common_log import log_debug
+from ansible.module_utils.azure_rm_common_snapshot import get_snapshot_resource
+from ansible.module_utils.azure_rm_common_url import build_url
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -1025,307 +1057,34 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resourceGroupName", "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "frontDoorName", "required": true},
+    "location": {"type": "str", "updatable": false, "disposition": "/"},
+    "friendly_name": {"type": "str", "disposition": "/properties/friendlyName"},
+    "routing_rules": {"type": "list", "disposition": "/properties/routingRules", "options": {"id": {"type": "str"}, "frontend_endpoints": {"type": "list", "disposition": "properties/frontendEndpoints", "options": {"id": {"type": "str"}}}, "accepted_protocols": {"type": "list", "disposition": "properties/acceptedProtocols", "choices": ["Http", "Https"]}, "patterns_to_match": {"type": "list", "disposition": "properties/patternsToMatch"}, "enabled_state": {"type": "str", "disposition": "properties/enabledState", "choices": ["Enabled", "Disabled"]}, "route_configuration": {"type": "dict", "disposition": "properties/routeConfiguration"}, "resource_state": {"type": "str", "disposition": "properties/resourceState", "choices": ["Creating", "Enabling", "Enabled", "Disabling", "Disabled", "Deleting"]}, "name": {"type": "str"}}},
+    "load_balancing_settings": {"type": "list", "disposition": "/properties/loadBalancingSettings", "options": {"id": {"type": "str"}, "sample_size": {"type": "number", "disposition": "properties/sampleSize"}, "successful_samples_required": {"type": "number", "disposition": "properties/successfulSamplesRequired"}, "additional_latency_milliseconds": {"type": "number", "disposition": "properties/additionalLatencyMilliseconds"}, "resource_state": {"type": "str", "disposition": "properties/resourceState", "choices": ["Creating", "Enabling", "Enabled", "Disabling", "Disabled", "Deleting"]}, "name": {"type": "str"}}},
+    "health_probe_settings": {"type": "list", "disposition": "/properties/healthProbeSettings", "options": {"id": {"type": "str"}, "path": {"type": "str", "disposition": "properties/*"}, "protocol": {"type": "str", "disposition": "properties/*", "choices": ["Http", "Https"]}, "interval_in_seconds": {"type": "number", "disposition": "properties/intervalInSeconds"}, "resource_state": {"type": "str", "disposition": "properties/resourceState", "choices": ["Creating", "Enabling", "Enabled", "Disabling", "Disabled", "Deleting"]}, "name": {"type": "str"}}},
+    "backend_pools": {"type": "list", "disposition": "/properties/backendPools", "options": {"id": {"type": "str"}, "backends": {"type": "list", "disposition": "properties/*", "options": {"address": {"type": "str"}, "http_port": {"type": "number", "disposition": "httpPort"}, "https_port": {"type": "number", "disposition": "httpsPort"}, "enabled_state": {"type": "str", "disposition": "enabledState", "choices": ["Enabled", "Disabled"]}, "priority": {"type": "number"}, "weight": {"type": "number"}, "backend_host_header": {"type": "str", "disposition": "backendHostHeader"}}}, "load_balancing_settings": {"type": "dict", "disposition": "properties/loadBalancingSettings", "options": {"id": {"type": "str"}}}, "health_probe_settings": {"type": "dict", "disposition": "properties/healthProbeSettings", "options": {"id": {"type": "str"}}}, "resource_state": {"type": "str", "disposition": "properties/resourceState", "choices": ["Creating", "Enabling", "Enabled", "Disabling", "Disabled", "Deleting"]}, "name": {"type": "str"}}},
+    "frontend_endpoints": {"type": "list", "disposition": "/properties/frontendEndpoints", "options": {"id": {"type": "str"}, "host_name": {"type": "str", "disposition": "properties/hostName"}, "session_affinity_enabled_state": {"type": "str", "disposition": "properties/sessionAffinityEnabledState", "choices": ["Enabled", "Disabled"]}, "session_affinity_ttl_seconds": {"type": "number", "disposition": "properties/sessionAffinityTtlSeconds"}, "web_application_firewall_policy_link": {"type": "dict", "disposition": "properties/webApplicationFirewallPolicyLink", "options": {"id": {"type": "str"}}}, "resource_state": {"type": "str", "disposition": "properties/resourceState", "choices": ["Creating", "Enabling", "Enabled", "Disabling", "Disabled", "Deleting"]}, "name": {"type": "str"}}},
+    "backend_pools_settings": {"type": "dict", "disposition": "/properties/backendPoolsSettings", "options": {"enforce_certificate_name_check": {"type": "str", "disposition": "enforceCertificateNameCheck", "choices": ["Enabled", "Disabled"]}}},
+    "enabled_state": {"type": "str", "disposition": "/properties/enabledState", "choices": ["Enabled", "Disabled"]},
+    "resource_state": {"type": "str", "disposition": "/properties/resourceState", "choices": ["Creating", "Enabling", "Enabled", "Disabling", "Disabled", "Deleting"]},
+    "wait": {"type": "bool", "default": true},
+    "polling_timeout": {"type": "int", "default": 1800},
+    "state_snapshot": {"type": "path"},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMFrontDoors(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resourceGroupName',
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='frontDoorName',
-                required=true
-            ),
-            location=dict(
-                type='str',
-                updatable=False,
-                disposition='/'
-            ),
-            friendly_name=dict(
-                type='str',
-                disposition='/properties/friendlyName'
-            ),
-            routing_rules=dict(
-                type='list',
-                disposition='/properties/routingRules',
-                options=dict(
-                    id=dict(
-                        type='str'
-                    ),
-                    frontend_endpoints=dict(
-                        type='list',
-                        disposition='properties/frontendEndpoints',
-                        options=dict(
-                            id=dict(
-                                type='str'
-                            )
-                        )
-                    ),
-                    accepted_protocols=dict(
-                        type='list',
-                        disposition='properties/acceptedProtocols',
-                        choices=['Http',
-                                 'Https']
-                    ),
-                    patterns_to_match=dict(
-                        type='list',
-                        disposition='properties/patternsToMatch'
-                    ),
-                    enabled_state=dict(
-                        type='str',
-                        disposition='properties/enabledState',
-                        choices=['Enabled',
-                                 'Disabled']
-                    ),
-                    route_configuration=dict(
-                        type='dict',
-                        disposition='properties/routeConfiguration'
-                    ),
-                    resource_state=dict(
-                        type='str',
-                        disposition='properties/resourceState',
-                        choices=['Creating',
-                                 'Enabling',
-                                 'Enabled',
-                                 'Disabling',
-                                 'Disabled',
-                                 'Deleting']
-                    ),
-                    name=dict(
-                        type='str'
-                    )
-                )
-            ),
-            load_balancing_settings=dict(
-                type='list',
-                disposition='/properties/loadBalancingSettings',
-                options=dict(
-                    id=dict(
-                        type='str'
-                    ),
-                    sample_size=dict(
-                        type='number',
-                        disposition='properties/sampleSize'
-                    ),
-                    successful_samples_required=dict(
-                        type='number',
-                        disposition='properties/successfulSamplesRequired'
-                    ),
-                    additional_latency_milliseconds=dict(
-                        type='number',
-                        disposition='properties/additionalLatencyMilliseconds'
-                    ),
-                    resource_state=dict(
-                        type='str',
-                        disposition='properties/resourceState',
-                        choices=['Creating',
-                                 'Enabling',
-                                 'Enabled',
-                                 'Disabling',
-                                 'Disabled',
-                                 'Deleting']
-                    ),
-                    name=dict(
-                        type='str'
-                    )
-                )
-            ),
-            health_probe_settings=dict(
-                type='list',
-                disposition='/properties/healthProbeSettings',
-                options=dict(
-                    id=dict(
-                        type='str'
-                    ),
-                    path=dict(
-                        type='str',
-                        disposition='properties/*'
-                    ),
-                    protocol=dict(
-                        type='str',
-                        disposition='properties/*',
-                        choices=['Http',
-                                 'Https']
-                    ),
-                    interval_in_seconds=dict(
-                        type='number',
-                        disposition='properties/intervalInSeconds'
-                    ),
-                    resource_state=dict(
-                        type='str',
-                        disposition='properties/resourceState',
-                        choices=['Creating',
-                                 'Enabling',
-                                 'Enabled',
-                                 'Disabling',
-                                 'Disabled',
-                                 'Deleting']
-                    ),
-                    name=dict(
-                        type='str'
-                    )
-                )
-            ),
-            backend_pools=dict(
-                type='list',
-                disposition='/properties/backendPools',
-                options=dict(
-                    id=dict(
-                        type='str'
-                    ),
-                    backends=dict(
-                        type='list',
-                        disposition='properties/*',
-                        options=dict(
-                            address=dict(
-                                type='str'
-                            ),
-                            http_port=dict(
-                                type='number',
-                                disposition='httpPort'
-                            ),
-                            https_port=dict(
-                                type='number',
-                                disposition='httpsPort'
-                            ),
-                            enabled_state=dict(
-                                type='str',
-                                disposition='enabledState',
-                                choices=['Enabled',
-                                         'Disabled']
-                            ),
-                            priority=dict(
-                                type='number'
-                            ),
-                            weight=dict(
-                                type='number'
-                            ),
-                            backend_host_header=dict(
-                                type='str',
-                                disposition='backendHostHeader'
-                            )
-                        )
-                    ),
-                    load_balancing_settings=dict(
-                        type='dict',
-                        disposition='properties/loadBalancingSettings',
-                        options=dict(
-                            id=dict(
-                                type='str'
-                            )
-                        )
-                    ),
-                    health_probe_settings=dict(
-                        type='dict',
-                        disposition='properties/healthProbeSettings',
-                        options=dict(
-                            id=dict(
-                                type='str'
-                            )
-                        )
-                    ),
-                    resource_state=dict(
-                        type='str',
-                        disposition='properties/resourceState',
-                        choices=['Creating',
-                                 'Enabling',
-                                 'Enabled',
-                                 'Disabling',
-                                 'Disabled',
-                                 'Deleting']
-                    ),
-                    name=dict(
-                        type='str'
-                    )
-                )
-            ),
-            frontend_endpoints=dict(
-                type='list',
-                disposition='/properties/frontendEndpoints',
-                options=dict(
-                    id=dict(
-                        type='str'
-                    ),
-                    host_name=dict(
-                        type='str',
-                        disposition='properties/hostName'
-                    ),
-                    session_affinity_enabled_state=dict(
-                        type='str',
-                        disposition='properties/sessionAffinityEnabledState',
-                        choices=['Enabled',
-                                 'Disabled']
-                    ),
-                    session_affinity_ttl_seconds=dict(
-                        type='number',
-                        disposition='properties/sessionAffinityTtlSeconds'
-                    ),
-                    web_application_firewall_policy_link=dict(
-                        type='dict',
-                        disposition='properties/webApplicationFirewallPolicyLink',
-                        options=dict(
-                            id=dict(
-                                type='str'
-                            )
-                        )
-                    ),
-                    resource_state=dict(
-                        type='str',
-                        disposition='properties/resourceState',
-                        choices=['Creating',
-                                 'Enabling',
-                                 'Enabled',
-                                 'Disabling',
-                                 'Disabled',
-                                 'Deleting']
-                    ),
-                    name=dict(
-                        type='str'
-                    )
-                )
-            ),
-            backend_pools_settings=dict(
-                type='dict',
-                disposition='/properties/backendPoolsSettings',
-                options=dict(
-                    enforce_certificate_name_check=dict(
-                        type='str',
-                        disposition='enforceCertificateNameCheck',
-                        choices=['Enabled',
-                                 'Disabled']
-                    )
-                )
-            ),
-            enabled_state=dict(
-                type='str',
-                disposition='/properties/enabledState',
-                choices=['Enabled',
-                         'Disabled']
-            ),
-            resource_state=dict(
-                type='str',
-                disposition='/properties/resourceState',
-                choices=['Creating',
-                         'Enabling',
-                         'Enabled',
-                         'Disabling',
-                         'Disabled',
-                         'Deleting']
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.name = None
@@ -1336,6 +1095,9 @@ class AzureRMFrontDoors(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.state_snapshot = None
+        self.wait = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -1357,12 +1119,12 @@ class AzureRMFrontDoors(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
 
         resource_group = self.get_resource_group(self.resource_group)
@@ -1370,19 +1132,18 @@ class AzureRMFrontDoors(AzureRMModuleBaseExt):
         if 'location' not in self.body:
             self.body['location'] = resource_group.location
 
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.Network' +
-                    '/frontDoors' +
-                    '/{{ front_door_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ front_door_name }}', self.name)
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.Network/frontDoors/{{ front_door_name }}',
+                                 subscription_id=self.subscription_id,
+                                 resource_group=self.resource_group,
+                                 front_door_name=self.name)
+        except ValueError as exc:
+            self.fail(str(exc))
 
-        old_response = self.get_resource()
+        if self.check_mode and self.state_snapshot:
+            old_response = get_snapshot_resource(self.state_snapshot, self.url, self.fail)
+        if old_response is None:
+            old_response = self.get_resource()
 
         if not old_response:
             self.log("FrontDoor instance doesn't exist")
@@ -1397,12 +1158,9 @@ class AzureRMFrontDoors(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                self.results['modifiers'] = modifiers
-                self.results['compare'] = []
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -1413,6 +1171,9 @@ class AzureRMFrontDoors(AzureRMModuleBaseExt):
                 return self.results
 
             response = self.create_update_resource()
+            if not self.wait:
+                self.results['id'] = self.url
+                response = None
 
             # if not old_response:
             self.results['changed'] = True
@@ -1426,12 +1187,13 @@ class AzureRMFrontDoors(AzureRMModuleBaseExt):
             if self.check_mode:
                 return self.results
 
-            self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
+            response = self.delete_resource()
+            if not self.wait:
+                self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                           'DELETE',
+                                                                           self.query_parameters,
+                                                                           response)
+            response = None
         else:
             self.log('FrontDoor instance unchanged')
             self.results['changed'] = False
@@ -1457,12 +1219,18 @@ class AzureRMFrontDoors(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               self.body,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout if self.wait else 0,
                                               30)
         except CloudError as exc:
             self.log('Error attempting to create the FrontDoor instance.')
             self.fail('Error creating the FrontDoor instance: {0}'.format(str(exc)))
 
+        if not self.wait:
+            self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                       'PUT',
+                                                                       self.query_parameters,
+                                                                       response)
+
         try:
             response = json.loads(response.text)
         except Exception:
@@ -1480,13 +1248,20 @@ class AzureRMFrontDoors(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              0,
                                               30)
+            if self.wait:
+                self.mgmt_client.wait_for_deletion(self.url,
+                                                   self.query_parameters,
+                                                   self.header_parameters,
+                                                   response,
+                                                   self.polling_timeout,
+                                                   30)
         except CloudError as e:
             self.log('Error attempting to delete the FrontDoor instance.')
             self.fail('Error deleting the FrontDoor instance: {0}'.format(str(e)))
 
-        return True
+        return response
 
     def get_resource(self):
         # self.log('Checking if the FrontDoor instance {0} is present'.format(self.))
@@ -1498,10 +1273,11 @@ class AzureRMFrontDoors(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout,
                                               30)
+            response = json.loads(response.text)
             found = True
-            self.log("Response : {0}".format(response))
+            log_debug(self, 'Response : {0}', response)
             # self.log("FrontDoor instance : {0} found".format(response.name))
         except CloudError as e:
             self.log('Did not find the FrontDoor instance.')
@@ -1512,6 +1288,8 @@ class AzureRMFrontDoors(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMFrontDoors()
 
 
@@ -212,6 +212,24 @@ options:
     description:
       - Resource type
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
+  polling_timeout:
+    description:
+      - Maximum time in seconds to wait for long running operation to complete.
+      - Status is polled as indicated by C(Azure-AsyncOperation), C(Location) and C(Retry-After) headers.
+    type: int
+    default: 3600
+  state_snapshot:
+    description:
+      - Path of state snapshot exported by M(azure_rm_statesnapshot).
+      - In check mode current state of the instance is taken from the snapshot instead of Azure, if the snapshot covers it.
+      - Instances of resource types, subscriptions or resource groups not exported to the snapshot are read from Azure.
+    type: path
   state:
     description:
       - Assert the state of the OpenShiftManagedCluster.
@@ -554,13 +572,27 @@ properties:
               type: dict
               sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+from ansible.module_utils.azure_rm_common_log import log_debug
+from ansible.module_utils.azure_rm_common_snapshot import get_snapshot_resource
+from ansible.module_utils.azure_rm_common_url import build_url
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -569,234 +601,32 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resourceGroupName", "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "resourceName", "required": true},
+    "location": {"type": "str", "updatable": false, "disposition": "/", "required": true},
+    "plan": {"type": "dict", "disposition": "/", "options": {"name": {"type": "str"}, "product": {"type": "str"}, "promotion_code": {"type": "str", "disposition": "promotionCode"}, "publisher": {"type": "str"}}},
+    "open_shift_version": {"type": "str", "disposition": "/properties/openShiftVersion", "required": true},
+    "network_profile": {"type": "dict", "disposition": "/properties/networkProfile", "options": {"vnet_cidr": {"type": "str", "disposition": "vnetCidr"}, "peer_vnet_id": {"type": "str", "disposition": "peerVnetId"}, "vnet_id": {"type": "str", "disposition": "vnetId"}}},
+    "router_profiles": {"type": "list", "disposition": "/properties/routerProfiles", "options": {"name": {"type": "str"}}},
+    "master_pool_profile": {"type": "dict", "disposition": "/properties/masterPoolProfile", "options": {"name": {"type": "str"}, "count": {"type": "number", "required": true}, "vm_size": {"type": "str", "disposition": "vmSize", "choices": ["Standard_D2s_v3", "Standard_D4s_v3", "Standard_D8s_v3", "Standard_D16s_v3", "Standard_D32s_v3", "Standard_D64s_v3", "Standard_DS4_v2", "Standard_DS5_v2", "Standard_F8s_v2", "Standard_F16s_v2", "Standard_F32s_v2", "Standard_F64s_v2", "Standard_F72s_v2", "Standard_F8s", "Standard_F16s", "Standard_E4s_v3", "Standard_E8s_v3", "Standard_E16s_v3", "Standard_E20s_v3", "Standard_E32s_v3", "Standard_E64s_v3", "Standard_GS2", "Standard_GS3", "Standard_GS4", "Standard_GS5", "Standard_DS12_v2", "Standard_DS13_v2", "Standard_DS14_v2", "Standard_DS15_v2", "Standard_L4s", "Standard_L8s", "Standard_L16s", "Standard_L32s"], "required": true}, "subnet_cidr": {"type": "str", "disposition": "subnetCidr"}, "os_type": {"type": "str", "disposition": "osType", "choices": ["Linux", "Windows"]}}},
+    "agent_pool_profiles": {"type": "list", "disposition": "/properties/agentPoolProfiles", "options": {"name": {"type": "str", "required": true}, "count": {"type": "number", "required": true}, "vm_size": {"type": "str", "disposition": "vmSize", "choices": ["Standard_D2s_v3", "Standard_D4s_v3", "Standard_D8s_v3", "Standard_D16s_v3", "Standard_D32s_v3", "Standard_D64s_v3", "Standard_DS4_v2", "Standard_DS5_v2", "Standard_F8s_v2", "Standard_F16s_v2", "Standard_F32s_v2", "Standard_F64s_v2", "Standard_F72s_v2", "Standard_F8s", "Standard_F16s", "Standard_E4s_v3", "Standard_E8s_v3", "Standard_E16s_v3", "Standard_E20s_v3", "Standard_E32s_v3", "Standard_E64s_v3", "Standard_GS2", "Standard_GS3", "Standard_GS4", "Standard_GS5", "Standard_DS12_v2", "Standard_DS13_v2", "Standard_DS14_v2", "Standard_DS15_v2", "Standard_L4s", "Standard_L8s", "Standard_L16s", "Standard_L32s"], "required": true}, "subnet_cidr": {"type": "str", "disposition": "subnetCidr"}, "os_type": {"type": "str", "disposition": "osType", "choices": ["Linux", "Windows"]}, "role": {"type": "str", "choices": ["compute", "infra"]}}},
+    "auth_profile": {"type": "dict", "disposition": "/properties/authProfile", "options": {"identity_providers": {"type": "list", "disposition": "identityProviders", "options": {"name": {"type": "str"}, "provider": {"type": "dict"}}}}},
+    "wait": {"type": "bool", "default": true},
+    "polling_timeout": {"type": "int", "default": 3600},
+    "state_snapshot": {"type": "path"},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMOpenShiftManagedClusters(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resourceGroupName',
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='resourceName',
-                required=true
-            ),
-            location=dict(
-                type='str',
-                updatable=False,
-                disposition='/',
-                required=true
-            ),
-            plan=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    name=dict(
-                        type='str'
-                    ),
-                    product=dict(
-                        type='str'
-                    ),
-                    promotion_code=dict(
-                        type='str',
-                        disposition='promotionCode'
-                    ),
-                    publisher=dict(
-                        type='str'
-                    )
-                )
-            ),
-            open_shift_version=dict(
-                type='str',
-                disposition='/properties/openShiftVersion',
-                required=true
-            ),
-            network_profile=dict(
-                type='dict',
-                disposition='/properties/networkProfile',
-                options=dict(
-                    vnet_cidr=dict(
-                        type='str',
-                        disposition='vnetCidr'
-                    ),
-                    peer_vnet_id=dict(
-                        type='str',
-                        disposition='peerVnetId'
-                    ),
-                    vnet_id=dict(
-                        type='str',
-                        disposition='vnetId'
-                    )
-                )
-            ),
-            router_profiles=dict(
-                type='list',
-                disposition='/properties/routerProfiles',
-                options=dict(
-                    name=dict(
-                        type='str'
-                    )
-                )
-            ),
-            master_pool_profile=dict(
-                type='dict',
-                disposition='/properties/masterPoolProfile',
-                options=dict(
-                    name=dict(
-                        type='str'
-                    ),
-                    count=dict(
-                        type='number',
-                        required=true
-                    ),
-                    vm_size=dict(
-                        type='str',
-                        disposition='vmSize',
-                        choices=['Standard_D2s_v3',
-                                 'Standard_D4s_v3',
-                                 'Standard_D8s_v3',
-                                 'Standard_D16s_v3',
-                                 'Standard_D32s_v3',
-                                 'Standard_D64s_v3',
-                                 'Standard_DS4_v2',
-                                 'Standard_DS5_v2',
-                                 'Standard_F8s_v2',
-                                 'Standard_F16s_v2',
-                                 'Standard_F32s_v2',
-                                 'Standard_F64s_v2',
-                                 'Standard_F72s_v2',
-                                 'Standard_F8s',
-                                 'Standard_F16s',
-                                 'Standard_E4s_v3',
-                                 'Standard_E8s_v3',
-                                 'Standard_E16s_v3',
-                                 'Standard_E20s_v3',
-                                 'Standard_E32s_v3',
-                                 'Standard_E64s_v3',
-                                 'Standard_GS2',
-                                 'Standard_GS3',
-                                 'Standard_GS4',
-                                 'Standard_GS5',
-                                 'Standard_DS12_v2',
-                                 'Standard_DS13_v2',
-                                 'Standard_DS14_v2',
-                                 'Standard_DS15_v2',
-                                 'Standard_L4s',
-                                 'Standard_L8s',
-                                 'Standard_L16s',
-                                 'Standard_L32s'],
-                        required=true
-                    ),
-                    subnet_cidr=dict(
-                        type='str',
-                        disposition='subnetCidr'
-                    ),
-                    os_type=dict(
-                        type='str',
-                        disposition='osType',
-                        choices=['Linux',
-                                 'Windows']
-                    )
-                )
-            ),
-            agent_pool_profiles=dict(
-                type='list',
-                disposition='/properties/agentPoolProfiles',
-                options=dict(
-                    name=dict(
-                        type='str',
-                        required=true
-                    ),
-                    count=dict(
-                        type='number',
-                        required=true
-                    ),
-                    vm_size=dict(
-                        type='str',
-                        disposition='vmSize',
-                        choices=['Standard_D2s_v3',
-                                 'Standard_D4s_v3',
-                                 'Standard_D8s_v3',
-                                 'Standard_D16s_v3',
-                                 'Standard_D32s_v3',
-                                 'Standard_D64s_v3',
-                                 'Standard_DS4_v2',
-                                 'Standard_DS5_v2',
-                                 'Standard_F8s_v2',
-                                 'Standard_F16s_v2',
-                                 'Standard_F32s_v2',
-                                 'Standard_F64s_v2',
-                                 'Standard_F72s_v2',
-                                 'Standard_F8s',
-                                 'Standard_F16s',
-                                 'Standard_E4s_v3',
-                                 'Standard_E8s_v3',
-                                 'Standard_E16s_v3',
-                                 'Standard_E20s_v3',
-                                 'Standard_E32s_v3',
-                                 'Standard_E64s_v3',
-                                 'Standard_GS2',
-                                 'Standard_GS3',
-                                 'Standard_GS4',
-                                 'Standard_GS5',
-                                 'Standard_DS12_v2',
-                                 'Standard_DS13_v2',
-                                 'Standard_DS14_v2',
-                                 'Standard_DS15_v2',
-                                 'Standard_L4s',
-                                 'Standard_L8s',
-                                 'Standard_L16s',
-                                 'Standard_L32s'],
-                        required=true
-                    ),
-                    subnet_cidr=dict(
-                        type='str',
-                        disposition='subnetCidr'
-                    ),
-                    os_type=dict(
-                        type='str',
-                        disposition='osType',
-                        choices=['Linux',
-                                 'Windows']
-                    ),
-                    role=dict(
-                        type='str',
-                        choices=['compute',
-                                 'infra']
-                    )
-                )
-            ),
-            auth_profile=dict(
-                type='dict',
-                disposition='/properties/authProfile',
-                options=dict(
-                    identity_providers=dict(
-                        type='list',
-                        disposition='identityProviders',
-                        options=dict(
-                            name=dict(
-                                type='str'
-                            ),
-                            provider=dict(
-                                type='dict'
-                            )
-                        )
-                    )
-                )
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.name = None
@@ -807,6 +637,9 @@ class AzureRMOpenShiftManagedClusters(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.state_snapshot = None
+        self.wait = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -828,12 +661,12 @@ class AzureRMOpenShiftManagedClusters(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
 
         resource_group = self.get_resource_group(self.resource_group)
@@ -841,19 +674,18 @@ class AzureRMOpenShiftManagedClusters(AzureRMModuleBaseExt):
         if 'location' not in self.body:
             self.body['location'] = resource_group.location
 
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.ContainerService' +
-                    '/openShiftManagedClusters' +
-                    '/{{ open_shift_managed_cluster_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ open_shift_managed_cluster_name }}', self.name)
-
-        old_response = self.get_resource()
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.ContainerService/openShiftManagedClusters/{{ open_shift_managed_cluster_name }}',
+                                 subscription_id=self.subscription_id,
+                                 resource_group=self.resource_group,
+                                 open_shift_managed_cluster_name=self.name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        if self.check_mode and self.state_snapshot:
+            old_response = get_snapshot_resource(self.state_snapshot, self.url, self.fail)
+        if old_response is None:
+            old_response = self.get_resource()
 
         if not old_response:
             self.log("OpenShiftManagedCluster instance doesn't exist")
@@ -868,12 +700,9 @@ class AzureRMOpenShiftManagedClusters(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                self.results['modifiers'] = modifiers
-                self.results['compare'] = []
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -884,6 +713,9 @@ class AzureRMOpenShiftManagedClusters(AzureRMModuleBaseExt):
                 return self.results
 
             response = self.create_update_resource()
+            if not self.wait:
+                self.results['id'] = self.url
+                response = None
 
             # if not old_response:
             self.results['changed'] = True
@@ -897,12 +729,13 @@ class AzureRMOpenShiftManagedClusters(AzureRMModuleBaseExt):
             if self.check_mode:
                 return self.results
 
-            self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
+            response = self.delete_resource()
+            if not self.wait:
+                self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                           'DELETE',
+                                                                           self.query_parameters,
+                                                                           response)
+            response = None
         else:
             self.log('OpenShiftManagedCluster instance unchanged')
             self.results['changed'] = False
@@ -929,12 +762,18 @@ class AzureRMOpenShiftManagedClusters(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               self.body,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout if self.wait else 0,
                                               30)
         except CloudError as exc:
             self.log('Error attempting to create the OpenShiftManagedCluster instance.')
             self.fail('Error creating the OpenShiftManagedCluster instance: {0}'.format(str(exc)))
 
+        if not self.wait:
+            self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                       'PUT',
+                                                                       self.query_parameters,
+                                                                       response)
+
         try:
             response = json.loads(response.text)
         except Exception:
@@ -952,13 +791,20 @@ class AzureRMOpenShiftManagedClusters(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              0,
                                               30)
+            if self.wait:
+                self.mgmt_client.wait_for_deletion(self.url,
+                                                   self.query_parameters,
+                                                   self.header_parameters,
+                                                   response,
+                                                   self.polling_timeout,
+                                                   30)
         except CloudError as e:
             self.log('Error attempting to delete the OpenShiftManagedCluster instance.')
             self.fail('Error deleting the OpenShiftManagedCluster instance: {0}'.format(str(e)))
 
-        return True
+        return response
 
     def get_resource(self):
         # self.log('Checking if the OpenShiftManagedCluster instance {0} is present'.format(self.))
@@ -970,10 +816,11 @@ class AzureRMOpenShiftManagedClusters(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout,
                                               30)
+            response = json.loads(response.text)
             found = True
-            self.log("Response : {0}".format(response))
+            log_debug(self, 'Response : {0}', response)
             # self.log("OpenShiftManagedCluster instance : {0} found".format(response.name))
         except CloudError as e:
             self.log('Did not find the OpenShiftManagedCluster instance.')
@@ -984,6 +831,8 @@ class AzureRMOpenShiftManagedClusters(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMOpenShiftManagedClusters()
 
 
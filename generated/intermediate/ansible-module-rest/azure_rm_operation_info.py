@@ -0,0 +1,204 @@
+#!/usr/bin/python
+#
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+
+DOCUMENTATION = '''
+---
+module: azure_rm_operation_info
+version_added: '2.9'
+short_description: Get status of asynchronous operations.
+description:
+  - Get status of long running operations started by modules called with I(wait=false).
+  - Optionally wait until all of them are completed, polling them together.
+options:
+  operations:
+    description:
+      - List of operation handles, as returned in I(operation) by modules called with I(wait=false).
+    required: true
+    type: list
+  wait:
+    description:
+      - Whether to wait until all the operations are completed.
+    type: bool
+    default: false
+  polling_timeout:
+    description:
+      - Maximum time in seconds to wait for the operations to complete.
+    type: int
+    default: 600
+extends_documentation_fragment:
+  - azure
+author:
+  - Zim Kalinowski (@zikalino)
+
+'''
+
+EXAMPLES = '''
+- name: Create pools without waiting
+  azure_rm_batchpool:
+    resource_group: myResourceGroup
+    account_name: myBatchAccount
+    name: "{{ item }}"
+    vm_size: STANDARD_D4
+    wait: false
+  loop:
+    - pool1
+    - pool2
+  register: pools
+
+- name: Wait for all pools to be created
+  azure_rm_operation_info:
+    operations: "{{ pools.results | map(attribute='operation') | list }}"
+    wait: true
+    polling_timeout: 1800
+
+'''
+
+RETURN = '''
+operations:
+  description: >-
+    A list of status of the operations, in the same order as I(operations).
+  returned: always
+  type: complex
+  contains:
+    url:
+      description:
+        - Resource ID the operation was started for.
+      returned: always
+      type: str
+      sample: null
+    method:
+      description:
+        - HTTP method which started the operation.
+      returned: always
+      type: str
+      sample: PUT
+    status:
+      description:
+        - Status of the operation, C(InProgress), C(Succeeded), C(Failed) or C(Canceled).
+      returned: always
+      type: str
+      sample: Succeeded
+    done:
+      description:
+        - Whether the operation is completed.
+      returned: always
+      type: bool
+      sample: true
+    error:
+      description:
+        - Error reported for failed operation.
+      returned: always
+      type: dict
+      sample: null
+    resource:
+      description:
+        - Resource created or updated by the operation, once completed.
+      returned: always
+      type: dict
+      sample: null
+
+'''
+
+import time
+from ansible.module_utils.azure_rm_common import AzureRMModuleBase
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt, LRO_INITIAL_INTERVAL, LRO_BACKOFF_FACTOR
+from ansible.module_utils.azure_rm_common_info_ext import run_parallel
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+
+
+class AzureRMOperationInfo(AzureRMModuleBase):
+    def __init__(self):
+        self.module_arg_spec = dict(
+            operations=dict(
+                type='list',
+                required=True
+            ),
+            wait=dict(
+                type='bool',
+                default=False
+            ),
+            polling_timeout=dict(
+                type='int',
+                default=600
+            )
+        )
+
+        self.operations = None
+        self.wait = None
+        self.polling_timeout = None
+
+        self.results = dict(changed=False)
+        self.mgmt_client = None
+        self.header_parameters = {}
+        self.header_parameters['Content-Type'] = 'application/json; charset=utf-8'
+
+        super(AzureRMOperationInfo, self).__init__(self.module_arg_spec, supports_tags=False)
+
+    def exec_module(self, **kwargs):
+
+        for key in self.module_arg_spec:
+            setattr(self, key, kwargs[key])
+
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
+                                                    base_url=self._cloud_environment.endpoints.resource_manager)
+
+        statuses = {}
+        pending = [i for i, operation in enumerate(self.operations) if operation]
+        deadline = time.time() + self.polling_timeout
+        interval = LRO_INITIAL_INTERVAL
+        while True:
+            statuses.update(self.check(pending))
+            pending = [i for i in pending if not statuses[i]['done']]
+            if not pending or not self.wait:
+                break
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                self.fail('Operations did not complete within {0} seconds'.format(self.polling_timeout))
+            # all pending operations are polled together, so wait as long as the slowest one asks to
+            delay = max([statuses[i]['retry_after'] or interval for i in pending])
+            time.sleep(min(delay, remaining))
+            interval = min(interval * LRO_BACKOFF_FACTOR, 30)
+
+        self.results['operations'] = [self.format_item(operation, statuses.get(i))
+                                      for i, operation in enumerate(self.operations)]
+        return self.results
+
+    def check(self, indices):
+        jobs = [(i, self.mgmt_client.check_operation, (self.operations[i], self.header_parameters)) for i in indices]
+        results, errors = run_parallel(jobs)
+        if errors:
+            self.fail('Error checking operations: {0}'.format(errors))
+        return results
+
+    def format_item(self, operation, status):
+        operation = operation or {}
+        status = status or dict(status='Succeeded', done=True, error=None, resource=None)
+        return dict(url=operation.get('url'),
+                    method=operation.get('method'),
+                    status=status['status'],
+                    done=status['done'],
+                    error=status['error'],
+                    resource=status['resource'])
+
+
+def main():
+    enable_token_cache()
+    enable_perf()
+    AzureRMOperationInfo()
+
+
+if __name__ == '__main__':
+    main()
@@ -176,6 +176,24 @@ options:
     description:
       - Resource type
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
+  polling_timeout:
+    description:
+      - Maximum time in seconds to wait for long running operation to complete.
+      - Status is polled as indicated by C(Azure-AsyncOperation), C(Location) and C(Retry-After) headers.
+    type: int
+    default: 600
+  state_snapshot:
+    description:
+      - Path of state snapshot exported by M(azure_rm_statesnapshot).
+      - In check mode current state of the instance is taken from the snapshot instead of Azure, if the snapshot covers it.
+      - Instances of resource types, subscriptions or resource groups not exported to the snapshot are read from Azure.
+    type: path
   state:
     description:
       - Assert the state of the Queue.
@@ -421,13 +439,27 @@ properties:
       type: str
       sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+from ansible.module_utils.azure_rm_common_log import log_debug
+from ansible.module_utils.azure_rm_common_snapshot import get_snapshot_resource
+from ansible.module_utils.azure_rm_common_url import build_url
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -436,106 +468,40 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resourceGroupName", "required": true},
+    "namespace_name": {"type": "str", "updatable": false, "disposition": "namespaceName", "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "queueName", "required": true},
+    "lock_duration": {"type": "unknown-primary[timeSpan]", "disposition": "/properties/lockDuration"},
+    "max_size_in_megabytes": {"type": "number", "disposition": "/properties/maxSizeInMegabytes"},
+    "requires_duplicate_detection": {"type": "boolean", "disposition": "/properties/requiresDuplicateDetection"},
+    "requires_session": {"type": "boolean", "disposition": "/properties/requiresSession"},
+    "default_message_time_to_live": {"type": "unknown-primary[timeSpan]", "disposition": "/properties/defaultMessageTimeToLive"},
+    "dead_lettering_on_message_expiration": {"type": "boolean", "disposition": "/properties/deadLetteringOnMessageExpiration"},
+    "duplicate_detection_history_time_window": {"type": "unknown-primary[timeSpan]", "disposition": "/properties/duplicateDetectionHistoryTimeWindow"},
+    "max_delivery_count": {"type": "number", "disposition": "/properties/maxDeliveryCount"},
+    "status": {"type": "str", "disposition": "/properties/*", "choices": ["Active", "Disabled", "Restoring", "SendDisabled", "ReceiveDisabled", "Creating", "Deleting", "Renaming", "Unknown"]},
+    "enable_batched_operations": {"type": "boolean", "disposition": "/properties/enableBatchedOperations"},
+    "auto_delete_on_idle": {"type": "unknown-primary[timeSpan]", "disposition": "/properties/autoDeleteOnIdle"},
+    "enable_partitioning": {"type": "boolean", "disposition": "/properties/enablePartitioning"},
+    "enable_express": {"type": "boolean", "disposition": "/properties/enableExpress"},
+    "forward_to": {"type": "str", "disposition": "/properties/forwardTo"},
+    "forward_dead_lettered_messages_to": {"type": "str", "disposition": "/properties/forwardDeadLetteredMessagesTo"},
+    "wait": {"type": "bool", "default": true},
+    "polling_timeout": {"type": "int", "default": 600},
+    "state_snapshot": {"type": "path"},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMQueues(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resourceGroupName',
-                required=true
-            ),
-            namespace_name=dict(
-                type='str',
-                updatable=False,
-                disposition='namespaceName',
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='queueName',
-                required=true
-            ),
-            lock_duration=dict(
-                type='unknown-primary[timeSpan]',
-                disposition='/properties/lockDuration'
-            ),
-            max_size_in_megabytes=dict(
-                type='number',
-                disposition='/properties/maxSizeInMegabytes'
-            ),
-            requires_duplicate_detection=dict(
-                type='boolean',
-                disposition='/properties/requiresDuplicateDetection'
-            ),
-            requires_session=dict(
-                type='boolean',
-                disposition='/properties/requiresSession'
-            ),
-            default_message_time_to_live=dict(
-                type='unknown-primary[timeSpan]',
-                disposition='/properties/defaultMessageTimeToLive'
-            ),
-            dead_lettering_on_message_expiration=dict(
-                type='boolean',
-                disposition='/properties/deadLetteringOnMessageExpiration'
-            ),
-            duplicate_detection_history_time_window=dict(
-                type='unknown-primary[timeSpan]',
-                disposition='/properties/duplicateDetectionHistoryTimeWindow'
-            ),
-            max_delivery_count=dict(
-                type='number',
-                disposition='/properties/maxDeliveryCount'
-            ),
-            status=dict(
-                type='str',
-                disposition='/properties/*',
-                choices=['Active',
-                         'Disabled',
-                         'Restoring',
-                         'SendDisabled',
-                         'ReceiveDisabled',
-                         'Creating',
-                         'Deleting',
-                         'Renaming',
-                         'Unknown']
-            ),
-            enable_batched_operations=dict(
-                type='boolean',
-                disposition='/properties/enableBatchedOperations'
-            ),
-            auto_delete_on_idle=dict(
-                type='unknown-primary[timeSpan]',
-                disposition='/properties/autoDeleteOnIdle'
-            ),
-            enable_partitioning=dict(
-                type='boolean',
-                disposition='/properties/enablePartitioning'
-            ),
-            enable_express=dict(
-                type='boolean',
-                disposition='/properties/enableExpress'
-            ),
-            forward_to=dict(
-                type='str',
-                disposition='/properties/forwardTo'
-            ),
-            forward_dead_lettered_messages_to=dict(
-                type='str',
-                disposition='/properties/forwardDeadLetteredMessagesTo'
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.namespace_name = None
@@ -547,6 +513,9 @@ class AzureRMQueues(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.state_snapshot = None
+        self.wait = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -568,32 +537,29 @@ class AzureRMQueues(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
 
         resource_group = self.get_resource_group(self.resource_group)
 
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.ServiceBus' +
-                    '/namespaces' +
-                    '/{{ namespace_name }}' +
-                    '/queues' +
-                    '/{{ queue_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ namespace_name }}', self.namespace_name)
-        self.url = self.url.replace('{{ queue_name }}', self.name)
-
-        old_response = self.get_resource()
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.ServiceBus/namespaces/{{ namespace_name }}/queues/{{ queue_name }}',
+                                 subscription_id=self.subscription_id,
+                                 resource_group=self.resource_group,
+                                 namespace_name=self.namespace_name,
+                                 queue_name=self.name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        if self.check_mode and self.state_snapshot:
+            old_response = get_snapshot_resource(self.state_snapshot, self.url, self.fail)
+        if old_response is None:
+            old_response = self.get_resource()
 
         if not old_response:
             self.log("Queue instance doesn't exist")
@@ -608,12 +574,9 @@ class AzureRMQueues(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                self.results['modifiers'] = modifiers
-                self.results['compare'] = []
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -624,6 +587,9 @@ class AzureRMQueues(AzureRMModuleBaseExt):
                 return self.results
 
             response = self.create_update_resource()
+            if not self.wait:
+                self.results['id'] = self.url
+                response = None
 
             # if not old_response:
             self.results['changed'] = True
@@ -637,12 +603,13 @@ class AzureRMQueues(AzureRMModuleBaseExt):
             if self.check_mode:
                 return self.results
 
-            self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
+            response = self.delete_resource()
+            if not self.wait:
+                self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                           'DELETE',
+                                                                           self.query_parameters,
+                                                                           response)
+            response = None
         else:
             self.log('Queue instance unchanged')
             self.results['changed'] = False
@@ -666,12 +633,18 @@ class AzureRMQueues(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               self.body,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout if self.wait else 0,
                                               30)
         except CloudError as exc:
             self.log('Error attempting to create the Queue instance.')
             self.fail('Error creating the Queue instance: {0}'.format(str(exc)))
 
+        if not self.wait:
+            self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                       'PUT',
+                                                                       self.query_parameters,
+                                                                       response)
+
         try:
             response = json.loads(response.text)
         except Exception:
@@ -689,13 +662,20 @@ class AzureRMQueues(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              0,
                                               30)
+            if self.wait:
+                self.mgmt_client.wait_for_deletion(self.url,
+                                                   self.query_parameters,
+                                                   self.header_parameters,
+                                                   response,
+                                                   self.polling_timeout,
+                                                   30)
         except CloudError as e:
             self.log('Error attempting to delete the Queue instance.')
             self.fail('Error deleting the Queue instance: {0}'.format(str(e)))
 
-        return True
+        return response
 
     def get_resource(self):
         # self.log('Checking if the Queue instance {0} is present'.format(self.))
@@ -707,10 +687,11 @@ class AzureRMQueues(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout,
                                               30)
+            response = json.loads(response.text)
             found = True
-            self.log("Response : {0}".format(response))
+            log_debug(self, 'Response : {0}', response)
             # self.log("Queue instance : {0} found".format(response.name))
         except CloudError as e:
             self.log('Did not find the Queue instance.')
@@ -721,6 +702,8 @@ class AzureRMQueues(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMQueues()
 
 
@@ -153,6 +153,24 @@ options:
     description:
       - Resource type
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
+  polling_timeout:
+    description:
+      - Maximum time in seconds to wait for long running operation to complete.
+      - Status is polled as indicated by C(Azure-AsyncOperation), C(Location) and C(Retry-After) headers.
+    type: int
+    default: 600
+  state_snapshot:
+    description:
+      - Path of state snapshot exported by M(azure_rm_statesnapshot).
+      - In check mode current state of the instance is taken from the snapshot instead of Azure, if the snapshot covers it.
+      - Instances of resource types, subscriptions or resource groups not exported to the snapshot are read from Azure.
+    type: path
   state:
     description:
       - Assert the state of the Subscription.
@@ -366,13 +384,27 @@ properties:
       type: str
       sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+from ansible.module_utils.azure_rm_common_log import log_debug
+from ansible.module_utils.azure_rm_common_snapshot import get_snapshot_resource
+from ansible.module_utils.azure_rm_common_url import build_url
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -381,100 +413,38 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resourceGroupName", "required": true},
+    "namespace_name": {"type": "str", "updatable": false, "disposition": "namespaceName", "required": true},
+    "topic_name": {"type": "str", "updatable": false, "disposition": "topicName", "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "subscriptionName", "required": true},
+    "lock_duration": {"type": "unknown-primary[timeSpan]", "disposition": "/properties/lockDuration"},
+    "requires_session": {"type": "boolean", "disposition": "/properties/requiresSession"},
+    "default_message_time_to_live": {"type": "unknown-primary[timeSpan]", "disposition": "/properties/defaultMessageTimeToLive"},
+    "dead_lettering_on_filter_evaluation_exceptions": {"type": "boolean", "disposition": "/properties/deadLetteringOnFilterEvaluationExceptions"},
+    "dead_lettering_on_message_expiration": {"type": "boolean", "disposition": "/properties/deadLetteringOnMessageExpiration"},
+    "duplicate_detection_history_time_window": {"type": "unknown-primary[timeSpan]", "disposition": "/properties/duplicateDetectionHistoryTimeWindow"},
+    "max_delivery_count": {"type": "number", "disposition": "/properties/maxDeliveryCount"},
+    "status": {"type": "str", "disposition": "/properties/*", "choices": ["Active", "Disabled", "Restoring", "SendDisabled", "ReceiveDisabled", "Creating", "Deleting", "Renaming", "Unknown"]},
+    "enable_batched_operations": {"type": "boolean", "disposition": "/properties/enableBatchedOperations"},
+    "auto_delete_on_idle": {"type": "unknown-primary[timeSpan]", "disposition": "/properties/autoDeleteOnIdle"},
+    "forward_to": {"type": "str", "disposition": "/properties/forwardTo"},
+    "forward_dead_lettered_messages_to": {"type": "str", "disposition": "/properties/forwardDeadLetteredMessagesTo"},
+    "wait": {"type": "bool", "default": true},
+    "polling_timeout": {"type": "int", "default": 600},
+    "state_snapshot": {"type": "path"},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMSubscriptions(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resourceGroupName',
-                required=true
-            ),
-            namespace_name=dict(
-                type='str',
-                updatable=False,
-                disposition='namespaceName',
-                required=true
-            ),
-            topic_name=dict(
-                type='str',
-                updatable=False,
-                disposition='topicName',
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='subscriptionName',
-                required=true
-            ),
-            lock_duration=dict(
-                type='unknown-primary[timeSpan]',
-                disposition='/properties/lockDuration'
-            ),
-            requires_session=dict(
-                type='boolean',
-                disposition='/properties/requiresSession'
-            ),
-            default_message_time_to_live=dict(
-                type='unknown-primary[timeSpan]',
-                disposition='/properties/defaultMessageTimeToLive'
-            ),
-            dead_lettering_on_filter_evaluation_exceptions=dict(
-                type='boolean',
-                disposition='/properties/deadLetteringOnFilterEvaluationExceptions'
-            ),
-            dead_lettering_on_message_expiration=dict(
-                type='boolean',
-                disposition='/properties/deadLetteringOnMessageExpiration'
-            ),
-            duplicate_detection_history_time_window=dict(
-                type='unknown-primary[timeSpan]',
-                disposition='/properties/duplicateDetectionHistoryTimeWindow'
-            ),
-            max_delivery_count=dict(
-                type='number',
-                disposition='/properties/maxDeliveryCount'
-            ),
-            status=dict(
-                type='str',
-                disposition='/properties/*',
-                choices=['Active',
-                         'Disabled',
-                         'Restoring',
-                         'SendDisabled',
-                         'ReceiveDisabled',
-                         'Creating',
-                         'Deleting',
-                         'Renaming',
-                         'Unknown']
-            ),
-            enable_batched_operations=dict(
-                type='boolean',
-                disposition='/properties/enableBatchedOperations'
-            ),
-            auto_delete_on_idle=dict(
-                type='unknown-primary[timeSpan]',
-                disposition='/properties/autoDeleteOnIdle'
-            ),
-            forward_to=dict(
-                type='str',
-                disposition='/properties/forwardTo'
-            ),
-            forward_dead_lettered_messages_to=dict(
-                type='str',
-                disposition='/properties/forwardDeadLetteredMessagesTo'
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.namespace_name = None
@@ -487,6 +457,9 @@ class AzureRMSubscriptions(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.state_snapshot = None
+        self.wait = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -508,35 +481,30 @@ class AzureRMSubscriptions(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
 
         resource_group = self.get_resource_group(self.resource_group)
 
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.ServiceBus' +
-                    '/namespaces' +
-                    '/{{ namespace_name }}' +
-                    '/topics' +
-                    '/{{ topic_name }}' +
-                    '/subscriptions' +
-                    '/{{ subscription_id }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ namespace_name }}', self.namespace_name)
-        self.url = self.url.replace('{{ topic_name }}', self.topic_name)
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-
-        old_response = self.get_resource()
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.ServiceBus/namespaces/{{ namespace_name }}/topics/{{ topic_name }}/subscriptions/{{ subscription_name }}',
+                                 subscription_id=self.subscription_id,
+                                 resource_group=self.resource_group,
+                                 namespace_name=self.namespace_name,
+                                 topic_name=self.topic_name,
+                                 subscription_name=self.name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        if self.check_mode and self.state_snapshot:
+            old_response = get_snapshot_resource(self.state_snapshot, self.url, self.fail)
+        if old_response is None:
+            old_response = self.get_resource()
 
         if not old_response:
             self.log("Subscription instance doesn't exist")
@@ -551,12 +519,9 @@ class AzureRMSubscriptions(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                self.results['modifiers'] = modifiers
-                self.results['compare'] = []
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -567,6 +532,9 @@ class AzureRMSubscriptions(AzureRMModuleBaseExt):
                 return self.results
 
             response = self.create_update_resource()
+            if not self.wait:
+                self.results['id'] = self.url
+                response = None
 
             # if not old_response:
             self.results['changed'] = True
@@ -580,12 +548,13 @@ class AzureRMSubscriptions(AzureRMModuleBaseExt):
             if self.check_mode:
                 return self.results
 
-            self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
+            response = self.delete_resource()
+            if not self.wait:
+                self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                           'DELETE',
+                                                                           self.query_parameters,
+                                                                           response)
+            response = None
         else:
             self.log('Subscription instance unchanged')
             self.results['changed'] = False
@@ -609,12 +578,18 @@ class AzureRMSubscriptions(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               self.body,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout if self.wait else 0,
                                               30)
         except CloudError as exc:
             self.log('Error attempting to create the Subscription instance.')
             self.fail('Error creating the Subscription instance: {0}'.format(str(exc)))
 
+        if not self.wait:
+            self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                       'PUT',
+                                                                       self.query_parameters,
+                                                                       response)
+
         try:
             response = json.loads(response.text)
         except Exception:
@@ -632,13 +607,20 @@ class AzureRMSubscriptions(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              0,
                                               30)
+            if self.wait:
+                self.mgmt_client.wait_for_deletion(self.url,
+                                                   self.query_parameters,
+                                                   self.header_parameters,
+                                                   response,
+                                                   self.polling_timeout,
+                                                   30)
         except CloudError as e:
             self.log('Error attempting to delete the Subscription instance.')
             self.fail('Error deleting the Subscription instance: {0}'.format(str(e)))
 
-        return True
+        return response
 
     def get_resource(self):
         # self.log('Checking if the Subscription instance {0} is present'.format(self.))
@@ -650,10 +632,11 @@ class AzureRMSubscriptions(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout,
                                               30)
+            response = json.loads(response.text)
             found = True
-            self.log("Response : {0}".format(response))
+            log_debug(self, 'Response : {0}', response)
             # self.log("Subscription instance : {0} found".format(response.name))
         except CloudError as e:
             self.log('Did not find the Subscription instance.')
@@ -664,6 +647,8 @@ class AzureRMSubscriptions(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMSubscriptions()
 
 
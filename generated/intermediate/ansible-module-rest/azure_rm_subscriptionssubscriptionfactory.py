@@ -67,6 +67,24 @@ options:
         The link to the new subscription. Use this link to check the status of
         subscription creation operation.
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
+  polling_timeout:
+    description:
+      - Maximum time in seconds to wait for long running operation to complete.
+      - Status is polled as indicated by C(Azure-AsyncOperation), C(Location) and C(Retry-After) headers.
+    type: int
+    default: 600
+  state_snapshot:
+    description:
+      - Path of state snapshot exported by M(azure_rm_statesnapshot).
+      - In check mode current state of the instance is taken from the snapshot instead of Azure, if the snapshot covers it.
+      - Instances of resource types, subscriptions or resource groups not exported to the snapshot are read from Azure.
+    type: path
   state:
     description:
       - Assert the state of the SubscriptionFactory.
@@ -111,13 +129,27 @@ subscription_link:
   type: str
   sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+from ansible.module_utils.azure_rm_common_log import log_debug
+from ansible.module_utils.azure_rm_common_snapshot import get_snapshot_resource
+from ansible.module_utils.azure_rm_common_url import build_url
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -126,53 +158,27 @@ except ImportError:
     pass
 
 
+ARG_SPEC = r'''{
+    "enrollment_account_name": {"type": "str", "updatable": false, "disposition": "enrollmentAccountName", "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "/"},
+    "owners": {"type": "list", "disposition": "/", "options": {"object_id": {"type": "str", "disposition": "objectId", "required": true}}},
+    "offer_type": {"type": "str", "updatable": false, "disposition": "/", "choices": ["MS-AZR-0017P", "MS-AZR-0148P"]},
+    "additional_parameters": {"type": "unknown[DictionaryType {\"$id\":\"45\",\"$type\":\"DictionaryType\",\"valueType\":{\"$id\":\"46\",\"$type\":\"PrimaryType\",\"knownPrimaryType\":\"object\",\"name\":{\"$id\":\"47\",\"fixed\":false,\"raw\":\"Object\"},\"deprecated\":false},\"supportsAdditionalProperties\":false,\"name\":{\"$id\":\"48\",\"fixed\":false},\"deprecated\":false}]", "updatable": false, "disposition": "/"},
+    "wait": {"type": "bool", "default": true},
+    "polling_timeout": {"type": "int", "default": 600},
+    "state_snapshot": {"type": "path"},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMSubscriptionFactory(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            enrollment_account_name=dict(
-                type='str',
-                updatable=False,
-                disposition='enrollmentAccountName',
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='/'
-            ),
-            owners=dict(
-                type='list',
-                disposition='/',
-                options=dict(
-                    object_id=dict(
-                        type='str',
-                        disposition='objectId',
-                        required=true
-                    )
-                )
-            ),
-            offer_type=dict(
-                type='str',
-                updatable=False,
-                disposition='/',
-                choices=['MS-AZR-0017P',
-                         'MS-AZR-0148P']
-            ),
-            additional_parameters=dict(
-                type='unknown[DictionaryType {"$id":"45","$type":"DictionaryType","valueType":{"$id":"46","$type":"PrimaryType","knownPrimaryType":"object","name":{"$id":"47","fixed":false,"raw":"Object"},"deprecated":false},"supportsAdditionalProperties":false,"name":{"$id":"48","fixed":false},"deprecated":false}]',
-                updatable=False,
-                disposition='/'
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.enrollment_account_name = None
         self.subscription_link = None
@@ -180,6 +186,9 @@ class AzureRMSubscriptionFactory(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.state_snapshot = None
+        self.wait = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -201,24 +210,24 @@ class AzureRMSubscriptionFactory(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
 
-        self.url = ('/providers' +
-                    '/Microsoft.Billing' +
-                    '/enrollmentAccounts' +
-                    '/{{ enrollment_account_name }}' +
-                    '/providers' +
-                    '/Microsoft.Subscription' +
-                    '/createSubscription')
-        self.url = self.url.replace('{{ enrollment_account_name }}', self.name)
+        try:
+            self.url = build_url('/providers/Microsoft.Billing/enrollmentAccounts/{{ enrollment_account_name }}/providers/Microsoft.Subscription/createSubscription',
+                                 enrollment_account_name=self.enrollment_account_name)
+        except ValueError as exc:
+            self.fail(str(exc))
 
-        old_response = self.get_resource()
+        if self.check_mode and self.state_snapshot:
+            old_response = get_snapshot_resource(self.state_snapshot, self.url, self.fail)
+        if old_response is None:
+            old_response = self.get_resource()
 
         if not old_response:
             self.log("SubscriptionFactory instance doesn't exist")
@@ -233,12 +242,9 @@ class AzureRMSubscriptionFactory(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                self.results['modifiers'] = modifiers
-                self.results['compare'] = []
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -249,6 +255,9 @@ class AzureRMSubscriptionFactory(AzureRMModuleBaseExt):
                 return self.results
 
             response = self.create_update_resource()
+            if not self.wait:
+                self.results['id'] = self.url
+                response = None
 
             # if not old_response:
             self.results['changed'] = True
@@ -262,19 +271,20 @@ class AzureRMSubscriptionFactory(AzureRMModuleBaseExt):
             if self.check_mode:
                 return self.results
 
-            self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
+            response = self.delete_resource()
+            if not self.wait:
+                self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                           'DELETE',
+                                                                           self.query_parameters,
+                                                                           response)
+            response = None
         else:
             self.log('SubscriptionFactory instance unchanged')
             self.results['changed'] = False
             response = old_response
 
         if response:
-           self.results["subscription_link"] = response["subscription_link"]
+           self.results["subscription_link"] = response.get("subscription_link")
 
         return self.results
 
@@ -289,7 +299,7 @@ class AzureRMSubscriptionFactory(AzureRMModuleBaseExt):
                                                   self.header_parameters,
                                                   self.body,
                                                   self.status_code,
-                                                  600,
+                                                  self.polling_timeout if self.wait else 0,
                                                   30)
             else:
                 response = self.mgmt_client.query(self.url,
@@ -298,12 +308,18 @@ class AzureRMSubscriptionFactory(AzureRMModuleBaseExt):
                                                   self.header_parameters,
                                                   self.body,
                                                   self.status_code,
-                                                  600,
+                                                  self.polling_timeout if self.wait else 0,
                                                   30)
         except CloudError as exc:
             self.log('Error attempting to create the SubscriptionFactory instance.')
             self.fail('Error creating the SubscriptionFactory instance: {0}'.format(str(exc)))
 
+        if not self.wait:
+            self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                       'PUT',
+                                                                       self.query_parameters,
+                                                                       response)
+
         try:
             response = json.loads(response.text)
         except Exception:
@@ -321,13 +337,20 @@ class AzureRMSubscriptionFactory(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              0,
                                               30)
+            if self.wait:
+                self.mgmt_client.wait_for_deletion(self.url,
+                                                   self.query_parameters,
+                                                   self.header_parameters,
+                                                   response,
+                                                   self.polling_timeout,
+                                                   30)
         except CloudError as e:
             self.log('Error attempting to delete the SubscriptionFactory instance.')
             self.fail('Error deleting the SubscriptionFactory instance: {0}'.format(str(e)))
 
-        return True
+        return response
 
     def get_resource(self):
         # self.log('Checking if the SubscriptionFactory instance {0} is present'.format(self.))
@@ -339,10 +362,11 @@ class AzureRMSubscriptionFactory(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout,
                                               30)
+            response = json.loads(response.text)
             found = True
-            self.log("Response : {0}".format(response))
+            log_debug(self, 'Response : {0}', response)
             # self.log("SubscriptionFactory instance : {0} found".format(response.name))
         except CloudError as e:
             self.log('Did not find the SubscriptionFactory instance.')
@@ -353,6 +377,8 @@ class AzureRMSubscriptionFactory(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMSubscriptionFactory()
 
 
@@ -263,6 +263,24 @@ options:
     description:
       - '{resourceProviderNamespace}/{resourceType}'
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
+  polling_timeout:
+    description:
+      - Maximum time in seconds to wait for long running operation to complete.
+      - Status is polled as indicated by C(Azure-AsyncOperation), C(Location) and C(Retry-After) headers.
+    type: int
+    default: 1800
+  state_snapshot:
+    description:
+      - Path of state snapshot exported by M(azure_rm_statesnapshot).
+      - In check mode current state of the instance is taken from the snapshot instead of Azure, if the snapshot covers it.
+      - Instances of resource types, subscriptions or resource groups not exported to the snapshot are read from Azure.
+    type: path
   state:
     description:
       - Assert the state of the VirtualMachine.
@@ -697,13 +715,27 @@ type:
   type: str
   sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_compare import get_comparator, create_merge_patch
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+from ansible.module_utils.azure_rm_common_log import log_debug
+from ansible.module_utils.azure_rm_common_snapshot import get_snapshot_resource
+from ansible.module_utils.azure_rm_common_url import build_url
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -712,180 +744,39 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resourceGroupName", "required": true},
+    "referer": {"type": "str", "updatable": false, "disposition": "Referer", "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "virtualMachineName", "required": true},
+    "location": {"type": "str", "updatable": false, "disposition": "/", "required": true},
+    "amount_of_ram": {"type": "number", "disposition": "/properties/amountOfRam", "required": true},
+    "disks": {"type": "list", "disposition": "/properties/*", "options": {"controller_id": {"type": "str", "disposition": "controllerId", "required": true}, "independence_mode": {"type": "str", "disposition": "independenceMode", "choices": ["persistent", "independent_persistent", "independent_nonpersistent"], "required": true}, "total_size": {"type": "number", "disposition": "totalSize", "required": true}, "virtual_disk_id": {"type": "str", "disposition": "virtualDiskId"}}},
+    "expose_to_guest_vm": {"type": "boolean", "disposition": "/properties/exposeToGuestVM"},
+    "guest_os": {"type": "str", "disposition": "/properties/guestOS", "required": true},
+    "guest_ostype": {"type": "str", "disposition": "/properties/guestOSType", "choices": ["linux", "windows", "other"], "required": true},
+    "nics": {"type": "list", "disposition": "/properties/*", "options": {"ip_addresses": {"type": "list", "disposition": "ipAddresses"}, "mac_address": {"type": "str", "disposition": "macAddress"}, "network": {"type": "dict", "options": {"id": {"type": "str", "required": true}, "location": {"type": "str", "updatable": false}}}, "nic_type": {"type": "str", "disposition": "nicType", "choices": ["E1000", "E1000E", "PCNET32", "VMXNET", "VMXNET2", "VMXNET3"], "required": true}, "power_on_boot": {"type": "boolean", "disposition": "powerOnBoot"}, "virtual_nic_id": {"type": "str", "disposition": "virtualNicId"}}},
+    "number_of_cores": {"type": "number", "disposition": "/properties/numberOfCores", "required": true},
+    "password": {"type": "str", "no_log": true, "disposition": "/properties/*"},
+    "private_cloud_id": {"type": "str", "disposition": "/properties/privateCloudId", "required": true},
+    "resource_pool": {"type": "dict", "disposition": "/properties/resourcePool", "options": {"id": {"type": "str", "required": true}, "location": {"type": "str", "updatable": false}}},
+    "template_id": {"type": "str", "disposition": "/properties/templateId"},
+    "username": {"type": "str", "disposition": "/properties/*"},
+    "v_sphere_networks": {"type": "list", "disposition": "/properties/vSphereNetworks"},
+    "wait": {"type": "bool", "default": true},
+    "polling_timeout": {"type": "int", "default": 1800},
+    "state_snapshot": {"type": "path"},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMVirtualMachine(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resourceGroupName',
-                required=true
-            ),
-            referer=dict(
-                type='str',
-                updatable=False,
-                disposition='Referer',
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='virtualMachineName',
-                required=true
-            ),
-            location=dict(
-                type='str',
-                updatable=False,
-                disposition='/',
-                required=true
-            ),
-            amount_of_ram=dict(
-                type='number',
-                disposition='/properties/amountOfRam',
-                required=true
-            ),
-            disks=dict(
-                type='list',
-                disposition='/properties/*',
-                options=dict(
-                    controller_id=dict(
-                        type='str',
-                        disposition='controllerId',
-                        required=true
-                    ),
-                    independence_mode=dict(
-                        type='str',
-                        disposition='independenceMode',
-                        choices=['persistent',
-                                 'independent_persistent',
-                                 'independent_nonpersistent'],
-                        required=true
-                    ),
-                    total_size=dict(
-                        type='number',
-                        disposition='totalSize',
-                        required=true
-                    ),
-                    virtual_disk_id=dict(
-                        type='str',
-                        disposition='virtualDiskId'
-                    )
-                )
-            ),
-            expose_to_guest_vm=dict(
-                type='boolean',
-                disposition='/properties/exposeToGuestVM'
-            ),
-            guest_os=dict(
-                type='str',
-                disposition='/properties/guestOS',
-                required=true
-            ),
-            guest_ostype=dict(
-                type='str',
-                disposition='/properties/guestOSType',
-                choices=['linux',
-                         'windows',
-                         'other'],
-                required=true
-            ),
-            nics=dict(
-                type='list',
-                disposition='/properties/*',
-                options=dict(
-                    ip_addresses=dict(
-                        type='list',
-                        disposition='ipAddresses'
-                    ),
-                    mac_address=dict(
-                        type='str',
-                        disposition='macAddress'
-                    ),
-                    network=dict(
-                        type='dict',
-                        options=dict(
-                            id=dict(
-                                type='str',
-                                required=true
-                            ),
-                            location=dict(
-                                type='str',
-                                updatable=False
-                            )
-                        )
-                    ),
-                    nic_type=dict(
-                        type='str',
-                        disposition='nicType',
-                        choices=['E1000',
-                                 'E1000E',
-                                 'PCNET32',
-                                 'VMXNET',
-                                 'VMXNET2',
-                                 'VMXNET3'],
-                        required=true
-                    ),
-                    power_on_boot=dict(
-                        type='boolean',
-                        disposition='powerOnBoot'
-                    ),
-                    virtual_nic_id=dict(
-                        type='str',
-                        disposition='virtualNicId'
-                    )
-                )
-            ),
-            number_of_cores=dict(
-                type='number',
-                disposition='/properties/numberOfCores',
-                required=true
-            ),
-            password=dict(
-                type='str',
-                no_log=True,
-                disposition='/properties/*'
-            ),
-            private_cloud_id=dict(
-                type='str',
-                disposition='/properties/privateCloudId',
-                required=true
-            ),
-            resource_pool=dict(
-                type='dict',
-                disposition='/properties/resourcePool',
-                options=dict(
-                    id=dict(
-                        type='str',
-                        required=true
-                    ),
-                    location=dict(
-                        type='str',
-                        updatable=False
-                    )
-                )
-            ),
-            template_id=dict(
-                type='str',
-                disposition='/properties/templateId'
-            ),
-            username=dict(
-                type='str',
-                disposition='/properties/*'
-            ),
-            v_sphere_networks=dict(
-                type='list',
-                disposition='/properties/vSphereNetworks'
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.referer = None
@@ -897,6 +788,9 @@ class AzureRMVirtualMachine(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.state_snapshot = None
+        self.wait = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -918,12 +812,12 @@ class AzureRMVirtualMachine(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
 
         resource_group = self.get_resource_group(self.resource_group)
@@ -931,19 +825,18 @@ class AzureRMVirtualMachine(AzureRMModuleBaseExt):
         if 'location' not in self.body:
             self.body['location'] = resource_group.location
 
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.VMwareCloudSimple' +
-                    '/virtualMachines' +
-                    '/{{ virtual_machine_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ virtual_machine_name }}', self.name)
-
-        old_response = self.get_resource()
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.VMwareCloudSimple/virtualMachines/{{ virtual_machine_name }}',
+                                 subscription_id=self.subscription_id,
+                                 resource_group=self.resource_group,
+                                 virtual_machine_name=self.name)
+        except ValueError as exc:
+            self.fail(str(exc))
+
+        if self.check_mode and self.state_snapshot:
+            old_response = get_snapshot_resource(self.state_snapshot, self.url, self.fail)
+        if old_response is None:
+            old_response = self.get_resource()
 
         if not old_response:
             self.log("VirtualMachine instance doesn't exist")
@@ -958,12 +851,9 @@ class AzureRMVirtualMachine(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                self.results['modifiers'] = modifiers
-                self.results['compare'] = []
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -974,6 +864,9 @@ class AzureRMVirtualMachine(AzureRMModuleBaseExt):
                 return self.results
 
             response = self.create_update_resource()
+            if not self.wait:
+                self.results['id'] = self.url
+                response = None
 
             # if not old_response:
             self.results['changed'] = True
@@ -987,12 +880,13 @@ class AzureRMVirtualMachine(AzureRMModuleBaseExt):
             if self.check_mode:
                 return self.results
 
-            self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
+            response = self.delete_resource()
+            if not self.wait:
+                self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                           'DELETE',
+                                                                           self.query_parameters,
+                                                                           response)
+            response = None
         else:
             self.log('VirtualMachine instance unchanged')
             self.results['changed'] = False
@@ -1012,18 +906,36 @@ class AzureRMVirtualMachine(AzureRMModuleBaseExt):
         # self.log('Creating / Updating the VirtualMachine instance {0}'.format(self.))
 
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'PUT',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              self.body,
-                                              self.status_code,
-                                              600,
-                                              30)
+            if self.to_do == Actions.Create:
+                response = self.mgmt_client.query(self.url,
+                                                  'PUT',
+                                                  self.query_parameters,
+                                                  self.header_parameters,
+                                                  self.body,
+                                                  self.status_code,
+                                                  self.polling_timeout if self.wait else 0,
+                                                  30)
+            else:
+                header_parameters = dict(self.header_parameters)
+                header_parameters['If-Match'] = '*'
+                response = self.mgmt_client.query(self.url,
+                                                  'PATCH',
+                                                  self.query_parameters,
+                                                  header_parameters,
+                                                  create_merge_patch(self.body, self.results['compare']),
+                                                  self.status_code,
+                                                  self.polling_timeout if self.wait else 0,
+                                                  30)
         except CloudError as exc:
             self.log('Error attempting to create the VirtualMachine instance.')
             self.fail('Error creating the VirtualMachine instance: {0}'.format(str(exc)))
 
+        if not self.wait:
+            self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                       'PUT' if self.to_do == Actions.Create else 'PATCH',
+                                                                       self.query_parameters,
+                                                                       response)
+
         try:
             response = json.loads(response.text)
         except Exception:
@@ -1041,13 +953,20 @@ class AzureRMVirtualMachine(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              0,
                                               30)
+            if self.wait:
+                self.mgmt_client.wait_for_deletion(self.url,
+                                                   self.query_parameters,
+                                                   self.header_parameters,
+                                                   response,
+                                                   self.polling_timeout,
+                                                   30)
         except CloudError as e:
             self.log('Error attempting to delete the VirtualMachine instance.')
             self.fail('Error deleting the VirtualMachine instance: {0}'.format(str(e)))
 
-        return True
+        return response
 
     def get_resource(self):
         # self.log('Checking if the VirtualMachine instance {0} is present'.format(self.))
@@ -1059,10 +978,11 @@ class AzureRMVirtualMachine(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout,
                                               30)
+            response = json.loads(response.text)
             found = True
-            self.log("Response : {0}".format(response))
+            log_debug(self, 'Response : {0}', response)
             # self.log("VirtualMachine instance : {0} found".format(response.name))
         except CloudError as e:
             self.log('Did not find the VirtualMachine instance.')
@@ -1073,6 +993,8 @@ class AzureRMVirtualMachine(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMVirtualMachine()
 
 
@@ -744,6 +744,24 @@ options:
     description:
       - Resource type.
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
+  polling_timeout:
+    description:
+      - Maximum time in seconds to wait for long running operation to complete.
+      - Status is polled as indicated by C(Azure-AsyncOperation), C(Location) and C(Retry-After) headers.
+    type: int
+    default: 600
+  state_snapshot:
+    description:
+      - Path of state snapshot exported by M(azure_rm_statesnapshot).
+      - In check mode current state of the instance is taken from the snapshot instead of Azure, if the snapshot covers it.
+      - Instances of resource types, subscriptions or resource groups not exported to the snapshot are read from Azure.
+    type: path
   state:
     description:
       - Assert the state of the WebApplicationFirewallPolicy.
@@ -1911,13 +1929,27 @@ etag:
   type: str
   sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_rest_ext import GenericRestClientExt
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
+from ansible.module_utils.azure_rm_common_log import log_debug
+from ansible.module_utils.azure_rm_common_snapshot import get_snapshot_resource
+from ansible.module_utils.azure_rm_common_url import build_url
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -1926,152 +1958,29 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resourceGroupName", "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "policyName", "required": true},
+    "id": {"type": "str", "updatable": false, "disposition": "/"},
+    "location": {"type": "str", "updatable": false, "disposition": "/"},
+    "policy_settings": {"type": "dict", "disposition": "/properties/policySettings", "options": {"enabled_state": {"type": "str", "disposition": "enabledState", "choices": ["Disabled", "Enabled"]}, "mode": {"type": "str", "choices": ["Prevention", "Detection"]}}},
+    "custom_rules": {"type": "list", "disposition": "/properties/customRules", "options": {"name": {"type": "str"}, "priority": {"type": "number", "required": true}, "rule_type": {"type": "str", "disposition": "ruleType", "choices": ["MatchRule", "Invalid"], "required": true}, "match_conditions": {"type": "list", "disposition": "matchConditions", "required": true, "options": {"match_variables": {"type": "list", "disposition": "matchVariables", "required": true, "options": {"variable_name": {"type": "str", "disposition": "variableName", "choices": ["RemoteAddr", "RequestMethod", "QueryString", "PostArgs", "RequestUri", "RequestHeaders", "RequestBody", "RequestCookies"], "required": true}, "selector": {"type": "str"}}}, "operator": {"type": "str", "choices": ["IPMatch", "Equal", "Contains", "LessThan", "GreaterThan", "LessThanOrEqual", "GreaterThanOrEqual", "BeginsWith", "EndsWith", "Regex"], "required": true}, "negation_conditon": {"type": "boolean", "disposition": "negationConditon"}, "match_values": {"type": "list", "disposition": "matchValues", "required": true}, "transforms": {"type": "list", "choices": ["Lowercase", "Trim", "UrlDecode", "UrlEncode", "RemoveNulls", "HtmlEntityDecode"]}}}, "action": {"type": "str", "choices": ["Allow", "Block", "Log"], "required": true}}},
+    "etag": {"type": "str", "updatable": false, "disposition": "/"},
+    "wait": {"type": "bool", "default": true},
+    "polling_timeout": {"type": "int", "default": 600},
+    "state_snapshot": {"type": "path"},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMWebApplicationFirewallPolicies(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resourceGroupName',
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='policyName',
-                required=true
-            ),
-            id=dict(
-                type='str',
-                updatable=False,
-                disposition='/'
-            ),
-            location=dict(
-                type='str',
-                updatable=False,
-                disposition='/'
-            ),
-            policy_settings=dict(
-                type='dict',
-                disposition='/properties/policySettings',
-                options=dict(
-                    enabled_state=dict(
-                        type='str',
-                        disposition='enabledState',
-                        choices=['Disabled',
-                                 'Enabled']
-                    ),
-                    mode=dict(
-                        type='str',
-                        choices=['Prevention',
-                                 'Detection']
-                    )
-                )
-            ),
-            custom_rules=dict(
-                type='list',
-                disposition='/properties/customRules',
-                options=dict(
-                    name=dict(
-                        type='str'
-                    ),
-                    priority=dict(
-                        type='number',
-                        required=true
-                    ),
-                    rule_type=dict(
-                        type='str',
-                        disposition='ruleType',
-                        choices=['MatchRule',
-                                 'Invalid'],
-                        required=true
-                    ),
-                    match_conditions=dict(
-                        type='list',
-                        disposition='matchConditions',
-                        required=true,
-                        options=dict(
-                            match_variables=dict(
-                                type='list',
-                                disposition='matchVariables',
-                                required=true,
-                                options=dict(
-                                    variable_name=dict(
-                                        type='str',
-                                        disposition='variableName',
-                                        choices=['RemoteAddr',
-                                                 'RequestMethod',
-                                                 'QueryString',
-                                                 'PostArgs',
-                                                 'RequestUri',
-                                                 'RequestHeaders',
-                                                 'RequestBody',
-                                                 'RequestCookies'],
-                                        required=true
-                                    ),
-                                    selector=dict(
-                                        type='str'
-                                    )
-                                )
-                            ),
-                            operator=dict(
-                                type='str',
-                                choices=['IPMatch',
-                                         'Equal',
-                                         'Contains',
-                                         'LessThan',
-                                         'GreaterThan',
-                                         'LessThanOrEqual',
-                                         'GreaterThanOrEqual',
-                                         'BeginsWith',
-                                         'EndsWith',
-                                         'Regex'],
-                                required=true
-                            ),
-                            negation_conditon=dict(
-                                type='boolean',
-                                disposition='negationConditon'
-                            ),
-                            match_values=dict(
-                                type='list',
-                                disposition='matchValues',
-                                required=true
-                            ),
-                            transforms=dict(
-                                type='list',
-                                choices=['Lowercase',
-                                         'Trim',
-                                         'UrlDecode',
-                                         'UrlEncode',
-                                         'RemoveNulls',
-                                         'HtmlEntityDecode']
-                            )
-                        )
-                    ),
-                    action=dict(
-                        type='str',
-                        choices=['Allow',
-                                 'Block',
-                                 'Log'],
-                        required=true
-                    )
-                )
-            ),
-            etag=dict(
-                type='str',
-                updatable=False,
-                disposition='/'
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.name = None
@@ -2081,6 +1990,9 @@ class AzureRMWebApplicationFirewallPolicies(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.state_snapshot = None
+        self.wait = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -2102,12 +2014,12 @@ class AzureRMWebApplicationFirewallPolicies(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClientExt,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
 
         resource_group = self.get_resource_group(self.resource_group)
@@ -2115,19 +2027,18 @@ class AzureRMWebApplicationFirewallPolicies(AzureRMModuleBaseExt):
         if 'location' not in self.body:
             self.body['location'] = resource_group.location
 
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.Network' +
-                    '/ApplicationGatewayWebApplicationFirewallPolicies' +
-                    '/{{ application_gateway_web_application_firewall_policy_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ application_gateway_web_application_firewall_policy_name }}', self.name)
+        try:
+            self.url = build_url('/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.Network/ApplicationGatewayWebApplicationFirewallPolicies/{{ application_gateway_web_application_firewall_policy_name }}',
+                                 subscription_id=self.subscription_id,
+                                 resource_group=self.resource_group,
+                                 application_gateway_web_application_firewall_policy_name=self.name)
+        except ValueError as exc:
+            self.fail(str(exc))
 
-        old_response = self.get_resource()
+        if self.check_mode and self.state_snapshot:
+            old_response = get_snapshot_resource(self.state_snapshot, self.url, self.fail)
+        if old_response is None:
+            old_response = self.get_resource()
 
         if not old_response:
             self.log("WebApplicationFirewallPolicy instance doesn't exist")
@@ -2142,12 +2053,9 @@ class AzureRMWebApplicationFirewallPolicies(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                self.results['modifiers'] = modifiers
-                self.results['compare'] = []
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -2158,6 +2066,9 @@ class AzureRMWebApplicationFirewallPolicies(AzureRMModuleBaseExt):
                 return self.results
 
             response = self.create_update_resource()
+            if not self.wait:
+                self.results['id'] = self.url
+                response = None
 
             # if not old_response:
             self.results['changed'] = True
@@ -2171,12 +2082,13 @@ class AzureRMWebApplicationFirewallPolicies(AzureRMModuleBaseExt):
             if self.check_mode:
                 return self.results
 
-            self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
+            response = self.delete_resource()
+            if not self.wait:
+                self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                           'DELETE',
+                                                                           self.query_parameters,
+                                                                           response)
+            response = None
         else:
             self.log('WebApplicationFirewallPolicy instance unchanged')
             self.results['changed'] = False
@@ -2189,7 +2101,7 @@ class AzureRMWebApplicationFirewallPolicies(AzureRMModuleBaseExt):
            self.results["location"] = response["location"]
            self.results["tags"] = response["tags"]
            self.results["properties"] = response["properties"]
-           self.results["etag"] = response["etag"]
+           self.results["etag"] = response.get("etag")
 
         return self.results
 
@@ -2203,12 +2115,18 @@ class AzureRMWebApplicationFirewallPolicies(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               self.body,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout if self.wait else 0,
                                               30)
         except CloudError as exc:
             self.log('Error attempting to create the WebApplicationFirewallPolicy instance.')
             self.fail('Error creating the WebApplicationFirewallPolicy instance: {0}'.format(str(exc)))
 
+        if not self.wait:
+            self.results['operation'] = self.mgmt_client.get_operation(self.url,
+                                                                       'PUT',
+                                                                       self.query_parameters,
+                                                                       response)
+
         try:
             response = json.loads(response.text)
         except Exception:
@@ -2226,13 +2144,20 @@ class AzureRMWebApplicationFirewallPolicies(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              0,
                                               30)
+            if self.wait:
+                self.mgmt_client.wait_for_deletion(self.url,
+                                                   self.query_parameters,
+                                                   self.header_parameters,
+                                                   response,
+                                                   self.polling_timeout,
+                                                   30)
         except CloudError as e:
             self.log('Error attempting to delete the WebApplicationFirewallPolicy instance.')
             self.fail('Error deleting the WebApplicationFirewallPolicy instance: {0}'.format(str(e)))
 
-        return True
+        return response
 
     def get_resource(self):
         # self.log('Checking if the WebApplicationFirewallPolicy instance {0} is present'.format(self.))
@@ -2244,10 +2169,11 @@ class AzureRMWebApplicationFirewallPolicies(AzureRMModuleBaseExt):
                                               self.header_parameters,
                                               None,
                                               self.status_code,
-                                              600,
+                                              self.polling_timeout,
                                               30)
+            response = json.loads(response.text)
             found = True
-            self.log("Response : {0}".format(response))
+            log_debug(self, 'Response : {0}', response)
             # self.log("WebApplicationFirewallPolicy instance : {0} found".format(response.name))
         except CloudError as e:
             self.log('Did not find the WebApplicationFirewallPolicy instance.')
@@ -2258,6 +2184,8 @@ class AzureRMWebApplicationFirewallPolicies(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMWebApplicationFirewallPolicies()
 
 
@@ -233,6 +233,17 @@ options:
         description:
           - Indicates if the given action rule is enabled or disabled
         type: str
+  max_items:
+    description:
+      - Maximum number of items returned by list operations.
+      - Next pages are not requested once this number of items was collected.
+    type: int
+  fields:
+    description:
+      - Fields to return for each item, as dot separated paths, for example C(properties.provisioningState).
+      - Entries which are not plain paths are evaluated as JMESPath expressions, which requires C(jmespath).
+      - Fields are selected as the response is decoded, by default all of them are returned.
+    type: list
 extends_documentation_fragment:
   - azure
 author:
@@ -521,6 +532,10 @@ action_rules:
 import time
 import json
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
+from ansible.module_utils.azure_rm_common_sdk_ext import paged_as_dict
+from ansible.module_utils.azure_rm_common_info_ext import get_projection, project
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -570,6 +585,12 @@ class AzureRMActionRulesInfo(AzureRMModuleBase):
             ),
             name=dict(
                 type='str'
+            ),
+            max_items=dict(
+                type='int'
+            ),
+            fields=dict(
+                type='list'
             )
         )
 
@@ -591,6 +612,9 @@ class AzureRMActionRulesInfo(AzureRMModuleBase):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.fields = None
+        self.projection = None
+        self.max_items = None
         self.url = None
         self.status_code = [200]
 
@@ -609,6 +633,7 @@ class AzureRMActionRulesInfo(AzureRMModuleBase):
 
         self.mgmt_client = self.get_mgmt_svc_client(RecoveryServicesClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.projection = get_projection(self.fields, self.fail)
 
         if (self.resource_group is not None and
             self.name is not None):
@@ -628,7 +653,7 @@ class AzureRMActionRulesInfo(AzureRMModuleBase):
         except CloudError as e:
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return project(response.as_dict(), self.projection)
 
     def listbyresourcegroup(self):
         response = None
@@ -638,7 +663,7 @@ class AzureRMActionRulesInfo(AzureRMModuleBase):
         except CloudError as e:
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return paged_as_dict(response, self.max_items, self.projection)
 
     def listbysubscription(self):
         response = None
@@ -648,13 +673,15 @@ class AzureRMActionRulesInfo(AzureRMModuleBase):
         except CloudError as e:
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return paged_as_dict(response, self.max_items, self.projection)
 
-    def format_item(item):
+    def format_item(self, item):
         return item
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMActionRulesInfo()
 
 
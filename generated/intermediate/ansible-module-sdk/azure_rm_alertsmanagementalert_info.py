@@ -135,6 +135,17 @@ options:
     description:
       - Unique ID of an alert instance.
     type: str
+  max_items:
+    description:
+      - Maximum number of items returned by list operations.
+      - Next pages are not requested once this number of items was collected.
+    type: int
+  fields:
+    description:
+      - Fields to return for each item, as dot separated paths, for example C(properties.provisioningState).
+      - Entries which are not plain paths are evaluated as JMESPath expressions, which requires C(jmespath).
+      - Fields are selected as the response is decoded, by default all of them are returned.
+    type: list
 extends_documentation_fragment:
   - azure
 author:
@@ -184,6 +195,10 @@ alerts:
 import time
 import json
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
+from ansible.module_utils.azure_rm_common_sdk_ext import paged_as_dict
+from ansible.module_utils.azure_rm_common_info_ext import get_projection, project
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -260,6 +275,12 @@ class AzureRMAlertsInfo(AzureRMModuleBase):
             ),
             alert_id=dict(
                 type='str'
+            ),
+            max_items=dict(
+                type='int'
+            ),
+            fields=dict(
+                type='list'
             )
         )
 
@@ -289,6 +310,9 @@ class AzureRMAlertsInfo(AzureRMModuleBase):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.fields = None
+        self.projection = None
+        self.max_items = None
         self.url = None
         self.status_code = [200]
 
@@ -307,6 +331,7 @@ class AzureRMAlertsInfo(AzureRMModuleBase):
 
         self.mgmt_client = self.get_mgmt_svc_client(RecoveryServicesClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.projection = get_projection(self.fields, self.fail)
 
         if (self.alert_id is not None):
             self.results['alerts'] = self.format_item(self.gethistory())
@@ -328,7 +353,7 @@ class AzureRMAlertsInfo(AzureRMModuleBase):
         except CloudError as e:
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return project(response.as_dict(), self.projection)
 
     def getbyid(self):
         response = None
@@ -338,7 +363,7 @@ class AzureRMAlertsInfo(AzureRMModuleBase):
         except CloudError as e:
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return project(response.as_dict(), self.projection)
 
     def getsummary(self):
         response = None
@@ -348,7 +373,7 @@ class AzureRMAlertsInfo(AzureRMModuleBase):
         except CloudError as e:
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return project(response.as_dict(), self.projection)
 
     def getall(self):
         response = None
@@ -358,7 +383,7 @@ class AzureRMAlertsInfo(AzureRMModuleBase):
         except CloudError as e:
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return paged_as_dict(response, self.max_items, self.projection)
 
     def metadata(self):
         response = None
@@ -368,13 +393,15 @@ class AzureRMAlertsInfo(AzureRMModuleBase):
         except CloudError as e:
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return project(response.as_dict(), self.projection)
 
-    def format_item(item):
+    def format_item(self, item):
         return item
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMAlertsInfo()
 
 
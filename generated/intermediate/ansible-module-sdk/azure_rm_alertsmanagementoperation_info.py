@@ -55,6 +55,17 @@ options:
             description:
               - Description of the operation
             type: str
+  max_items:
+    description:
+      - Maximum number of items returned by list operations.
+      - Next pages are not requested once this number of items was collected.
+    type: int
+  fields:
+    description:
+      - Fields to return for each item, as dot separated paths, for example C(properties.provisioningState).
+      - Entries which are not plain paths are evaluated as JMESPath expressions, which requires C(jmespath).
+      - Fields are selected as the response is decoded, by default all of them are returned.
+    type: list
 extends_documentation_fragment:
   - azure
 author:
@@ -135,6 +146,10 @@ operations:
 import time
 import json
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
+from ansible.module_utils.azure_rm_common_sdk_ext import paged_as_dict
+from ansible.module_utils.azure_rm_common_info_ext import get_projection, project
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -149,6 +164,12 @@ except ImportError:
 class AzureRMOperationsInfo(AzureRMModuleBase):
     def __init__(self):
         self.module_arg_spec = dict(
+            max_items=dict(
+                type='int'
+            ),
+            fields=dict(
+                type='list'
+            )
         )
 
         self.next_link = None
@@ -157,6 +178,9 @@ class AzureRMOperationsInfo(AzureRMModuleBase):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.fields = None
+        self.projection = None
+        self.max_items = None
         self.url = None
         self.status_code = [200]
 
@@ -175,6 +199,7 @@ class AzureRMOperationsInfo(AzureRMModuleBase):
 
         self.mgmt_client = self.get_mgmt_svc_client(RecoveryServicesClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.projection = get_projection(self.fields, self.fail)
 
         else:
             self.results['operations'] = [self.format_item(self.list())]
@@ -188,13 +213,15 @@ class AzureRMOperationsInfo(AzureRMModuleBase):
         except CloudError as e:
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return paged_as_dict(response, self.max_items, self.projection)
 
-    def format_item(item):
+    def format_item(self, item):
         return item
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMOperationsInfo()
 
 
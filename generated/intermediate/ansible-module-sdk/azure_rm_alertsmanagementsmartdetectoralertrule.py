@@ -38,6 +38,12 @@ options:
     description:
       - The alert rule description.
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the SmartDetectorAlertRule.
@@ -352,12 +358,23 @@ properties:
           type: 'unknown-primary[timeSpan]'
           sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -481,6 +498,10 @@ class AzureRMSmartDetectorAlertRules(AzureRMModuleBaseExt):
                     )
                 )
             ),
+            wait=dict(
+                type='bool',
+                default=True
+            ),
             state=dict(
                 type='str',
                 default='present',
@@ -498,6 +519,7 @@ class AzureRMSmartDetectorAlertRules(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMSmartDetectorAlertRules, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -533,9 +555,9 @@ class AzureRMSmartDetectorAlertRules(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -568,6 +590,10 @@ class AzureRMSmartDetectorAlertRules(AzureRMModuleBaseExt):
                                                                                     alert_rule_name=self.name,
                                                                                     parameters=self.body)
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the SmartDetectorAlertRule instance.')
@@ -579,6 +605,11 @@ class AzureRMSmartDetectorAlertRules(AzureRMModuleBaseExt):
         try:
             response = self.mgmt_client.smart_detector_alert_rules.delete(resource_group_name=self.resource_group,
                                                                           alert_rule_name=self.name)
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the SmartDetectorAlertRule instance.')
             self.fail('Error deleting the SmartDetectorAlertRule instance: {0}'.format(str(e)))
@@ -597,6 +628,8 @@ class AzureRMSmartDetectorAlertRules(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMSmartDetectorAlertRules()
 
 
@@ -226,6 +226,17 @@ options:
             The URI to fetch the next page of alerts. Call ListNext() with this
             URI to fetch the next page alerts.
         type: str
+  max_items:
+    description:
+      - Maximum number of items returned by list operations.
+      - Next pages are not requested once this number of items was collected.
+    type: int
+  fields:
+    description:
+      - Fields to return for each item, as dot separated paths, for example C(properties.provisioningState).
+      - Entries which are not plain paths are evaluated as JMESPath expressions, which requires C(jmespath).
+      - Fields are selected as the response is decoded, by default all of them are returned.
+    type: list
 extends_documentation_fragment:
   - azure
 author:
@@ -481,6 +492,10 @@ smart_groups:
 import time
 import json
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
+from ansible.module_utils.azure_rm_common_sdk_ext import paged_as_dict
+from ansible.module_utils.azure_rm_common_info_ext import get_projection, project
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -530,6 +545,12 @@ class AzureRMSmartGroupsInfo(AzureRMModuleBase):
             ),
             smart_group_id=dict(
                 type='str'
+            ),
+            max_items=dict(
+                type='int'
+            ),
+            fields=dict(
+                type='list'
             )
         )
 
@@ -551,6 +572,9 @@ class AzureRMSmartGroupsInfo(AzureRMModuleBase):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.fields = None
+        self.projection = None
+        self.max_items = None
         self.url = None
         self.status_code = [200]
 
@@ -569,6 +593,7 @@ class AzureRMSmartGroupsInfo(AzureRMModuleBase):
 
         self.mgmt_client = self.get_mgmt_svc_client(RecoveryServicesClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.projection = get_projection(self.fields, self.fail)
 
         if (self.smart_group_id is not None):
             self.results['smart_groups'] = self.format_item(self.gethistory())
@@ -586,7 +611,7 @@ class AzureRMSmartGroupsInfo(AzureRMModuleBase):
         except CloudError as e:
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return project(response.as_dict(), self.projection)
 
     def getbyid(self):
         response = None
@@ -596,7 +621,7 @@ class AzureRMSmartGroupsInfo(AzureRMModuleBase):
         except CloudError as e:
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return project(response.as_dict(), self.projection)
 
     def getall(self):
         response = None
@@ -606,13 +631,15 @@ class AzureRMSmartGroupsInfo(AzureRMModuleBase):
         except CloudError as e:
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return paged_as_dict(response, self.max_items, self.projection)
 
-    def format_item(item):
+    def format_item(self, item):
         return item
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMSmartGroupsInfo()
 
 
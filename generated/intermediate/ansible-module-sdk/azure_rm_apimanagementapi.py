@@ -234,6 +234,12 @@ options:
     description:
       - Resource name.
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the Api.
@@ -676,12 +682,24 @@ properties:
           type: str
           sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -693,209 +711,44 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resource_group_name", "required": true},
+    "service_name": {"type": "str", "updatable": false, "required": true},
+    "api_id": {"type": "str", "updatable": false, "required": true},
+    "description": {"type": "str", "disposition": "/"},
+    "authentication_settings": {"type": "dict", "disposition": "/", "options": {"o_auth2": {"type": "dict", "options": {"authorization_server_id": {"type": "str"}, "scope": {"type": "str"}}}, "openid": {"type": "dict", "options": {"openid_provider_id": {"type": "str"}, "bearer_token_sending_methods": {"type": "list", "choices": ["authorizationHeader", "query"]}}}, "subscription_key_required": {"type": "boolean"}}},
+    "subscription_key_parameter_names": {"type": "dict", "disposition": "/", "options": {"header": {"type": "str"}, "query": {"type": "str"}}},
+    "type": {"type": "str", "disposition": "/", "choices": ["http", "soap"]},
+    "api_revision": {"type": "str", "disposition": "/"},
+    "api_version": {"type": "str", "disposition": "/"},
+    "is_current": {"type": "boolean", "disposition": "/"},
+    "api_revision_description": {"type": "str", "disposition": "/"},
+    "api_version_description": {"type": "str", "disposition": "/"},
+    "api_version_set_id": {"type": "raw", "disposition": "/", "pattern": "//subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.ApiManagement/service/{{ service_name }}/apiVersionSets/{{ name }}"},
+    "subscription_required": {"type": "boolean", "disposition": "/"},
+    "source_api_id": {"type": "raw", "disposition": "/", "pattern": "//subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.ApiManagement/service/{{ service_name }}/apis/{{ name }}"},
+    "display_name": {"type": "str", "disposition": "/"},
+    "service_url": {"type": "str", "disposition": "/"},
+    "path": {"type": "str", "disposition": "/", "required": true},
+    "protocols": {"type": "list", "disposition": "/", "choices": ["http", "https"]},
+    "api_version_set": {"type": "dict", "disposition": "/", "options": {"id": {"type": "str"}, "name": {"type": "str"}, "description": {"type": "str"}, "versioning_scheme": {"type": "str", "choices": ["Segment", "Query", "Header"]}, "version_query_name": {"type": "str"}, "version_header_name": {"type": "str"}}},
+    "value": {"type": "str", "disposition": "/"},
+    "format": {"type": "str", "disposition": "/", "choices": ["wadl-xml", "wadl-link-json", "swagger-json", "swagger-link-json", "wsdl", "wsdl-link", "openapi", "openapi+json", "openapi-link"]},
+    "wsdl_selector": {"type": "dict", "disposition": "/", "options": {"wsdl_service_name": {"type": "str"}, "wsdl_endpoint_name": {"type": "str"}}},
+    "api_type": {"type": "str", "disposition": "/", "choices": ["SoapToRest", "SoapPassThrough"]},
+    "wait": {"type": "bool", "default": true},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMApi(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resource_group_name',
-                required=true
-            ),
-            service_name=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            api_id=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            description=dict(
-                type='str',
-                disposition='/'
-            ),
-            authentication_settings=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    o_auth2=dict(
-                        type='dict',
-                        options=dict(
-                            authorization_server_id=dict(
-                                type='str'
-                            ),
-                            scope=dict(
-                                type='str'
-                            )
-                        )
-                    ),
-                    openid=dict(
-                        type='dict',
-                        options=dict(
-                            openid_provider_id=dict(
-                                type='str'
-                            ),
-                            bearer_token_sending_methods=dict(
-                                type='list',
-                                choices=['authorizationHeader',
-                                         'query']
-                            )
-                        )
-                    ),
-                    subscription_key_required=dict(
-                        type='boolean'
-                    )
-                )
-            ),
-            subscription_key_parameter_names=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    header=dict(
-                        type='str'
-                    ),
-                    query=dict(
-                        type='str'
-                    )
-                )
-            ),
-            type=dict(
-                type='str',
-                disposition='/',
-                choices=['http',
-                         'soap']
-            ),
-            api_revision=dict(
-                type='str',
-                disposition='/'
-            ),
-            api_version=dict(
-                type='str',
-                disposition='/'
-            ),
-            is_current=dict(
-                type='boolean',
-                disposition='/'
-            ),
-            api_revision_description=dict(
-                type='str',
-                disposition='/'
-            ),
-            api_version_description=dict(
-                type='str',
-                disposition='/'
-            ),
-            api_version_set_id=dict(
-                type='raw',
-                disposition='/',
-                pattern=('//subscriptions/{{ subscription_id }}/resourceGroups'
-                         '/{{ resource_group }}/providers/Microsoft.ApiManagement/service'
-                         '/{{ service_name }}/apiVersionSets/{{ name }}')
-            ),
-            subscription_required=dict(
-                type='boolean',
-                disposition='/'
-            ),
-            source_api_id=dict(
-                type='raw',
-                disposition='/',
-                pattern=('//subscriptions/{{ subscription_id }}/resourceGroups'
-                         '/{{ resource_group }}/providers/Microsoft.ApiManagement/service'
-                         '/{{ service_name }}/apis/{{ name }}')
-            ),
-            display_name=dict(
-                type='str',
-                disposition='/'
-            ),
-            service_url=dict(
-                type='str',
-                disposition='/'
-            ),
-            path=dict(
-                type='str',
-                disposition='/',
-                required=true
-            ),
-            protocols=dict(
-                type='list',
-                disposition='/',
-                choices=['http',
-                         'https']
-            ),
-            api_version_set=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    id=dict(
-                        type='str'
-                    ),
-                    name=dict(
-                        type='str'
-                    ),
-                    description=dict(
-                        type='str'
-                    ),
-                    versioning_scheme=dict(
-                        type='str',
-                        choices=['Segment',
-                                 'Query',
-                                 'Header']
-                    ),
-                    version_query_name=dict(
-                        type='str'
-                    ),
-                    version_header_name=dict(
-                        type='str'
-                    )
-                )
-            ),
-            value=dict(
-                type='str',
-                disposition='/'
-            ),
-            format=dict(
-                type='str',
-                disposition='/',
-                choices=['wadl-xml',
-                         'wadl-link-json',
-                         'swagger-json',
-                         'swagger-link-json',
-                         'wsdl',
-                         'wsdl-link',
-                         'openapi',
-                         'openapi+json',
-                         'openapi-link']
-            ),
-            wsdl_selector=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    wsdl_service_name=dict(
-                        type='str'
-                    ),
-                    wsdl_endpoint_name=dict(
-                        type='str'
-                    )
-                )
-            ),
-            api_type=dict(
-                type='str',
-                disposition='/',
-                choices=['SoapToRest',
-                         'SoapPassThrough']
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.service_name = None
@@ -908,6 +761,7 @@ class AzureRMApi(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMApi, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -921,7 +775,7 @@ class AzureRMApi(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
@@ -943,9 +797,9 @@ class AzureRMApi(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -977,6 +831,10 @@ class AzureRMApi(AzureRMModuleBaseExt):
                                                              api_id=self.api_id,
                                                              parameters=self.body)
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the Api instance.')
@@ -989,6 +847,11 @@ class AzureRMApi(AzureRMModuleBaseExt):
             response = self.mgmt_client.api.delete(resource_group_name=self.resource_group,
                                                    service_name=self.service_name,
                                                    api_id=self.api_id)
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the Api instance.')
             self.fail('Error deleting the Api instance: {0}'.format(str(e)))
@@ -1008,6 +871,8 @@ class AzureRMApi(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMApi()
 
 
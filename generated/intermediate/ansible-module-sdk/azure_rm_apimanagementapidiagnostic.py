@@ -167,6 +167,12 @@ options:
     description:
       - Resource type for API Management resource.
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the ApiDiagnostic.
@@ -450,12 +456,24 @@ properties:
       type: boolean
       sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -467,143 +485,30 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resource_group_name", "required": true},
+    "service_name": {"type": "str", "updatable": false, "required": true},
+    "api_id": {"type": "str", "updatable": false, "required": true},
+    "diagnostic_id": {"type": "str", "updatable": false, "required": true},
+    "always_log": {"type": "str", "disposition": "/", "choices": ["allErrors"]},
+    "logger_id": {"type": "str", "disposition": "/", "required": true},
+    "sampling": {"type": "dict", "disposition": "/", "options": {"sampling_type": {"type": "str", "choices": ["fixed"]}, "percentage": {"type": "number"}}},
+    "frontend": {"type": "dict", "disposition": "/", "options": {"request": {"type": "dict", "options": {"headers": {"type": "list"}, "body": {"type": "dict", "options": {"bytes": {"type": "number"}}}}}, "response": {"type": "dict", "options": {"headers": {"type": "list"}, "body": {"type": "dict", "options": {"bytes": {"type": "number"}}}}}}},
+    "backend": {"type": "dict", "disposition": "/", "options": {"request": {"type": "dict", "options": {"headers": {"type": "list"}, "body": {"type": "dict", "options": {"bytes": {"type": "number"}}}}}, "response": {"type": "dict", "options": {"headers": {"type": "list"}, "body": {"type": "dict", "options": {"bytes": {"type": "number"}}}}}}},
+    "enable_http_correlation_headers": {"type": "boolean", "disposition": "/"},
+    "wait": {"type": "bool", "default": true},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMApiDiagnostic(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resource_group_name',
-                required=true
-            ),
-            service_name=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            api_id=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            diagnostic_id=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            always_log=dict(
-                type='str',
-                disposition='/',
-                choices=['allErrors']
-            ),
-            logger_id=dict(
-                type='str',
-                disposition='/',
-                required=true
-            ),
-            sampling=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    sampling_type=dict(
-                        type='str',
-                        choices=['fixed']
-                    ),
-                    percentage=dict(
-                        type='number'
-                    )
-                )
-            ),
-            frontend=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    request=dict(
-                        type='dict',
-                        options=dict(
-                            headers=dict(
-                                type='list'
-                            ),
-                            body=dict(
-                                type='dict',
-                                options=dict(
-                                    bytes=dict(
-                                        type='number'
-                                    )
-                                )
-                            )
-                        )
-                    ),
-                    response=dict(
-                        type='dict',
-                        options=dict(
-                            headers=dict(
-                                type='list'
-                            ),
-                            body=dict(
-                                type='dict',
-                                options=dict(
-                                    bytes=dict(
-                                        type='number'
-                                    )
-                                )
-                            )
-                        )
-                    )
-                )
-            ),
-            backend=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    request=dict(
-                        type='dict',
-                        options=dict(
-                            headers=dict(
-                                type='list'
-                            ),
-                            body=dict(
-                                type='dict',
-                                options=dict(
-                                    bytes=dict(
-                                        type='number'
-                                    )
-                                )
-                            )
-                        )
-                    ),
-                    response=dict(
-                        type='dict',
-                        options=dict(
-                            headers=dict(
-                                type='list'
-                            ),
-                            body=dict(
-                                type='dict',
-                                options=dict(
-                                    bytes=dict(
-                                        type='number'
-                                    )
-                                )
-                            )
-                        )
-                    )
-                )
-            ),
-            enable_http_correlation_headers=dict(
-                type='boolean',
-                disposition='/'
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.service_name = None
@@ -617,6 +522,7 @@ class AzureRMApiDiagnostic(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMApiDiagnostic, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -630,7 +536,7 @@ class AzureRMApiDiagnostic(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
@@ -652,9 +558,9 @@ class AzureRMApiDiagnostic(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -687,6 +593,10 @@ class AzureRMApiDiagnostic(AzureRMModuleBaseExt):
                                                                         diagnostic_id=self.diagnostic_id,
                                                                         parameters=self.body)
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the ApiDiagnostic instance.')
@@ -700,6 +610,11 @@ class AzureRMApiDiagnostic(AzureRMModuleBaseExt):
                                                               service_name=self.service_name,
                                                               api_id=self.api_id,
                                                               diagnostic_id=self.diagnostic_id)
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the ApiDiagnostic instance.')
             self.fail('Error deleting the ApiDiagnostic instance: {0}'.format(str(e)))
@@ -720,6 +635,8 @@ class AzureRMApiDiagnostic(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMApiDiagnostic()
 
 
@@ -46,6 +46,12 @@ options:
     description:
       - Date and time when the issue was created.
     type: datetime
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the ApiIssue.
@@ -185,12 +191,23 @@ properties:
       type: str
       sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -265,6 +282,10 @@ class AzureRMApiIssue(AzureRMModuleBaseExt):
                          '/{{ resource_group }}/providers/Microsoft.ApiManagement/service'
                          '/{{ service_name }}/users/{{ name }}')
             ),
+            wait=dict(
+                type='bool',
+                default=True
+            ),
             state=dict(
                 type='str',
                 default='present',
@@ -284,6 +305,7 @@ class AzureRMApiIssue(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMApiIssue, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -319,9 +341,9 @@ class AzureRMApiIssue(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -354,6 +376,10 @@ class AzureRMApiIssue(AzureRMModuleBaseExt):
                                                                    issue_id=self.issue_id,
                                                                    parameters=self.body)
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the ApiIssue instance.')
@@ -367,6 +393,11 @@ class AzureRMApiIssue(AzureRMModuleBaseExt):
                                                          service_name=self.service_name,
                                                          api_id=self.api_id,
                                                          issue_id=self.issue_id)
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the ApiIssue instance.')
             self.fail('Error deleting the ApiIssue instance: {0}'.format(str(e)))
@@ -387,6 +418,8 @@ class AzureRMApiIssue(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMApiIssue()
 
 
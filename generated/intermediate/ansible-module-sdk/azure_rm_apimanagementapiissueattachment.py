@@ -81,6 +81,12 @@ options:
     description:
       - Resource type for API Management resource.
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the ApiIssueAttachment.
@@ -167,12 +173,24 @@ properties:
       type: str
       sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -184,60 +202,28 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resource_group_name", "required": true},
+    "service_name": {"type": "str", "updatable": false, "required": true},
+    "api_id": {"type": "str", "updatable": false, "required": true},
+    "issue_id": {"type": "str", "updatable": false, "required": true},
+    "attachment_id": {"type": "str", "updatable": false, "required": true},
+    "title": {"type": "str", "disposition": "/", "required": true},
+    "content_format": {"type": "str", "disposition": "/", "required": true},
+    "content": {"type": "str", "disposition": "/", "required": true},
+    "wait": {"type": "bool", "default": true},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMApiIssueAttachment(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resource_group_name',
-                required=true
-            ),
-            service_name=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            api_id=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            issue_id=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            attachment_id=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            title=dict(
-                type='str',
-                disposition='/',
-                required=true
-            ),
-            content_format=dict(
-                type='str',
-                disposition='/',
-                required=true
-            ),
-            content=dict(
-                type='str',
-                disposition='/',
-                required=true
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.service_name = None
@@ -252,6 +238,7 @@ class AzureRMApiIssueAttachment(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMApiIssueAttachment, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -265,7 +252,7 @@ class AzureRMApiIssueAttachment(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
@@ -287,9 +274,9 @@ class AzureRMApiIssueAttachment(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -323,6 +310,10 @@ class AzureRMApiIssueAttachment(AzureRMModuleBaseExt):
                                                                               attachment_id=self.attachment_id,
                                                                               parameters=self.body)
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the ApiIssueAttachment instance.')
@@ -337,6 +328,11 @@ class AzureRMApiIssueAttachment(AzureRMModuleBaseExt):
                                                                     api_id=self.api_id,
                                                                     issue_id=self.issue_id,
                                                                     attachment_id=self.attachment_id)
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the ApiIssueAttachment instance.')
             self.fail('Error deleting the ApiIssueAttachment instance: {0}'.format(str(e)))
@@ -358,6 +354,8 @@ class AzureRMApiIssueAttachment(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMApiIssueAttachment()
 
 
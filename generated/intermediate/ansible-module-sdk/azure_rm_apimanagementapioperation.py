@@ -361,6 +361,12 @@ options:
     description:
       - Resource type for API Management resource.
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the ApiOperation.
@@ -881,12 +887,24 @@ properties:
       type: str
       sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -898,272 +916,32 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resource_group_name", "required": true},
+    "service_name": {"type": "str", "updatable": false, "required": true},
+    "api_id": {"type": "str", "updatable": false, "required": true},
+    "operation_id": {"type": "str", "updatable": false, "required": true},
+    "template_parameters": {"type": "list", "disposition": "/", "options": {"name": {"type": "str", "required": true}, "description": {"type": "str"}, "type": {"type": "str", "required": true}, "default_value": {"type": "str"}, "required": {"type": "boolean"}, "values": {"type": "list"}}},
+    "description": {"type": "str", "disposition": "/"},
+    "request": {"type": "dict", "disposition": "/", "options": {"description": {"type": "str"}, "query_parameters": {"type": "list", "options": {"name": {"type": "str", "required": true}, "description": {"type": "str"}, "type": {"type": "str", "required": true}, "default_value": {"type": "str"}, "required": {"type": "boolean"}, "values": {"type": "list"}}}, "headers": {"type": "list", "options": {"name": {"type": "str", "required": true}, "description": {"type": "str"}, "type": {"type": "str", "required": true}, "default_value": {"type": "str"}, "required": {"type": "boolean"}, "values": {"type": "list"}}}, "representations": {"type": "list", "options": {"content_type": {"type": "str", "required": true}, "sample": {"type": "str"}, "schema_id": {"type": "str"}, "type_name": {"type": "str"}, "form_parameters": {"type": "list", "options": {"name": {"type": "str", "required": true}, "description": {"type": "str"}, "type": {"type": "str", "required": true}, "default_value": {"type": "str"}, "required": {"type": "boolean"}, "values": {"type": "list"}}}}}}},
+    "responses": {"type": "list", "disposition": "/", "options": {"status_code": {"type": "number", "required": true}, "description": {"type": "str"}, "representations": {"type": "list", "options": {"content_type": {"type": "str", "required": true}, "sample": {"type": "str"}, "schema_id": {"type": "str"}, "type_name": {"type": "str"}, "form_parameters": {"type": "list", "options": {"name": {"type": "str", "required": true}, "description": {"type": "str"}, "type": {"type": "str", "required": true}, "default_value": {"type": "str"}, "required": {"type": "boolean"}, "values": {"type": "list"}}}}}, "headers": {"type": "list", "options": {"name": {"type": "str", "required": true}, "description": {"type": "str"}, "type": {"type": "str", "required": true}, "default_value": {"type": "str"}, "required": {"type": "boolean"}, "values": {"type": "list"}}}}},
+    "policies": {"type": "str", "disposition": "/"},
+    "display_name": {"type": "str", "disposition": "/", "required": true},
+    "method": {"type": "str", "disposition": "/", "required": true},
+    "url_template": {"type": "str", "disposition": "/", "required": true},
+    "wait": {"type": "bool", "default": true},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMApiOperation(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resource_group_name',
-                required=true
-            ),
-            service_name=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            api_id=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            operation_id=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            template_parameters=dict(
-                type='list',
-                disposition='/',
-                options=dict(
-                    name=dict(
-                        type='str',
-                        required=true
-                    ),
-                    description=dict(
-                        type='str'
-                    ),
-                    type=dict(
-                        type='str',
-                        required=true
-                    ),
-                    default_value=dict(
-                        type='str'
-                    ),
-                    required=dict(
-                        type='boolean'
-                    ),
-                    values=dict(
-                        type='list'
-                    )
-                )
-            ),
-            description=dict(
-                type='str',
-                disposition='/'
-            ),
-            request=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    description=dict(
-                        type='str'
-                    ),
-                    query_parameters=dict(
-                        type='list',
-                        options=dict(
-                            name=dict(
-                                type='str',
-                                required=true
-                            ),
-                            description=dict(
-                                type='str'
-                            ),
-                            type=dict(
-                                type='str',
-                                required=true
-                            ),
-                            default_value=dict(
-                                type='str'
-                            ),
-                            required=dict(
-                                type='boolean'
-                            ),
-                            values=dict(
-                                type='list'
-                            )
-                        )
-                    ),
-                    headers=dict(
-                        type='list',
-                        options=dict(
-                            name=dict(
-                                type='str',
-                                required=true
-                            ),
-                            description=dict(
-                                type='str'
-                            ),
-                            type=dict(
-                                type='str',
-                                required=true
-                            ),
-                            default_value=dict(
-                                type='str'
-                            ),
-                            required=dict(
-                                type='boolean'
-                            ),
-                            values=dict(
-                                type='list'
-                            )
-                        )
-                    ),
-                    representations=dict(
-                        type='list',
-                        options=dict(
-                            content_type=dict(
-                                type='str',
-                                required=true
-                            ),
-                            sample=dict(
-                                type='str'
-                            ),
-                            schema_id=dict(
-                                type='str'
-                            ),
-                            type_name=dict(
-                                type='str'
-                            ),
-                            form_parameters=dict(
-                                type='list',
-                                options=dict(
-                                    name=dict(
-                                        type='str',
-                                        required=true
-                                    ),
-                                    description=dict(
-                                        type='str'
-                                    ),
-                                    type=dict(
-                                        type='str',
-                                        required=true
-                                    ),
-                                    default_value=dict(
-                                        type='str'
-                                    ),
-                                    required=dict(
-                                        type='boolean'
-                                    ),
-                                    values=dict(
-                                        type='list'
-                                    )
-                                )
-                            )
-                        )
-                    )
-                )
-            ),
-            responses=dict(
-                type='list',
-                disposition='/',
-                options=dict(
-                    status_code=dict(
-                        type='number',
-                        required=true
-                    ),
-                    description=dict(
-                        type='str'
-                    ),
-                    representations=dict(
-                        type='list',
-                        options=dict(
-                            content_type=dict(
-                                type='str',
-                                required=true
-                            ),
-                            sample=dict(
-                                type='str'
-                            ),
-                            schema_id=dict(
-                                type='str'
-                            ),
-                            type_name=dict(
-                                type='str'
-                            ),
-                            form_parameters=dict(
-                                type='list',
-                                options=dict(
-                                    name=dict(
-                                        type='str',
-                                        required=true
-                                    ),
-                                    description=dict(
-                                        type='str'
-                                    ),
-                                    type=dict(
-                                        type='str',
-                                        required=true
-                                    ),
-                                    default_value=dict(
-                                        type='str'
-                                    ),
-                                    required=dict(
-                                        type='boolean'
-                                    ),
-                                    values=dict(
-                                        type='list'
-                                    )
-                                )
-                            )
-                        )
-                    ),
-                    headers=dict(
-                        type='list',
-                        options=dict(
-                            name=dict(
-                                type='str',
-                                required=true
-                            ),
-                            description=dict(
-                                type='str'
-                            ),
-                            type=dict(
-                                type='str',
-                                required=true
-                            ),
-                            default_value=dict(
-                                type='str'
-                            ),
-                            required=dict(
-                                type='boolean'
-                            ),
-                            values=dict(
-                                type='list'
-                            )
-                        )
-                    )
-                )
-            ),
-            policies=dict(
-                type='str',
-                disposition='/'
-            ),
-            display_name=dict(
-                type='str',
-                disposition='/',
-                required=true
-            ),
-            method=dict(
-                type='str',
-                disposition='/',
-                required=true
-            ),
-            url_template=dict(
-                type='str',
-                disposition='/',
-                required=true
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.service_name = None
@@ -1177,6 +955,7 @@ class AzureRMApiOperation(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMApiOperation, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -1190,7 +969,7 @@ class AzureRMApiOperation(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
@@ -1212,9 +991,9 @@ class AzureRMApiOperation(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -1247,6 +1026,10 @@ class AzureRMApiOperation(AzureRMModuleBaseExt):
                                                                        operation_id=self.operation_id,
                                                                        parameters=self.body)
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the ApiOperation instance.')
@@ -1260,6 +1043,11 @@ class AzureRMApiOperation(AzureRMModuleBaseExt):
                                                              service_name=self.service_name,
                                                              api_id=self.api_id,
                                                              operation_id=self.operation_id)
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the ApiOperation instance.')
             self.fail('Error deleting the ApiOperation instance: {0}'.format(str(e)))
@@ -1280,6 +1068,8 @@ class AzureRMApiOperation(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMApiOperation()
 
 
@@ -78,6 +78,12 @@ options:
     description:
       - Resource type for API Management resource.
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the ApiVersionSet.
@@ -184,12 +190,24 @@ properties:
       type: str
       sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -201,60 +219,28 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resource_group_name", "required": true},
+    "service_name": {"type": "str", "updatable": false, "required": true},
+    "version_set_id": {"type": "str", "updatable": false, "required": true},
+    "description": {"type": "str", "disposition": "/"},
+    "version_query_name": {"type": "str", "disposition": "/"},
+    "version_header_name": {"type": "str", "disposition": "/"},
+    "display_name": {"type": "str", "disposition": "/", "required": true},
+    "versioning_scheme": {"type": "str", "disposition": "/", "choices": ["Segment", "Query", "Header"], "required": true},
+    "wait": {"type": "bool", "default": true},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMApiVersionSet(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resource_group_name',
-                required=true
-            ),
-            service_name=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            version_set_id=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            description=dict(
-                type='str',
-                disposition='/'
-            ),
-            version_query_name=dict(
-                type='str',
-                disposition='/'
-            ),
-            version_header_name=dict(
-                type='str',
-                disposition='/'
-            ),
-            display_name=dict(
-                type='str',
-                disposition='/',
-                required=true
-            ),
-            versioning_scheme=dict(
-                type='str',
-                disposition='/',
-                choices=['Segment',
-                         'Query',
-                         'Header'],
-                required=true
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.service_name = None
@@ -267,6 +253,7 @@ class AzureRMApiVersionSet(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMApiVersionSet, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -280,7 +267,7 @@ class AzureRMApiVersionSet(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
@@ -302,9 +289,9 @@ class AzureRMApiVersionSet(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -336,6 +323,10 @@ class AzureRMApiVersionSet(AzureRMModuleBaseExt):
                                                                          version_set_id=self.version_set_id,
                                                                          parameters=self.body)
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the ApiVersionSet instance.')
@@ -348,6 +339,11 @@ class AzureRMApiVersionSet(AzureRMModuleBaseExt):
             response = self.mgmt_client.api_version_set.delete(resource_group_name=self.resource_group,
                                                                service_name=self.service_name,
                                                                version_set_id=self.version_set_id)
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the ApiVersionSet instance.')
             self.fail('Error deleting the ApiVersionSet instance: {0}'.format(str(e)))
@@ -367,6 +363,8 @@ class AzureRMApiVersionSet(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMApiVersionSet()
 
 
@@ -157,6 +157,12 @@ options:
     description:
       - Resource type for API Management resource.
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the AuthorizationServer.
@@ -384,12 +390,24 @@ properties:
       type: str
       sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -401,130 +419,39 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resource_group_name", "required": true},
+    "service_name": {"type": "str", "updatable": false, "required": true},
+    "authsid": {"type": "str", "updatable": false, "required": true},
+    "description": {"type": "str", "disposition": "/"},
+    "authorization_methods": {"type": "list", "disposition": "/", "choices": ["HEAD", "OPTIONS", "TRACE", "GET", "POST", "PUT", "PATCH", "DELETE"]},
+    "client_authentication_method": {"type": "list", "disposition": "/", "choices": ["Basic", "Body"]},
+    "token_body_parameters": {"type": "list", "disposition": "/", "options": {"name": {"type": "str", "required": true}, "value": {"type": "str", "required": true}}},
+    "token_endpoint": {"type": "str", "disposition": "/"},
+    "support_state": {"type": "boolean", "disposition": "/"},
+    "default_scope": {"type": "str", "disposition": "/"},
+    "bearer_token_sending_methods": {"type": "list", "disposition": "/", "choices": ["authorizationHeader", "query"]},
+    "client_secret": {"type": "str", "disposition": "/"},
+    "resource_owner_username": {"type": "str", "disposition": "/"},
+    "resource_owner_password": {"type": "str", "disposition": "/"},
+    "display_name": {"type": "str", "disposition": "/", "required": true},
+    "client_registration_endpoint": {"type": "str", "disposition": "/", "required": true},
+    "authorization_endpoint": {"type": "str", "disposition": "/", "required": true},
+    "grant_types": {"type": "list", "disposition": "/", "choices": ["authorizationCode", "implicit", "resourceOwnerPassword", "clientCredentials"], "required": true},
+    "client_id": {"type": "str", "disposition": "/", "required": true},
+    "wait": {"type": "bool", "default": true},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMAuthorizationServer(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resource_group_name',
-                required=true
-            ),
-            service_name=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            authsid=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            description=dict(
-                type='str',
-                disposition='/'
-            ),
-            authorization_methods=dict(
-                type='list',
-                disposition='/',
-                choices=['HEAD',
-                         'OPTIONS',
-                         'TRACE',
-                         'GET',
-                         'POST',
-                         'PUT',
-                         'PATCH',
-                         'DELETE']
-            ),
-            client_authentication_method=dict(
-                type='list',
-                disposition='/',
-                choices=['Basic',
-                         'Body']
-            ),
-            token_body_parameters=dict(
-                type='list',
-                disposition='/',
-                options=dict(
-                    name=dict(
-                        type='str',
-                        required=true
-                    ),
-                    value=dict(
-                        type='str',
-                        required=true
-                    )
-                )
-            ),
-            token_endpoint=dict(
-                type='str',
-                disposition='/'
-            ),
-            support_state=dict(
-                type='boolean',
-                disposition='/'
-            ),
-            default_scope=dict(
-                type='str',
-                disposition='/'
-            ),
-            bearer_token_sending_methods=dict(
-                type='list',
-                disposition='/',
-                choices=['authorizationHeader',
-                         'query']
-            ),
-            client_secret=dict(
-                type='str',
-                disposition='/'
-            ),
-            resource_owner_username=dict(
-                type='str',
-                disposition='/'
-            ),
-            resource_owner_password=dict(
-                type='str',
-                disposition='/'
-            ),
-            display_name=dict(
-                type='str',
-                disposition='/',
-                required=true
-            ),
-            client_registration_endpoint=dict(
-                type='str',
-                disposition='/',
-                required=true
-            ),
-            authorization_endpoint=dict(
-                type='str',
-                disposition='/',
-                required=true
-            ),
-            grant_types=dict(
-                type='list',
-                disposition='/',
-                choices=['authorizationCode',
-                         'implicit',
-                         'resourceOwnerPassword',
-                         'clientCredentials'],
-                required=true
-            ),
-            client_id=dict(
-                type='str',
-                disposition='/',
-                required=true
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.service_name = None
@@ -537,6 +464,7 @@ class AzureRMAuthorizationServer(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMAuthorizationServer, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -550,7 +478,7 @@ class AzureRMAuthorizationServer(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
@@ -572,9 +500,9 @@ class AzureRMAuthorizationServer(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -606,6 +534,10 @@ class AzureRMAuthorizationServer(AzureRMModuleBaseExt):
                                                                               authsid=self.authsid,
                                                                               parameters=self.body)
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the AuthorizationServer instance.')
@@ -618,6 +550,11 @@ class AzureRMAuthorizationServer(AzureRMModuleBaseExt):
             response = self.mgmt_client.authorization_server.delete(resource_group_name=self.resource_group,
                                                                     service_name=self.service_name,
                                                                     authsid=self.authsid)
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the AuthorizationServer instance.')
             self.fail('Error deleting the AuthorizationServer instance: {0}'.format(str(e)))
@@ -637,6 +574,8 @@ class AzureRMAuthorizationServer(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMAuthorizationServer()
 
 
@@ -186,6 +186,12 @@ options:
     description:
       - Resource type for API Management resource.
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the Backend.
@@ -485,12 +491,24 @@ properties:
       type: str
       sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -502,147 +520,32 @@ except ImportError:
     pass
 
 
+ARG_SPEC = r'''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resource_group_name", "required": true},
+    "service_name": {"type": "str", "updatable": false, "required": true},
+    "backend_id": {"type": "str", "updatable": false, "required": true},
+    "title": {"type": "str", "disposition": "/"},
+    "description": {"type": "str", "disposition": "/"},
+    "resource_id": {"type": "str", "disposition": "/"},
+    "service_fabric_cluster": {"type": "dict", "disposition": "/", "options": {"client_certificatethumbprint": {"type": "str", "required": true}, "max_partition_resolution_retries": {"type": "number"}, "management_endpoints": {"type": "list", "required": true}, "server_certificate_thumbprints": {"type": "list"}, "server_x509names": {"type": "list", "options": {"name": {"type": "str"}, "issuer_certificate_thumbprint": {"type": "str"}}}}},
+    "credentials": {"type": "dict", "disposition": "/", "options": {"certificate": {"type": "list"}, "query": {"type": "unknown[DictionaryType {\"$id\":\"1845\",\"$type\":\"DictionaryType\",\"valueType\":{\"$id\":\"1846\",\"$type\":\"SequenceType\",\"elementType\":{\"$id\":\"1847\",\"$type\":\"PrimaryType\",\"knownPrimaryType\":\"string\",\"name\":{\"$id\":\"1848\",\"fixed\":false,\"raw\":\"String\"},\"deprecated\":false},\"name\":{\"$id\":\"1849\",\"fixed\":false},\"deprecated\":false},\"supportsAdditionalProperties\":false,\"name\":{\"$id\":\"1850\",\"fixed\":false},\"deprecated\":false}]"}, "header": {"type": "unknown[DictionaryType {\"$id\":\"1855\",\"$type\":\"DictionaryType\",\"valueType\":{\"$id\":\"1856\",\"$type\":\"SequenceType\",\"elementType\":{\"$id\":\"1857\",\"$type\":\"PrimaryType\",\"knownPrimaryType\":\"string\",\"name\":{\"$id\":\"1858\",\"fixed\":false,\"raw\":\"String\"},\"deprecated\":false},\"name\":{\"$id\":\"1859\",\"fixed\":false},\"deprecated\":false},\"supportsAdditionalProperties\":false,\"name\":{\"$id\":\"1860\",\"fixed\":false},\"deprecated\":false}]"}, "authorization": {"type": "dict", "options": {"scheme": {"type": "str", "required": true}, "parameter": {"type": "str", "required": true}}}}},
+    "proxy": {"type": "dict", "disposition": "/", "options": {"url": {"type": "str", "required": true}, "username": {"type": "str"}, "password": {"type": "str", "no_log": true}}},
+    "tls": {"type": "dict", "disposition": "/", "options": {"validate_certificate_chain": {"type": "boolean"}, "validate_certificate_name": {"type": "boolean"}}},
+    "url": {"type": "str", "disposition": "/", "required": true},
+    "protocol": {"type": "str", "disposition": "/", "choices": ["http", "soap"], "required": true},
+    "wait": {"type": "bool", "default": true},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMBackend(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resource_group_name',
-                required=true
-            ),
-            service_name=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            backend_id=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            title=dict(
-                type='str',
-                disposition='/'
-            ),
-            description=dict(
-                type='str',
-                disposition='/'
-            ),
-            resource_id=dict(
-                type='str',
-                disposition='/'
-            ),
-            service_fabric_cluster=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    client_certificatethumbprint=dict(
-                        type='str',
-                        required=true
-                    ),
-                    max_partition_resolution_retries=dict(
-                        type='number'
-                    ),
-                    management_endpoints=dict(
-                        type='list',
-                        required=true
-                    ),
-                    server_certificate_thumbprints=dict(
-                        type='list'
-                    ),
-                    server_x509names=dict(
-                        type='list',
-                        options=dict(
-                            name=dict(
-                                type='str'
-                            ),
-                            issuer_certificate_thumbprint=dict(
-                                type='str'
-                            )
-                        )
-                    )
-                )
-            ),
-            credentials=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    certificate=dict(
-                        type='list'
-                    ),
-                    query=dict(
-                        type='unknown[DictionaryType {"$id":"1845","$type":"DictionaryType","valueType":{"$id":"1846","$type":"SequenceType","elementType":{"$id":"1847","$type":"PrimaryType","knownPrimaryType":"string","name":{"$id":"1848","fixed":false,"raw":"String"},"deprecated":false},"name":{"$id":"1849","fixed":false},"deprecated":false},"supportsAdditionalProperties":false,"name":{"$id":"1850","fixed":false},"deprecated":false}]'
-                    ),
-                    header=dict(
-                        type='unknown[DictionaryType {"$id":"1855","$type":"DictionaryType","valueType":{"$id":"1856","$type":"SequenceType","elementType":{"$id":"1857","$type":"PrimaryType","knownPrimaryType":"string","name":{"$id":"1858","fixed":false,"raw":"String"},"deprecated":false},"name":{"$id":"1859","fixed":false},"deprecated":false},"supportsAdditionalProperties":false,"name":{"$id":"1860","fixed":false},"deprecated":false}]'
-                    ),
-                    authorization=dict(
-                        type='dict',
-                        options=dict(
-                            scheme=dict(
-                                type='str',
-                                required=true
-                            ),
-                            parameter=dict(
-                                type='str',
-                                required=true
-                            )
-                        )
-                    )
-                )
-            ),
-            proxy=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    url=dict(
-                        type='str',
-                        required=true
-                    ),
-                    username=dict(
-                        type='str'
-                    ),
-                    password=dict(
-                        type='str',
-                        no_log=True
-                    )
-                )
-            ),
-            tls=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    validate_certificate_chain=dict(
-                        type='boolean'
-                    ),
-                    validate_certificate_name=dict(
-                        type='boolean'
-                    )
-                )
-            ),
-            url=dict(
-                type='str',
-                disposition='/',
-                required=true
-            ),
-            protocol=dict(
-                type='str',
-                disposition='/',
-                choices=['http',
-                         'soap'],
-                required=true
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.service_name = None
@@ -655,6 +558,7 @@ class AzureRMBackend(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMBackend, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -668,7 +572,7 @@ class AzureRMBackend(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
@@ -690,9 +594,9 @@ class AzureRMBackend(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -724,6 +628,10 @@ class AzureRMBackend(AzureRMModuleBaseExt):
                                                                  backend_id=self.backend_id,
                                                                  parameters=self.body)
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the Backend instance.')
@@ -736,6 +644,11 @@ class AzureRMBackend(AzureRMModuleBaseExt):
             response = self.mgmt_client.backend.delete(resource_group_name=self.resource_group,
                                                        service_name=self.service_name,
                                                        backend_id=self.backend_id)
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the Backend instance.')
             self.fail('Error deleting the Backend instance: {0}'.format(str(e)))
@@ -755,6 +668,8 @@ class AzureRMBackend(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMBackend()
 
 
@@ -66,6 +66,12 @@ options:
     description:
       - Resource type for API Management resource.
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the DelegationSetting.
@@ -176,12 +182,24 @@ properties:
           type: boolean
           sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -193,57 +211,26 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resource_group_name", "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "service_name", "required": true},
+    "url": {"type": "str", "disposition": "/"},
+    "validation_key": {"type": "str", "disposition": "/"},
+    "subscriptions": {"type": "dict", "disposition": "/", "options": {"enabled": {"type": "boolean"}}},
+    "user_registration": {"type": "dict", "disposition": "/", "options": {"enabled": {"type": "boolean"}}},
+    "wait": {"type": "bool", "default": true},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMDelegationSettings(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resource_group_name',
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='service_name',
-                required=true
-            ),
-            url=dict(
-                type='str',
-                disposition='/'
-            ),
-            validation_key=dict(
-                type='str',
-                disposition='/'
-            ),
-            subscriptions=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    enabled=dict(
-                        type='boolean'
-                    )
-                )
-            ),
-            user_registration=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    enabled=dict(
-                        type='boolean'
-                    )
-                )
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.name = None
@@ -255,6 +242,7 @@ class AzureRMDelegationSettings(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMDelegationSettings, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -268,7 +256,7 @@ class AzureRMDelegationSettings(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
@@ -290,9 +278,9 @@ class AzureRMDelegationSettings(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -323,6 +311,10 @@ class AzureRMDelegationSettings(AzureRMModuleBaseExt):
                                                                              service_name=self.name,
                                                                              parameters=self.body)
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the DelegationSetting instance.')
@@ -333,6 +325,11 @@ class AzureRMDelegationSettings(AzureRMModuleBaseExt):
         # self.log('Deleting the DelegationSetting instance {0}'.format(self.))
         try:
             response = self.mgmt_client.delegation_settings.delete()
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the DelegationSetting instance.')
             self.fail('Error deleting the DelegationSetting instance: {0}'.format(str(e)))
@@ -351,6 +348,8 @@ class AzureRMDelegationSettings(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMDelegationSettings()
 
 
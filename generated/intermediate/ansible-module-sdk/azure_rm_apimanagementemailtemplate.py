@@ -82,6 +82,12 @@ options:
     description:
       - Resource type for API Management resource.
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the EmailTemplate.
@@ -206,12 +212,24 @@ properties:
           type: str
           sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -223,67 +241,28 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resource_group_name", "required": true},
+    "service_name": {"type": "str", "updatable": false, "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "template_name", "required": true},
+    "subject": {"type": "str", "disposition": "/"},
+    "title": {"type": "str", "disposition": "/"},
+    "description": {"type": "str", "disposition": "/"},
+    "body": {"type": "str", "disposition": "/"},
+    "parameters": {"type": "list", "disposition": "/", "options": {"name": {"type": "str"}, "title": {"type": "str"}, "description": {"type": "str"}}},
+    "wait": {"type": "bool", "default": true},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMEmailTemplate(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resource_group_name',
-                required=true
-            ),
-            service_name=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='template_name',
-                required=true
-            ),
-            subject=dict(
-                type='str',
-                disposition='/'
-            ),
-            title=dict(
-                type='str',
-                disposition='/'
-            ),
-            description=dict(
-                type='str',
-                disposition='/'
-            ),
-            body=dict(
-                type='str',
-                disposition='/'
-            ),
-            parameters=dict(
-                type='list',
-                disposition='/',
-                options=dict(
-                    name=dict(
-                        type='str'
-                    ),
-                    title=dict(
-                        type='str'
-                    ),
-                    description=dict(
-                        type='str'
-                    )
-                )
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.service_name = None
@@ -296,6 +275,7 @@ class AzureRMEmailTemplate(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMEmailTemplate, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -309,7 +289,7 @@ class AzureRMEmailTemplate(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
@@ -331,9 +311,9 @@ class AzureRMEmailTemplate(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -365,6 +345,10 @@ class AzureRMEmailTemplate(AzureRMModuleBaseExt):
                                                                         template_name=self.name,
                                                                         parameters=self.body)
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the EmailTemplate instance.')
@@ -377,6 +361,11 @@ class AzureRMEmailTemplate(AzureRMModuleBaseExt):
             response = self.mgmt_client.email_template.delete(resource_group_name=self.resource_group,
                                                               service_name=self.service_name,
                                                               template_name=self.name)
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the EmailTemplate instance.')
             self.fail('Error deleting the EmailTemplate instance: {0}'.format(str(e)))
@@ -396,6 +385,8 @@ class AzureRMEmailTemplate(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMEmailTemplate()
 
 
@@ -83,6 +83,12 @@ options:
     description:
       - Resource ID.
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the IdentityProvider.
@@ -213,12 +219,24 @@ properties:
       type: str
       sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -230,81 +248,32 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resource_group_name", "required": true},
+    "service_name": {"type": "str", "updatable": false, "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "identity_provider_name", "required": true},
+    "type": {"type": "str", "disposition": "/", "choices": ["facebook", "google", "microsoft", "twitter", "aad", "aadB2C"]},
+    "allowed_tenants": {"type": "list", "disposition": "/"},
+    "authority": {"type": "str", "disposition": "/"},
+    "signup_policy_name": {"type": "str", "disposition": "/"},
+    "signin_policy_name": {"type": "str", "disposition": "/"},
+    "profile_editing_policy_name": {"type": "str", "disposition": "/"},
+    "password_reset_policy_name": {"type": "str", "no_log": true, "disposition": "/"},
+    "client_id": {"type": "str", "disposition": "/", "required": true},
+    "client_secret": {"type": "str", "disposition": "/", "required": true},
+    "wait": {"type": "bool", "default": true},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMIdentityProvider(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resource_group_name',
-                required=true
-            ),
-            service_name=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='identity_provider_name',
-                required=true
-            ),
-            type=dict(
-                type='str',
-                disposition='/',
-                choices=['facebook',
-                         'google',
-                         'microsoft',
-                         'twitter',
-                         'aad',
-                         'aadB2C']
-            ),
-            allowed_tenants=dict(
-                type='list',
-                disposition='/'
-            ),
-            authority=dict(
-                type='str',
-                disposition='/'
-            ),
-            signup_policy_name=dict(
-                type='str',
-                disposition='/'
-            ),
-            signin_policy_name=dict(
-                type='str',
-                disposition='/'
-            ),
-            profile_editing_policy_name=dict(
-                type='str',
-                disposition='/'
-            ),
-            password_reset_policy_name=dict(
-                type='str',
-                no_log=True,
-                disposition='/'
-            ),
-            client_id=dict(
-                type='str',
-                disposition='/',
-                required=true
-            ),
-            client_secret=dict(
-                type='str',
-                disposition='/',
-                required=true
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.service_name = None
@@ -317,6 +286,7 @@ class AzureRMIdentityProvider(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMIdentityProvider, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -330,7 +300,7 @@ class AzureRMIdentityProvider(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
@@ -352,9 +322,9 @@ class AzureRMIdentityProvider(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -386,6 +356,10 @@ class AzureRMIdentityProvider(AzureRMModuleBaseExt):
                                                                            identity_provider_name=self.name,
                                                                            parameters=self.body)
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the IdentityProvider instance.')
@@ -398,6 +372,11 @@ class AzureRMIdentityProvider(AzureRMModuleBaseExt):
             response = self.mgmt_client.identity_provider.delete(resource_group_name=self.resource_group,
                                                                  service_name=self.service_name,
                                                                  identity_provider_name=self.name)
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the IdentityProvider instance.')
             self.fail('Error deleting the IdentityProvider instance: {0}'.format(str(e)))
@@ -417,6 +396,8 @@ class AzureRMIdentityProvider(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMIdentityProvider()
 
 
@@ -83,6 +83,12 @@ options:
         description:
           - Data Transferred in KiloBytes.
         type: number
+  fields:
+    description:
+      - Fields to return for each item, as dot separated paths, for example C(properties.provisioningState).
+      - Entries which are not plain paths are evaluated as JMESPath expressions, which requires C(jmespath).
+      - Fields are selected as the response is decoded, by default all of them are returned.
+    type: list
 extends_documentation_fragment:
   - azure
 author:
@@ -169,6 +175,9 @@ quota_by_period_keys:
 import time
 import json
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
+from ansible.module_utils.azure_rm_common_info_ext import get_projection, project
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -198,6 +207,9 @@ class AzureRMQuotaByPeriodKeysInfo(AzureRMModuleBase):
             quota_period_key=dict(
                 type='str',
                 required=true
+            ),
+            fields=dict(
+                type='list'
             )
         )
 
@@ -214,6 +226,8 @@ class AzureRMQuotaByPeriodKeysInfo(AzureRMModuleBase):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.fields = None
+        self.projection = None
         self.url = None
         self.status_code = [200]
 
@@ -232,6 +246,7 @@ class AzureRMQuotaByPeriodKeysInfo(AzureRMModuleBase):
 
         self.mgmt_client = self.get_mgmt_svc_client(ApiManagementClientClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.projection = get_projection(self.fields, self.fail)
 
         if (self.resource_group is not None and
             self.service_name is not None and
@@ -251,13 +266,15 @@ class AzureRMQuotaByPeriodKeysInfo(AzureRMModuleBase):
         except CloudError as e:
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return project(response.as_dict(), self.projection)
 
-    def format_item(item):
+    def format_item(self, item):
         return item
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMQuotaByPeriodKeysInfo()
 
 
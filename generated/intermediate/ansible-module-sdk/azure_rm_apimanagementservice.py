@@ -405,6 +405,12 @@ options:
     description:
       - ETag of the resource.
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the ApiManagementService.
@@ -1047,12 +1053,24 @@ etag:
   type: str
   sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -1064,230 +1082,36 @@ except ImportError:
     pass
 
 
+ARG_SPEC = r'''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resource_group_name", "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "service_name", "required": true},
+    "notification_sender_email": {"type": "str", "disposition": "/"},
+    "hostname_configurations": {"type": "list", "disposition": "/", "options": {"type": {"type": "str", "choices": ["Proxy", "Portal", "Management", "Scm", "DeveloperPortal"], "required": true}, "host_name": {"type": "str", "required": true}, "key_vault_id": {"type": "str"}, "encoded_certificate": {"type": "str"}, "certificate_password": {"type": "str"}, "default_ssl_binding": {"type": "boolean"}, "negotiate_client_certificate": {"type": "boolean"}, "certificate": {"type": "dict", "options": {"expiry": {"type": "datetime", "required": true}, "thumbprint": {"type": "str", "required": true}, "subject": {"type": "str", "required": true}}}}},
+    "virtual_network_configuration": {"type": "dict", "disposition": "/", "options": {"subnet_resource_id": {"type": "raw", "pattern": "//subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.Network/virtualNetworks/{{ virtual_network_name }}/subnets/{{ name }}"}}},
+    "additional_locations": {"type": "list", "disposition": "/", "options": {"location": {"type": "str", "updatable": false, "required": true}, "sku": {"type": "dict", "required": true, "options": {"name": {"type": "str", "choices": ["Developer", "Standard", "Premium", "Basic", "Consumption"], "required": true}, "capacity": {"type": "number"}}}, "virtual_network_configuration": {"type": "dict", "options": {"subnet_resource_id": {"type": "raw", "pattern": "//subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.Network/virtualNetworks/{{ virtual_network_name }}/subnets/{{ name }}"}}}}},
+    "custom_properties": {"type": "unknown[DictionaryType {\"$id\":\"2519\",\"$type\":\"DictionaryType\",\"valueType\":{\"$id\":\"2520\",\"$type\":\"PrimaryType\",\"knownPrimaryType\":\"string\",\"name\":{\"$id\":\"2521\",\"fixed\":false,\"raw\":\"String\"},\"deprecated\":false},\"supportsAdditionalProperties\":false,\"name\":{\"$id\":\"2522\",\"fixed\":false},\"deprecated\":false}]", "disposition": "/"},
+    "certificates": {"type": "list", "disposition": "/", "options": {"encoded_certificate": {"type": "str"}, "certificate_password": {"type": "str"}, "store_name": {"type": "str", "choices": ["CertificateAuthority", "Root"], "required": true}, "certificate": {"type": "dict", "options": {"expiry": {"type": "datetime", "required": true}, "thumbprint": {"type": "str", "required": true}, "subject": {"type": "str", "required": true}}}}},
+    "enable_client_certificate": {"type": "boolean", "disposition": "/"},
+    "virtual_network_type": {"type": "str", "disposition": "/", "choices": ["None", "External", "Internal"]},
+    "publisher_email": {"type": "str", "disposition": "/", "required": true},
+    "publisher_name": {"type": "str", "disposition": "/", "required": true},
+    "sku_name": {"type": "str", "disposition": "/sku/name", "choices": ["Developer", "Standard", "Premium", "Basic", "Consumption"], "required": true},
+    "sku_capacity": {"type": "number", "disposition": "/sku/capacity"},
+    "identity": {"type": "dict", "disposition": "/", "options": {"type": {"type": "str", "required": true}}},
+    "location": {"type": "str", "updatable": false, "disposition": "/", "required": true},
+    "wait": {"type": "bool", "default": true},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMApiManagementService(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resource_group_name',
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='service_name',
-                required=true
-            ),
-            notification_sender_email=dict(
-                type='str',
-                disposition='/'
-            ),
-            hostname_configurations=dict(
-                type='list',
-                disposition='/',
-                options=dict(
-                    type=dict(
-                        type='str',
-                        choices=['Proxy',
-                                 'Portal',
-                                 'Management',
-                                 'Scm',
-                                 'DeveloperPortal'],
-                        required=true
-                    ),
-                    host_name=dict(
-                        type='str',
-                        required=true
-                    ),
-                    key_vault_id=dict(
-                        type='str'
-                    ),
-                    encoded_certificate=dict(
-                        type='str'
-                    ),
-                    certificate_password=dict(
-                        type='str'
-                    ),
-                    default_ssl_binding=dict(
-                        type='boolean'
-                    ),
-                    negotiate_client_certificate=dict(
-                        type='boolean'
-                    ),
-                    certificate=dict(
-                        type='dict',
-                        options=dict(
-                            expiry=dict(
-                                type='datetime',
-                                required=true
-                            ),
-                            thumbprint=dict(
-                                type='str',
-                                required=true
-                            ),
-                            subject=dict(
-                                type='str',
-                                required=true
-                            )
-                        )
-                    )
-                )
-            ),
-            virtual_network_configuration=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    subnet_resource_id=dict(
-                        type='raw',
-                        pattern=('//subscriptions/{{ subscription_id }}/resourceGroups'
-                                 '/{{ resource_group }}/providers/Microsoft.Network'
-                                 '/virtualNetworks/{{ virtual_network_name }}/subnets'
-                                 '/{{ name }}')
-                    )
-                )
-            ),
-            additional_locations=dict(
-                type='list',
-                disposition='/',
-                options=dict(
-                    location=dict(
-                        type='str',
-                        updatable=False,
-                        required=true
-                    ),
-                    sku=dict(
-                        type='dict',
-                        required=true,
-                        options=dict(
-                            name=dict(
-                                type='str',
-                                choices=['Developer',
-                                         'Standard',
-                                         'Premium',
-                                         'Basic',
-                                         'Consumption'],
-                                required=true
-                            ),
-                            capacity=dict(
-                                type='number'
-                            )
-                        )
-                    ),
-                    virtual_network_configuration=dict(
-                        type='dict',
-                        options=dict(
-                            subnet_resource_id=dict(
-                                type='raw',
-                                pattern=('//subscriptions/{{ subscription_id }}'
-                                         '/resourceGroups/{{ resource_group }}/providers'
-                                         '/Microsoft.Network/virtualNetworks'
-                                         '/{{ virtual_network_name }}/subnets/{{ name }}')
-                            )
-                        )
-                    )
-                )
-            ),
-            custom_properties=dict(
-                type='unknown[DictionaryType {"$id":"2519","$type":"DictionaryType","valueType":{"$id":"2520","$type":"PrimaryType","knownPrimaryType":"string","name":{"$id":"2521","fixed":false,"raw":"String"},"deprecated":false},"supportsAdditionalProperties":false,"name":{"$id":"2522","fixed":false},"deprecated":false}]',
-                disposition='/'
-            ),
-            certificates=dict(
-                type='list',
-                disposition='/',
-                options=dict(
-                    encoded_certificate=dict(
-                        type='str'
-                    ),
-                    certificate_password=dict(
-                        type='str'
-                    ),
-                    store_name=dict(
-                        type='str',
-                        choices=['CertificateAuthority',
-                                 'Root'],
-                        required=true
-                    ),
-                    certificate=dict(
-                        type='dict',
-                        options=dict(
-                            expiry=dict(
-                                type='datetime',
-                                required=true
-                            ),
-                            thumbprint=dict(
-                                type='str',
-                                required=true
-                            ),
-                            subject=dict(
-                                type='str',
-                                required=true
-                            )
-                        )
-                    )
-                )
-            ),
-            enable_client_certificate=dict(
-                type='boolean',
-                disposition='/'
-            ),
-            virtual_network_type=dict(
-                type='str',
-                disposition='/',
-                choices=['None',
-                         'External',
-                         'Internal']
-            ),
-            publisher_email=dict(
-                type='str',
-                disposition='/',
-                required=true
-            ),
-            publisher_name=dict(
-                type='str',
-                disposition='/',
-                required=true
-            ),
-            sku_name=dict(
-                type='str',
-                disposition='/sku/name',
-                choices=['Developer',
-                         'Standard',
-                         'Premium',
-                         'Basic',
-                         'Consumption'],
-                required=true
-            ),
-            sku_capacity=dict(
-                type='number',
-                disposition='/sku/capacity'
-            ),
-            identity=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    type=dict(
-                        type='str',
-                        required=true
-                    )
-                )
-            ),
-            location=dict(
-                type='str',
-                updatable=False,
-                disposition='/',
-                required=true
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.name = None
@@ -1300,6 +1124,7 @@ class AzureRMApiManagementService(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMApiManagementService, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -1313,7 +1138,7 @@ class AzureRMApiManagementService(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
@@ -1335,9 +1160,9 @@ class AzureRMApiManagementService(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -1373,6 +1198,10 @@ class AzureRMApiManagementService(AzureRMModuleBaseExt):
                                                                                 service_name=self.name,
                                                                                 parameters=self.body)
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the ApiManagementService instance.')
@@ -1384,6 +1213,11 @@ class AzureRMApiManagementService(AzureRMModuleBaseExt):
         try:
             response = self.mgmt_client.api_management_service.delete(resource_group_name=self.resource_group,
                                                                       service_name=self.name)
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the ApiManagementService instance.')
             self.fail('Error deleting the ApiManagementService instance: {0}'.format(str(e)))
@@ -1402,6 +1236,8 @@ class AzureRMApiManagementService(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMApiManagementService()
 
 
@@ -83,6 +83,12 @@ options:
     description:
       - The ID of the resource.
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the BatchAccount.
@@ -266,12 +272,24 @@ properties:
       type: number
       sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -283,68 +301,26 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resource_group_name", "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "account_name", "required": true},
+    "location": {"type": "str", "updatable": false, "disposition": "/", "required": true},
+    "auto_storage_account_id": {"type": "raw", "disposition": "/auto_storage/storage_account_id", "required": true, "pattern": "//subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.Storage/storageAccounts/{{ name }}"},
+    "pool_allocation_mode": {"type": "str", "disposition": "/", "choices": ["BatchService", "UserSubscription"]},
+    "key_vault_reference": {"type": "dict", "disposition": "/", "options": {"id": {"type": "raw", "required": true, "pattern": "//subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.KeyVault/vaults/{{ name }}"}, "url": {"type": "str", "required": true}}},
+    "wait": {"type": "bool", "default": true},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMBatchAccount(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resource_group_name',
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='account_name',
-                required=true
-            ),
-            location=dict(
-                type='str',
-                updatable=False,
-                disposition='/',
-                required=true
-            ),
-            auto_storage_account_id=dict(
-                type='raw',
-                disposition='/auto_storage/storage_account_id',
-                required=true,
-                pattern=('//subscriptions/{{ subscription_id }}/resourceGroups'
-                         '/{{ resource_group }}/providers/Microsoft.Storage/storageAccounts'
-                         '/{{ name }}')
-            ),
-            pool_allocation_mode=dict(
-                type='str',
-                disposition='/',
-                choices=['BatchService',
-                         'UserSubscription']
-            ),
-            key_vault_reference=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    id=dict(
-                        type='raw',
-                        required=true,
-                        pattern=('//subscriptions/{{ subscription_id }}/resourceGroups'
-                                 '/{{ resource_group }}/providers/Microsoft.KeyVault/vaults'
-                                 '/{{ name }}')
-                    ),
-                    url=dict(
-                        type='str',
-                        required=true
-                    )
-                )
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.name = None
@@ -354,6 +330,7 @@ class AzureRMBatchAccount(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMBatchAccount, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -367,7 +344,7 @@ class AzureRMBatchAccount(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
@@ -389,9 +366,9 @@ class AzureRMBatchAccount(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -429,6 +406,10 @@ class AzureRMBatchAccount(AzureRMModuleBaseExt):
                                                                  account_name=self.name,
                                                                  parameters=self.body)
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the BatchAccount instance.')
@@ -440,6 +421,11 @@ class AzureRMBatchAccount(AzureRMModuleBaseExt):
         try:
             response = self.mgmt_client.batch_account.delete(resource_group_name=self.resource_group,
                                                              account_name=self.name)
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the BatchAccount instance.')
             self.fail('Error deleting the BatchAccount instance: {0}'.format(str(e)))
@@ -458,6 +444,8 @@ class AzureRMBatchAccount(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMBatchAccount()
 
 
@@ -954,6 +954,12 @@ options:
     description:
       - 'The ETag of the resource, used for concurrency statements.'
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the Pool.
@@ -2381,12 +2387,24 @@ properties:
                   type: dict
                   sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -2398,465 +2416,37 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resource_group_name", "required": true},
+    "account_name": {"type": "str", "updatable": false, "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "pool_name", "required": true},
+    "display_name": {"type": "str", "disposition": "/"},
+    "vm_size": {"type": "str", "disposition": "/"},
+    "deployment_configuration": {"type": "dict", "disposition": "/", "options": {"cloud_service_configuration": {"type": "dict", "options": {"os_family": {"type": "str", "required": true}, "os_version": {"type": "str"}}}, "virtual_machine_configuration": {"type": "dict", "options": {"image_reference": {"type": "dict", "required": true, "options": {"publisher": {"type": "str"}, "offer": {"type": "str"}, "sku": {"type": "str"}, "version": {"type": "str"}, "id": {"type": "raw", "pattern": "//subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.Compute/images/{{ name }}"}}}, "node_agent_sku_id": {"type": "str", "required": true}, "windows_configuration": {"type": "dict", "options": {"enable_automatic_updates": {"type": "boolean"}}}, "data_disks": {"type": "list", "options": {"lun": {"type": "number", "required": true}, "caching": {"type": "str", "choices": ["None", "ReadOnly", "ReadWrite"]}, "disk_size_gb": {"type": "number", "required": true}, "storage_account_type": {"type": "str", "choices": ["Standard_LRS", "Premium_LRS"]}}}, "license_type": {"type": "str"}, "container_configuration": {"type": "dict", "options": {"type": {"type": "str", "required": true}, "container_image_names": {"type": "list"}, "container_registries": {"type": "list"}}}}}}},
+    "scale_settings": {"type": "dict", "disposition": "/", "options": {"fixed_scale": {"type": "dict", "options": {"resize_timeout": {"type": "unknown-primary[timeSpan]"}, "target_dedicated_nodes": {"type": "number"}, "target_low_priority_nodes": {"type": "number"}, "node_deallocation_option": {"type": "str", "choices": ["Requeue", "Terminate", "TaskCompletion", "RetainedData"]}}}, "auto_scale": {"type": "dict", "options": {"formula": {"type": "str", "required": true}, "evaluation_interval": {"type": "unknown-primary[timeSpan]"}}}}},
+    "inter_node_communication": {"type": "str", "disposition": "/", "choices": ["Enabled", "Disabled"]},
+    "network_configuration": {"type": "dict", "disposition": "/", "options": {"subnet_id": {"type": "raw", "pattern": "//subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.Network/virtualNetworks/{{ virtual_network_name }}/subnets/{{ name }}"}, "endpoint_configuration": {"type": "dict", "options": {"inbound_nat_pools": {"type": "list", "required": true, "options": {"name": {"type": "str", "required": true}, "protocol": {"type": "str", "choices": ["TCP", "UDP"], "required": true}, "backend_port": {"type": "number", "required": true}, "frontend_port_range_start": {"type": "number", "required": true}, "frontend_port_range_end": {"type": "number", "required": true}, "network_security_group_rules": {"type": "list"}}}}}}},
+    "max_tasks_per_node": {"type": "number", "disposition": "/"},
+    "task_scheduling_policy": {"type": "dict", "disposition": "/", "options": {"node_fill_type": {"type": "str", "choices": ["Spread", "Pack"], "required": true}}},
+    "user_accounts": {"type": "list", "disposition": "/", "options": {"name": {"type": "str", "required": true}, "password": {"type": "str", "no_log": true, "required": true}, "elevation_level": {"type": "str", "choices": ["NonAdmin", "Admin"]}, "linux_user_configuration": {"type": "dict", "options": {"uid": {"type": "number"}, "gid": {"type": "number"}, "ssh_private_key": {"type": "str"}}}, "windows_user_configuration": {"type": "dict", "options": {"login_mode": {"type": "str", "choices": ["Batch", "Interactive"]}}}}},
+    "metadata": {"type": "list", "disposition": "/", "options": {"name": {"type": "str", "required": true}, "value": {"type": "str", "required": true}}},
+    "start_task": {"type": "dict", "disposition": "/", "options": {"command_line": {"type": "str"}, "resource_files": {"type": "list", "options": {"auto_storage_container_name": {"type": "str"}, "storage_container_url": {"type": "str"}, "http_url": {"type": "str"}, "blob_prefix": {"type": "str"}, "file_path": {"type": "str"}, "file_mode": {"type": "str"}}}, "environment_settings": {"type": "list", "options": {"name": {"type": "str", "required": true}, "value": {"type": "str"}}}, "user_identity": {"type": "dict", "options": {"user_name": {"type": "str"}, "auto_user": {"type": "dict", "options": {"scope": {"type": "str", "choices": ["Task", "Pool"]}, "elevation_level": {"type": "str", "choices": ["NonAdmin", "Admin"]}}}}}, "max_task_retry_count": {"type": "number"}, "wait_for_success": {"type": "boolean"}, "container_settings": {"type": "dict", "options": {"container_run_options": {"type": "str"}, "image_name": {"type": "str", "required": true}, "registry": {"type": "dict", "options": {"registry_server": {"type": "str"}, "username": {"type": "str", "required": true}, "password": {"type": "str", "no_log": true, "required": true}}}}}}},
+    "certificates": {"type": "list", "disposition": "/", "options": {"id": {"type": "raw", "required": true, "pattern": "//subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.Batch/batchAccounts/{{ batch_account_name }}/pools/{{ pool_name }}/certificates/{{ name }}"}, "store_location": {"type": "str", "choices": ["CurrentUser", "LocalMachine"]}, "store_name": {"type": "str"}, "visibility": {"type": "list", "choices": ["StartTask", "Task", "RemoteUser"]}}},
+    "application_packages": {"type": "list", "disposition": "/", "options": {"id": {"type": "raw", "required": true, "pattern": "//subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.Batch/batchAccounts/{{ batch_account_name }}/pools/{{ pool_name }}/applications/{{ name }}"}, "version": {"type": "str"}}},
+    "application_licenses": {"type": "list", "disposition": "/"},
+    "wait": {"type": "bool", "default": true},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMPool(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resource_group_name',
-                required=true
-            ),
-            account_name=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='pool_name',
-                required=true
-            ),
-            display_name=dict(
-                type='str',
-                disposition='/'
-            ),
-            vm_size=dict(
-                type='str',
-                disposition='/'
-            ),
-            deployment_configuration=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    cloud_service_configuration=dict(
-                        type='dict',
-                        options=dict(
-                            os_family=dict(
-                                type='str',
-                                required=true
-                            ),
-                            os_version=dict(
-                                type='str'
-                            )
-                        )
-                    ),
-                    virtual_machine_configuration=dict(
-                        type='dict',
-                        options=dict(
-                            image_reference=dict(
-                                type='dict',
-                                required=true,
-                                options=dict(
-                                    publisher=dict(
-                                        type='str'
-                                    ),
-                                    offer=dict(
-                                        type='str'
-                                    ),
-                                    sku=dict(
-                                        type='str'
-                                    ),
-                                    version=dict(
-                                        type='str'
-                                    ),
-                                    id=dict(
-                                        type='raw',
-                                        pattern=('//subscriptions/{{ subscription_id }}'
-                                                 '/resourceGroups/{{ resource_group }}'
-                                                 '/providers/Microsoft.Compute/images'
-                                                 '/{{ name }}')
-                                    )
-                                )
-                            ),
-                            node_agent_sku_id=dict(
-                                type='str',
-                                required=true
-                            ),
-                            windows_configuration=dict(
-                                type='dict',
-                                options=dict(
-                                    enable_automatic_updates=dict(
-                                        type='boolean'
-                                    )
-                                )
-                            ),
-                            data_disks=dict(
-                                type='list',
-                                options=dict(
-                                    lun=dict(
-                                        type='number',
-                                        required=true
-                                    ),
-                                    caching=dict(
-                                        type='str',
-                                        choices=['None',
-                                                 'ReadOnly',
-                                                 'ReadWrite']
-                                    ),
-                                    disk_size_gb=dict(
-                                        type='number',
-                                        required=true
-                                    ),
-                                    storage_account_type=dict(
-                                        type='str',
-                                        choices=['Standard_LRS',
-                                                 'Premium_LRS']
-                                    )
-                                )
-                            ),
-                            license_type=dict(
-                                type='str'
-                            ),
-                            container_configuration=dict(
-                                type='dict',
-                                options=dict(
-                                    type=dict(
-                                        type='str',
-                                        required=true
-                                    ),
-                                    container_image_names=dict(
-                                        type='list'
-                                    ),
-                                    container_registries=dict(
-                                        type='list'
-                                    )
-                                )
-                            )
-                        )
-                    )
-                )
-            ),
-            scale_settings=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    fixed_scale=dict(
-                        type='dict',
-                        options=dict(
-                            resize_timeout=dict(
-                                type='unknown-primary[timeSpan]'
-                            ),
-                            target_dedicated_nodes=dict(
-                                type='number'
-                            ),
-                            target_low_priority_nodes=dict(
-                                type='number'
-                            ),
-                            node_deallocation_option=dict(
-                                type='str',
-                                choices=['Requeue',
-                                         'Terminate',
-                                         'TaskCompletion',
-                                         'RetainedData']
-                            )
-                        )
-                    ),
-                    auto_scale=dict(
-                        type='dict',
-                        options=dict(
-                            formula=dict(
-                                type='str',
-                                required=true
-                            ),
-                            evaluation_interval=dict(
-                                type='unknown-primary[timeSpan]'
-                            )
-                        )
-                    )
-                )
-            ),
-            inter_node_communication=dict(
-                type='str',
-                disposition='/',
-                choices=['Enabled',
-                         'Disabled']
-            ),
-            network_configuration=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    subnet_id=dict(
-                        type='raw',
-                        pattern=('//subscriptions/{{ subscription_id }}/resourceGroups'
-                                 '/{{ resource_group }}/providers/Microsoft.Network'
-                                 '/virtualNetworks/{{ virtual_network_name }}/subnets'
-                                 '/{{ name }}')
-                    ),
-                    endpoint_configuration=dict(
-                        type='dict',
-                        options=dict(
-                            inbound_nat_pools=dict(
-                                type='list',
-                                required=true,
-                                options=dict(
-                                    name=dict(
-                                        type='str',
-                                        required=true
-                                    ),
-                                    protocol=dict(
-                                        type='str',
-                                        choices=['TCP',
-                                                 'UDP'],
-                                        required=true
-                                    ),
-                                    backend_port=dict(
-                                        type='number',
-                                        required=true
-                                    ),
-                                    frontend_port_range_start=dict(
-                                        type='number',
-                                        required=true
-                                    ),
-                                    frontend_port_range_end=dict(
-                                        type='number',
-                                        required=true
-                                    ),
-                                    network_security_group_rules=dict(
-                                        type='list'
-                                    )
-                                )
-                            )
-                        )
-                    )
-                )
-            ),
-            max_tasks_per_node=dict(
-                type='number',
-                disposition='/'
-            ),
-            task_scheduling_policy=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    node_fill_type=dict(
-                        type='str',
-                        choices=['Spread',
-                                 'Pack'],
-                        required=true
-                    )
-                )
-            ),
-            user_accounts=dict(
-                type='list',
-                disposition='/',
-                options=dict(
-                    name=dict(
-                        type='str',
-                        required=true
-                    ),
-                    password=dict(
-                        type='str',
-                        no_log=True,
-                        required=true
-                    ),
-                    elevation_level=dict(
-                        type='str',
-                        choices=['NonAdmin',
-                                 'Admin']
-                    ),
-                    linux_user_configuration=dict(
-                        type='dict',
-                        options=dict(
-                            uid=dict(
-                                type='number'
-                            ),
-                            gid=dict(
-                                type='number'
-                            ),
-                            ssh_private_key=dict(
-                                type='str'
-                            )
-                        )
-                    ),
-                    windows_user_configuration=dict(
-                        type='dict',
-                        options=dict(
-                            login_mode=dict(
-                                type='str',
-                                choices=['Batch',
-                                         'Interactive']
-                            )
-                        )
-                    )
-                )
-            ),
-            metadata=dict(
-                type='list',
-                disposition='/',
-                options=dict(
-                    name=dict(
-                        type='str',
-                        required=true
-                    ),
-                    value=dict(
-                        type='str',
-                        required=true
-                    )
-                )
-            ),
-            start_task=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    command_line=dict(
-                        type='str'
-                    ),
-                    resource_files=dict(
-                        type='list',
-                        options=dict(
-                            auto_storage_container_name=dict(
-                                type='str'
-                            ),
-                            storage_container_url=dict(
-                                type='str'
-                            ),
-                            http_url=dict(
-                                type='str'
-                            ),
-                            blob_prefix=dict(
-                                type='str'
-                            ),
-                            file_path=dict(
-                                type='str'
-                            ),
-                            file_mode=dict(
-                                type='str'
-                            )
-                        )
-                    ),
-                    environment_settings=dict(
-                        type='list',
-                        options=dict(
-                            name=dict(
-                                type='str',
-                                required=true
-                            ),
-                            value=dict(
-                                type='str'
-                            )
-                        )
-                    ),
-                    user_identity=dict(
-                        type='dict',
-                        options=dict(
-                            user_name=dict(
-                                type='str'
-                            ),
-                            auto_user=dict(
-                                type='dict',
-                                options=dict(
-                                    scope=dict(
-                                        type='str',
-                                        choices=['Task',
-                                                 'Pool']
-                                    ),
-                                    elevation_level=dict(
-                                        type='str',
-                                        choices=['NonAdmin',
-                                                 'Admin']
-                                    )
-                                )
-                            )
-                        )
-                    ),
-                    max_task_retry_count=dict(
-                        type='number'
-                    ),
-                    wait_for_success=dict(
-                        type='boolean'
-                    ),
-                    container_settings=dict(
-                        type='dict',
-                        options=dict(
-                            container_run_options=dict(
-                                type='str'
-                            ),
-                            image_name=dict(
-                                type='str',
-                                required=true
-                            ),
-                            registry=dict(
-                                type='dict',
-                                options=dict(
-                                    registry_server=dict(
-                                        type='str'
-                                    ),
-                                    username=dict(
-                                        type='str',
-                                        required=true
-                                    ),
-                                    password=dict(
-                                        type='str',
-                                        no_log=True,
-                                        required=true
-                                    )
-                                )
-                            )
-                        )
-                    )
-                )
-            ),
-            certificates=dict(
-                type='list',
-                disposition='/',
-                options=dict(
-                    id=dict(
-                        type='raw',
-                        required=true,
-                        pattern=('//subscriptions/{{ subscription_id }}/resourceGroups'
-                                 '/{{ resource_group }}/providers/Microsoft.Batch'
-                                 '/batchAccounts/{{ batch_account_name }}/pools'
-                                 '/{{ pool_name }}/certificates/{{ name }}')
-                    ),
-                    store_location=dict(
-                        type='str',
-                        choices=['CurrentUser',
-                                 'LocalMachine']
-                    ),
-                    store_name=dict(
-                        type='str'
-                    ),
-                    visibility=dict(
-                        type='list',
-                        choices=['StartTask',
-                                 'Task',
-                                 'RemoteUser']
-                    )
-                )
-            ),
-            application_packages=dict(
-                type='list',
-                disposition='/',
-                options=dict(
-                    id=dict(
-                        type='raw',
-                        required=true,
-                        pattern=('//subscriptions/{{ subscription_id }}/resourceGroups'
-                                 '/{{ resource_group }}/providers/Microsoft.Batch'
-                                 '/batchAccounts/{{ batch_account_name }}/pools'
-                                 '/{{ pool_name }}/applications/{{ name }}')
-                    ),
-                    version=dict(
-                        type='str'
-                    )
-                )
-            ),
-            application_licenses=dict(
-                type='list',
-                disposition='/'
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.account_name = None
@@ -2868,6 +2458,7 @@ class AzureRMPool(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMPool, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -2881,7 +2472,7 @@ class AzureRMPool(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
@@ -2903,9 +2494,9 @@ class AzureRMPool(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -2944,6 +2535,10 @@ class AzureRMPool(AzureRMModuleBaseExt):
                                                         pool_name=self.name,
                                                         parameters=self.body)
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the Pool instance.')
@@ -2956,6 +2551,11 @@ class AzureRMPool(AzureRMModuleBaseExt):
             response = self.mgmt_client.pool.delete(resource_group_name=self.resource_group,
                                                     account_name=self.account_name,
                                                     pool_name=self.name)
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the Pool instance.')
             self.fail('Error deleting the Pool instance: {0}'.format(str(e)))
@@ -2975,6 +2575,8 @@ class AzureRMPool(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMPool()
 
 
@@ -214,6 +214,12 @@ options:
     description:
       - A relative URI containing the ID of the VM that has the disk attached.
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the Disk.
@@ -577,12 +583,24 @@ properties:
       type: str
       sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -594,159 +612,32 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resource_group_name", "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "disk_name", "required": true},
+    "location": {"type": "str", "updatable": false, "disposition": "/", "required": true},
+    "sku": {"type": "dict", "disposition": "/", "options": {"name": {"type": "str", "choices": ["Standard_LRS", "Premium_LRS", "StandardSSD_LRS", "UltraSSD_LRS"]}}},
+    "zones": {"type": "list", "updatable": false, "disposition": "/"},
+    "os_type": {"type": "str", "disposition": "/", "choices": ["Windows", "Linux"]},
+    "hyper_vgeneration": {"type": "str", "disposition": "/", "choices": ["V1", "V2"]},
+    "creation_data": {"type": "dict", "disposition": "/", "required": true, "options": {"create_option": {"type": "str", "choices": ["Empty", "Attach", "FromImage", "Import", "Copy", "Restore", "Upload"], "required": true}, "storage_account_id": {"type": "str"}, "image_reference": {"type": "dict", "options": {"id": {"type": "str", "required": true}, "lun": {"type": "number"}}}, "source_uri": {"type": "str"}, "source_resource_id": {"type": "str"}}},
+    "disk_size_gb": {"type": "number", "disposition": "/"},
+    "encryption_settings_collection": {"type": "dict", "disposition": "/", "options": {"enabled": {"type": "boolean", "required": true}, "encryption_settings": {"type": "list", "options": {"disk_encryption_key": {"type": "dict", "options": {"source_vault": {"type": "dict", "required": true}, "secret_url": {"type": "str", "required": true}}}, "key_encryption_key": {"type": "dict", "options": {"source_vault": {"type": "dict", "required": true}, "key_url": {"type": "str", "required": true}}}}}}},
+    "disk_iopsread_write": {"type": "number", "disposition": "/"},
+    "disk_mbps_read_write": {"type": "number", "disposition": "/"},
+    "wait": {"type": "bool", "default": true},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMDisks(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resource_group_name',
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='disk_name',
-                required=true
-            ),
-            location=dict(
-                type='str',
-                updatable=False,
-                disposition='/',
-                required=true
-            ),
-            sku=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    name=dict(
-                        type='str',
-                        choices=['Standard_LRS',
-                                 'Premium_LRS',
-                                 'StandardSSD_LRS',
-                                 'UltraSSD_LRS']
-                    )
-                )
-            ),
-            zones=dict(
-                type='list',
-                updatable=False,
-                disposition='/'
-            ),
-            os_type=dict(
-                type='str',
-                disposition='/',
-                choices=['Windows',
-                         'Linux']
-            ),
-            hyper_vgeneration=dict(
-                type='str',
-                disposition='/',
-                choices=['V1',
-                         'V2']
-            ),
-            creation_data=dict(
-                type='dict',
-                disposition='/',
-                required=true,
-                options=dict(
-                    create_option=dict(
-                        type='str',
-                        choices=['Empty',
-                                 'Attach',
-                                 'FromImage',
-                                 'Import',
-                                 'Copy',
-                                 'Restore',
-                                 'Upload'],
-                        required=true
-                    ),
-                    storage_account_id=dict(
-                        type='str'
-                    ),
-                    image_reference=dict(
-                        type='dict',
-                        options=dict(
-                            id=dict(
-                                type='str',
-                                required=true
-                            ),
-                            lun=dict(
-                                type='number'
-                            )
-                        )
-                    ),
-                    source_uri=dict(
-                        type='str'
-                    ),
-                    source_resource_id=dict(
-                        type='str'
-                    )
-                )
-            ),
-            disk_size_gb=dict(
-                type='number',
-                disposition='/'
-            ),
-            encryption_settings_collection=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    enabled=dict(
-                        type='boolean',
-                        required=true
-                    ),
-                    encryption_settings=dict(
-                        type='list',
-                        options=dict(
-                            disk_encryption_key=dict(
-                                type='dict',
-                                options=dict(
-                                    source_vault=dict(
-                                        type='dict',
-                                        required=true
-                                    ),
-                                    secret_url=dict(
-                                        type='str',
-                                        required=true
-                                    )
-                                )
-                            ),
-                            key_encryption_key=dict(
-                                type='dict',
-                                options=dict(
-                                    source_vault=dict(
-                                        type='dict',
-                                        required=true
-                                    ),
-                                    key_url=dict(
-                                        type='str',
-                                        required=true
-                                    )
-                                )
-                            )
-                        )
-                    )
-                )
-            ),
-            disk_iopsread_write=dict(
-                type='number',
-                disposition='/'
-            ),
-            disk_mbps_read_write=dict(
-                type='number',
-                disposition='/'
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.name = None
@@ -759,6 +650,7 @@ class AzureRMDisks(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMDisks, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -772,7 +664,7 @@ class AzureRMDisks(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
@@ -794,9 +686,9 @@ class AzureRMDisks(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -832,6 +724,10 @@ class AzureRMDisks(AzureRMModuleBaseExt):
                                                                disk_name=self.name,
                                                                disk=self.disk)
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the Disk instance.')
@@ -843,6 +739,11 @@ class AzureRMDisks(AzureRMModuleBaseExt):
         try:
             response = self.mgmt_client.disks.delete(resource_group_name=self.resource_group,
                                                      disk_name=self.name)
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the Disk instance.')
             self.fail('Error deleting the Disk instance: {0}'.format(str(e)))
@@ -861,6 +762,8 @@ class AzureRMDisks(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMDisks()
 
 
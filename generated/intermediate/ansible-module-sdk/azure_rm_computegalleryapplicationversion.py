@@ -182,6 +182,12 @@ options:
     description:
       - Resource type
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the GalleryApplicationVersion.
@@ -440,12 +446,24 @@ properties:
               type: number
               sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -457,105 +475,26 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resource_group_name", "required": true},
+    "gallery_name": {"type": "str", "updatable": false, "required": true},
+    "gallery_application_name": {"type": "str", "updatable": false, "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "gallery_application_version_name", "required": true},
+    "location": {"type": "str", "updatable": false, "disposition": "/", "required": true},
+    "publishing_profile": {"type": "dict", "disposition": "/", "required": true, "options": {"target_regions": {"type": "list", "options": {"name": {"type": "str", "required": true}, "regional_replica_count": {"type": "number"}, "storage_account_type": {"type": "str", "choices": ["Standard_LRS", "Standard_ZRS"]}}}, "replica_count": {"type": "number"}, "exclude_from_latest": {"type": "boolean"}, "end_of_life_date": {"type": "datetime"}, "storage_account_type": {"type": "str", "choices": ["Standard_LRS", "Standard_ZRS"]}, "source": {"type": "dict", "required": true, "options": {"file_name": {"type": "str", "required": true}, "media_link": {"type": "str", "required": true}}}, "content_type": {"type": "str"}, "enable_health_check": {"type": "boolean"}}},
+    "wait": {"type": "bool", "default": true},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMGalleryApplicationVersions(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resource_group_name',
-                required=true
-            ),
-            gallery_name=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            gallery_application_name=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='gallery_application_version_name',
-                required=true
-            ),
-            location=dict(
-                type='str',
-                updatable=False,
-                disposition='/',
-                required=true
-            ),
-            publishing_profile=dict(
-                type='dict',
-                disposition='/',
-                required=true,
-                options=dict(
-                    target_regions=dict(
-                        type='list',
-                        options=dict(
-                            name=dict(
-                                type='str',
-                                required=true
-                            ),
-                            regional_replica_count=dict(
-                                type='number'
-                            ),
-                            storage_account_type=dict(
-                                type='str',
-                                choices=['Standard_LRS',
-                                         'Standard_ZRS']
-                            )
-                        )
-                    ),
-                    replica_count=dict(
-                        type='number'
-                    ),
-                    exclude_from_latest=dict(
-                        type='boolean'
-                    ),
-                    end_of_life_date=dict(
-                        type='datetime'
-                    ),
-                    storage_account_type=dict(
-                        type='str',
-                        choices=['Standard_LRS',
-                                 'Standard_ZRS']
-                    ),
-                    source=dict(
-                        type='dict',
-                        required=true,
-                        options=dict(
-                            file_name=dict(
-                                type='str',
-                                required=true
-                            ),
-                            media_link=dict(
-                                type='str',
-                                required=true
-                            )
-                        )
-                    ),
-                    content_type=dict(
-                        type='str'
-                    ),
-                    enable_health_check=dict(
-                        type='boolean'
-                    )
-                )
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.gallery_name = None
@@ -569,6 +508,7 @@ class AzureRMGalleryApplicationVersions(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMGalleryApplicationVersions, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -582,7 +522,7 @@ class AzureRMGalleryApplicationVersions(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
@@ -604,9 +544,9 @@ class AzureRMGalleryApplicationVersions(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -641,6 +581,10 @@ class AzureRMGalleryApplicationVersions(AzureRMModuleBaseExt):
                                                                                       gallery_application_version_name=self.name,
                                                                                       gallery_application_version=self.galleryApplicationVersion)
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the GalleryApplicationVersion instance.')
@@ -654,6 +598,11 @@ class AzureRMGalleryApplicationVersions(AzureRMModuleBaseExt):
                                                                             gallery_name=self.gallery_name,
                                                                             gallery_application_name=self.gallery_application_name,
                                                                             gallery_application_version_name=self.name)
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the GalleryApplicationVersion instance.')
             self.fail('Error deleting the GalleryApplicationVersion instance: {0}'.format(str(e)))
@@ -674,6 +623,8 @@ class AzureRMGalleryApplicationVersions(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMGalleryApplicationVersions()
 
 
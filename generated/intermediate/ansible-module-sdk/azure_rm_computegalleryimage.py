@@ -171,6 +171,12 @@ options:
     description:
       - Resource type
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the GalleryImage.
@@ -419,12 +425,24 @@ properties:
       type: str
       sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -436,147 +454,35 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resource_group_name", "required": true},
+    "gallery_name": {"type": "str", "updatable": false, "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "gallery_image_name", "required": true},
+    "location": {"type": "str", "updatable": false, "disposition": "/", "required": true},
+    "description": {"type": "str", "disposition": "/"},
+    "eula": {"type": "str", "disposition": "/"},
+    "privacy_statement_uri": {"type": "str", "disposition": "/"},
+    "release_note_uri": {"type": "str", "disposition": "/"},
+    "os_type": {"type": "str", "disposition": "/", "choices": ["Windows", "Linux"], "required": true},
+    "os_state": {"type": "str", "disposition": "/", "choices": ["Generalized", "Specialized"], "required": true},
+    "end_of_life_date": {"type": "datetime", "disposition": "/"},
+    "identifier": {"type": "dict", "disposition": "/", "required": true, "options": {"publisher": {"type": "str", "required": true}, "offer": {"type": "str", "required": true}, "sku": {"type": "str", "required": true}}},
+    "recommended": {"type": "dict", "disposition": "/", "options": {"v_cpus": {"type": "dict", "options": {"min": {"type": "number"}, "max": {"type": "number"}}}, "memory": {"type": "dict", "options": {"min": {"type": "number"}, "max": {"type": "number"}}}}},
+    "disallowed": {"type": "dict", "disposition": "/", "options": {"disk_types": {"type": "list"}}},
+    "purchase_plan": {"type": "dict", "disposition": "/", "options": {"name": {"type": "str"}, "publisher": {"type": "str"}, "product": {"type": "str"}}},
+    "wait": {"type": "bool", "default": true},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMGalleryImages(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resource_group_name',
-                required=true
-            ),
-            gallery_name=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='gallery_image_name',
-                required=true
-            ),
-            location=dict(
-                type='str',
-                updatable=False,
-                disposition='/',
-                required=true
-            ),
-            description=dict(
-                type='str',
-                disposition='/'
-            ),
-            eula=dict(
-                type='str',
-                disposition='/'
-            ),
-            privacy_statement_uri=dict(
-                type='str',
-                disposition='/'
-            ),
-            release_note_uri=dict(
-                type='str',
-                disposition='/'
-            ),
-            os_type=dict(
-                type='str',
-                disposition='/',
-                choices=['Windows',
-                         'Linux'],
-                required=true
-            ),
-            os_state=dict(
-                type='str',
-                disposition='/',
-                choices=['Generalized',
-                         'Specialized'],
-                required=true
-            ),
-            end_of_life_date=dict(
-                type='datetime',
-                disposition='/'
-            ),
-            identifier=dict(
-                type='dict',
-                disposition='/',
-                required=true,
-                options=dict(
-                    publisher=dict(
-                        type='str',
-                        required=true
-                    ),
-                    offer=dict(
-                        type='str',
-                        required=true
-                    ),
-                    sku=dict(
-                        type='str',
-                        required=true
-                    )
-                )
-            ),
-            recommended=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    v_cpus=dict(
-                        type='dict',
-                        options=dict(
-                            min=dict(
-                                type='number'
-                            ),
-                            max=dict(
-                                type='number'
-                            )
-                        )
-                    ),
-                    memory=dict(
-                        type='dict',
-                        options=dict(
-                            min=dict(
-                                type='number'
-                            ),
-                            max=dict(
-                                type='number'
-                            )
-                        )
-                    )
-                )
-            ),
-            disallowed=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    disk_types=dict(
-                        type='list'
-                    )
-                )
-            ),
-            purchase_plan=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    name=dict(
-                        type='str'
-                    ),
-                    publisher=dict(
-                        type='str'
-                    ),
-                    product=dict(
-                        type='str'
-                    )
-                )
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.gallery_name = None
@@ -589,6 +495,7 @@ class AzureRMGalleryImages(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMGalleryImages, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -602,7 +509,7 @@ class AzureRMGalleryImages(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
@@ -624,9 +531,9 @@ class AzureRMGalleryImages(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -660,6 +567,10 @@ class AzureRMGalleryImages(AzureRMModuleBaseExt):
                                                                         gallery_image_name=self.name,
                                                                         gallery_image=self.galleryImage)
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the GalleryImage instance.')
@@ -672,6 +583,11 @@ class AzureRMGalleryImages(AzureRMModuleBaseExt):
             response = self.mgmt_client.gallery_images.delete(resource_group_name=self.resource_group,
                                                               gallery_name=self.gallery_name,
                                                               gallery_image_name=self.name)
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the GalleryImage instance.')
             self.fail('Error deleting the GalleryImage instance: {0}'.format(str(e)))
@@ -691,6 +607,8 @@ class AzureRMGalleryImages(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMGalleryImages()
 
 
@@ -281,6 +281,12 @@ options:
     description:
       - The type of Azure resource.
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the DatabaseAccount.
@@ -685,12 +691,24 @@ properties:
       type: str
       sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -702,132 +720,35 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resource_group_name", "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "account_name", "required": true},
+    "location": {"type": "str", "updatable": false, "disposition": "/"},
+    "kind": {"type": "str", "updatable": false, "disposition": "/", "choices": ["GlobalDocumentDB", "MongoDB", "Parse"]},
+    "consistency_policy": {"type": "dict", "disposition": "/", "options": {"default_consistency_level": {"type": "str", "choices": ["Eventual", "Session", "BoundedStaleness", "Strong", "ConsistentPrefix"], "required": true}, "max_staleness_prefix": {"type": "number"}, "max_interval_in_seconds": {"type": "number"}}},
+    "locations": {"type": "list", "disposition": "/", "required": true, "options": {"location_name": {"type": "str"}, "failover_priority": {"type": "number"}, "is_zone_redundant": {"type": "boolean"}}},
+    "database_account_offer_type": {"type": "str", "disposition": "/", "required": true},
+    "ip_range_filter": {"type": "str", "disposition": "/"},
+    "is_virtual_network_filter_enabled": {"type": "boolean", "disposition": "/"},
+    "enable_automatic_failover": {"type": "boolean", "disposition": "/"},
+    "capabilities": {"type": "list", "disposition": "/", "options": {"name": {"type": "str"}}},
+    "virtual_network_rules": {"type": "list", "disposition": "/", "options": {"id": {"type": "str"}, "ignore_missing_vnet_service_endpoint": {"type": "boolean"}}},
+    "enable_multiple_write_locations": {"type": "boolean", "disposition": "/"},
+    "enable_cassandra_connector": {"type": "boolean", "disposition": "/"},
+    "connector_offer": {"type": "str", "disposition": "/", "choices": ["Small"]},
+    "wait": {"type": "bool", "default": true},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMDatabaseAccounts(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resource_group_name',
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='account_name',
-                required=true
-            ),
-            location=dict(
-                type='str',
-                updatable=False,
-                disposition='/'
-            ),
-            kind=dict(
-                type='str',
-                updatable=False,
-                disposition='/',
-                choices=['GlobalDocumentDB',
-                         'MongoDB',
-                         'Parse']
-            ),
-            consistency_policy=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    default_consistency_level=dict(
-                        type='str',
-                        choices=['Eventual',
-                                 'Session',
-                                 'BoundedStaleness',
-                                 'Strong',
-                                 'ConsistentPrefix'],
-                        required=true
-                    ),
-                    max_staleness_prefix=dict(
-                        type='number'
-                    ),
-                    max_interval_in_seconds=dict(
-                        type='number'
-                    )
-                )
-            ),
-            locations=dict(
-                type='list',
-                disposition='/',
-                required=true,
-                options=dict(
-                    location_name=dict(
-                        type='str'
-                    ),
-                    failover_priority=dict(
-                        type='number'
-                    ),
-                    is_zone_redundant=dict(
-                        type='boolean'
-                    )
-                )
-            ),
-            database_account_offer_type=dict(
-                type='str',
-                disposition='/',
-                required=true
-            ),
-            ip_range_filter=dict(
-                type='str',
-                disposition='/'
-            ),
-            is_virtual_network_filter_enabled=dict(
-                type='boolean',
-                disposition='/'
-            ),
-            enable_automatic_failover=dict(
-                type='boolean',
-                disposition='/'
-            ),
-            capabilities=dict(
-                type='list',
-                disposition='/',
-                options=dict(
-                    name=dict(
-                        type='str'
-                    )
-                )
-            ),
-            virtual_network_rules=dict(
-                type='list',
-                disposition='/',
-                options=dict(
-                    id=dict(
-                        type='str'
-                    ),
-                    ignore_missing_vnet_service_endpoint=dict(
-                        type='boolean'
-                    )
-                )
-            ),
-            enable_multiple_write_locations=dict(
-                type='boolean',
-                disposition='/'
-            ),
-            enable_cassandra_connector=dict(
-                type='boolean',
-                disposition='/'
-            ),
-            connector_offer=dict(
-                type='str',
-                disposition='/',
-                choices=['Small']
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.name = None
@@ -839,6 +760,7 @@ class AzureRMDatabaseAccounts(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMDatabaseAccounts, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -852,7 +774,7 @@ class AzureRMDatabaseAccounts(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
@@ -874,9 +796,9 @@ class AzureRMDatabaseAccounts(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -910,6 +832,10 @@ class AzureRMDatabaseAccounts(AzureRMModuleBaseExt):
                                                                            account_name=self.name,
                                                                            create_update_parameters=self.createUpdateParameters)
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the DatabaseAccount instance.')
@@ -921,6 +847,11 @@ class AzureRMDatabaseAccounts(AzureRMModuleBaseExt):
         try:
             response = self.mgmt_client.database_accounts.delete(resource_group_name=self.resource_group,
                                                                  account_name=self.name)
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the DatabaseAccount instance.')
             self.fail('Error deleting the DatabaseAccount instance: {0}'.format(str(e)))
@@ -939,6 +870,8 @@ class AzureRMDatabaseAccounts(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMDatabaseAccounts()
 
 
@@ -279,6 +279,58 @@ options:
         The cassandra connector offer type for the Cosmos DB database C*
         account.
     type: str
+  max_items:
+    description:
+      - Maximum number of items returned by list operations.
+      - Next pages are not requested once this number of items was collected.
+    type: int
+  facets:
+    description:
+      - List of facets of the database account to get in one invocation.
+      - Selected facets are queried concurrently and returned keyed by facet name.
+      - When not specified, first facet which has all required options specified is returned.
+    type: list
+    choices:
+      - getmongodbcollectionthroughput
+      - getsqlcontainerthroughput
+      - getgremlingraphthroughput
+      - getcassandratablethroughput
+      - getmongodbcollection
+      - getsqlcontainer
+      - getsqldatabasethroughput
+      - getgremlindatabasethroughput
+      - getmongodbdatabasethroughput
+      - getcassandrakeyspacethroughput
+      - getcassandratable
+      - getgremlingraph
+      - gettablethroughput
+      - listmongodbcollections
+      - listsqlcontainers
+      - listgremlingraphs
+      - listcassandratables
+      - getsqldatabase
+      - getmongodbdatabase
+      - getgremlindatabase
+      - getcassandrakeyspace
+      - gettable
+      - listmongodbdatabases
+      - listsqldatabases
+      - listgremlindatabases
+      - listcassandrakeyspaces
+      - listtables
+      - listmetricdefinitions
+      - getreadonlykeys
+      - listmetrics
+      - listusages
+      - get
+      - listbyresourcegroup
+      - list
+  fields:
+    description:
+      - Fields to return for each item, as dot separated paths, for example C(properties.provisioningState).
+      - Entries which are not plain paths are evaluated as JMESPath expressions, which requires C(jmespath).
+      - Fields are selected as the response is decoded, by default all of them are returned.
+    type: list
 extends_documentation_fragment:
   - azure
 author:
@@ -517,6 +569,10 @@ database_accounts:
 import time
 import json
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
+from ansible.module_utils.azure_rm_common_sdk_ext import paged_as_dict
+from ansible.module_utils.azure_rm_common_info_ext import run_parallel, get_projection, project
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -528,6 +584,46 @@ except ImportError:
     pass
 
 
+# facets in order of precedence, first one with all required options specified
+# is used when facets option is not specified
+FACETS = [
+    ('getmongodbcollectionthroughput', ['resource_group', 'account_name', 'database_name', 'name']),
+    ('getsqlcontainerthroughput', ['resource_group', 'account_name', 'database_name', 'container_name']),
+    ('getgremlingraphthroughput', ['resource_group', 'account_name', 'database_name', 'graph_name']),
+    ('getcassandratablethroughput', ['resource_group', 'account_name', 'keyspace_name', 'table_name']),
+    ('getmongodbcollection', ['resource_group', 'account_name', 'database_name', 'name']),
+    ('getsqlcontainer', ['resource_group', 'account_name', 'database_name', 'container_name']),
+    ('getsqldatabasethroughput', ['resource_group', 'account_name', 'database_name']),
+    ('getgremlindatabasethroughput', ['resource_group', 'account_name', 'database_name']),
+    ('getmongodbdatabasethroughput', ['resource_group', 'account_name', 'database_name']),
+    ('getcassandrakeyspacethroughput', ['resource_group', 'account_name', 'keyspace_name']),
+    ('getcassandratable', ['resource_group', 'account_name', 'keyspace_name', 'table_name']),
+    ('getgremlingraph', ['resource_group', 'account_name', 'database_name', 'graph_name']),
+    ('gettablethroughput', ['resource_group', 'account_name', 'table_name']),
+    ('listmongodbcollections', ['resource_group', 'account_name', 'database_name']),
+    ('listsqlcontainers', ['resource_group', 'account_name', 'database_name']),
+    ('listgremlingraphs', ['resource_group', 'account_name', 'database_name']),
+    ('listcassandratables', ['resource_group', 'account_name', 'keyspace_name']),
+    ('getsqldatabase', ['resource_group', 'account_name', 'database_name']),
+    ('getmongodbdatabase', ['resource_group', 'account_name', 'database_name']),
+    ('getgremlindatabase', ['resource_group', 'account_name', 'database_name']),
+    ('getcassandrakeyspace', ['resource_group', 'account_name', 'keyspace_name']),
+    ('gettable', ['resource_group', 'account_name', 'table_name']),
+    ('listmongodbdatabases', ['resource_group', 'account_name']),
+    ('listsqldatabases', ['resource_group', 'account_name']),
+    ('listgremlindatabases', ['resource_group', 'account_name']),
+    ('listcassandrakeyspaces', ['resource_group', 'account_name']),
+    ('listtables', ['resource_group', 'account_name']),
+    ('listmetricdefinitions', ['resource_group', 'account_name']),
+    ('getreadonlykeys', ['resource_group', 'account_name']),
+    ('listmetrics', ['resource_group', 'account_name']),
+    ('listusages', ['resource_group', 'account_name']),
+    ('get', ['resource_group', 'account_name']),
+    ('listbyresourcegroup', ['resource_group']),
+    ('list', [])
+]
+
+
 class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
     def __init__(self):
         self.module_arg_spec = dict(
@@ -554,6 +650,49 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
             ),
             name=dict(
                 type='str'
+            ),
+            max_items=dict(
+                type='int'
+            ),
+            facets=dict(
+                type='list',
+                choices=['getmongodbcollectionthroughput',
+                         'getsqlcontainerthroughput',
+                         'getgremlingraphthroughput',
+                         'getcassandratablethroughput',
+                         'getmongodbcollection',
+                         'getsqlcontainer',
+                         'getsqldatabasethroughput',
+                         'getgremlindatabasethroughput',
+                         'getmongodbdatabasethroughput',
+                         'getcassandrakeyspacethroughput',
+                         'getcassandratable',
+                         'getgremlingraph',
+                         'gettablethroughput',
+                         'listmongodbcollections',
+                         'listsqlcontainers',
+                         'listgremlingraphs',
+                         'listcassandratables',
+                         'getsqldatabase',
+                         'getmongodbdatabase',
+                         'getgremlindatabase',
+                         'getcassandrakeyspace',
+                         'gettable',
+                         'listmongodbdatabases',
+                         'listsqldatabases',
+                         'listgremlindatabases',
+                         'listcassandrakeyspaces',
+                         'listtables',
+                         'listmetricdefinitions',
+                         'getreadonlykeys',
+                         'listmetrics',
+                         'listusages',
+                         'get',
+                         'listbyresourcegroup',
+                         'list']
+            ),
+            fields=dict(
+                type='list'
             )
         )
 
@@ -576,6 +715,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.fields = None
+        self.projection = None
+        self.facets = None
+        self.in_scope = False
+        self.max_items = None
         self.url = None
         self.status_code = [200]
 
@@ -594,139 +738,37 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
 
         self.mgmt_client = self.get_mgmt_svc_client(CosmosDBClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.projection = get_projection(self.fields, self.fail)
 
-        if (self.resource_group is not None and
-            self.account_name is not None and
-            self.database_name is not None and
-            self.name is not None):
-            self.results['database_accounts'] = self.format_item(self.getmongodbcollectionthroughput())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.database_name is not None and
-              self.container_name is not None):
-            self.results['database_accounts'] = self.format_item(self.getsqlcontainerthroughput())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.database_name is not None and
-              self.graph_name is not None):
-            self.results['database_accounts'] = self.format_item(self.getgremlingraphthroughput())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.keyspace_name is not None and
-              self.table_name is not None):
-            self.results['database_accounts'] = self.format_item(self.getcassandratablethroughput())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.database_name is not None and
-              self.name is not None):
-            self.results['database_accounts'] = self.format_item(self.getmongodbcollection())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.database_name is not None and
-              self.container_name is not None):
-            self.results['database_accounts'] = self.format_item(self.getsqlcontainer())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.database_name is not None):
-            self.results['database_accounts'] = self.format_item(self.getsqldatabasethroughput())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.database_name is not None):
-            self.results['database_accounts'] = self.format_item(self.getgremlindatabasethroughput())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.database_name is not None):
-            self.results['database_accounts'] = self.format_item(self.getmongodbdatabasethroughput())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.keyspace_name is not None):
-            self.results['database_accounts'] = self.format_item(self.getcassandrakeyspacethroughput())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.keyspace_name is not None and
-              self.table_name is not None):
-            self.results['database_accounts'] = self.format_item(self.getcassandratable())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.database_name is not None and
-              self.graph_name is not None):
-            self.results['database_accounts'] = self.format_item(self.getgremlingraph())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.table_name is not None):
-            self.results['database_accounts'] = self.format_item(self.gettablethroughput())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.database_name is not None):
-            self.results['database_accounts'] = self.format_item(self.listmongodbcollections())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.database_name is not None):
-            self.results['database_accounts'] = self.format_item(self.listsqlcontainers())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.database_name is not None):
-            self.results['database_accounts'] = self.format_item(self.listgremlingraphs())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.keyspace_name is not None):
-            self.results['database_accounts'] = self.format_item(self.listcassandratables())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.database_name is not None):
-            self.results['database_accounts'] = self.format_item(self.getsqldatabase())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.database_name is not None):
-            self.results['database_accounts'] = self.format_item(self.getmongodbdatabase())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.database_name is not None):
-            self.results['database_accounts'] = self.format_item(self.getgremlindatabase())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.keyspace_name is not None):
-            self.results['database_accounts'] = self.format_item(self.getcassandrakeyspace())
-        elif (self.resource_group is not None and
-              self.account_name is not None and
-              self.table_name is not None):
-            self.results['database_accounts'] = self.format_item(self.gettable())
-        elif (self.resource_group is not None and
-              self.account_name is not None):
-            self.results['database_accounts'] = self.format_item(self.listmongodbdatabases())
-        elif (self.resource_group is not None and
-              self.account_name is not None):
-            self.results['database_accounts'] = self.format_item(self.listsqldatabases())
-        elif (self.resource_group is not None and
-              self.account_name is not None):
-            self.results['database_accounts'] = self.format_item(self.listgremlindatabases())
-        elif (self.resource_group is not None and
-              self.account_name is not None):
-            self.results['database_accounts'] = self.format_item(self.listcassandrakeyspaces())
-        elif (self.resource_group is not None and
-              self.account_name is not None):
-            self.results['database_accounts'] = self.format_item(self.listtables())
-        elif (self.resource_group is not None and
-              self.account_name is not None):
-            self.results['database_accounts'] = self.format_item(self.listmetricdefinitions())
-        elif (self.resource_group is not None and
-              self.account_name is not None):
-            self.results['database_accounts'] = self.format_item(self.getreadonlykeys())
-        elif (self.resource_group is not None and
-              self.account_name is not None):
-            self.results['database_accounts'] = self.format_item(self.listmetrics())
-        elif (self.resource_group is not None and
-              self.account_name is not None):
-            self.results['database_accounts'] = self.format_item(self.listusages())
-        elif (self.resource_group is not None and
-              self.account_name is not None):
-            self.results['database_accounts'] = self.format_item(self.get())
-        elif (self.resource_group is not None):
-            self.results['database_accounts'] = self.format_item(self.listbyresourcegroup())
+        if self.facets:
+            self.results['database_accounts'] = self.get_facets()
         else:
-            self.results['database_accounts'] = [self.format_item(self.list())]
+            for facet, required in FACETS:
+                if all(getattr(self, option) is not None for option in required):
+                    self.results['database_accounts'] = self.format_item(getattr(self, facet)())
+                    break
         return self.results
 
+    def get_facets(self):
+        jobs = []
+        for facet, required in FACETS:
+            if facet not in self.facets:
+                continue
+            missing = [option for option in required if getattr(self, option) is None]
+            if missing:
+                self.fail('Facet {0} requires following options: {1}'.format(facet, ', '.join(missing)))
+            jobs.append((facet, getattr(self, facet), []))
+        # getters raise CloudError like in a scope, so failed facets are reported
+        in_scope = self.in_scope
+        self.in_scope = True
+        try:
+            results, errors = run_parallel(jobs)
+        finally:
+            self.in_scope = in_scope
+        if errors:
+            self.fail('Error getting facets: {0}'.format(errors))
+        return dict((facet, self.format_item(result)) for facet, result in results.items())
+
     def getmongodbcollectionthroughput(self):
         response = None
 
@@ -736,9 +778,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                                                                             database_name=self.database_name,
                                                                                             collection_name=self.name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return project(response.as_dict(), self.projection)
 
     def getsqlcontainerthroughput(self):
         response = None
@@ -749,9 +793,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                                                                        database_name=self.database_name,
                                                                                        container_name=self.container_name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return project(response.as_dict(), self.projection)
 
     def getgremlingraphthroughput(self):
         response = None
@@ -762,9 +808,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                                                                        database_name=self.database_name,
                                                                                        graph_name=self.graph_name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return project(response.as_dict(), self.projection)
 
     def getcassandratablethroughput(self):
         response = None
@@ -775,9 +823,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                                                                          keyspace_name=self.keyspace_name,
                                                                                          table_name=self.table_name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return project(response.as_dict(), self.projection)
 
     def getmongodbcollection(self):
         response = None
@@ -788,9 +838,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                                                                  database_name=self.database_name,
                                                                                  collection_name=self.name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return project(response.as_dict(), self.projection)
 
     def getsqlcontainer(self):
         response = None
@@ -801,9 +853,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                                                             database_name=self.database_name,
                                                                             container_name=self.container_name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return project(response.as_dict(), self.projection)
 
     def getsqldatabasethroughput(self):
         response = None
@@ -813,9 +867,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                                                                       account_name=self.account_name,
                                                                                       database_name=self.database_name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return project(response.as_dict(), self.projection)
 
     def getgremlindatabasethroughput(self):
         response = None
@@ -825,9 +881,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                                                                           account_name=self.account_name,
                                                                                           database_name=self.database_name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return project(response.as_dict(), self.projection)
 
     def getmongodbdatabasethroughput(self):
         response = None
@@ -837,9 +895,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                                                                           account_name=self.account_name,
                                                                                           database_name=self.database_name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return project(response.as_dict(), self.projection)
 
     def getcassandrakeyspacethroughput(self):
         response = None
@@ -849,9 +909,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                                                                             account_name=self.account_name,
                                                                                             keyspace_name=self.keyspace_name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return project(response.as_dict(), self.projection)
 
     def getcassandratable(self):
         response = None
@@ -862,9 +924,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                                                               keyspace_name=self.keyspace_name,
                                                                               table_name=self.table_name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return project(response.as_dict(), self.projection)
 
     def getgremlingraph(self):
         response = None
@@ -875,9 +939,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                                                             database_name=self.database_name,
                                                                             graph_name=self.graph_name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return project(response.as_dict(), self.projection)
 
     def gettablethroughput(self):
         response = None
@@ -887,9 +953,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                                                                account_name=self.account_name,
                                                                                table_name=self.table_name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return project(response.as_dict(), self.projection)
 
     def listmongodbcollections(self):
         response = None
@@ -899,9 +967,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                                                                    account_name=self.account_name,
                                                                                    database_name=self.database_name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return paged_as_dict(response, self.max_items, self.projection)
 
     def listsqlcontainers(self):
         response = None
@@ -911,9 +981,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                                                               account_name=self.account_name,
                                                                               database_name=self.database_name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return paged_as_dict(response, self.max_items, self.projection)
 
     def listgremlingraphs(self):
         response = None
@@ -923,9 +995,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                                                               account_name=self.account_name,
                                                                               database_name=self.database_name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return paged_as_dict(response, self.max_items, self.projection)
 
     def listcassandratables(self):
         response = None
@@ -935,9 +1009,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                                                                 account_name=self.account_name,
                                                                                 keyspace_name=self.keyspace_name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return paged_as_dict(response, self.max_items, self.projection)
 
     def getsqldatabase(self):
         response = None
@@ -947,9 +1023,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                                                            account_name=self.account_name,
                                                                            database_name=self.database_name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return project(response.as_dict(), self.projection)
 
     def getmongodbdatabase(self):
         response = None
@@ -959,9 +1037,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                                                                account_name=self.account_name,
                                                                                database_name=self.database_name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return project(response.as_dict(), self.projection)
 
     def getgremlindatabase(self):
         response = None
@@ -971,9 +1051,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                                                                account_name=self.account_name,
                                                                                database_name=self.database_name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return project(response.as_dict(), self.projection)
 
     def getcassandrakeyspace(self):
         response = None
@@ -983,9 +1065,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                                                                  account_name=self.account_name,
                                                                                  keyspace_name=self.keyspace_name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return project(response.as_dict(), self.projection)
 
     def gettable(self):
         response = None
@@ -995,9 +1079,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
                                                                     account_name=self.account_name,
                                                                     table_name=self.table_name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return project(response.as_dict(), self.projection)
 
     def listmongodbdatabases(self):
         response = None
@@ -1006,9 +1092,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
             response = self.mgmt_client.database_accounts.list_mongo_dbdatabases(resource_group_name=self.resource_group,
                                                                                  account_name=self.account_name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return paged_as_dict(response, self.max_items, self.projection)
 
     def listsqldatabases(self):
         response = None
@@ -1017,9 +1105,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
             response = self.mgmt_client.database_accounts.list_sql_databases(resource_group_name=self.resource_group,
                                                                              account_name=self.account_name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return paged_as_dict(response, self.max_items, self.projection)
 
     def listgremlindatabases(self):
         response = None
@@ -1028,9 +1118,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
             response = self.mgmt_client.database_accounts.list_gremlin_databases(resource_group_name=self.resource_group,
                                                                                  account_name=self.account_name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return paged_as_dict(response, self.max_items, self.projection)
 
     def listcassandrakeyspaces(self):
         response = None
@@ -1039,9 +1131,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
             response = self.mgmt_client.database_accounts.list_cassandra_keyspaces(resource_group_name=self.resource_group,
                                                                                    account_name=self.account_name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return paged_as_dict(response, self.max_items, self.projection)
 
     def listtables(self):
         response = None
@@ -1050,9 +1144,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
             response = self.mgmt_client.database_accounts.list_tables(resource_group_name=self.resource_group,
                                                                       account_name=self.account_name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return paged_as_dict(response, self.max_items, self.projection)
 
     def listmetricdefinitions(self):
         response = None
@@ -1061,9 +1157,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
             response = self.mgmt_client.database_accounts.list_metric_definitions(resource_group_name=self.resource_group,
                                                                                   account_name=self.account_name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return paged_as_dict(response, self.max_items, self.projection)
 
     def getreadonlykeys(self):
         response = None
@@ -1072,9 +1170,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
             response = self.mgmt_client.database_accounts.get_read_only_keys(resource_group_name=self.resource_group,
                                                                              account_name=self.account_name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return project(response.as_dict(), self.projection)
 
     def listmetrics(self):
         response = None
@@ -1083,9 +1183,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
             response = self.mgmt_client.database_accounts.list_metrics(resource_group_name=self.resource_group,
                                                                        account_name=self.account_name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return paged_as_dict(response, self.max_items, self.projection)
 
     def listusages(self):
         response = None
@@ -1094,9 +1196,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
             response = self.mgmt_client.database_accounts.list_usages(resource_group_name=self.resource_group,
                                                                       account_name=self.account_name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return paged_as_dict(response, self.max_items, self.projection)
 
     def get(self):
         response = None
@@ -1105,9 +1209,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
             response = self.mgmt_client.database_accounts.get(resource_group_name=self.resource_group,
                                                               account_name=self.account_name)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return project(response.as_dict(), self.projection)
 
     def listbyresourcegroup(self):
         response = None
@@ -1115,9 +1221,11 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
         try:
             response = self.mgmt_client.database_accounts.list_by_resource_group(resource_group_name=self.resource_group)
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return paged_as_dict(response, self.max_items, self.projection)
 
     def list(self):
         response = None
@@ -1125,15 +1233,19 @@ class AzureRMDatabaseAccountsInfo(AzureRMModuleBase):
         try:
             response = self.mgmt_client.database_accounts.list()
         except CloudError as e:
+            if self.in_scope:
+                raise
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return paged_as_dict(response, self.max_items, self.projection)
 
-    def format_item(item):
+    def format_item(self, item):
         return item
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMDatabaseAccountsInfo()
 
 
@@ -119,6 +119,12 @@ options:
     description:
       - Type of the resource
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the EventSubscription.
@@ -451,12 +457,24 @@ properties:
       type: dict
       sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -468,72 +486,27 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "scope": {"type": "str", "updatable": false, "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "event_subscription_name", "required": true},
+    "destination": {"type": "dict", "disposition": "/"},
+    "filter": {"type": "dict", "disposition": "/", "options": {"subject_begins_with": {"type": "str"}, "subject_ends_with": {"type": "str"}, "included_event_types": {"type": "list"}, "is_subject_case_sensitive": {"type": "boolean"}}},
+    "labels": {"type": "list", "disposition": "/"},
+    "retry_policy": {"type": "dict", "disposition": "/", "options": {"max_delivery_attempts": {"type": "number"}, "event_time_to_live_in_minutes": {"type": "number"}}},
+    "dead_letter_destination": {"type": "dict", "disposition": "/"},
+    "wait": {"type": "bool", "default": true},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMEventSubscriptions(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            scope=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='event_subscription_name',
-                required=true
-            ),
-            destination=dict(
-                type='dict',
-                disposition='/'
-            ),
-            filter=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    subject_begins_with=dict(
-                        type='str'
-                    ),
-                    subject_ends_with=dict(
-                        type='str'
-                    ),
-                    included_event_types=dict(
-                        type='list'
-                    ),
-                    is_subject_case_sensitive=dict(
-                        type='boolean'
-                    )
-                )
-            ),
-            labels=dict(
-                type='list',
-                disposition='/'
-            ),
-            retry_policy=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    max_delivery_attempts=dict(
-                        type='number'
-                    ),
-                    event_time_to_live_in_minutes=dict(
-                        type='number'
-                    )
-                )
-            ),
-            dead_letter_destination=dict(
-                type='dict',
-                disposition='/'
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.scope = None
         self.name = None
@@ -545,6 +518,7 @@ class AzureRMEventSubscriptions(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMEventSubscriptions, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -558,7 +532,7 @@ class AzureRMEventSubscriptions(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
@@ -578,9 +552,9 @@ class AzureRMEventSubscriptions(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -611,6 +585,10 @@ class AzureRMEventSubscriptions(AzureRMModuleBaseExt):
                                                                              event_subscription_name=self.name,
                                                                              event_subscription_info=self.eventSubscriptionInfo)
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the EventSubscription instance.')
@@ -622,6 +600,11 @@ class AzureRMEventSubscriptions(AzureRMModuleBaseExt):
         try:
             response = self.mgmt_client.event_subscriptions.delete(scope=self.scope,
                                                                    event_subscription_name=self.name)
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the EventSubscription instance.')
             self.fail('Error deleting the EventSubscription instance: {0}'.format(str(e)))
@@ -640,6 +623,8 @@ class AzureRMEventSubscriptions(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMEventSubscriptions()
 
 
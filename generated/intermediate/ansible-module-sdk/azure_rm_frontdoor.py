@@ -355,6 +355,12 @@ options:
     description:
       - Resource type.
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the FrontDoor.
@@ -1010,12 +1016,24 @@ properties:
       type: str
       sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -1027,279 +1045,32 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resource_group_name", "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "front_door_name", "required": true},
+    "location": {"type": "str", "updatable": false, "disposition": "/"},
+    "friendly_name": {"type": "str", "disposition": "/"},
+    "routing_rules": {"type": "list", "disposition": "/", "options": {"id": {"type": "str"}, "frontend_endpoints": {"type": "list", "options": {"id": {"type": "str"}}}, "accepted_protocols": {"type": "list", "choices": ["Http", "Https"]}, "patterns_to_match": {"type": "list"}, "enabled_state": {"type": "str", "choices": ["Enabled", "Disabled"]}, "route_configuration": {"type": "dict"}, "resource_state": {"type": "str", "choices": ["Creating", "Enabling", "Enabled", "Disabling", "Disabled", "Deleting"]}, "name": {"type": "str"}}},
+    "load_balancing_settings": {"type": "list", "disposition": "/", "options": {"id": {"type": "str"}, "sample_size": {"type": "number"}, "successful_samples_required": {"type": "number"}, "additional_latency_milliseconds": {"type": "number"}, "resource_state": {"type": "str", "choices": ["Creating", "Enabling", "Enabled", "Disabling", "Disabled", "Deleting"]}, "name": {"type": "str"}}},
+    "health_probe_settings": {"type": "list", "disposition": "/", "options": {"id": {"type": "str"}, "path": {"type": "str"}, "protocol": {"type": "str", "choices": ["Http", "Https"]}, "interval_in_seconds": {"type": "number"}, "resource_state": {"type": "str", "choices": ["Creating", "Enabling", "Enabled", "Disabling", "Disabled", "Deleting"]}, "name": {"type": "str"}}},
+    "backend_pools": {"type": "list", "disposition": "/", "options": {"id": {"type": "str"}, "backends": {"type": "list", "options": {"address": {"type": "str"}, "http_port": {"type": "number"}, "https_port": {"type": "number"}, "enabled_state": {"type": "str", "choices": ["Enabled", "Disabled"]}, "priority": {"type": "number"}, "weight": {"type": "number"}, "backend_host_header": {"type": "str"}}}, "load_balancing_settings": {"type": "dict", "options": {"id": {"type": "str"}}}, "health_probe_settings": {"type": "dict", "options": {"id": {"type": "str"}}}, "resource_state": {"type": "str", "choices": ["Creating", "Enabling", "Enabled", "Disabling", "Disabled", "Deleting"]}, "name": {"type": "str"}}},
+    "frontend_endpoints": {"type": "list", "disposition": "/", "options": {"id": {"type": "str"}, "host_name": {"type": "str"}, "session_affinity_enabled_state": {"type": "str", "choices": ["Enabled", "Disabled"]}, "session_affinity_ttl_seconds": {"type": "number"}, "web_application_firewall_policy_link": {"type": "dict", "options": {"id": {"type": "str"}}}, "resource_state": {"type": "str", "choices": ["Creating", "Enabling", "Enabled", "Disabling", "Disabled", "Deleting"]}, "name": {"type": "str"}}},
+    "backend_pools_settings": {"type": "dict", "disposition": "/", "options": {"enforce_certificate_name_check": {"type": "str", "choices": ["Enabled", "Disabled"]}}},
+    "enabled_state": {"type": "str", "disposition": "/", "choices": ["Enabled", "Disabled"]},
+    "resource_state": {"type": "str", "disposition": "/", "choices": ["Creating", "Enabling", "Enabled", "Disabling", "Disabled", "Deleting"]},
+    "wait": {"type": "bool", "default": true},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMFrontDoors(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resource_group_name',
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='front_door_name',
-                required=true
-            ),
-            location=dict(
-                type='str',
-                updatable=False,
-                disposition='/'
-            ),
-            friendly_name=dict(
-                type='str',
-                disposition='/'
-            ),
-            routing_rules=dict(
-                type='list',
-                disposition='/',
-                options=dict(
-                    id=dict(
-                        type='str'
-                    ),
-                    frontend_endpoints=dict(
-                        type='list',
-                        options=dict(
-                            id=dict(
-                                type='str'
-                            )
-                        )
-                    ),
-                    accepted_protocols=dict(
-                        type='list',
-                        choices=['Http',
-                                 'Https']
-                    ),
-                    patterns_to_match=dict(
-                        type='list'
-                    ),
-                    enabled_state=dict(
-                        type='str',
-                        choices=['Enabled',
-                                 'Disabled']
-                    ),
-                    route_configuration=dict(
-                        type='dict'
-                    ),
-                    resource_state=dict(
-                        type='str',
-                        choices=['Creating',
-                                 'Enabling',
-                                 'Enabled',
-                                 'Disabling',
-                                 'Disabled',
-                                 'Deleting']
-                    ),
-                    name=dict(
-                        type='str'
-                    )
-                )
-            ),
-            load_balancing_settings=dict(
-                type='list',
-                disposition='/',
-                options=dict(
-                    id=dict(
-                        type='str'
-                    ),
-                    sample_size=dict(
-                        type='number'
-                    ),
-                    successful_samples_required=dict(
-                        type='number'
-                    ),
-                    additional_latency_milliseconds=dict(
-                        type='number'
-                    ),
-                    resource_state=dict(
-                        type='str',
-                        choices=['Creating',
-                                 'Enabling',
-                                 'Enabled',
-                                 'Disabling',
-                                 'Disabled',
-                                 'Deleting']
-                    ),
-                    name=dict(
-                        type='str'
-                    )
-                )
-            ),
-            health_probe_settings=dict(
-                type='list',
-                disposition='/',
-                options=dict(
-                    id=dict(
-                        type='str'
-                    ),
-                    path=dict(
-                        type='str'
-                    ),
-                    protocol=dict(
-                        type='str',
-                        choices=['Http',
-                                 'Https']
-                    ),
-                    interval_in_seconds=dict(
-                        type='number'
-                    ),
-                    resource_state=dict(
-                        type='str',
-                        choices=['Creating',
-                                 'Enabling',
-                                 'Enabled',
-                                 'Disabling',
-                                 'Disabled',
-                                 'Deleting']
-                    ),
-                    name=dict(
-                        type='str'
-                    )
-                )
-            ),
-            backend_pools=dict(
-                type='list',
-                disposition='/',
-                options=dict(
-                    id=dict(
-                        type='str'
-                    ),
-                    backends=dict(
-                        type='list',
-                        options=dict(
-                            address=dict(
-                                type='str'
-                            ),
-                            http_port=dict(
-                                type='number'
-                            ),
-                            https_port=dict(
-                                type='number'
-                            ),
-                            enabled_state=dict(
-                                type='str',
-                                choices=['Enabled',
-                                         'Disabled']
-                            ),
-                            priority=dict(
-                                type='number'
-                            ),
-                            weight=dict(
-                                type='number'
-                            ),
-                            backend_host_header=dict(
-                                type='str'
-                            )
-                        )
-                    ),
-                    load_balancing_settings=dict(
-                        type='dict',
-                        options=dict(
-                            id=dict(
-                                type='str'
-                            )
-                        )
-                    ),
-                    health_probe_settings=dict(
-                        type='dict',
-                        options=dict(
-                            id=dict(
-                                type='str'
-                            )
-                        )
-                    ),
-                    resource_state=dict(
-                        type='str',
-                        choices=['Creating',
-                                 'Enabling',
-                                 'Enabled',
-                                 'Disabling',
-                                 'Disabled',
-                                 'Deleting']
-                    ),
-                    name=dict(
-                        type='str'
-                    )
-                )
-            ),
-            frontend_endpoints=dict(
-                type='list',
-                disposition='/',
-                options=dict(
-                    id=dict(
-                        type='str'
-                    ),
-                    host_name=dict(
-                        type='str'
-                    ),
-                    session_affinity_enabled_state=dict(
-                        type='str',
-                        choices=['Enabled',
-                                 'Disabled']
-                    ),
-                    session_affinity_ttl_seconds=dict(
-                        type='number'
-                    ),
-                    web_application_firewall_policy_link=dict(
-                        type='dict',
-                        options=dict(
-                            id=dict(
-                                type='str'
-                            )
-                        )
-                    ),
-                    resource_state=dict(
-                        type='str',
-                        choices=['Creating',
-                                 'Enabling',
-                                 'Enabled',
-                                 'Disabling',
-                                 'Disabled',
-                                 'Deleting']
-                    ),
-                    name=dict(
-                        type='str'
-                    )
-                )
-            ),
-            backend_pools_settings=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    enforce_certificate_name_check=dict(
-                        type='str',
-                        choices=['Enabled',
-                                 'Disabled']
-                    )
-                )
-            ),
-            enabled_state=dict(
-                type='str',
-                disposition='/',
-                choices=['Enabled',
-                         'Disabled']
-            ),
-            resource_state=dict(
-                type='str',
-                disposition='/',
-                choices=['Creating',
-                         'Enabling',
-                         'Enabled',
-                         'Disabling',
-                         'Disabled',
-                         'Deleting']
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.name = None
@@ -1311,6 +1082,7 @@ class AzureRMFrontDoors(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMFrontDoors, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -1324,7 +1096,7 @@ class AzureRMFrontDoors(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
@@ -1346,9 +1118,9 @@ class AzureRMFrontDoors(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -1381,6 +1153,10 @@ class AzureRMFrontDoors(AzureRMModuleBaseExt):
                                                                      front_door_name=self.name,
                                                                      front_door_parameters=self.frontDoorParameters)
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the FrontDoor instance.')
@@ -1392,6 +1168,11 @@ class AzureRMFrontDoors(AzureRMModuleBaseExt):
         try:
             response = self.mgmt_client.front_doors.delete(resource_group_name=self.resource_group,
                                                            front_door_name=self.name)
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the FrontDoor instance.')
             self.fail('Error deleting the FrontDoor instance: {0}'.format(str(e)))
@@ -1410,6 +1191,8 @@ class AzureRMFrontDoors(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMFrontDoors()
 
 
@@ -99,6 +99,12 @@ options:
     description:
       - The resource type.
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the Service.
@@ -311,12 +317,24 @@ properties:
           type: boolean
           sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -328,92 +346,35 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resource_group_name", "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "resource_name", "required": true},
+    "kind": {"type": "str", "updatable": false, "disposition": "/", "choices": ["fhir", "fhir-Stu3", "fhir-R4"], "required": true},
+    "location": {"type": "str", "updatable": false, "disposition": "/", "required": true},
+    "etag": {"type": "str", "updatable": false, "disposition": "/"},
+    "access_policies_object_id": {"type": "str", "disposition": "/access_policies/object_id", "required": true},
+    "cosmos_db_offer_throughput": {"type": "number", "disposition": "/cosmos_db_configuration/offer_throughput"},
+    "authentication_authority": {"type": "str", "disposition": "/authentication_configuration/authority"},
+    "authentication_audience": {"type": "str", "disposition": "/authentication_configuration/audience"},
+    "authentication_smart_proxy_enabled": {"type": "boolean", "disposition": "/authentication_configuration/smart_proxy_enabled"},
+    "cors_origins": {"type": "list", "disposition": "/cors_configuration/origins"},
+    "cors_headers": {"type": "list", "disposition": "/cors_configuration/headers"},
+    "cors_methods": {"type": "list", "disposition": "/cors_configuration/methods"},
+    "cors_max_age": {"type": "number", "disposition": "/cors_configuration/max_age"},
+    "cors_allow_credentials": {"type": "boolean", "disposition": "/cors_configuration/allow_credentials"},
+    "wait": {"type": "bool", "default": true},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMServices(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resource_group_name',
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='resource_name',
-                required=true
-            ),
-            kind=dict(
-                type='str',
-                updatable=False,
-                disposition='/',
-                choices=['fhir',
-                         'fhir-Stu3',
-                         'fhir-R4'],
-                required=true
-            ),
-            location=dict(
-                type='str',
-                updatable=False,
-                disposition='/',
-                required=true
-            ),
-            etag=dict(
-                type='str',
-                updatable=False,
-                disposition='/'
-            ),
-            access_policies_object_id=dict(
-                type='str',
-                disposition='/access_policies/object_id',
-                required=true
-            ),
-            cosmos_db_offer_throughput=dict(
-                type='number',
-                disposition='/cosmos_db_configuration/offer_throughput'
-            ),
-            authentication_authority=dict(
-                type='str',
-                disposition='/authentication_configuration/authority'
-            ),
-            authentication_audience=dict(
-                type='str',
-                disposition='/authentication_configuration/audience'
-            ),
-            authentication_smart_proxy_enabled=dict(
-                type='boolean',
-                disposition='/authentication_configuration/smart_proxy_enabled'
-            ),
-            cors_origins=dict(
-                type='list',
-                disposition='/cors_configuration/origins'
-            ),
-            cors_headers=dict(
-                type='list',
-                disposition='/cors_configuration/headers'
-            ),
-            cors_methods=dict(
-                type='list',
-                disposition='/cors_configuration/methods'
-            ),
-            cors_max_age=dict(
-                type='number',
-                disposition='/cors_configuration/max_age'
-            ),
-            cors_allow_credentials=dict(
-                type='boolean',
-                disposition='/cors_configuration/allow_credentials'
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.name = None
@@ -425,6 +386,7 @@ class AzureRMServices(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMServices, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -438,7 +400,7 @@ class AzureRMServices(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
@@ -460,9 +422,9 @@ class AzureRMServices(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -497,6 +459,10 @@ class AzureRMServices(AzureRMModuleBaseExt):
                                                                   resource_name=self.name,
                                                                   service_description=self.serviceDescription)
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the Service instance.')
@@ -508,6 +474,11 @@ class AzureRMServices(AzureRMModuleBaseExt):
         try:
             response = self.mgmt_client.services.delete(resource_group_name=self.resource_group,
                                                         resource_name=self.name)
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the Service instance.')
             self.fail('Error deleting the Service instance: {0}'.format(str(e)))
@@ -526,6 +497,8 @@ class AzureRMServices(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMServices()
 
 
@@ -193,6 +193,12 @@ options:
         The type of the resource.  For example,
         /providers/Microsoft.Management/managementGroups
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the ManagementGroup.
@@ -476,12 +482,24 @@ properties:
                   type: dict
                   sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -493,47 +511,24 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "group_id": {"type": "str", "updatable": false, "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "/"},
+    "display_name": {"type": "str", "disposition": "/"},
+    "details": {"type": "dict", "disposition": "/", "options": {"parent": {"type": "dict", "options": {"id": {"type": "str"}}}}},
+    "wait": {"type": "bool", "default": true},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMManagementGroups(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            group_id=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='/'
-            ),
-            display_name=dict(
-                type='str',
-                disposition='/'
-            ),
-            details=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    parent=dict(
-                        type='dict',
-                        options=dict(
-                            id=dict(
-                                type='str'
-                            )
-                        )
-                    )
-                )
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.group_id = None
         self.id = None
@@ -543,6 +538,7 @@ class AzureRMManagementGroups(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMManagementGroups, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -556,7 +552,7 @@ class AzureRMManagementGroups(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
@@ -576,9 +572,9 @@ class AzureRMManagementGroups(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -608,6 +604,10 @@ class AzureRMManagementGroups(AzureRMModuleBaseExt):
             response = self.mgmt_client.management_groups.create_or_update(group_id=self.group_id,
                                                                            create_management_group_request=self.createManagementGroupRequest)
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the ManagementGroup instance.')
@@ -618,6 +618,11 @@ class AzureRMManagementGroups(AzureRMModuleBaseExt):
         # self.log('Deleting the ManagementGroup instance {0}'.format(self.))
         try:
             response = self.mgmt_client.management_groups.delete(group_id=self.group_id)
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the ManagementGroup instance.')
             self.fail('Error deleting the ManagementGroup instance: {0}'.format(str(e)))
@@ -635,6 +640,8 @@ class AzureRMManagementGroups(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMManagementGroups()
 
 
@@ -212,6 +212,12 @@ options:
     description:
       - Resource type
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the OpenShiftManagedCluster.
@@ -554,12 +560,24 @@ properties:
               type: dict
               sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -571,223 +589,30 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resource_group_name", "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "resource_name", "required": true},
+    "location": {"type": "str", "updatable": false, "disposition": "/", "required": true},
+    "plan": {"type": "dict", "disposition": "/", "options": {"name": {"type": "str"}, "product": {"type": "str"}, "promotion_code": {"type": "str"}, "publisher": {"type": "str"}}},
+    "open_shift_version": {"type": "str", "disposition": "/", "required": true},
+    "network_profile": {"type": "dict", "disposition": "/", "options": {"vnet_cidr": {"type": "str"}, "peer_vnet_id": {"type": "str"}, "vnet_id": {"type": "str"}}},
+    "router_profiles": {"type": "list", "disposition": "/", "options": {"name": {"type": "str"}}},
+    "master_pool_profile": {"type": "dict", "disposition": "/", "options": {"name": {"type": "str"}, "count": {"type": "number", "required": true}, "vm_size": {"type": "str", "choices": ["Standard_D2s_v3", "Standard_D4s_v3", "Standard_D8s_v3", "Standard_D16s_v3", "Standard_D32s_v3", "Standard_D64s_v3", "Standard_DS4_v2", "Standard_DS5_v2", "Standard_F8s_v2", "Standard_F16s_v2", "Standard_F32s_v2", "Standard_F64s_v2", "Standard_F72s_v2", "Standard_F8s", "Standard_F16s", "Standard_E4s_v3", "Standard_E8s_v3", "Standard_E16s_v3", "Standard_E20s_v3", "Standard_E32s_v3", "Standard_E64s_v3", "Standard_GS2", "Standard_GS3", "Standard_GS4", "Standard_GS5", "Standard_DS12_v2", "Standard_DS13_v2", "Standard_DS14_v2", "Standard_DS15_v2", "Standard_L4s", "Standard_L8s", "Standard_L16s", "Standard_L32s"], "required": true}, "subnet_cidr": {"type": "str"}, "os_type": {"type": "str", "choices": ["Linux", "Windows"]}}},
+    "agent_pool_profiles": {"type": "list", "disposition": "/", "options": {"name": {"type": "str", "required": true}, "count": {"type": "number", "required": true}, "vm_size": {"type": "str", "choices": ["Standard_D2s_v3", "Standard_D4s_v3", "Standard_D8s_v3", "Standard_D16s_v3", "Standard_D32s_v3", "Standard_D64s_v3", "Standard_DS4_v2", "Standard_DS5_v2", "Standard_F8s_v2", "Standard_F16s_v2", "Standard_F32s_v2", "Standard_F64s_v2", "Standard_F72s_v2", "Standard_F8s", "Standard_F16s", "Standard_E4s_v3", "Standard_E8s_v3", "Standard_E16s_v3", "Standard_E20s_v3", "Standard_E32s_v3", "Standard_E64s_v3", "Standard_GS2", "Standard_GS3", "Standard_GS4", "Standard_GS5", "Standard_DS12_v2", "Standard_DS13_v2", "Standard_DS14_v2", "Standard_DS15_v2", "Standard_L4s", "Standard_L8s", "Standard_L16s", "Standard_L32s"], "required": true}, "subnet_cidr": {"type": "str"}, "os_type": {"type": "str", "choices": ["Linux", "Windows"]}, "role": {"type": "str", "choices": ["compute", "infra"]}}},
+    "auth_profile": {"type": "dict", "disposition": "/", "options": {"identity_providers": {"type": "list", "options": {"name": {"type": "str"}, "provider": {"type": "dict"}}}}},
+    "wait": {"type": "bool", "default": true},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMOpenShiftManagedClusters(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resource_group_name',
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='resource_name',
-                required=true
-            ),
-            location=dict(
-                type='str',
-                updatable=False,
-                disposition='/',
-                required=true
-            ),
-            plan=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    name=dict(
-                        type='str'
-                    ),
-                    product=dict(
-                        type='str'
-                    ),
-                    promotion_code=dict(
-                        type='str'
-                    ),
-                    publisher=dict(
-                        type='str'
-                    )
-                )
-            ),
-            open_shift_version=dict(
-                type='str',
-                disposition='/',
-                required=true
-            ),
-            network_profile=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    vnet_cidr=dict(
-                        type='str'
-                    ),
-                    peer_vnet_id=dict(
-                        type='str'
-                    ),
-                    vnet_id=dict(
-                        type='str'
-                    )
-                )
-            ),
-            router_profiles=dict(
-                type='list',
-                disposition='/',
-                options=dict(
-                    name=dict(
-                        type='str'
-                    )
-                )
-            ),
-            master_pool_profile=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    name=dict(
-                        type='str'
-                    ),
-                    count=dict(
-                        type='number',
-                        required=true
-                    ),
-                    vm_size=dict(
-                        type='str',
-                        choices=['Standard_D2s_v3',
-                                 'Standard_D4s_v3',
-                                 'Standard_D8s_v3',
-                                 'Standard_D16s_v3',
-                                 'Standard_D32s_v3',
-                                 'Standard_D64s_v3',
-                                 'Standard_DS4_v2',
-                                 'Standard_DS5_v2',
-                                 'Standard_F8s_v2',
-                                 'Standard_F16s_v2',
-                                 'Standard_F32s_v2',
-                                 'Standard_F64s_v2',
-                                 'Standard_F72s_v2',
-                                 'Standard_F8s',
-                                 'Standard_F16s',
-                                 'Standard_E4s_v3',
-                                 'Standard_E8s_v3',
-                                 'Standard_E16s_v3',
-                                 'Standard_E20s_v3',
-                                 'Standard_E32s_v3',
-                                 'Standard_E64s_v3',
-                                 'Standard_GS2',
-                                 'Standard_GS3',
-                                 'Standard_GS4',
-                                 'Standard_GS5',
-                                 'Standard_DS12_v2',
-                                 'Standard_DS13_v2',
-                                 'Standard_DS14_v2',
-                                 'Standard_DS15_v2',
-                                 'Standard_L4s',
-                                 'Standard_L8s',
-                                 'Standard_L16s',
-                                 'Standard_L32s'],
-                        required=true
-                    ),
-                    subnet_cidr=dict(
-                        type='str'
-                    ),
-                    os_type=dict(
-                        type='str',
-                        choices=['Linux',
-                                 'Windows']
-                    )
-                )
-            ),
-            agent_pool_profiles=dict(
-                type='list',
-                disposition='/',
-                options=dict(
-                    name=dict(
-                        type='str',
-                        required=true
-                    ),
-                    count=dict(
-                        type='number',
-                        required=true
-                    ),
-                    vm_size=dict(
-                        type='str',
-                        choices=['Standard_D2s_v3',
-                                 'Standard_D4s_v3',
-                                 'Standard_D8s_v3',
-                                 'Standard_D16s_v3',
-                                 'Standard_D32s_v3',
-                                 'Standard_D64s_v3',
-                                 'Standard_DS4_v2',
-                                 'Standard_DS5_v2',
-                                 'Standard_F8s_v2',
-                                 'Standard_F16s_v2',
-                                 'Standard_F32s_v2',
-                                 'Standard_F64s_v2',
-                                 'Standard_F72s_v2',
-                                 'Standard_F8s',
-                                 'Standard_F16s',
-                                 'Standard_E4s_v3',
-                                 'Standard_E8s_v3',
-                                 'Standard_E16s_v3',
-                                 'Standard_E20s_v3',
-                                 'Standard_E32s_v3',
-                                 'Standard_E64s_v3',
-                                 'Standard_GS2',
-                                 'Standard_GS3',
-                                 'Standard_GS4',
-                                 'Standard_GS5',
-                                 'Standard_DS12_v2',
-                                 'Standard_DS13_v2',
-                                 'Standard_DS14_v2',
-                                 'Standard_DS15_v2',
-                                 'Standard_L4s',
-                                 'Standard_L8s',
-                                 'Standard_L16s',
-                                 'Standard_L32s'],
-                        required=true
-                    ),
-                    subnet_cidr=dict(
-                        type='str'
-                    ),
-                    os_type=dict(
-                        type='str',
-                        choices=['Linux',
-                                 'Windows']
-                    ),
-                    role=dict(
-                        type='str',
-                        choices=['compute',
-                                 'infra']
-                    )
-                )
-            ),
-            auth_profile=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    identity_providers=dict(
-                        type='list',
-                        options=dict(
-                            name=dict(
-                                type='str'
-                            ),
-                            provider=dict(
-                                type='dict'
-                            )
-                        )
-                    )
-                )
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.name = None
@@ -799,6 +624,7 @@ class AzureRMOpenShiftManagedClusters(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMOpenShiftManagedClusters, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -812,7 +638,7 @@ class AzureRMOpenShiftManagedClusters(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
@@ -834,9 +660,9 @@ class AzureRMOpenShiftManagedClusters(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -870,6 +696,10 @@ class AzureRMOpenShiftManagedClusters(AzureRMModuleBaseExt):
                                                                                      resource_name=self.name,
                                                                                      parameters=self.body)
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the OpenShiftManagedCluster instance.')
@@ -881,6 +711,11 @@ class AzureRMOpenShiftManagedClusters(AzureRMModuleBaseExt):
         try:
             response = self.mgmt_client.open_shift_managed_clusters.delete(resource_group_name=self.resource_group,
                                                                            resource_name=self.name)
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the OpenShiftManagedCluster instance.')
             self.fail('Error deleting the OpenShiftManagedCluster instance: {0}'.format(str(e)))
@@ -899,6 +734,8 @@ class AzureRMOpenShiftManagedClusters(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMOpenShiftManagedClusters()
 
 
@@ -176,6 +176,12 @@ options:
     description:
       - Resource type
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the Queue.
@@ -421,12 +427,24 @@ properties:
       type: str
       sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -438,105 +456,38 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resource_group_name", "required": true},
+    "namespace_name": {"type": "str", "updatable": false, "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "queue_name", "required": true},
+    "lock_duration": {"type": "unknown-primary[timeSpan]", "disposition": "/"},
+    "max_size_in_megabytes": {"type": "number", "disposition": "/"},
+    "requires_duplicate_detection": {"type": "boolean", "disposition": "/"},
+    "requires_session": {"type": "boolean", "disposition": "/"},
+    "default_message_time_to_live": {"type": "unknown-primary[timeSpan]", "disposition": "/"},
+    "dead_lettering_on_message_expiration": {"type": "boolean", "disposition": "/"},
+    "duplicate_detection_history_time_window": {"type": "unknown-primary[timeSpan]", "disposition": "/"},
+    "max_delivery_count": {"type": "number", "disposition": "/"},
+    "status": {"type": "str", "disposition": "/", "choices": ["Active", "Disabled", "Restoring", "SendDisabled", "ReceiveDisabled", "Creating", "Deleting", "Renaming", "Unknown"]},
+    "enable_batched_operations": {"type": "boolean", "disposition": "/"},
+    "auto_delete_on_idle": {"type": "unknown-primary[timeSpan]", "disposition": "/"},
+    "enable_partitioning": {"type": "boolean", "disposition": "/"},
+    "enable_express": {"type": "boolean", "disposition": "/"},
+    "forward_to": {"type": "str", "disposition": "/"},
+    "forward_dead_lettered_messages_to": {"type": "str", "disposition": "/"},
+    "wait": {"type": "bool", "default": true},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMQueues(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resource_group_name',
-                required=true
-            ),
-            namespace_name=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='queue_name',
-                required=true
-            ),
-            lock_duration=dict(
-                type='unknown-primary[timeSpan]',
-                disposition='/'
-            ),
-            max_size_in_megabytes=dict(
-                type='number',
-                disposition='/'
-            ),
-            requires_duplicate_detection=dict(
-                type='boolean',
-                disposition='/'
-            ),
-            requires_session=dict(
-                type='boolean',
-                disposition='/'
-            ),
-            default_message_time_to_live=dict(
-                type='unknown-primary[timeSpan]',
-                disposition='/'
-            ),
-            dead_lettering_on_message_expiration=dict(
-                type='boolean',
-                disposition='/'
-            ),
-            duplicate_detection_history_time_window=dict(
-                type='unknown-primary[timeSpan]',
-                disposition='/'
-            ),
-            max_delivery_count=dict(
-                type='number',
-                disposition='/'
-            ),
-            status=dict(
-                type='str',
-                disposition='/',
-                choices=['Active',
-                         'Disabled',
-                         'Restoring',
-                         'SendDisabled',
-                         'ReceiveDisabled',
-                         'Creating',
-                         'Deleting',
-                         'Renaming',
-                         'Unknown']
-            ),
-            enable_batched_operations=dict(
-                type='boolean',
-                disposition='/'
-            ),
-            auto_delete_on_idle=dict(
-                type='unknown-primary[timeSpan]',
-                disposition='/'
-            ),
-            enable_partitioning=dict(
-                type='boolean',
-                disposition='/'
-            ),
-            enable_express=dict(
-                type='boolean',
-                disposition='/'
-            ),
-            forward_to=dict(
-                type='str',
-                disposition='/'
-            ),
-            forward_dead_lettered_messages_to=dict(
-                type='str',
-                disposition='/'
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.namespace_name = None
@@ -549,6 +500,7 @@ class AzureRMQueues(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMQueues, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -562,7 +514,7 @@ class AzureRMQueues(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
@@ -584,9 +536,9 @@ class AzureRMQueues(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -618,6 +570,10 @@ class AzureRMQueues(AzureRMModuleBaseExt):
                                                                 queue_name=self.name,
                                                                 parameters=self.body)
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the Queue instance.')
@@ -630,6 +586,11 @@ class AzureRMQueues(AzureRMModuleBaseExt):
             response = self.mgmt_client.queues.delete(resource_group_name=self.resource_group,
                                                       namespace_name=self.namespace_name,
                                                       queue_name=self.name)
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the Queue instance.')
             self.fail('Error deleting the Queue instance: {0}'.format(str(e)))
@@ -649,6 +610,8 @@ class AzureRMQueues(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMQueues()
 
 
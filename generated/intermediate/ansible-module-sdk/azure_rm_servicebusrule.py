@@ -138,6 +138,12 @@ options:
     description:
       - Resource type
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the Rule.
@@ -355,12 +361,24 @@ properties:
           type: boolean
           sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -372,112 +390,29 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resource_group_name", "required": true},
+    "namespace_name": {"type": "str", "updatable": false, "required": true},
+    "topic_name": {"type": "str", "updatable": false, "required": true},
+    "subscription_name": {"type": "str", "updatable": false, "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "rule_name", "required": true},
+    "action": {"type": "dict", "disposition": "/", "options": {"sql_expression": {"type": "str"}, "compatibility_level": {"type": "number"}, "requires_preprocessing": {"type": "boolean"}}},
+    "filter_type": {"type": "str", "disposition": "/", "choices": ["SqlFilter", "CorrelationFilter"]},
+    "sql_filter": {"type": "dict", "disposition": "/", "options": {"sql_expression": {"type": "str"}, "requires_preprocessing": {"type": "boolean"}}},
+    "correlation_filter": {"type": "dict", "disposition": "/", "options": {"correlation_id": {"type": "str"}, "message_id": {"type": "str"}, "to": {"type": "str"}, "reply_to": {"type": "str"}, "label": {"type": "str"}, "session_id": {"type": "str"}, "reply_to_session_id": {"type": "str"}, "content_type": {"type": "str"}, "requires_preprocessing": {"type": "boolean"}}},
+    "wait": {"type": "bool", "default": true},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMRules(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resource_group_name',
-                required=true
-            ),
-            namespace_name=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            topic_name=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            subscription_name=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='rule_name',
-                required=true
-            ),
-            action=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    sql_expression=dict(
-                        type='str'
-                    ),
-                    compatibility_level=dict(
-                        type='number'
-                    ),
-                    requires_preprocessing=dict(
-                        type='boolean'
-                    )
-                )
-            ),
-            filter_type=dict(
-                type='str',
-                disposition='/',
-                choices=['SqlFilter',
-                         'CorrelationFilter']
-            ),
-            sql_filter=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    sql_expression=dict(
-                        type='str'
-                    ),
-                    requires_preprocessing=dict(
-                        type='boolean'
-                    )
-                )
-            ),
-            correlation_filter=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    correlation_id=dict(
-                        type='str'
-                    ),
-                    message_id=dict(
-                        type='str'
-                    ),
-                    to=dict(
-                        type='str'
-                    ),
-                    reply_to=dict(
-                        type='str'
-                    ),
-                    label=dict(
-                        type='str'
-                    ),
-                    session_id=dict(
-                        type='str'
-                    ),
-                    reply_to_session_id=dict(
-                        type='str'
-                    ),
-                    content_type=dict(
-                        type='str'
-                    ),
-                    requires_preprocessing=dict(
-                        type='boolean'
-                    )
-                )
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.namespace_name = None
@@ -492,6 +427,7 @@ class AzureRMRules(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMRules, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -505,7 +441,7 @@ class AzureRMRules(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
@@ -527,9 +463,9 @@ class AzureRMRules(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -563,6 +499,10 @@ class AzureRMRules(AzureRMModuleBaseExt):
                                                                rule_name=self.name,
                                                                parameters=self.body)
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the Rule instance.')
@@ -577,6 +517,11 @@ class AzureRMRules(AzureRMModuleBaseExt):
                                                      topic_name=self.topic_name,
                                                      subscription_name=self.subscription_name,
                                                      rule_name=self.name)
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the Rule instance.')
             self.fail('Error deleting the Rule instance: {0}'.format(str(e)))
@@ -598,6 +543,8 @@ class AzureRMRules(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMRules()
 
 
@@ -320,6 +320,12 @@ options:
     description:
       - Resource type
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the SoftwareUpdateConfiguration.
@@ -826,12 +832,24 @@ properties:
               type: str
               sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -843,262 +861,28 @@ except ImportError:
     pass
 
 
+ARG_SPEC = r'''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resource_group_name", "required": true},
+    "automation_account_name": {"type": "str", "updatable": false, "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "software_update_configuration_name", "required": true},
+    "client_request_id": {"type": "str", "updatable": false},
+    "update_configuration": {"type": "dict", "disposition": "/", "required": true, "options": {"operating_system": {"type": "str", "choices": ["Windows", "Linux"], "required": true}, "windows": {"type": "dict", "options": {"included_update_classifications": {"type": "str", "choices": ["Unclassified", "Critical", "Security", "UpdateRollup", "FeaturePack", "ServicePack", "Definition", "Tools", "Updates"]}, "excluded_kb_numbers": {"type": "list"}, "included_kb_numbers": {"type": "list"}, "reboot_setting": {"type": "str"}}}, "linux": {"type": "dict", "options": {"included_package_classifications": {"type": "str", "choices": ["Unclassified", "Critical", "Security", "Other"]}, "excluded_package_name_masks": {"type": "list"}, "included_package_name_masks": {"type": "list"}, "reboot_setting": {"type": "str"}}}, "duration": {"type": "unknown-primary[timeSpan]"}, "azure_virtual_machines": {"type": "raw", "pattern": "//subscriptions/5ae68d89-69a4-454f-b5ce-e443cc4e0067/resourceGroups/myresources/providers/Microsoft.Compute/virtualMachines/vm-03"}, "non_azure_computer_names": {"type": "list"}, "targets": {"type": "dict", "options": {"azure_queries": {"type": "list", "options": {"scope": {"type": "raw", "pattern": "//subscriptions/5ae68d89-69a4-454f-b5ce-e443cc4e0067"}, "locations": {"type": "list"}, "tag_settings": {"type": "dict"}}}, "non_azure_queries": {"type": "list", "options": {"function_alias": {"type": "str"}, "workspace_id": {"type": "str"}}}}}}},
+    "schedule_info": {"type": "dict", "disposition": "/", "required": true, "options": {"start_time": {"type": "datetime"}, "expiry_time": {"type": "datetime"}, "expiry_time_offset_minutes": {"type": "number"}, "is_enabled": {"type": "boolean"}, "next_run": {"type": "datetime"}, "next_run_offset_minutes": {"type": "number"}, "interval": {"type": "number"}, "frequency": {"type": "str", "choices": ["OneTime", "Day", "Hour", "Week", "Month", "Minute"]}, "time_zone": {"type": "str"}, "advanced_schedule": {"type": "dict", "options": {"week_days": {"type": "list"}, "month_days": {"type": "list"}, "monthly_occurrences": {"type": "list", "options": {"occurrence": {"type": "number"}, "day": {"type": "str", "choices": ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]}}}}}, "creation_time": {"type": "datetime"}, "last_modified_time": {"type": "datetime"}, "description": {"type": "str"}}},
+    "error": {"type": "dict", "disposition": "/", "options": {"code": {"type": "str"}, "message": {"type": "str"}}},
+    "tasks": {"type": "dict", "disposition": "/", "options": {"pre_task": {"type": "dict", "options": {"parameters": {"type": "unknown[DictionaryType {\"$id\":\"355\",\"$type\":\"DictionaryType\",\"valueType\":{\"$id\":\"356\",\"$type\":\"PrimaryType\",\"knownPrimaryType\":\"string\",\"name\":{\"$id\":\"357\",\"fixed\":false,\"raw\":\"String\"},\"deprecated\":false},\"supportsAdditionalProperties\":false,\"name\":{\"$id\":\"358\",\"fixed\":false},\"deprecated\":false}]"}, "source": {"type": "str"}}}, "post_task": {"type": "dict", "options": {"parameters": {"type": "unknown[DictionaryType {\"$id\":\"355\",\"$type\":\"DictionaryType\",\"valueType\":{\"$id\":\"356\",\"$type\":\"PrimaryType\",\"knownPrimaryType\":\"string\",\"name\":{\"$id\":\"357\",\"fixed\":false,\"raw\":\"String\"},\"deprecated\":false},\"supportsAdditionalProperties\":false,\"name\":{\"$id\":\"358\",\"fixed\":false},\"deprecated\":false}]"}, "source": {"type": "str"}}}}},
+    "wait": {"type": "bool", "default": true},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMSoftwareUpdateConfigurations(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resource_group_name',
-                required=true
-            ),
-            automation_account_name=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='software_update_configuration_name',
-                required=true
-            ),
-            client_request_id=dict(
-                type='str',
-                updatable=False
-            ),
-            update_configuration=dict(
-                type='dict',
-                disposition='/',
-                required=true,
-                options=dict(
-                    operating_system=dict(
-                        type='str',
-                        choices=['Windows',
-                                 'Linux'],
-                        required=true
-                    ),
-                    windows=dict(
-                        type='dict',
-                        options=dict(
-                            included_update_classifications=dict(
-                                type='str',
-                                choices=['Unclassified',
-                                         'Critical',
-                                         'Security',
-                                         'UpdateRollup',
-                                         'FeaturePack',
-                                         'ServicePack',
-                                         'Definition',
-                                         'Tools',
-                                         'Updates']
-                            ),
-                            excluded_kb_numbers=dict(
-                                type='list'
-                            ),
-                            included_kb_numbers=dict(
-                                type='list'
-                            ),
-                            reboot_setting=dict(
-                                type='str'
-                            )
-                        )
-                    ),
-                    linux=dict(
-                        type='dict',
-                        options=dict(
-                            included_package_classifications=dict(
-                                type='str',
-                                choices=['Unclassified',
-                                         'Critical',
-                                         'Security',
-                                         'Other']
-                            ),
-                            excluded_package_name_masks=dict(
-                                type='list'
-                            ),
-                            included_package_name_masks=dict(
-                                type='list'
-                            ),
-                            reboot_setting=dict(
-                                type='str'
-                            )
-                        )
-                    ),
-                    duration=dict(
-                        type='unknown-primary[timeSpan]'
-                    ),
-                    azure_virtual_machines=dict(
-                        type='raw',
-                        pattern=('//subscriptions/5ae68d89-69a4-454f-b5ce-e443cc4e0067'
-                                 '/resourceGroups/myresources/providers/Microsoft.Compute'
-                                 '/virtualMachines/vm-03')
-                    ),
-                    non_azure_computer_names=dict(
-                        type='list'
-                    ),
-                    targets=dict(
-                        type='dict',
-                        options=dict(
-                            azure_queries=dict(
-                                type='list',
-                                options=dict(
-                                    scope=dict(
-                                        type='raw',
-                                        pattern=('//subscriptions'
-                                                 '/5ae68d89-69a4-454f-b5ce-e443cc4e0067')
-                                    ),
-                                    locations=dict(
-                                        type='list'
-                                    ),
-                                    tag_settings=dict(
-                                        type='dict'
-                                    )
-                                )
-                            ),
-                            non_azure_queries=dict(
-                                type='list',
-                                options=dict(
-                                    function_alias=dict(
-                                        type='str'
-                                    ),
-                                    workspace_id=dict(
-                                        type='str'
-                                    )
-                                )
-                            )
-                        )
-                    )
-                )
-            ),
-            schedule_info=dict(
-                type='dict',
-                disposition='/',
-                required=true,
-                options=dict(
-                    start_time=dict(
-                        type='datetime'
-                    ),
-                    expiry_time=dict(
-                        type='datetime'
-                    ),
-                    expiry_time_offset_minutes=dict(
-                        type='number'
-                    ),
-                    is_enabled=dict(
-                        type='boolean'
-                    ),
-                    next_run=dict(
-                        type='datetime'
-                    ),
-                    next_run_offset_minutes=dict(
-                        type='number'
-                    ),
-                    interval=dict(
-                        type='number'
-                    ),
-                    frequency=dict(
-                        type='str',
-                        choices=['OneTime',
-                                 'Day',
-                                 'Hour',
-                                 'Week',
-                                 'Month',
-                                 'Minute']
-                    ),
-                    time_zone=dict(
-                        type='str'
-                    ),
-                    advanced_schedule=dict(
-                        type='dict',
-                        options=dict(
-                            week_days=dict(
-                                type='list'
-                            ),
-                            month_days=dict(
-                                type='list'
-                            ),
-                            monthly_occurrences=dict(
-                                type='list',
-                                options=dict(
-                                    occurrence=dict(
-                                        type='number'
-                                    ),
-                                    day=dict(
-                                        type='str',
-                                        choices=['Monday',
-                                                 'Tuesday',
-                                                 'Wednesday',
-                                                 'Thursday',
-                                                 'Friday',
-                                                 'Saturday',
-                                                 'Sunday']
-                                    )
-                                )
-                            )
-                        )
-                    ),
-                    creation_time=dict(
-                        type='datetime'
-                    ),
-                    last_modified_time=dict(
-                        type='datetime'
-                    ),
-                    description=dict(
-                        type='str'
-                    )
-                )
-            ),
-            error=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    code=dict(
-                        type='str'
-                    ),
-                    message=dict(
-                        type='str'
-                    )
-                )
-            ),
-            tasks=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    pre_task=dict(
-                        type='dict',
-                        options=dict(
-                            parameters=dict(
-                                type='unknown[DictionaryType {"$id":"355","$type":"DictionaryType","valueType":{"$id":"356","$type":"PrimaryType","knownPrimaryType":"string","name":{"$id":"357","fixed":false,"raw":"String"},"deprecated":false},"supportsAdditionalProperties":false,"name":{"$id":"358","fixed":false},"deprecated":false}]'
-                            ),
-                            source=dict(
-                                type='str'
-                            )
-                        )
-                    ),
-                    post_task=dict(
-                        type='dict',
-                        options=dict(
-                            parameters=dict(
-                                type='unknown[DictionaryType {"$id":"355","$type":"DictionaryType","valueType":{"$id":"356","$type":"PrimaryType","knownPrimaryType":"string","name":{"$id":"357","fixed":false,"raw":"String"},"deprecated":false},"supportsAdditionalProperties":false,"name":{"$id":"358","fixed":false},"deprecated":false}]'
-                            ),
-                            source=dict(
-                                type='str'
-                            )
-                        )
-                    )
-                )
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.automation_account_name = None
@@ -1112,6 +896,7 @@ class AzureRMSoftwareUpdateConfigurations(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMSoftwareUpdateConfigurations, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -1125,7 +910,7 @@ class AzureRMSoftwareUpdateConfigurations(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
@@ -1147,9 +932,9 @@ class AzureRMSoftwareUpdateConfigurations(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -1184,6 +969,10 @@ class AzureRMSoftwareUpdateConfigurations(AzureRMModuleBaseExt):
             else:
                 response = self.mgmt_client.software_update_configurations.update()
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the SoftwareUpdateConfiguration instance.')
@@ -1196,6 +985,11 @@ class AzureRMSoftwareUpdateConfigurations(AzureRMModuleBaseExt):
             response = self.mgmt_client.software_update_configurations.delete(resource_group_name=self.resource_group,
                                                                               automation_account_name=self.automation_account_name,
                                                                               software_update_configuration_name=self.name)
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the SoftwareUpdateConfiguration instance.')
             self.fail('Error deleting the SoftwareUpdateConfiguration instance: {0}'.format(str(e)))
@@ -1213,6 +1007,8 @@ class AzureRMSoftwareUpdateConfigurations(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMSoftwareUpdateConfigurations()
 
 
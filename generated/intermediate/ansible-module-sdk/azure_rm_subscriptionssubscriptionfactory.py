@@ -67,6 +67,12 @@ options:
         The link to the new subscription. Use this link to check the status of
         subscription creation operation.
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the SubscriptionFactory.
@@ -111,12 +117,24 @@ subscription_link:
   type: str
   sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -128,51 +146,25 @@ except ImportError:
     pass
 
 
+ARG_SPEC = r'''{
+    "enrollment_account_name": {"type": "str", "updatable": false, "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "/"},
+    "owners": {"type": "list", "disposition": "/", "options": {"object_id": {"type": "str", "required": true}}},
+    "offer_type": {"type": "str", "updatable": false, "disposition": "/", "choices": ["MS-AZR-0017P", "MS-AZR-0148P"]},
+    "additional_parameters": {"type": "unknown[DictionaryType {\"$id\":\"45\",\"$type\":\"DictionaryType\",\"valueType\":{\"$id\":\"46\",\"$type\":\"PrimaryType\",\"knownPrimaryType\":\"object\",\"name\":{\"$id\":\"47\",\"fixed\":false,\"raw\":\"Object\"},\"deprecated\":false},\"supportsAdditionalProperties\":false,\"name\":{\"$id\":\"48\",\"fixed\":false},\"deprecated\":false}]", "updatable": false, "disposition": "/"},
+    "wait": {"type": "bool", "default": true},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMSubscriptionFactory(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            enrollment_account_name=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='/'
-            ),
-            owners=dict(
-                type='list',
-                disposition='/',
-                options=dict(
-                    object_id=dict(
-                        type='str',
-                        required=true
-                    )
-                )
-            ),
-            offer_type=dict(
-                type='str',
-                updatable=False,
-                disposition='/',
-                choices=['MS-AZR-0017P',
-                         'MS-AZR-0148P']
-            ),
-            additional_parameters=dict(
-                type='unknown[DictionaryType {"$id":"45","$type":"DictionaryType","valueType":{"$id":"46","$type":"PrimaryType","knownPrimaryType":"object","name":{"$id":"47","fixed":false,"raw":"Object"},"deprecated":false},"supportsAdditionalProperties":false,"name":{"$id":"48","fixed":false},"deprecated":false}]',
-                updatable=False,
-                disposition='/'
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.enrollment_account_name = None
         self.subscription_link = None
@@ -181,6 +173,7 @@ class AzureRMSubscriptionFactory(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMSubscriptionFactory, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -194,7 +187,7 @@ class AzureRMSubscriptionFactory(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
@@ -214,9 +207,9 @@ class AzureRMSubscriptionFactory(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -245,6 +238,10 @@ class AzureRMSubscriptionFactory(AzureRMModuleBaseExt):
             else:
                 response = self.mgmt_client.subscription_factory.update()
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the SubscriptionFactory instance.')
@@ -255,6 +252,11 @@ class AzureRMSubscriptionFactory(AzureRMModuleBaseExt):
         # self.log('Deleting the SubscriptionFactory instance {0}'.format(self.))
         try:
             response = self.mgmt_client.subscription_factory.delete()
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the SubscriptionFactory instance.')
             self.fail('Error deleting the SubscriptionFactory instance: {0}'.format(str(e)))
@@ -272,6 +274,8 @@ class AzureRMSubscriptionFactory(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMSubscriptionFactory()
 
 
@@ -349,6 +349,12 @@ options:
     description:
       - Is Vrops enabled/disabled
     type: boolean
+  fields:
+    description:
+      - Fields to return for each item, as dot separated paths, for example C(properties.provisioningState).
+      - Entries which are not plain paths are evaluated as JMESPath expressions, which requires C(jmespath).
+      - Fields are selected as the response is decoded, by default all of them are returned.
+    type: list
 extends_documentation_fragment:
   - azure
 author:
@@ -424,6 +430,9 @@ RETURN = '''
 import time
 import json
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
+from ansible.module_utils.azure_rm_common_info_ext import get_projection, project
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -450,6 +459,9 @@ class AzureRMInfo(AzureRMModuleBase):
             ),
             operation_id=dict(
                 type='str'
+            ),
+            fields=dict(
+                type='list'
             )
         )
 
@@ -466,6 +478,8 @@ class AzureRMInfo(AzureRMModuleBase):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.fields = None
+        self.projection = None
         self.url = None
         self.status_code = [200]
 
@@ -484,6 +498,7 @@ class AzureRMInfo(AzureRMModuleBase):
 
         self.mgmt_client = self.get_mgmt_svc_client(VMwareCloudSimpleClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.projection = get_projection(self.fields, self.fail)
 
         if (self.region_id is not None and
             self.referer is not None and
@@ -504,7 +519,7 @@ class AzureRMInfo(AzureRMModuleBase):
         except CloudError as e:
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return project(response.as_dict(), self.projection)
 
     def getprivatecloud(self):
         response = None
@@ -515,13 +530,15 @@ class AzureRMInfo(AzureRMModuleBase):
         except CloudError as e:
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return response.as_dict()
+        return project(response.as_dict(), self.projection)
 
-    def format_item(item):
+    def format_item(self, item):
         return item
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMInfo()
 
 
@@ -131,6 +131,12 @@ options:
     description:
       - '{resourceProviderNamespace}/{resourceType}'
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the DedicatedCloudNode.
@@ -364,12 +370,23 @@ type:
   type: str
   sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -466,6 +483,10 @@ class AzureRMDedicatedCloudNode(AzureRMModuleBaseExt):
                 type='str',
                 disposition='/sku/tier'
             ),
+            wait=dict(
+                type='bool',
+                default=True
+            ),
             state=dict(
                 type='str',
                 default='present',
@@ -484,6 +505,7 @@ class AzureRMDedicatedCloudNode(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMDedicatedCloudNode, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -519,9 +541,9 @@ class AzureRMDedicatedCloudNode(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -556,6 +578,10 @@ class AzureRMDedicatedCloudNode(AzureRMModuleBaseExt):
                                                                               dedicated_cloud_node_name=self.name,
                                                                               dedicated_cloud_node_request=self.dedicatedCloudNodeRequest)
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the DedicatedCloudNode instance.')
@@ -567,6 +593,11 @@ class AzureRMDedicatedCloudNode(AzureRMModuleBaseExt):
         try:
             response = self.mgmt_client.dedicated_cloud_node.delete(resource_group_name=self.resource_group,
                                                                     dedicated_cloud_node_name=self.name)
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the DedicatedCloudNode instance.')
             self.fail('Error deleting the DedicatedCloudNode instance: {0}'.format(str(e)))
@@ -585,6 +616,8 @@ class AzureRMDedicatedCloudNode(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMDedicatedCloudNode()
 
 
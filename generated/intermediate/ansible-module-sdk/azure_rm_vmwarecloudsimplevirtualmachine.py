@@ -263,6 +263,12 @@ options:
     description:
       - '{resourceProviderNamespace}/{resourceType}'
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the VirtualMachine.
@@ -697,12 +703,24 @@ type:
   type: str
   sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -714,170 +732,37 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resource_group_name", "required": true},
+    "referer": {"type": "str", "updatable": false, "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "virtual_machine_name", "required": true},
+    "location": {"type": "str", "updatable": false, "disposition": "/", "required": true},
+    "amount_of_ram": {"type": "number", "disposition": "/", "required": true},
+    "disks": {"type": "list", "disposition": "/", "options": {"controller_id": {"type": "str", "required": true}, "independence_mode": {"type": "str", "choices": ["persistent", "independent_persistent", "independent_nonpersistent"], "required": true}, "total_size": {"type": "number", "required": true}, "virtual_disk_id": {"type": "str"}}},
+    "expose_to_guest_vm": {"type": "boolean", "disposition": "/"},
+    "guest_os": {"type": "str", "disposition": "/", "required": true},
+    "guest_ostype": {"type": "str", "disposition": "/", "choices": ["linux", "windows", "other"], "required": true},
+    "nics": {"type": "list", "disposition": "/", "options": {"ip_addresses": {"type": "list"}, "mac_address": {"type": "str"}, "network": {"type": "dict", "options": {"id": {"type": "str", "required": true}, "location": {"type": "str", "updatable": false}}}, "nic_type": {"type": "str", "choices": ["E1000", "E1000E", "PCNET32", "VMXNET", "VMXNET2", "VMXNET3"], "required": true}, "power_on_boot": {"type": "boolean"}, "virtual_nic_id": {"type": "str"}}},
+    "number_of_cores": {"type": "number", "disposition": "/", "required": true},
+    "password": {"type": "str", "no_log": true, "disposition": "/"},
+    "private_cloud_id": {"type": "str", "disposition": "/", "required": true},
+    "resource_pool": {"type": "dict", "disposition": "/", "options": {"id": {"type": "str", "required": true}, "location": {"type": "str", "updatable": false}}},
+    "template_id": {"type": "str", "disposition": "/"},
+    "username": {"type": "str", "disposition": "/"},
+    "v_sphere_networks": {"type": "list", "disposition": "/"},
+    "wait": {"type": "bool", "default": true},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMVirtualMachine(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resource_group_name',
-                required=true
-            ),
-            referer=dict(
-                type='str',
-                updatable=False,
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='virtual_machine_name',
-                required=true
-            ),
-            location=dict(
-                type='str',
-                updatable=False,
-                disposition='/',
-                required=true
-            ),
-            amount_of_ram=dict(
-                type='number',
-                disposition='/',
-                required=true
-            ),
-            disks=dict(
-                type='list',
-                disposition='/',
-                options=dict(
-                    controller_id=dict(
-                        type='str',
-                        required=true
-                    ),
-                    independence_mode=dict(
-                        type='str',
-                        choices=['persistent',
-                                 'independent_persistent',
-                                 'independent_nonpersistent'],
-                        required=true
-                    ),
-                    total_size=dict(
-                        type='number',
-                        required=true
-                    ),
-                    virtual_disk_id=dict(
-                        type='str'
-                    )
-                )
-            ),
-            expose_to_guest_vm=dict(
-                type='boolean',
-                disposition='/'
-            ),
-            guest_os=dict(
-                type='str',
-                disposition='/',
-                required=true
-            ),
-            guest_ostype=dict(
-                type='str',
-                disposition='/',
-                choices=['linux',
-                         'windows',
-                         'other'],
-                required=true
-            ),
-            nics=dict(
-                type='list',
-                disposition='/',
-                options=dict(
-                    ip_addresses=dict(
-                        type='list'
-                    ),
-                    mac_address=dict(
-                        type='str'
-                    ),
-                    network=dict(
-                        type='dict',
-                        options=dict(
-                            id=dict(
-                                type='str',
-                                required=true
-                            ),
-                            location=dict(
-                                type='str',
-                                updatable=False
-                            )
-                        )
-                    ),
-                    nic_type=dict(
-                        type='str',
-                        choices=['E1000',
-                                 'E1000E',
-                                 'PCNET32',
-                                 'VMXNET',
-                                 'VMXNET2',
-                                 'VMXNET3'],
-                        required=true
-                    ),
-                    power_on_boot=dict(
-                        type='boolean'
-                    ),
-                    virtual_nic_id=dict(
-                        type='str'
-                    )
-                )
-            ),
-            number_of_cores=dict(
-                type='number',
-                disposition='/',
-                required=true
-            ),
-            password=dict(
-                type='str',
-                no_log=True,
-                disposition='/'
-            ),
-            private_cloud_id=dict(
-                type='str',
-                disposition='/',
-                required=true
-            ),
-            resource_pool=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    id=dict(
-                        type='str',
-                        required=true
-                    ),
-                    location=dict(
-                        type='str',
-                        updatable=False
-                    )
-                )
-            ),
-            template_id=dict(
-                type='str',
-                disposition='/'
-            ),
-            username=dict(
-                type='str',
-                disposition='/'
-            ),
-            v_sphere_networks=dict(
-                type='list',
-                disposition='/'
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.referer = None
@@ -890,6 +775,7 @@ class AzureRMVirtualMachine(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMVirtualMachine, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -903,7 +789,7 @@ class AzureRMVirtualMachine(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
@@ -925,9 +811,9 @@ class AzureRMVirtualMachine(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -961,6 +847,10 @@ class AzureRMVirtualMachine(AzureRMModuleBaseExt):
                                                                          virtual_machine_name=self.name,
                                                                          virtual_machine_request=self.virtualMachineRequest)
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the VirtualMachine instance.')
@@ -973,6 +863,11 @@ class AzureRMVirtualMachine(AzureRMModuleBaseExt):
             response = self.mgmt_client.virtual_machine.delete(resource_group_name=self.resource_group,
                                                                referer=self.referer,
                                                                virtual_machine_name=self.name)
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the VirtualMachine instance.')
             self.fail('Error deleting the VirtualMachine instance: {0}'.format(str(e)))
@@ -991,6 +886,8 @@ class AzureRMVirtualMachine(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMVirtualMachine()
 
 
@@ -744,6 +744,12 @@ options:
     description:
       - Resource type.
     type: str
+  wait:
+    description:
+      - Whether to wait for creation, update or deletion of the instance to complete.
+      - When C(false) module returns right away, use I(operation) with M(azure_rm_operation_info) to track progress.
+    type: bool
+    default: true
   state:
     description:
       - Assert the state of the WebApplicationFirewallPolicy.
@@ -1911,12 +1917,24 @@ etag:
   type: str
   sample: null
 
+operation:
+  description:
+    - Handle of the asynchronous operation started by the module.
+  returned: when I(wait=false)
+  type: dict
+  sample: null
+
 '''
 
 import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_compare import get_comparator
+from ansible.module_utils.azure_rm_common_spec import get_arg_spec
+from ansible.module_utils.azure_rm_common_sdk_ext import get_poller_operation
+from ansible.module_utils.azure_rm_common_auth_ext import enable_token_cache
+from ansible.module_utils.azure_rm_common_perf import enable_perf
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -1928,145 +1946,27 @@ except ImportError:
     pass
 
 
+ARG_SPEC = '''{
+    "resource_group": {"type": "str", "updatable": false, "disposition": "resource_group_name", "required": true},
+    "name": {"type": "str", "updatable": false, "disposition": "policy_name", "required": true},
+    "id": {"type": "str", "updatable": false, "disposition": "/"},
+    "location": {"type": "str", "updatable": false, "disposition": "/"},
+    "policy_settings": {"type": "dict", "disposition": "/", "options": {"enabled_state": {"type": "str", "choices": ["Disabled", "Enabled"]}, "mode": {"type": "str", "choices": ["Prevention", "Detection"]}}},
+    "custom_rules": {"type": "list", "disposition": "/", "options": {"name": {"type": "str"}, "priority": {"type": "number", "required": true}, "rule_type": {"type": "str", "choices": ["MatchRule", "Invalid"], "required": true}, "match_conditions": {"type": "list", "required": true, "options": {"match_variables": {"type": "list", "required": true, "options": {"variable_name": {"type": "str", "choices": ["RemoteAddr", "RequestMethod", "QueryString", "PostArgs", "RequestUri", "RequestHeaders", "RequestBody", "RequestCookies"], "required": true}, "selector": {"type": "str"}}}, "operator": {"type": "str", "choices": ["IPMatch", "Equal", "Contains", "LessThan", "GreaterThan", "LessThanOrEqual", "GreaterThanOrEqual", "BeginsWith", "EndsWith", "Regex"], "required": true}, "negation_conditon": {"type": "boolean"}, "match_values": {"type": "list", "required": true}, "transforms": {"type": "list", "choices": ["Lowercase", "Trim", "UrlDecode", "UrlEncode", "RemoveNulls", "HtmlEntityDecode"]}}}, "action": {"type": "str", "choices": ["Allow", "Block", "Log"], "required": true}}},
+    "etag": {"type": "str", "updatable": false, "disposition": "/"},
+    "wait": {"type": "bool", "default": true},
+    "state": {"type": "str", "default": "present", "choices": ["present", "absent"]}
+}'''
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
 class AzureRMWebApplicationFirewallPolicies(AzureRMModuleBaseExt):
     def __init__(self):
-        self.module_arg_spec = dict(
-            resource_group=dict(
-                type='str',
-                updatable=False,
-                disposition='resource_group_name',
-                required=true
-            ),
-            name=dict(
-                type='str',
-                updatable=False,
-                disposition='policy_name',
-                required=true
-            ),
-            id=dict(
-                type='str',
-                updatable=False,
-                disposition='/'
-            ),
-            location=dict(
-                type='str',
-                updatable=False,
-                disposition='/'
-            ),
-            policy_settings=dict(
-                type='dict',
-                disposition='/',
-                options=dict(
-                    enabled_state=dict(
-                        type='str',
-                        choices=['Disabled',
-                                 'Enabled']
-                    ),
-                    mode=dict(
-                        type='str',
-                        choices=['Prevention',
-                                 'Detection']
-                    )
-                )
-            ),
-            custom_rules=dict(
-                type='list',
-                disposition='/',
-                options=dict(
-                    name=dict(
-                        type='str'
-                    ),
-                    priority=dict(
-                        type='number',
-                        required=true
-                    ),
-                    rule_type=dict(
-                        type='str',
-                        choices=['MatchRule',
-                                 'Invalid'],
-                        required=true
-                    ),
-                    match_conditions=dict(
-                        type='list',
-                        required=true,
-                        options=dict(
-                            match_variables=dict(
-                                type='list',
-                                required=true,
-                                options=dict(
-                                    variable_name=dict(
-                                        type='str',
-                                        choices=['RemoteAddr',
-                                                 'RequestMethod',
-                                                 'QueryString',
-                                                 'PostArgs',
-                                                 'RequestUri',
-                                                 'RequestHeaders',
-                                                 'RequestBody',
-                                                 'RequestCookies'],
-                                        required=true
-                                    ),
-                                    selector=dict(
-                                        type='str'
-                                    )
-                                )
-                            ),
-                            operator=dict(
-                                type='str',
-                                choices=['IPMatch',
-                                         'Equal',
-                                         'Contains',
-                                         'LessThan',
-                                         'GreaterThan',
-                                         'LessThanOrEqual',
-                                         'GreaterThanOrEqual',
-                                         'BeginsWith',
-                                         'EndsWith',
-                                         'Regex'],
-                                required=true
-                            ),
-                            negation_conditon=dict(
-                                type='boolean'
-                            ),
-                            match_values=dict(
-                                type='list',
-                                required=true
-                            ),
-                            transforms=dict(
-                                type='list',
-                                choices=['Lowercase',
-                                         'Trim',
-                                         'UrlDecode',
-                                         'UrlEncode',
-                                         'RemoveNulls',
-                                         'HtmlEntityDecode']
-                            )
-                        )
-                    ),
-                    action=dict(
-                        type='str',
-                        choices=['Allow',
-                                 'Block',
-                                 'Log'],
-                        required=true
-                    )
-                )
-            ),
-            etag=dict(
-                type='str',
-                updatable=False,
-                disposition='/'
-            ),
-            state=dict(
-                type='str',
-                default='present',
-                choices=['present', 'absent']
-            )
-        )
+        self.arg_spec = get_arg_spec(type(self), ARG_SPEC)
+        self.module_arg_spec = self.arg_spec.options
 
         self.resource_group = None
         self.name = None
@@ -2077,6 +1977,7 @@ class AzureRMWebApplicationFirewallPolicies(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
         self.to_do = Actions.NoAction
 
         super(AzureRMWebApplicationFirewallPolicies, self).__init__(derived_arg_spec=self.module_arg_spec,
@@ -2090,7 +1991,7 @@ class AzureRMWebApplicationFirewallPolicies(AzureRMModuleBaseExt):
             elif kwargs[key] is not None:
                 self.body[key] = kwargs[key]
 
-        self.inflate_parameters(self.module_arg_spec, self.body, 0)
+        self.arg_spec.inflate(self.body, self.normalize_resource_id)
 
         old_response = None
         response = None
@@ -2112,9 +2013,9 @@ class AzureRMWebApplicationFirewallPolicies(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
-                modifiers = {}
-                self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                comparator = get_comparator(type(self), self.module_arg_spec)
+                self.results['compare'] = comparator.compare(self.body, old_response, self.module.warn)
+                if any(change['updatable'] for change in self.results['compare']):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -2148,6 +2049,10 @@ class AzureRMWebApplicationFirewallPolicies(AzureRMModuleBaseExt):
                                                                                            policy_name=self.name,
                                                                                            parameters=self.body)
             if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if not self.wait:
+                    self.results['operation'] = get_poller_operation(response)
+                    self.results['id'] = self.results['operation']['url']
+                    return {}
                 response = self.get_poller_result(response)
         except CloudError as exc:
             self.log('Error attempting to create the WebApplicationFirewallPolicy instance.')
@@ -2159,6 +2064,11 @@ class AzureRMWebApplicationFirewallPolicies(AzureRMModuleBaseExt):
         try:
             response = self.mgmt_client.web_application_firewall_policies.delete(resource_group_name=self.resource_group,
                                                                                  policy_name=self.name)
+            if isinstance(response, AzureOperationPoller) or isinstance(response, LROPoller):
+                if self.wait:
+                    self.get_poller_result(response)
+                else:
+                    self.results['operation'] = get_poller_operation(response)
         except CloudError as e:
             self.log('Error attempting to delete the WebApplicationFirewallPolicy instance.')
             self.fail('Error deleting the WebApplicationFirewallPolicy instance: {0}'.format(str(e)))
@@ -2177,6 +2087,8 @@ class AzureRMWebApplicationFirewallPolicies(AzureRMModuleBaseExt):
 
 
 def main():
+    enable_token_cache()
+    enable_perf()
     AzureRMWebApplicationFirewallPolicies()
 
 
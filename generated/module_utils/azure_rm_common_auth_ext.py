@@ -0,0 +1,131 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import os
+import json
+import time
+import fcntl
+import hashlib
+import tempfile
+try:
+    from msrestazure.azure_active_directory import ServicePrincipalCredentials, UserPassCredentials
+except ImportError:
+    # This is handled in azure_rm_common
+    ServicePrincipalCredentials = None
+    UserPassCredentials = None
+
+
+# path of the token cache file, caching is enabled only when set
+TOKEN_CACHE_ENV = 'AZURE_TOKEN_CACHE'
+# cached token is not used if it expires sooner than this number of seconds
+TOKEN_EXPIRY_MARGIN = 300
+
+
+class TokenCache(object):
+    '''
+    On-disk cache of AAD tokens shared by module processes on the controller.
+
+    Access is serialized with an exclusive lock on a sidecar lock file, the cache is
+    replaced atomically and readable only by its owner.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+
+    def get(self, key):
+        with self._lock():
+            token = self._read().get(key)
+        if token and float(token.get('expires_on', 0)) > time.time() + TOKEN_EXPIRY_MARGIN:
+            return token
+        return None
+
+    def set(self, key, token):
+        with self._lock():
+            entries = self._read()
+            now = time.time()
+            entries = dict((k, v) for k, v in entries.items() if float(v.get('expires_on', 0)) > now)
+            entries[key] = token
+            self._write(entries)
+
+    def _lock(self):
+        return FileLock(self.path + '.lock')
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def _write(self, entries):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entries, f, default=str)
+            os.chmod(tmp, 0o600)
+            os.rename(tmp, self.path)
+        except Exception:
+            os.remove(tmp)
+            raise
+
+
+class FileLock(object):
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+
+    def __enter__(self):
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *args):
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+        os.close(self.fd)
+
+
+def get_token_key(credentials):
+    # secret is part of the key, so token is never shared between different credentials
+    parts = [getattr(credentials, 'store_key', None),
+             getattr(credentials, '_tenant', None),
+             getattr(credentials, 'resource', None),
+             getattr(credentials, 'secret', None),
+             getattr(credentials, 'password', None)]
+    return hashlib.sha256(json.dumps(parts, default=str).encode('utf-8')).hexdigest()
+
+
+def enable_token_cache(path=None):
+    '''
+    Makes service principal and user credentials reuse tokens cached on disk by
+    previous module invocations, instead of acquiring new token from AAD.
+
+    Cache is opt-in, it's used only if path is specified or AZURE_TOKEN_CACHE
+    environment variable is set. Must be called before credentials are created.
+    '''
+    path = path or os.environ.get(TOKEN_CACHE_ENV)
+    if not path or ServicePrincipalCredentials is None:
+        return
+    cache = TokenCache(os.path.expanduser(path))
+    for credentials_type in [ServicePrincipalCredentials, UserPassCredentials]:
+        if getattr(credentials_type, '_token_cache', None) is not None:
+            credentials_type._token_cache = cache
+            continue
+        credentials_type._token_cache = cache
+        credentials_type.set_token = _cached_set_token(credentials_type.set_token)
+
+
+def _cached_set_token(set_token):
+    def cached_set_token(self):
+        key = get_token_key(self)
+        token = self._token_cache.get(key)
+        if token is not None:
+            self.token = token
+            return
+        set_token(self)
+        self._token_cache.set(key, self.token)
+    return cached_set_token
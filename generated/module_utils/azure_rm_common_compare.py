@@ -0,0 +1,150 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from ansible.module_utils.six import string_types
+from ansible.module_utils.azure_rm_common_perf import timer
+
+
+# compiled comparators, keyed by module type
+_comparators = {}
+
+
+def get_comparator(module_type, arg_spec):
+    '''
+    Returns comparator compiled from arg_spec, compiling it only once per module type.
+    '''
+    comparator = _comparators.get(module_type)
+    if comparator is None:
+        comparator = _comparators[module_type] = Comparator(arg_spec)
+    return comparator
+
+
+class Comparator(object):
+    '''
+    Idempotency comparator compiled from module arg spec.
+
+    Spec is flattened once into rules, a dict mapping body path (as created by
+    inflate_parameters) to tuple of updatable and comparison, containing only
+    paths which don't use default rule. Comparison then walks only values which
+    were set in module body, looking rules up by path.
+    '''
+
+    def __init__(self, arg_spec):
+        self.rules = {}
+        self._compile(arg_spec, '')
+
+    def _compile(self, arg_spec, path):
+        for name, option in arg_spec.items():
+            disposition = option.get('disposition', '*')
+            if disposition == '/':
+                disposition = '/*'
+            option_path = '/'.join(p for p in (path + '/' + disposition.replace('*', name)).split('/') if p)
+            option_path = '/' + option_path + ('/*' if option.get('type') == 'list' else '')
+            updatable = option.get('updatable', True)
+            comparison = option.get('comparison', 'default')
+            if not updatable or comparison != 'default':
+                self.rules[option_path] = (updatable, comparison)
+            if option.get('options'):
+                self._compile(option['options'], option_path)
+
+    def compare(self, new, old, warn=None):
+        '''
+        Returns list of differences between new and old, each a dict with path, new
+        and old values and updatable flag. Values not set in new are not compared.
+        Differences of values which can't be updated are reported through warn.
+        '''
+        changes = []
+        with timer('compare'):
+            self._compare(new, old, '', changes)
+        for change in changes:
+            if not change['updatable'] and warn is not None:
+                warn("property '{0}' cannot be updated ({1}->{2})".format(change['path'], change['old'], change['new']))
+        return changes
+
+    def _compare(self, new, old, path, changes):
+        if new is None:
+            # suboption which wasn't set, current value is kept
+            return
+        if isinstance(new, dict):
+            if not isinstance(old, dict):
+                self._change(path, new, old, changes)
+                return
+            for key, value in new.items():
+                self._compare(value, old.get(key), path + '/' + key, changes)
+        elif isinstance(new, list):
+            if not isinstance(old, list) or len(new) != len(old):
+                self._change(path, new, old, changes)
+                return
+            new, old = self._sorted(new), self._sorted(old)
+            for new_item, old_item in zip(new, old):
+                self._compare(new_item, old_item, path + '/*', changes)
+        else:
+            comparison = self.rules.get(path, (True, 'default'))[1]
+            if comparison == 'ignore':
+                return
+            new_value, old_value = new, old
+            if isinstance(new, string_types) and isinstance(old, string_types):
+                new_value, old_value = new.lower(), old.lower()
+                if comparison == 'location':
+                    new_value, old_value = new_value.replace(' ', ''), old_value.replace(' ', '')
+            if str(new_value) != str(old_value):
+                self._change(path, new, old, changes)
+
+    def _change(self, path, new, old, changes):
+        changes.append(dict(path=path,
+                            new=new,
+                            old=old,
+                            updatable=self.rules.get(path, (True, 'default'))[0]))
+
+    def _sorted(self, items):
+        # items of lists of dicts are matched by id or name, other lists are compared as sets
+        if items and isinstance(items[0], dict):
+            key = 'id' if 'id' in items[0] else 'name' if 'name' in items[0] else None
+            if key is None:
+                return items
+            return sorted(items, key=lambda item: str(item.get(key)))
+        return sorted(items, key=str)
+
+
+def create_merge_patch(body, changes):
+    '''
+    Returns JSON merge patch (RFC 7396) containing only values of body which differ
+    from the current resource, as reported by Comparator.compare().
+
+    Lists can't be patched partially, so a changed list is included as a whole.
+    Values which are None weren't set in the module, they are left out, as null
+    would remove them from the resource. Change of the whole body, reported when the
+    current resource isn't an object, can't be patched and is left out too.
+    '''
+    patch = {}
+    for change in changes:
+        if not change['updatable']:
+            continue
+        keys = change['path'].split('/')[1:]
+        if '*' in keys:
+            keys = keys[:keys.index('*')]
+        if not keys:
+            continue
+        value = body
+        for key in keys:
+            value = value[key]
+        value = _without_none(value)
+        if value is None:
+            continue
+        target = patch
+        for key in keys[:-1]:
+            target = target.setdefault(key, {})
+        target[keys[-1]] = value
+    return patch
+
+
+def _without_none(value):
+    if isinstance(value, dict):
+        return dict((key, _without_none(item)) for key, item in value.items() if item is not None)
+    if isinstance(value, list):
+        return [_without_none(item) for item in value]
+    return value
@@ -0,0 +1,235 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import copy
+import re
+from multiprocessing.pool import ThreadPool
+
+try:
+    import jmespath
+    HAS_JMESPATH = True
+except ImportError:
+    HAS_JMESPATH = False
+
+
+DEFAULT_MAX_WORKERS = 8
+
+# fields matching this are plain dot separated paths, anything else is JMESPath expression
+FIELD_PATH_RE = re.compile(r'^[A-Za-z0-9_$@-]+(\.[A-Za-z0-9_$@-]+)*$')
+
+# options expanded by get_scope_plan(), they can't be set per scope
+FAN_OUT_OPTIONS = ['subscriptions', 'resource_groups', 'scopes']
+
+
+def run_parallel(jobs, max_workers=DEFAULT_MAX_WORKERS):
+    '''
+    Runs jobs on a bounded thread pool within current module invocation.
+
+    jobs is a list of (key, function, args) tuples. Returns tuple of results and errors,
+    both dicts keyed by job key, errors are messages of exceptions raised by jobs.
+    Failure of a single job doesn't affect the others.
+    '''
+    results = {}
+    errors = {}
+    if not jobs:
+        return results, errors
+
+    def run(job):
+        key, func, args = job
+        try:
+            return key, func(*args), None
+        except Exception as exc:
+            return key, None, str(exc) or type(exc).__name__
+
+    pool = ThreadPool(min(max_workers, len(jobs)))
+    try:
+        for key, result, error in pool.map(run, jobs):
+            if error is None:
+                results[key] = result
+            else:
+                errors[key] = error
+    finally:
+        pool.close()
+        pool.join()
+    return results, errors
+
+
+class ScopeError(Exception):
+    pass
+
+
+def get_scope_plan(subscriptions, resource_groups, scopes, arg_spec, fail):
+    '''
+    Expands list valued scope options into a plan, list of dicts of options to set for
+    each scope, one for every combination of subscription, resource group and scope.
+    '''
+    for scope in scopes or []:
+        unknown = [key for key in scope if key not in arg_spec or key in FAN_OUT_OPTIONS]
+        if unknown:
+            fail('Unsupported scope options: {0}'.format(', '.join(unknown)))
+    plan = []
+    for subscription_id in subscriptions or [None]:
+        for resource_group in resource_groups or [None]:
+            for scope in scopes or [{}]:
+                options = dict(scope)
+                if subscription_id is not None:
+                    options['subscription_id'] = subscription_id
+                if resource_group is not None:
+                    options['resource_group'] = resource_group
+                plan.append(options)
+    return plan
+
+
+def query_scopes(module, plan, query, max_workers=DEFAULT_MAX_WORKERS):
+    '''
+    Runs query on a copy of module for every scope of plan on a bounded thread pool.
+
+    Each copy gets its own results and has in_scope set, so its getters raise CloudError
+    instead of logging it, and module.fail() of the copy raises ScopeError. Failure in
+    one scope is reported in its error and doesn't affect the others. Items returned
+    for all scopes are merged into lists in module.results, in order of the plan.
+    Returns list of dicts with scope and error, None if the scope succeeded.
+    '''
+    def fail(msg, **kwargs):
+        raise ScopeError(msg)
+
+    def run(options):
+        scoped = copy.copy(module)
+        scoped.results = dict()
+        scoped.fail = fail
+        scoped.in_scope = True
+        # the copy queries its own scope only
+        scoped.subscriptions = scoped.resource_groups = scoped.scopes = None
+        for key, value in options.items():
+            if key == 'subscription_id':
+                # subscription_id of AzureRMModuleBase is a read only property of azure_auth
+                scoped.azure_auth = copy.copy(module.azure_auth)
+                scoped.azure_auth.subscription_id = value
+            else:
+                setattr(scoped, key, value)
+        query(scoped)
+        scoped.results.pop('changed', None)
+        return scoped.results
+
+    results, errors = run_parallel([(i, run, (options,)) for i, options in enumerate(plan)], max_workers)
+    for i in range(len(plan)):
+        for key, value in (results.get(i) or {}).items():
+            module.results.setdefault(key, []).extend(get_items(value))
+    return [dict(scope=options, error=errors.get(i)) for i, options in enumerate(plan)]
+
+
+def check_required_options(module, plan, required):
+    '''
+    Fails module if it misses any of required options, or if any scope of plan misses
+    them when plan is not None. Options which scopes may set are not required by the
+    argument spec, so they are checked here once scopes are known.
+    '''
+    for options in plan if plan is not None else [{}]:
+        missing = [option for option in required if options.get(option, getattr(module, option)) is None]
+        if missing:
+            module.fail('missing required arguments: {0}'.format(', '.join(missing)))
+
+
+def lists_with_resource_graph(module, options):
+    '''
+    Returns True if module lists resources with Resource Graph and none of options,
+    which select other operations than listing, is set. A single query then lists
+    resources of all subscriptions and resource groups instead of one per scope.
+    '''
+    return (module.backend == 'resource_graph' and not module.scopes and
+            all(getattr(module, option) is None for option in options))
+
+
+def get_items(result):
+    '''
+    Returns list of items of result of info module, as set by its query: single item
+    or a list result of list operation, either may be wrapped in a list or in temp_item.
+    '''
+    if isinstance(result, list):
+        return [item for element in result for item in get_items(element)]
+    if isinstance(result, dict) and list(result) == ['temp_item']:
+        return get_items(result['temp_item'])
+    if isinstance(result, dict) and isinstance(result.get('value'), list):
+        return list(result['value'])
+    return [result] if result else []
+
+
+def get_projection(fields, fail):
+    '''
+    Returns projection compiled from fields option, or None if all fields should be returned.
+    '''
+    if not fields:
+        return None
+    try:
+        return Projection(fields)
+    except Exception as exc:
+        fail('Invalid fields: {0}'.format(str(exc)))
+
+
+def project(result, projection):
+    '''
+    Applies projection to single item, or to every item of list result.
+    '''
+    if projection is None:
+        return result
+    if isinstance(result, dict) and isinstance(result.get('value'), list):
+        result['value'] = [projection(item) for item in result['value']]
+        return result
+    return projection(result)
+
+
+class Projection(object):
+    '''
+    Selects fields of response items.
+
+    Paths are merged into a tree once, so every item is walked only along selected
+    paths, lists on the way are traversed. Other fields are evaluated as JMESPath
+    expressions, dict results are merged into the item, anything else is stored
+    under the expression itself.
+    '''
+
+    def __init__(self, fields):
+        self.tree = {}
+        self.expressions = []
+        for field in fields:
+            if FIELD_PATH_RE.match(field):
+                self._add_path(field.split('.'))
+            elif not HAS_JMESPATH:
+                raise ValueError('jmespath is required for expression {0}'.format(field))
+            else:
+                self.expressions.append((field, jmespath.compile(field)))
+
+    def _add_path(self, parts):
+        node = self.tree
+        for part in parts[:-1]:
+            child = node.get(part, {})
+            if child is True:
+                # whole subtree is selected already
+                return
+            node = node.setdefault(part, child)
+        node[parts[-1]] = True
+
+    def __call__(self, item):
+        result = self._select(item, self.tree)
+        if not isinstance(result, dict):
+            return result
+        for field, expression in self.expressions:
+            value = expression.search(item)
+            if isinstance(value, dict):
+                result.update(value)
+            else:
+                result[field] = value
+        return result
+
+    def _select(self, value, tree):
+        if tree is True:
+            return value
+        if isinstance(value, list):
+            return [self._select(item, tree) for item in value]
+        if not isinstance(value, dict):
+            return value
+        return dict((key, self._select(value[key], subtree)) for key, subtree in tree.items() if key in value)
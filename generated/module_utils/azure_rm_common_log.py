@@ -0,0 +1,75 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import os
+import re
+import json
+from ansible.module_utils.six import string_types
+
+
+# maximum length of logged value, can be changed by environment variable
+LOG_MAX_LENGTH_ENV = 'AZURE_LOG_MAX_LENGTH'
+LOG_MAX_LENGTH = 4096
+# values of keys matching this are never logged
+LOG_REDACTED_KEY_RE = re.compile(r'password|secret|token|connectionstring|accesskey|primarykey|secondarykey|^keys?$|^value$', re.I)
+LOG_REDACTED = '********'
+
+
+def log_debug(module, message, *args):
+    '''
+    Logs message formatted with args through module.log(), but only when debug
+    logging of the module is on, so arguments like whole responses are not formatted
+    just to be thrown away.
+
+    Arguments are rendered by describe(), which redacts secrets and truncates
+    long values.
+    '''
+    ansible_module = getattr(module, 'module', None)
+    if not getattr(ansible_module, '_debug', False):
+        return
+    module.log(message.format(*[describe(arg) for arg in args]))
+
+
+def describe(value):
+    '''
+    Returns text of value for logging. Responses are represented by their body,
+    JSON values have secrets redacted, text is truncated to LOG_MAX_LENGTH.
+    '''
+    text = getattr(value, 'text', None)
+    if isinstance(text, string_types):
+        status = getattr(value, 'status_code', None)
+        try:
+            value = json.loads(text)
+        except ValueError:
+            value = text
+        text = render(value)
+        if status is not None:
+            text = '{0} {1}'.format(status, text)
+    else:
+        text = render(value)
+    try:
+        max_length = int(os.environ.get(LOG_MAX_LENGTH_ENV, LOG_MAX_LENGTH))
+    except ValueError:
+        max_length = LOG_MAX_LENGTH
+    if max_length > 0 and len(text) > max_length:
+        text = '{0}... ({1} more characters)'.format(text[:max_length], len(text) - max_length)
+    return text
+
+
+def render(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(redact(value), sort_keys=True, default=str)
+    return str(value)
+
+
+def redact(value):
+    if isinstance(value, dict):
+        return dict((key, LOG_REDACTED if LOG_REDACTED_KEY_RE.search(str(key)) and isinstance(item, string_types) else redact(item))
+                    for key, item in value.items())
+    if isinstance(value, list):
+        return [redact(item) for item in value]
+    return value
@@ -0,0 +1,200 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import os
+import sys
+import json
+import time
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.azure_rm_common_auth_ext import FileLock
+try:
+    from urllib.parse import urlparse
+except ImportError:
+    from urlparse import urlparse
+try:
+    from msrest.service_client import ServiceClient
+except ImportError:
+    # This is handled in azure_rm_common
+    ServiceClient = None
+
+
+# path of the trace file, every module invocation appends one JSON line to it
+PERF_TRACE_ENV = 'AZURE_PERF_TRACE'
+# when set, module results contain _perf
+PERF_RESULTS_ENV = 'AZURE_PERF_RESULTS'
+# trace keeps details of at most this many requests per invocation, totals include all of them
+PERF_MAX_REQUESTS = 200
+
+_recorder = None
+
+
+class PerfRecorder(object):
+    '''
+    Collects timing of a single module invocation.
+
+    Every request sent through msrest ServiceClient, which both REST and SDK modules
+    use, is recorded with its latency, status and sizes. Requests to Azure-AsyncOperation
+    and Location urls returned by previous responses are counted as polls, requests
+    repeated after 429 as retries. Named phases, like compare and inflate, are timed
+    with timer().
+    '''
+
+    def __init__(self, module_name):
+        self.module_name = module_name
+        self.start = time.time()
+        self.requests = []
+        self.totals = dict(requests=0, latency=0.0, bytes_in=0, bytes_out=0, polls=0, retries=0, throttled=0)
+        self.phases = {}
+        self.operation_urls = set()
+        self.throttled_urls = set()
+
+    def add_request(self, method, url, status, latency, bytes_out, bytes_in, headers):
+        poll = url in self.operation_urls
+        retry = (method, url) in self.throttled_urls
+        self.throttled_urls.discard((method, url))
+        if status == 429:
+            self.throttled_urls.add((method, url))
+        for name in ['Azure-AsyncOperation', 'Location']:
+            if headers.get(name):
+                self.operation_urls.add(headers[name])
+        totals = self.totals
+        totals['requests'] += 1
+        totals['latency'] += latency
+        totals['bytes_in'] += bytes_in
+        totals['bytes_out'] += bytes_out
+        totals['polls'] += 1 if poll else 0
+        totals['retries'] += 1 if retry else 0
+        totals['throttled'] += 1 if status == 429 else 0
+        if len(self.requests) < PERF_MAX_REQUESTS:
+            # query string carries only api-version and paging, path is enough to identify request
+            self.requests.append(dict(method=method,
+                                      path=urlparse(url).path,
+                                      status=status,
+                                      latency=round(latency, 4),
+                                      bytes_out=bytes_out,
+                                      bytes_in=bytes_in,
+                                      poll=poll,
+                                      retry=retry))
+
+    def add_phase(self, name, duration):
+        phase = self.phases.setdefault(name, dict(calls=0, time=0.0))
+        phase['calls'] += 1
+        phase['time'] += duration
+
+    def as_dict(self, details=False):
+        result = dict(module=self.module_name,
+                      start=self.start,
+                      duration=round(time.time() - self.start, 4),
+                      totals=dict(self.totals, latency=round(self.totals['latency'], 4)),
+                      phases=dict((name, dict(calls=phase['calls'], time=round(phase['time'], 4)))
+                                  for name, phase in self.phases.items()))
+        if details:
+            result['requests'] = self.requests
+        return result
+
+
+class _Timer(object):
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, *args):
+        if _recorder is not None:
+            _recorder.add_phase(self.name, time.time() - self.start)
+
+
+class _NoTimer(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+_NO_TIMER = _NoTimer()
+
+
+def timer(name):
+    '''
+    Returns context manager timing phase name of current invocation, it does nothing
+    unless telemetry was enabled by enable_perf().
+    '''
+    return _Timer(name) if _recorder is not None else _NO_TIMER
+
+
+def enable_perf():
+    '''
+    Enables performance telemetry of the current module invocation.
+
+    Telemetry is opt-in. If AZURE_PERF_TRACE environment variable is set, an invocation
+    record with its requests is appended to the file it names as one JSON line, so
+    records of concurrent module processes can be read by a callback plugin or
+    tools/perf_report.py. If AZURE_PERF_RESULTS is set, totals are also returned in
+    module result as _perf. Must be called before the module is created.
+    '''
+    global _recorder
+    trace_path = os.environ.get(PERF_TRACE_ENV)
+    in_results = bool(os.environ.get(PERF_RESULTS_ENV))
+    if not trace_path and not in_results:
+        return
+    _recorder = PerfRecorder(os.path.basename(sys.argv[0]).split('.')[0])
+    if ServiceClient is not None and not getattr(ServiceClient, '_perf_enabled', False):
+        ServiceClient._perf_enabled = True
+        ServiceClient.send = _timed_send(ServiceClient.send)
+    AnsibleModule.exit_json = _reported_exit(AnsibleModule.exit_json, False, trace_path, in_results)
+    AnsibleModule.fail_json = _reported_exit(AnsibleModule.fail_json, True, trace_path, in_results)
+
+
+def _timed_send(send):
+    def timed_send(self, request, *args, **kwargs):
+        start = time.time()
+        response = send(self, request, *args, **kwargs)
+        if _recorder is not None:
+            data = getattr(request, 'data', None) or getattr(request, 'body', None) or b''
+            try:
+                bytes_in = len(response.content or b'')
+            except Exception:
+                bytes_in = 0
+            _recorder.add_request(request.method,
+                                  request.url,
+                                  response.status_code,
+                                  time.time() - start,
+                                  len(data) if isinstance(data, (bytes, str)) else 0,
+                                  bytes_in,
+                                  response.headers)
+        return response
+    return timed_send
+
+
+def _reported_exit(exit, failed, trace_path, in_results):
+    def reported_exit(self, **kwargs):
+        if _recorder is not None:
+            # name passed by Ansible is more reliable than name of the executed file
+            _recorder.module_name = getattr(self, '_name', None) or _recorder.module_name
+            if in_results:
+                kwargs['_perf'] = _recorder.as_dict()
+            if trace_path:
+                _write_trace(os.path.expanduser(trace_path), dict(_recorder.as_dict(True),
+                                                                  failed=failed or bool(kwargs.get('failed')),
+                                                                  changed=kwargs.get('changed')))
+        exit(self, **kwargs)
+    return reported_exit
+
+
+def _write_trace(path, record):
+    line = json.dumps(record, sort_keys=True) + '\n'
+    try:
+        with FileLock(path + '.lock'):
+            with open(path, 'a') as f:
+                f.write(line)
+    except (IOError, OSError):
+        # telemetry must never fail the task
+        pass
@@ -0,0 +1,552 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import os
+import time
+import json
+import hashlib
+import tempfile
+from email.utils import parsedate_tz, mktime_tz
+from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible.module_utils.azure_rm_common_auth_ext import FileLock
+try:
+    from msrestazure.azure_exceptions import CloudError
+except ImportError:
+    # This is handled in azure_rm_common
+    pass
+
+
+# first poll happens quickly, then the interval doubles up to the cap passed to query()
+LRO_INITIAL_INTERVAL = 1
+LRO_BACKOFF_FACTOR = 2
+LRO_TERMINAL_STATES = ['succeeded', 'failed', 'canceled', 'cancelled']
+LRO_FAILED_STATES = ['failed', 'canceled', 'cancelled']
+LRO_POLL_STATUS_CODES = [200, 201, 202, 204]
+
+# path of the file used to share request budget between module processes, throttling is enabled only when set
+THROTTLE_STATE_ENV = 'AZURE_THROTTLE_STATE'
+# default ARM limits of requests per subscription and hour
+THROTTLE_LIMITS = {'reads': 12000, 'writes': 1200}
+THROTTLE_MAX_RETRIES = 5
+THROTTLE_DEFAULT_RETRY_AFTER = 10
+THROTTLE_MIN_WAIT = 0.1
+
+# directory of the conditional GET cache, caching is enabled only when set
+RESPONSE_CACHE_ENV = 'AZURE_RESPONSE_CACHE'
+RESPONSE_CACHE_TTL = 24 * 3600
+RESPONSE_CACHE_MAX_SIZE = 100 * 1024 * 1024
+
+# Resource Graph queries are POSTs, but they only read and don't count against ARM write limits
+RESOURCE_GRAPH_URL = '/providers/Microsoft.ResourceGraph/resources'
+RESOURCE_GRAPH_API_VERSION = '2021-03-01'
+RESOURCE_GRAPH_MAX_PAGE_SIZE = 1000
+# columns of Resources table which are returned by ARM for a resource
+RESOURCE_GRAPH_COLUMNS = ['id', 'name', 'type', 'location', 'tags', 'kind', 'sku', 'plan', 'identity', 'zones', 'managedBy', 'properties']
+
+
+def get_retry_after(response, default=None):
+    '''
+    Returns number of seconds requested by Retry-After header, or default
+    if header is not present or malformed.
+    '''
+    value = response.headers.get('Retry-After')
+    if not value:
+        return default
+    try:
+        return max(int(value), 0)
+    except ValueError:
+        pass
+    parsed = parsedate_tz(value)
+    if parsed is None:
+        return default
+    return max(mktime_tz(parsed) - time.time(), 0)
+
+
+def get_json(response):
+    try:
+        result = json.loads(response.text)
+    except Exception:
+        return {}
+    return result if isinstance(result, dict) else {}
+
+
+class SubscriptionThrottle(object):
+    '''
+    Token bucket of ARM requests of a subscription, shared by concurrent module processes
+    through a state file.
+
+    Buckets refill at rate of default ARM hourly limits and are lowered to the budget
+    reported by x-ms-ratelimit-remaining-subscription-* headers. Retry-After of
+    throttled request blocks all processes until it passes.
+    '''
+
+    def __init__(self, path, subscription_id):
+        self.path = path
+        self.subscription_id = subscription_id
+
+    def acquire(self, kind):
+        while True:
+            with FileLock(self.path + '.lock'):
+                state = self._read()
+                bucket = self._refill(state, kind)
+                wait = bucket['blocked_until'] - time.time()
+                if wait <= 0:
+                    if bucket['tokens'] >= 1:
+                        bucket['tokens'] -= 1
+                        self._write(state)
+                        return
+                    wait = (1 - bucket['tokens']) * 3600.0 / THROTTLE_LIMITS[kind]
+            time.sleep(max(wait, THROTTLE_MIN_WAIT))
+
+    def update(self, kind, remaining, retry_after):
+        with FileLock(self.path + '.lock'):
+            state = self._read()
+            bucket = self._refill(state, kind)
+            if remaining is not None:
+                bucket['tokens'] = min(bucket['tokens'], float(remaining))
+            if retry_after is not None:
+                bucket['blocked_until'] = max(bucket['blocked_until'], time.time() + retry_after)
+            self._write(state)
+
+    def _refill(self, state, kind):
+        now = time.time()
+        buckets = state.setdefault(self.subscription_id, {})
+        bucket = buckets.setdefault(kind, {'tokens': THROTTLE_LIMITS[kind], 'updated': now, 'blocked_until': 0})
+        elapsed = max(now - bucket['updated'], 0)
+        bucket['tokens'] = min(THROTTLE_LIMITS[kind], bucket['tokens'] + elapsed * THROTTLE_LIMITS[kind] / 3600.0)
+        bucket['updated'] = now
+        return bucket
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def _write(self, state):
+        # written under lock, so temporary file name doesn't need to be unique
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(state, f)
+        os.rename(tmp, self.path)
+
+
+class CachedResponse(object):
+    '''
+    Response served from ResponseCache, provides attributes of response used by modules.
+    '''
+
+    def __init__(self, status_code, headers, text):
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+        self.content = text.encode('utf-8')
+
+
+class ResponseCache(object):
+    '''
+    On-disk cache of GET responses which have ETag, keyed by url and query parameters
+    (including api-version).
+
+    Entries older than RESPONSE_CACHE_TTL are not used, and oldest entries are evicted
+    once the cache grows over RESPONSE_CACHE_MAX_SIZE. Entries may contain secrets,
+    so cache is accessible only by its owner.
+    '''
+
+    def __init__(self, path, ttl=RESPONSE_CACHE_TTL, max_size=RESPONSE_CACHE_MAX_SIZE):
+        self.path = path
+        self.ttl = ttl
+        self.max_size = max_size
+        if not os.path.isdir(path):
+            os.makedirs(path, 0o700)
+
+    def get(self, url, query_parameters):
+        entry_path = self._entry_path(url, query_parameters)
+        try:
+            if os.path.getmtime(entry_path) + self.ttl < time.time():
+                os.remove(entry_path)
+                return None
+            with open(entry_path) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def set(self, url, query_parameters, response):
+        entry = dict(etag=response.headers['ETag'],
+                     status_code=response.status_code,
+                     headers=dict(response.headers),
+                     text=response.text)
+        fd, tmp = tempfile.mkstemp(dir=self.path)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(entry, f)
+        os.rename(tmp, self._entry_path(url, query_parameters))
+        self.evict()
+
+    def touch(self, url, query_parameters):
+        try:
+            os.utime(self._entry_path(url, query_parameters), None)
+        except OSError:
+            pass
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.path):
+            try:
+                stat = os.stat(os.path.join(self.path, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for mtime, size, name in entries)
+        for mtime, size, name in sorted(entries):
+            if total <= self.max_size and mtime + self.ttl >= time.time():
+                continue
+            try:
+                os.remove(os.path.join(self.path, name))
+            except OSError:
+                pass
+            total -= size
+
+    def _entry_path(self, url, query_parameters):
+        key = json.dumps([url, sorted((query_parameters or {}).items())])
+        return os.path.join(self.path, hashlib.sha256(key.encode('utf-8')).hexdigest() + '.json')
+
+
+class GenericRestClientExt(GenericRestClient):
+    '''
+    GenericRestClient with adaptive long running operation handling.
+
+    Instead of polling with a fixed interval, query() follows Azure-AsyncOperation
+    and Location headers returned by ARM, honors Retry-After and otherwise uses capped
+    exponential backoff. polling_timeout is a deadline for the whole operation,
+    polling_interval is the maximum interval between two polls.
+
+    Requests rejected with 429 are retried after Retry-After. If AZURE_THROTTLE_STATE
+    environment variable is set, requests are also throttled by SubscriptionThrottle.
+    If AZURE_RESPONSE_CACHE is set, GET requests are conditional and 304 responses are
+    served from ResponseCache.
+    '''
+
+    def __init__(self, credentials, subscription_id, base_url=None):
+        super(GenericRestClientExt, self).__init__(credentials, subscription_id, base_url)
+        self.lro_polls = 0
+        self.throttled = 0
+        self.throttle = None
+        if os.environ.get(THROTTLE_STATE_ENV):
+            self.throttle = SubscriptionThrottle(os.path.expanduser(os.environ[THROTTLE_STATE_ENV]), subscription_id)
+        self.cache = None
+        if os.environ.get(RESPONSE_CACHE_ENV):
+            self.cache = ResponseCache(os.path.expanduser(os.environ[RESPONSE_CACHE_ENV]))
+
+    def query(self, url, method, query_parameters, header_parameters, body, expected_status_codes, polling_timeout, polling_interval):
+        if method == 'GET' and self.cache:
+            return self.query_cached(url, query_parameters, header_parameters, expected_status_codes)
+        response = self.send(url,
+                             method,
+                             query_parameters,
+                             header_parameters,
+                             body,
+                             expected_status_codes)
+        if method != 'GET' and polling_timeout > 0 and response.status_code in [201, 202]:
+            response = self.wait_for_completion(url,
+                                                method,
+                                                query_parameters,
+                                                header_parameters,
+                                                response,
+                                                polling_timeout,
+                                                polling_interval)
+        return response
+
+    def query_cached(self, url, query_parameters, header_parameters, expected_status_codes):
+        entry = self.cache.get(url, query_parameters)
+        if entry is None:
+            response = self.send(url, 'GET', query_parameters, header_parameters, None, expected_status_codes)
+        else:
+            header_parameters = dict(header_parameters or {})
+            header_parameters['If-None-Match'] = entry['etag']
+            response = self.send(url, 'GET', query_parameters, header_parameters, None, list(expected_status_codes) + [304])
+            if response.status_code == 304:
+                self.cache.touch(url, query_parameters)
+                return CachedResponse(entry['status_code'], entry['headers'], entry['text'])
+        if response.headers.get('ETag'):
+            self.cache.set(url, query_parameters, response)
+        return response
+
+    def send(self, url, method, query_parameters, header_parameters, body, expected_status_codes):
+        kind = 'reads' if method in ['GET', 'HEAD'] or url == RESOURCE_GRAPH_URL else 'writes'
+        retries = 0
+        while True:
+            if self.throttle:
+                self.throttle.acquire(kind)
+            response = super(GenericRestClientExt, self).query(url,
+                                                               method,
+                                                               query_parameters,
+                                                               header_parameters,
+                                                               body,
+                                                               list(expected_status_codes) + [429],
+                                                               0,
+                                                               0)
+            retry_after = get_retry_after(response, THROTTLE_DEFAULT_RETRY_AFTER) if response.status_code == 429 else None
+            if self.throttle:
+                self.throttle.update(kind, response.headers.get('x-ms-ratelimit-remaining-subscription-' + kind), retry_after)
+            if response.status_code != 429 or 429 in expected_status_codes:
+                return response
+            retries += 1
+            self.throttled += 1
+            if retries > THROTTLE_MAX_RETRIES:
+                raise CloudError(response)
+            if not self.throttle:
+                # otherwise throttle waits until Retry-After passes
+                time.sleep(retry_after)
+
+    def query_pages(self, url, method, query_parameters, header_parameters, body, expected_status_codes, page_size=None):
+        '''
+        Generator yielding decoded pages of list operation, following nextLink.
+        Next page is requested only when previous one was consumed.
+        '''
+        query_parameters = dict(query_parameters or {})
+        if page_size:
+            query_parameters['$top'] = page_size
+        while url:
+            page = json.loads(self.query(url,
+                                         method,
+                                         query_parameters,
+                                         header_parameters,
+                                         body,
+                                         expected_status_codes,
+                                         0,
+                                         0).text)
+            yield page
+            url = page.get('nextLink') if isinstance(page, dict) else None
+            # nextLink already contains all query parameters
+            query_parameters = None
+
+    def query_list(self, url, method, query_parameters, header_parameters, body, expected_status_codes, max_items=None, page_size=None, projection=None):
+        '''
+        Returns result of list operation with items of all pages merged into 'value'.
+
+        Pages are fetched until there is no nextLink or max_items items were collected,
+        in which case nextLink of the last page is kept. Responses which are not pageable
+        are returned as they are. If projection is given, it's applied to items of each
+        page as it's decoded, so only projected items are kept.
+        '''
+        result = None
+        for page in self.query_pages(url, method, query_parameters, header_parameters, body, expected_status_codes, page_size):
+            if not isinstance(page, dict) or not isinstance(page.get('value'), list):
+                return projection(page) if projection is not None else page
+            if projection is not None:
+                page['value'] = [projection(item) for item in page['value']]
+            if result is None:
+                result = page
+            else:
+                result['value'].extend(page['value'])
+                result['nextLink'] = page.get('nextLink')
+            if max_items and len(result['value']) >= max_items:
+                del result['value'][max_items:]
+                return result
+        result.pop('nextLink', None)
+        return result
+
+    def query_resource_graph(self, resource_type, subscriptions, resource_group, header_parameters, max_items=None, page_size=None, projection=None):
+        '''
+        Lists resources of resource_type in all subscriptions, or in resource_group, with
+        a single Azure Resource Graph query paged by the server.
+
+        resource_type and resource_group may also be lists, or None to not filter by them.
+        Result has the same shape as result of query_list. Only top level columns which
+        are needed by projection are requested.
+        '''
+        resource_types = resource_type if isinstance(resource_type, list) else [resource_type] if resource_type else []
+        resource_groups = resource_group if isinstance(resource_group, list) else [resource_group] if resource_group else []
+        query = 'Resources'
+        query += self._kql_filter('type', resource_types)
+        query += self._kql_filter('resourceGroup', resource_groups)
+        columns = RESOURCE_GRAPH_COLUMNS
+        if projection is not None and not projection.expressions:
+            columns = [column for column in columns if column in projection.tree] or ['id']
+        query += ' | project ' + ', '.join(columns)
+        options = {'resultFormat': 'objectArray',
+                   '$top': min(page_size or RESOURCE_GRAPH_MAX_PAGE_SIZE, RESOURCE_GRAPH_MAX_PAGE_SIZE)}
+        # Resource Graph returns type in lower case
+        type_names = dict((name.lower(), name) for name in resource_types)
+        items = []
+        while True:
+            response = self.send(RESOURCE_GRAPH_URL,
+                                 'POST',
+                                 {'api-version': RESOURCE_GRAPH_API_VERSION},
+                                 header_parameters,
+                                 dict(subscriptions=subscriptions, query=query, options=options),
+                                 [200])
+            page = get_json(response)
+            for item in page.get('data') or []:
+                if item.get('type', '').lower() in type_names:
+                    item['type'] = type_names[item['type'].lower()]
+                items.append(projection(item) if projection is not None else item)
+            if max_items and len(items) >= max_items:
+                del items[max_items:]
+                break
+            if not page.get('$skipToken'):
+                break
+            options = dict(options)
+            options['$skipToken'] = page['$skipToken']
+        return {'value': items}
+
+    def _kql_filter(self, column, values):
+        values = ["'{0}'".format(value.replace("'", "\\'")) for value in values]
+        if not values:
+            return ''
+        if len(values) == 1:
+            return ' | where {0} =~ {1}'.format(column, values[0])
+        return ' | where {0} in~ ({1})'.format(column, ', '.join(values))
+
+    def wait_for_completion(self, url, method, query_parameters, header_parameters, response, polling_timeout, polling_interval):
+        deadline = time.time() + polling_timeout
+        interval = LRO_INITIAL_INTERVAL
+        async_url = response.headers.get('Azure-AsyncOperation')
+        location_url = response.headers.get('Location')
+        final_url = None
+
+        if async_url:
+            kind, status_url = 'async', async_url
+            # for POST result can be fetched from location after operation completed,
+            # deleted resource is gone, so DELETE gets only what location returns, if any
+            final_url = location_url if method in ['POST', 'DELETE'] else url
+        elif location_url and response.status_code == 202:
+            kind, status_url = 'location', location_url
+        elif method in ['PUT', 'PATCH']:
+            # no operation headers, poll resource itself until provisioning state is terminal
+            kind, status_url = 'resource', url
+        else:
+            return response
+
+        done = kind == 'resource' and self.is_done(kind, response)
+        while not done:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise CloudError(response, error='Long running operation did not complete within {0} seconds'.format(polling_timeout))
+            time.sleep(min(get_retry_after(response, interval), remaining))
+            interval = min(interval * LRO_BACKOFF_FACTOR, polling_interval)
+            self.lro_polls += 1
+            response = self.get_status(status_url, url, query_parameters, header_parameters)
+            done = self.is_done(kind, response)
+
+        if kind == 'async':
+            if get_json(response).get('status', '').lower() in LRO_FAILED_STATES:
+                raise CloudError(response)
+            if final_url:
+                response = self.get_status(final_url, url, query_parameters, header_parameters)
+        elif kind == 'resource':
+            if (get_json(response).get('properties') or {}).get('provisioningState', '').lower() in LRO_FAILED_STATES:
+                raise CloudError(response)
+        return response
+
+    def wait_for_deletion(self, url, query_parameters, header_parameters, response, polling_timeout, polling_interval):
+        '''
+        Waits until resource deleted by request which returned response is gone.
+
+        Operation status is followed first if ARM returned one, then the resource itself
+        is polled with backoff starting at LRO_INITIAL_INTERVAL until it's not found.
+        '''
+        deadline = time.time() + polling_timeout
+        if response.status_code in [201, 202]:
+            self.wait_for_completion(url, 'DELETE', query_parameters, header_parameters, response, polling_timeout, polling_interval)
+        interval = LRO_INITIAL_INTERVAL
+        while True:
+            response = self.send(url,
+                                 'GET',
+                                 query_parameters,
+                                 header_parameters,
+                                 None,
+                                 LRO_POLL_STATUS_CODES + [404])
+            if response.status_code == 404:
+                return
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise CloudError(response, error='Resource was not deleted within {0} seconds'.format(polling_timeout))
+            time.sleep(min(get_retry_after(response, interval), remaining))
+            interval = min(interval * LRO_BACKOFF_FACTOR, polling_interval)
+            self.lro_polls += 1
+
+    def get_operation(self, url, method, query_parameters, response):
+        '''
+        Returns handle of operation started by request which returned response.
+        Handle is serializable, so it can be returned as module result.
+        '''
+        status_url = response.headers.get('Azure-AsyncOperation')
+        kind = 'async'
+        if not status_url and response.status_code == 202:
+            status_url = response.headers.get('Location')
+            kind = 'location'
+        if not status_url:
+            kind = 'resource'
+        return dict(kind=kind,
+                    method=method,
+                    url=url,
+                    api_version=(query_parameters or {}).get('api-version'),
+                    status_url=status_url,
+                    retry_after=get_retry_after(response))
+
+    def check_operation(self, operation, header_parameters):
+        '''
+        Checks once operation described by handle returned from get_operation().
+
+        Returns dict with status, done flag, error and, for completed PUT and PATCH,
+        the resource itself. Doesn't wait, caller decides when to check again.
+        '''
+        url = operation.get('url')
+        method = operation.get('method')
+        kind = operation.get('kind')
+        query_parameters = {'api-version': operation.get('api_version')}
+        status_url = operation.get('status_url') or url
+        if kind not in ['async', 'location']:
+            kind = 'resource'
+        result = dict(status='InProgress', done=False, error=None, resource=None)
+
+        if kind == 'resource' and method == 'DELETE':
+            response = self.send(url, 'GET', query_parameters, header_parameters, None, LRO_POLL_STATUS_CODES + [404])
+            if response.status_code == 404:
+                result.update(status='Succeeded', done=True)
+            result['retry_after'] = get_retry_after(response)
+            return result
+
+        response = self.get_status(status_url, url, query_parameters, header_parameters)
+        result['retry_after'] = get_retry_after(response)
+        if not self.is_done(kind, response):
+            return result
+        result['done'] = True
+        if kind == 'async':
+            body = get_json(response)
+            result['status'] = body.get('status', 'Succeeded')
+            result['error'] = body.get('error')
+        elif kind == 'resource':
+            state = (get_json(response).get('properties') or {}).get('provisioningState')
+            result['status'] = state or 'Succeeded'
+        else:
+            result['status'] = 'Succeeded'
+        if result['status'].lower() in LRO_FAILED_STATES or method not in ['PUT', 'PATCH']:
+            return result
+        if kind != 'resource':
+            response = self.send(url, 'GET', query_parameters, header_parameters, None, LRO_POLL_STATUS_CODES)
+        result['resource'] = get_json(response)
+        return result
+
+    def get_status(self, status_url, url, query_parameters, header_parameters):
+        # operation urls returned by ARM are absolute and already carry api-version
+        return self.send(status_url,
+                         'GET',
+                         query_parameters if status_url == url else None,
+                         header_parameters,
+                         None,
+                         LRO_POLL_STATUS_CODES)
+
+    def is_done(self, kind, response):
+        if kind == 'async':
+            return get_json(response).get('status', '').lower() in LRO_TERMINAL_STATES
+        if kind == 'resource':
+            state = (get_json(response).get('properties') or {}).get('provisioningState')
+            return state is None or state.lower() in LRO_TERMINAL_STATES
+        return response.status_code != 202
@@ -0,0 +1,60 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+try:
+    from urllib.parse import urlparse, parse_qs
+except ImportError:
+    from urlparse import urlparse, parse_qs
+try:
+    from msrest.paging import Paged
+except ImportError:
+    # This is handled in azure_rm_common
+    Paged = None
+
+
+def paged_as_dict(response, max_items=None, projection=None):
+    '''
+    Returns dict of SDK response.
+
+    Paged responses are iterated lazily, so next page is fetched only when needed,
+    and stop once max_items items were collected. Items are returned in 'value',
+    same as in REST list responses. If projection is given, it's applied to every
+    item as it's converted.
+    '''
+    if Paged is None or not isinstance(response, Paged):
+        return projection(response.as_dict()) if projection is not None else response.as_dict()
+    items = []
+    for item in response:
+        item = item.as_dict()
+        items.append(projection(item) if projection is not None else item)
+        if max_items and len(items) >= max_items:
+            break
+    return {'value': items}
+
+
+def get_poller_operation(poller):
+    '''
+    Returns handle of operation tracked by SDK poller, in the same format as
+    GenericRestClientExt.get_operation(), so it can be checked by azure_rm_operation_info.
+    '''
+    operation = getattr(getattr(poller, '_polling_method', None), '_operation', None)
+    response = getattr(operation, 'initial_response', None)
+    request = getattr(response, 'request', None)
+    parsed = urlparse(getattr(request, 'url', None) or '')
+    status_url = getattr(operation, 'async_url', None)
+    kind = 'async'
+    if not status_url:
+        status_url = getattr(operation, 'location_url', None)
+        kind = 'location'
+    if not status_url:
+        kind = 'resource'
+    return dict(kind=kind,
+                method=getattr(request, 'method', None),
+                url=parsed.path,
+                api_version=parse_qs(parsed.query).get('api-version', [None])[0],
+                status_url=status_url,
+                retry_after=None)
@@ -0,0 +1,116 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import os
+import json
+import time
+import tempfile
+
+
+SNAPSHOT_VERSION = 1
+
+# loaded snapshots, keyed by path
+_snapshots = {}
+
+
+class StateSnapshot(object):
+    '''
+    State of resources exported at once, used by modules in check mode instead
+    of reading each resource from Azure.
+
+    Snapshot covers the subscriptions, resource groups and resource types it was
+    exported for. If it was exported for all resource types, it covers only types
+    it contains, as types without any resource can't be told from types not
+    exported. The same holds for child resource types, like
+    Microsoft.Batch/batchAccounts/pools, as most of them are not in Resource Graph
+    at all. Resources are keyed by lower case id.
+    '''
+
+    def __init__(self, data):
+        self.resources = data['resources']
+        self.subscriptions = set(subscription.lower() for subscription in data['subscriptions'])
+        self.resource_groups = set(group.lower() for group in data['resource_groups']) if data.get('resource_groups') else None
+        self.resource_types = set(resource.get('type', '').lower() for resource in self.resources.values())
+        for resource_type in data.get('resource_types') or []:
+            if not is_child_type(resource_type):
+                self.resource_types.add(resource_type.lower())
+
+    def get(self, url):
+        '''
+        Returns resource with id url, False if snapshot covers the resource and it
+        doesn't exist, None if snapshot doesn't cover it.
+        '''
+        parts = url.strip('/').split('/')
+        if len(parts) < 2 or parts[0].lower() != 'subscriptions' or parts[1].lower() not in self.subscriptions:
+            return None
+        if self.resource_groups is not None:
+            if len(parts) < 4 or parts[2].lower() != 'resourcegroups' or parts[3].lower() not in self.resource_groups:
+                return None
+        if get_resource_type(url).lower() not in self.resource_types:
+            return None
+        return self.resources.get(url.lower(), False)
+
+
+def get_resource_type(url):
+    '''Returns type of resource with id url, like Microsoft.Batch/batchAccounts/pools.'''
+    parts = url.strip('/').split('/')
+    lowered = [part.lower() for part in parts]
+    if 'providers' not in lowered:
+        return ''
+    start = len(lowered) - 1 - lowered[::-1].index('providers')
+    names = parts[start + 1:]
+    # namespace followed by pairs of type and name
+    return '/'.join([names[0]] + names[1::2]) if names else ''
+
+
+def is_child_type(resource_type):
+    '''Returns True if resource_type is type of child resource, like Microsoft.Batch/batchAccounts/pools.'''
+    return resource_type.strip('/').count('/') > 1
+
+
+def load_snapshot(path):
+    snapshot = _snapshots.get(path)
+    if snapshot is None:
+        with open(os.path.expanduser(path)) as f:
+            data = json.load(f)
+        if data.get('version') != SNAPSHOT_VERSION:
+            raise ValueError('unsupported snapshot version {0}'.format(data.get('version')))
+        snapshot = _snapshots[path] = StateSnapshot(data)
+    return snapshot
+
+
+def get_snapshot_resource(path, url, fail):
+    '''
+    Returns resource with id url from snapshot at path, as returned by get_resource()
+    of modules, or None if the snapshot doesn't cover it and it must be read from Azure.
+    Errors of reading snapshot are reported through fail.
+    '''
+    try:
+        return load_snapshot(path).get(url)
+    except (IOError, OSError, ValueError, KeyError) as exc:
+        fail('Error reading state snapshot {0}: {1}'.format(path, str(exc)))
+
+
+def write_snapshot(path, resources, subscriptions, resource_groups=None, resource_types=None):
+    '''Writes snapshot of resources atomically, readable only by its owner.'''
+    data = dict(version=SNAPSHOT_VERSION,
+                created=time.time(),
+                subscriptions=subscriptions,
+                resource_groups=resource_groups,
+                resource_types=resource_types,
+                resources=dict((resource['id'].lower(), resource) for resource in resources))
+    path = os.path.expanduser(path)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.rename(tmp, path)
+    except Exception:
+        os.remove(tmp)
+        raise
+    return len(data['resources'])
@@ -0,0 +1,102 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import json
+from ansible.module_utils.azure_rm_common_perf import timer
+
+
+# compiled arg specs, keyed by module type
+_arg_specs = {}
+
+
+def get_arg_spec(module_type, text):
+    '''
+    Returns arg spec compiled from its serialized form, compiling it only once per module type.
+    '''
+    arg_spec = _arg_specs.get(module_type)
+    if arg_spec is None:
+        arg_spec = _arg_specs[module_type] = ArgSpec(text)
+    return arg_spec
+
+
+class ArgSpec(object):
+    '''
+    Module arg spec compiled from JSON emitted by the generator.
+
+    Besides options passed to AnsibleModule, spec is compiled once into inflate plan,
+    a tuple of steps with disposition paths already split, so inflating module body
+    doesn't have to walk and parse the whole spec again.
+    '''
+
+    def __init__(self, text):
+        self._text = text
+        self.plan = self._compile(json.loads(text), 0)
+
+    @property
+    def options(self):
+        '''
+        Returns options as expected by AnsibleModule. Every call returns new copy,
+        so compiled spec can't be changed by its users.
+        '''
+        return json.loads(self._text)
+
+    def _compile(self, options, level):
+        plan = []
+        for name, option in options.items():
+            disposition = option.get('disposition', '*')
+            if level == 0 and not disposition.startswith('/'):
+                # top level options without absolute disposition stay where they are
+                path, target = None, None
+            else:
+                if disposition == '/':
+                    disposition = '/*'
+                parts = disposition.split('/')
+                if parts[0] == '':
+                    parts.pop(0)
+                path = tuple(parts[:-1])
+                target = parts[-1] if parts[-1] != '*' else name
+            children = self._compile(option['options'], level + 1) if option.get('options') else None
+            plan.append((name, option.get('purgeIfNone', False), option.get('pattern'), path, target, children))
+        return tuple(plan)
+
+    def inflate(self, body, normalize_resource_id):
+        '''
+        Moves options in body to locations specified by their dispositions,
+        equivalent to AzureRMModuleBaseExt.inflate_parameters(spec, body, 0).
+        Resource ids are normalized by normalize_resource_id(value, pattern).
+        '''
+        with timer('inflate'):
+            self._inflate(self.plan, body, normalize_resource_id)
+
+    def _inflate(self, plan, body, normalize_resource_id):
+        if isinstance(body, list):
+            for item in body:
+                self._inflate(plan, item, normalize_resource_id)
+            return
+        for name, purge, pattern, path, target, children in plan:
+            value = body.get(name)
+            if value is None:
+                if purge:
+                    body.pop(name, None)
+                continue
+            if isinstance(pattern, list):
+                param = value
+                for item in pattern:
+                    value = body[name] = normalize_resource_id(param, item)
+                    if value is not None:
+                        break
+            elif pattern:
+                value = body[name] = normalize_resource_id(value, pattern)
+            if path is None:
+                continue
+            container = body
+            del body[name]
+            for key in path:
+                container = container.setdefault(key, {})
+            container[target] = value
+            if children:
+                self._inflate(children, value, normalize_resource_id)
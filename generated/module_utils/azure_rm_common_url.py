@@ -0,0 +1,65 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import re
+try:
+    from urllib.parse import quote
+except ImportError:
+    from urllib import quote
+
+
+URL_PLACEHOLDER_RE = re.compile(r'\{\{ *([A-Za-z_][A-Za-z0-9_]*) *\}\}')
+# characters allowed in path segment besides unreserved ones (RFC 3986), everything else is percent-encoded
+URL_SEGMENT_SAFE = "!$&'()*+,;=:@"
+
+# compiled url templates, keyed by template
+_url_templates = {}
+
+
+def build_url(template, **parameters):
+    '''
+    Returns url built from template with {{ name }} placeholders, compiling the template
+    only once per process.
+    '''
+    url_template = _url_templates.get(template)
+    if url_template is None:
+        url_template = _url_templates[template] = UrlTemplate(template)
+    return url_template.build(parameters)
+
+
+class UrlTemplate(object):
+    '''
+    ARM url template compiled into literal segments and placeholder names.
+
+    Every parameter is percent-encoded as a single path segment, so values can't
+    change structure of the url. Each placeholder must be bound exactly by name,
+    placeholder used more than once gets the same value everywhere.
+    '''
+
+    def __init__(self, template):
+        self.template = template
+        parts = URL_PLACEHOLDER_RE.split(template)
+        self.literals = tuple(parts[0::2])
+        self.names = tuple(parts[1::2])
+        self.parameters = frozenset(self.names)
+
+    def build(self, parameters):
+        if len(parameters) != len(self.parameters) or any(parameters.get(name) is None for name in self.parameters):
+            self._check(parameters)
+        url = [self.literals[0]]
+        for name, literal in zip(self.names, self.literals[1:]):
+            url.append(quote(str(parameters[name]), safe=URL_SEGMENT_SAFE))
+            url.append(literal)
+        return ''.join(url)
+
+    def _check(self, parameters):
+        unknown = sorted(set(parameters) - self.parameters)
+        if unknown:
+            raise ValueError('Unknown parameters {0} of url {1}'.format(', '.join(unknown), self.template))
+        missing = sorted(name for name in self.parameters if parameters.get(name) is None)
+        if missing:
+            raise ValueError('Parameters {0} of url {1} are not set'.format(', '.join(missing), self.template))
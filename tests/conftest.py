@@ -0,0 +1,22 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# tools import each other as top level modules, generated module_utils are imported
+# as ansible.module_utils.<name>, like tools/benchmark.py does when running modules,
+# those which don't need Ansible can be imported as top level modules too
+import os
+import sys
+
+ROOT_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+MODULE_UTILS_DIR = os.path.join(ROOT_DIR, 'generated', 'module_utils')
+
+sys.path.insert(0, os.path.join(ROOT_DIR, 'tools'))
+sys.path.insert(1, MODULE_UTILS_DIR)
+try:
+    import ansible.module_utils
+except ImportError:
+    pass
+else:
+    if MODULE_UTILS_DIR not in ansible.module_utils.__path__:
+        ansible.module_utils.__path__.append(MODULE_UTILS_DIR)
@@ -0,0 +1,92 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import pytest
+
+compare = pytest.importorskip('ansible.module_utils.azure_rm_common_compare')
+
+
+ARG_SPEC = {
+    'location': {'type': 'str', 'updatable': False, 'comparison': 'location'},
+    'sku': {'type': 'dict', 'disposition': '/', 'options': {
+        'name': {'type': 'str'},
+        'capacity': {'type': 'int'},
+    }},
+    'max_size': {'type': 'int', 'disposition': '/properties/maxSizeInMegabytes'},
+    'etag': {'type': 'str', 'comparison': 'ignore'},
+    'rules': {'type': 'list', 'disposition': '/properties/rules', 'options': {
+        'name': {'type': 'str'},
+        'action': {'type': 'str'},
+    }},
+}
+
+OLD = {
+    'id': '/subscriptions/sub/resourceGroups/rg/providers/Microsoft.Test/things/thing',
+    'location': 'West US',
+    'sku': {'name': 'Standard', 'capacity': 1},
+    'etag': 'W/"1"',
+    'properties': {'maxSizeInMegabytes': 1024,
+                   'rules': [{'name': 'a', 'action': 'allow'}, {'name': 'b', 'action': 'deny'}]},
+}
+
+
+def changes(new, old=OLD, warn=None):
+    return compare.Comparator(ARG_SPEC).compare(new, old, warn)
+
+
+def test_unset_suboptions_are_not_changes():
+    new = {'sku': {'name': 'standard', 'capacity': None}, 'properties': {'maxSizeInMegabytes': None}}
+    assert changes(new) == []
+
+
+def test_changed_value():
+    assert changes({'properties': {'maxSizeInMegabytes': 2048}}) == [
+        dict(path='/properties/maxSizeInMegabytes', new=2048, old=1024, updatable=True)]
+
+
+def test_location_and_ignore_rules():
+    assert changes({'location': 'westus', 'etag': 'other'}) == []
+
+
+def test_list_items_matched_by_name():
+    new = {'properties': {'rules': [{'name': 'b', 'action': 'deny'}, {'name': 'a', 'action': 'allow'}]}}
+    assert changes(new) == []
+    new['properties']['rules'][1]['action'] = 'deny'
+    assert [change['path'] for change in changes(new)] == ['/properties/rules/*/action']
+
+
+def test_not_updatable_change_is_warned():
+    warnings = []
+    result = changes({'location': 'eastus'}, warn=warnings.append)
+    assert result == [dict(path='/location', new='eastus', old='West US', updatable=False)]
+    assert warnings == ["property '/location' cannot be updated (West US->eastus)"]
+
+
+def test_comparator_is_compiled_once_per_module_type():
+    assert compare.get_comparator('ThingModule', ARG_SPEC) is compare.get_comparator('ThingModule', {})
+
+
+def test_merge_patch_contains_changed_values_only():
+    new = {'location': 'eastus',
+           'sku': {'name': 'Standard', 'capacity': 2},
+           'properties': {'maxSizeInMegabytes': 1024,
+                          'rules': [{'name': 'a', 'action': 'deny'}, {'name': 'b', 'action': 'deny'}]}}
+    assert compare.create_merge_patch(new, changes(new)) == {
+        'sku': {'capacity': 2},
+        'properties': {'rules': [{'name': 'a', 'action': 'deny'}, {'name': 'b', 'action': 'deny'}]}}
+
+
+def test_merge_patch_leaves_out_unset_values():
+    new = {'sku': {'name': 'Premium', 'capacity': None},
+           'properties': {'rules': [{'name': 'a', 'action': None}]}}
+    assert compare.create_merge_patch(new, changes(new)) == {
+        'sku': {'name': 'Premium'},
+        'properties': {'rules': [{'name': 'a'}]}}
+
+
+def test_merge_patch_doesnt_send_whole_body():
+    new = {'sku': {'name': 'Premium'}}
+    result = changes(new, old='not a resource')
+    assert [change['path'] for change in result] == ['']
+    assert compare.create_merge_patch(new, result) == {}
@@ -0,0 +1,142 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import importlib.util
+import json
+import os
+
+import pytest
+
+CloudError = pytest.importorskip('msrestazure.azure_exceptions').CloudError
+pytest.importorskip('ansible.module_utils.azure_rm_common')
+pytest.importorskip('ansible.module_utils.azure_rm_common_info_ext')
+
+
+GENERATED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'generated')
+MODULE_PATHS = [os.path.join(GENERATED_DIR, 'intermediate', 'ansible-module-rest', 'azure_rm_cosmosdbdatabaseaccount_info.py'),
+                os.path.join(GENERATED_DIR, 'ansible-collection', 'cosmosdbdatabaseaccount_info.py')]
+ACCOUNT_URL = '/subscriptions/sub/resourceGroups/rg/providers/Microsoft.DocumentDB/databaseAccounts/account'
+OPTIONS = ['resource_group', 'account_name', 'table_name', 'database_name', 'keyspace_name', 'graph_name',
+           'container_name', 'name', 'max_items', 'page_size', 'facets', 'fields', 'subscriptions', 'resource_groups',
+           'scopes']
+
+
+class Response(object):
+    def __init__(self, body):
+        self.status_code = 200
+        self.headers = {}
+        self.text = json.dumps(body)
+
+
+class RecordingClient(object):
+    '''Answers every request with an item holding its url, or fails requests of failing urls.'''
+
+    def __init__(self, failing=()):
+        self.requested = []
+        self.failing = failing
+
+    def query(self, url, method, query_parameters, header_parameters, body, expected_status_codes, polling_timeout, polling_interval):
+        self.requested.append(url)
+        if url in self.failing:
+            raise CloudError(Response({}), 'Resource {0} not found'.format(url))
+        return Response({'id': url})
+
+    def query_list(self, url, method, query_parameters, header_parameters, body, expected_status_codes, max_items=None, page_size=None, projection=None):
+        self.requested.append(url)
+        return [{'id': url + '/item'}]
+
+    def query_resource_graph(self, resource_type, subscriptions, resource_group, header_parameters, max_items=None, page_size=None, projection=None):
+        self.requested.append((resource_type, subscriptions, resource_group))
+        return [{'id': 'graph/item'}]
+
+
+def create_module(path, **options):
+    spec = importlib.util.spec_from_file_location(os.path.basename(path)[:-len('.py')], path)
+    source = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(source)
+    cls = source.AzureRMDatabaseAccountsInfo
+    # module is created without AzureRMModuleBase.__init__(), which connects to Azure
+    module = cls.__new__(cls)
+    for option in OPTIONS:
+        setattr(module, option, None)
+    module.backend = 'arm'
+    module.in_scope = False
+    module.projection = None
+    module.azure_auth = type('AzureAuth', (), dict(subscription_id='sub'))()
+    module.query_parameters = {'api-version': '2015-04-08'}
+    module.header_parameters = {}
+    module.status_code = [200]
+    module.results = dict(changed=False)
+    module.mgmt_client = RecordingClient()
+
+    def fail(msg, **kwargs):
+        raise AssertionError(msg)
+
+    module.fail = fail
+    module.log = lambda msg: None
+    for key, value in options.items():
+        setattr(module, key, value)
+    return module
+
+
+@pytest.mark.parametrize('path', MODULE_PATHS)
+def test_facets_use_module_options(path):
+    module = create_module(path,
+                           resource_group='rg',
+                           account_name='account',
+                           database_name='db',
+                           name='collection',
+                           facets=['getsqldatabase', 'listsqlcontainers', 'getmongodbcollectionthroughput'])
+    module.query_info()
+    assert sorted(module.mgmt_client.requested) == [
+        ACCOUNT_URL + '/apis/mongodb/databases/db/collections/collection/settings/throughput',
+        ACCOUNT_URL + '/apis/sql/databases/db',
+        ACCOUNT_URL + '/apis/sql/databases/db/containers']
+    assert module.results['database_accounts'] == {
+        'getsqldatabase': {'temp_item': {'id': ACCOUNT_URL + '/apis/sql/databases/db'}},
+        'listsqlcontainers': {'temp_item': [{'id': ACCOUNT_URL + '/apis/sql/databases/db/containers/item'}]},
+        'getmongodbcollectionthroughput': {
+            'temp_item': {'id': ACCOUNT_URL + '/apis/mongodb/databases/db/collections/collection/settings/throughput'}}}
+
+
+@pytest.mark.parametrize('path', MODULE_PATHS)
+def test_most_specific_facet_without_facets_option(path):
+    module = create_module(path, resource_group='rg', account_name='account', table_name='table', facets=None)
+    module.query_info()
+    assert module.mgmt_client.requested == [ACCOUNT_URL + '/apis/table/tables/table/settings/throughput']
+    assert module.results['database_accounts'] == {
+        'temp_item': {'id': ACCOUNT_URL + '/apis/table/tables/table/settings/throughput'}}
+
+
+@pytest.mark.parametrize('path', MODULE_PATHS)
+def test_resource_graph_lists_all_scopes_with_one_query(path):
+    module = create_module(path, backend='resource_graph', subscriptions=['s1', 's2'], resource_groups=['rg1', 'rg2'])
+    module.module_arg_spec = dict((option, {}) for option in OPTIONS + ['backend'])
+    module.get_mgmt_svc_client = lambda client_type, base_url: module.mgmt_client
+    module._cloud_environment = type('CloudEnvironment', (), dict(endpoints=type('Endpoints', (), dict(resource_manager=''))))
+    module.exec_module(**dict((option, getattr(module, option)) for option in module.module_arg_spec))
+    assert module.mgmt_client.requested == [('Microsoft.DocumentDB/databaseAccounts', ['s1', 's2'], ['rg1', 'rg2'])]
+    assert module.results['database_accounts'] == {'temp_item': [{'id': 'graph/item'}]}
+    assert 'scopes' not in module.results
+
+
+@pytest.mark.parametrize('path', MODULE_PATHS)
+def test_debug_log_has_listed_items(path):
+    logged = []
+    module = create_module(path, resource_group='rg', account_name='account', database_name='db',
+                           facets=['listsqlcontainers'])
+    module.module = type('AnsibleModule', (), dict(_debug=True))
+    module.log = logged.append
+    module.query_info()
+    assert logged == ['Response : [{"id": "' + ACCOUNT_URL + '/apis/sql/databases/db/containers/item"}]']
+
+
+@pytest.mark.parametrize('path', MODULE_PATHS)
+def test_failed_facet_fails_module(path):
+    module = create_module(path, resource_group='rg', account_name='account', database_name='db',
+                           facets=['getsqldatabase', 'listsqlcontainers'])
+    module.mgmt_client = RecordingClient(failing=[ACCOUNT_URL + '/apis/sql/databases/db'])
+    with pytest.raises(AssertionError, match='Error getting facets: .*getsqldatabase.*not found'):
+        module.query_info()
+    assert module.in_scope is False
@@ -0,0 +1,159 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import pytest
+
+from azure_rm_common_info_ext import (check_required_options, get_items, get_projection, get_scope_plan,
+                                      lists_with_resource_graph, query_scopes, run_parallel)
+
+
+ARG_SPEC = dict(resource_group=dict(type='str'), name=dict(type='str'), subscriptions=dict(type='list'))
+
+
+class NotFound(Exception):
+    pass
+
+
+class AzureAuth(object):
+    def __init__(self, subscription_id):
+        self.subscription_id = subscription_id
+
+
+class ThingsInfo(object):
+    '''Info module answering from a dict of subscription to resource group to names.'''
+
+    def __init__(self, things):
+        self.things = things
+        self.azure_auth = AzureAuth('default')
+        self.resource_group = None
+        self.name = None
+        self.backend = 'arm'
+        self.subscriptions = self.resource_groups = self.scopes = None
+        self.in_scope = False
+        self.results = dict(changed=False)
+
+    @property
+    def subscription_id(self):
+        # read only, as in AzureRMModuleBase
+        return self.azure_auth.subscription_id
+
+    def fail(self, msg, **kwargs):
+        raise AssertionError('module failed: ' + msg)
+
+    def query_info(self):
+        if self.subscription_id not in self.things:
+            raise NotFound("Subscription '{0}' could not be found.".format(self.subscription_id))
+        groups = self.things[self.subscription_id]
+        if self.resource_group not in groups:
+            self.fail('Resource group {0} not found'.format(self.resource_group))
+        if self.name is not None:
+            self.results['things'] = {'temp_item': {'id': self.name}}
+        else:
+            self.results['things'] = [{'temp_item': {'value': [{'id': name} for name in groups[self.resource_group]]}}]
+
+
+def fail(msg, **kwargs):
+    raise AssertionError(msg)
+
+
+def test_scope_plan_combines_options():
+    plan = get_scope_plan(['s1', 's2'], ['rg1', 'rg2'], [{'name': 'a'}], ARG_SPEC, fail)
+    assert plan == [dict(subscription_id='s1', resource_group='rg1', name='a'),
+                    dict(subscription_id='s1', resource_group='rg2', name='a'),
+                    dict(subscription_id='s2', resource_group='rg1', name='a'),
+                    dict(subscription_id='s2', resource_group='rg2', name='a')]
+
+
+def test_scope_plan_rejects_fan_out_and_unknown_options():
+    with pytest.raises(AssertionError, match='subscriptions, location'):
+        get_scope_plan(None, None, [{'subscriptions': ['s'], 'location': 'westus'}], ARG_SPEC, fail)
+
+
+def test_items_of_scopes_are_merged():
+    module = ThingsInfo({'s1': {'rg': ['a', 'b']}, 's2': {'rg': ['c']}})
+    scopes = query_scopes(module, get_scope_plan(['s1', 's2'], ['rg'], None, ARG_SPEC, fail), ThingsInfo.query_info)
+    assert module.results['things'] == [{'id': 'a'}, {'id': 'b'}, {'id': 'c'}]
+    assert scopes == [dict(scope=dict(subscription_id='s1', resource_group='rg'), error=None),
+                      dict(scope=dict(subscription_id='s2', resource_group='rg'), error=None)]
+    # scopes are queried on copies of the module
+    assert module.subscription_id == 'default' and module.in_scope is False
+
+
+def test_scopes_query_their_subscription_only():
+    seen = []
+    module = ThingsInfo({})
+    module.subscriptions = ['s1', 's2']
+    query_scopes(module, get_scope_plan(module.subscriptions, None, None, ARG_SPEC, fail),
+                 lambda scoped: seen.append((scoped.subscription_id, scoped.subscriptions)))
+    assert sorted(seen) == [('s1', None), ('s2', None)]
+
+
+def test_required_options_may_be_set_by_scopes():
+    module = ThingsInfo({})
+    check_required_options(module, None, [])
+    with pytest.raises(AssertionError, match='missing required arguments: resource_group, name'):
+        check_required_options(module, None, ['resource_group', 'name'])
+    plan = get_scope_plan(None, ['rg1', 'rg2'], [{'name': 'a'}], ARG_SPEC, fail)
+    check_required_options(module, plan, ['resource_group', 'name'])
+    module.name = 'b'
+    check_required_options(module, get_scope_plan(None, ['rg1'], None, ARG_SPEC, fail), ['resource_group', 'name'])
+    with pytest.raises(AssertionError, match='missing required arguments: resource_group$'):
+        check_required_options(module, get_scope_plan(None, None, [{'name': 'a'}], ARG_SPEC, fail),
+                               ['resource_group', 'name'])
+
+
+def test_lists_with_resource_graph():
+    module = ThingsInfo({})
+    module.subscriptions = ['s1', 's2']
+    assert not lists_with_resource_graph(module, ['name'])
+    module.backend = 'resource_graph'
+    assert lists_with_resource_graph(module, ['name'])
+    module.name = 'a'
+    assert not lists_with_resource_graph(module, ['name'])
+    module.name = None
+    module.scopes = [{'name': 'a'}]
+    assert not lists_with_resource_graph(module, ['name'])
+
+
+def test_single_items_are_merged():
+    module = ThingsInfo({'s1': {'rg': []}})
+    query_scopes(module, get_scope_plan(['s1'], ['rg'], [{'name': 'a'}, {'name': 'b'}], ARG_SPEC, fail),
+                 ThingsInfo.query_info)
+    assert module.results['things'] == [{'id': 'a'}, {'id': 'b'}]
+
+
+def test_failed_scopes_report_one_message_each():
+    module = ThingsInfo({'s1': {'rg': ['a']}})
+    scopes = query_scopes(module, get_scope_plan(['s1', 's2'], ['rg', 'other'], None, ARG_SPEC, fail),
+                          ThingsInfo.query_info)
+    assert module.results['things'] == [{'id': 'a'}]
+    assert [scope['error'] for scope in scopes] == [None,
+                                                    'Resource group other not found',
+                                                    "Subscription 's2' could not be found.",
+                                                    "Subscription 's2' could not be found."]
+
+
+def test_run_parallel_keeps_results_of_other_jobs():
+    def divide(a, b):
+        return a // b
+
+    results, errors = run_parallel([('ok', divide, (4, 2)), ('error', divide, (1, 0)), ('empty', fail, ('',))])
+    assert results == {'ok': 2}
+    assert sorted(errors) == ['empty', 'error']
+    assert 'division' in errors['error'] and '\n' not in errors['error']
+    assert errors['empty'] == 'AssertionError'
+
+
+def test_get_items():
+    assert get_items({}) == []
+    assert get_items(None) == []
+    assert get_items({'id': 'a'}) == [{'id': 'a'}]
+    assert get_items([{'temp_item': {'value': [{'id': 'a'}], 'nextLink': 'next'}}, {'temp_item': {}}]) == [{'id': 'a'}]
+
+
+def test_projection_selects_paths():
+    projection = get_projection(['name', 'properties.state', 'tags'], fail)
+    item = {'name': 'a', 'id': 'x', 'properties': {'state': 'on', 'size': 1}, 'tags': {'k': 'v'}}
+    assert projection(item) == {'name': 'a', 'properties': {'state': 'on'}, 'tags': {'k': 'v'}}
+    assert get_projection(None, fail) is None
@@ -0,0 +1,78 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import os
+
+import code_model
+import model_cache
+
+
+MAP = '''
+CliName: batch
+Namespace: azure.mgmt.batch
+Modules:
+  - ModuleName: azure_rm_batchaccount
+    Options: [{Name: name, Type: str}]
+    Undefined: !<tag:yaml.org,2002:js/undefined> ''
+  - ModuleName: azure_rm_batchaccount_info
+    Options: []
+'''
+
+CODE_MODEL = '''
+$id: '1'
+info: {$id: '2', title: Batch}
+schemas:
+  - {$id: '3', name: Account, parent: {$ref: '1'}}
+  - {$ref: '3'}
+'''
+
+
+def write(directory, name, text):
+    path = str(directory.join(name))
+    with open(path, 'w') as f:
+        f.write(text)
+    return path
+
+
+def test_load_writes_sidecar_only_when_asked(tmpdir):
+    path = write(tmpdir, 'batch-map.yml', MAP)
+    document = model_cache.load(path)
+    assert not os.path.exists(path + model_cache.CACHE_SUFFIX)
+    assert model_cache.load(path, write=True) == document
+    assert os.path.exists(path + model_cache.CACHE_SUFFIX)
+    assert model_cache.open_cache(path) is not None
+
+
+def test_map_round_trip(tmpdir):
+    path = write(tmpdir, 'batch-map.yml', MAP)
+    model_cache.load(path, write=True)
+    document = model_cache.load(path)
+    assert [module['ModuleName'] for module in document['Modules']] == ['azure_rm_batchaccount',
+                                                                       'azure_rm_batchaccount_info']
+    assert document['Modules'][0]['Undefined'] is None
+    assert model_cache.load_module(path, 'azure_rm_batchaccount_info') == dict(ModuleName='azure_rm_batchaccount_info',
+                                                                                Options=[])
+    assert model_cache.load_module(path, 'azure_rm_other') is None
+    assert model_cache.load_service(path) == dict(CliName='batch', Namespace='azure.mgmt.batch', Modules=None)
+
+
+def test_stale_sidecar_is_not_used(tmpdir):
+    path = write(tmpdir, 'batch-map.yml', MAP)
+    model_cache.load(path, write=True)
+    write(tmpdir, 'batch-map.yml', MAP.replace('CliName: batch', 'CliName: other'))
+    assert model_cache.open_cache(path) is None
+    assert model_cache.load(path)['CliName'] == 'other'
+    assert model_cache.load_service(path)['CliName'] == 'other'
+    assert model_cache.open_cache(path) is not None
+
+
+def test_code_model_round_trip(tmpdir):
+    path = write(tmpdir, 'batch-input.yml', CODE_MODEL)
+    model_cache.load(path, write=True)
+    model = model_cache.load(path)
+    assert isinstance(model, code_model.ModelObject)
+    account = model['schemas'][0]
+    assert model['schemas'][1] is account
+    assert account['parent'] is model
+    assert model['info']['title'] == 'Batch'
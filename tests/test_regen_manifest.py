@@ -0,0 +1,80 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import os
+
+import pytest
+
+import model_cache
+import regen_manifest
+import render_pool
+
+
+MAP = '''
+CliName: batch
+Modules:
+  - ModuleName: azure_rm_batchaccount
+    Options: [{Name: name}]
+  - ModuleName: azure_rm_batchaccount_info
+    Options: []
+'''
+
+
+def empty_manifest(generated):
+    return regen_manifest.load_manifest(str(generated.join('missing.json')))
+
+
+@pytest.fixture
+def generated(tmpdir, monkeypatch):
+    monkeypatch.setattr(regen_manifest, 'GENERATED_DIR', str(tmpdir))
+    tmpdir.mkdir('intermediate').join('batch-map.yml').write(MAP)
+    for name in ['azure_rm_batchaccount', 'azure_rm_batchaccount_info']:
+        tmpdir.join('intermediate').ensure_dir('ansible-module-rest').join(name + '.py').write(name)
+    tmpdir.ensure_dir('azure-cli', 'batch').join('commands.py').write('commands')
+    return tmpdir
+
+
+def test_plan_of_empty_manifest_renders_everything(generated):
+    manifest = empty_manifest(generated)
+    result = regen_manifest.plan(manifest, '1')
+    assert result['modules'] == dict(new=['azure_rm_batchaccount', 'azure_rm_batchaccount_info'], changed=[], removed=[])
+    assert result['render'] == ['azure-cli/batch/commands.py',
+                                'intermediate/ansible-module-rest/azure_rm_batchaccount.py',
+                                'intermediate/ansible-module-rest/azure_rm_batchaccount_info.py']
+    assert not os.path.exists(str(generated.join('intermediate', 'batch-map.yml' + model_cache.CACHE_SUFFIX)))
+
+
+def test_update_then_plan(generated):
+    manifest = regen_manifest.update(empty_manifest(generated), '1')
+    assert sorted(manifest['modules']) == ['azure_rm_batchaccount', 'azure_rm_batchaccount_info']
+    assert manifest['outputs']['azure-cli/batch/commands.py']['sources'] == ['batch-map.yml']
+    assert regen_manifest.plan(manifest, '1') == dict(modules=dict(new=[], changed=[], removed=[]),
+                                                      render=[], modified=[], missing=[])
+
+    generated.join('intermediate', 'ansible-module-rest', 'azure_rm_batchaccount.py').write('edited')
+    generated.join('intermediate', 'ansible-module-rest', 'azure_rm_batchaccount_info.py').remove()
+    result = regen_manifest.plan(manifest, '1')
+    assert result['modified'] == ['intermediate/ansible-module-rest/azure_rm_batchaccount.py']
+    assert result['missing'] == ['intermediate/ansible-module-rest/azure_rm_batchaccount_info.py']
+
+    generated.join('intermediate', 'batch-map.yml').write(MAP.replace('[{Name: name}]', '[]'))
+    result = regen_manifest.plan(manifest, '1')
+    assert result['modules'] == dict(new=[], changed=['azure_rm_batchaccount'], removed=[])
+    assert regen_manifest.plan(manifest, '2')['modules']['changed'] == ['azure_rm_batchaccount',
+                                                                        'azure_rm_batchaccount_info']
+
+
+def test_update_of_some_modules_keeps_map_stale(generated):
+    manifest = regen_manifest.update(empty_manifest(generated), '1', set(['azure_rm_batchaccount']))
+    assert sorted(manifest['modules']) == ['azure_rm_batchaccount']
+    assert manifest['maps']['batch']['sha256'] is None
+    assert regen_manifest.plan(manifest, '1')['modules']['new'] == ['azure_rm_batchaccount_info']
+
+
+def test_render_check_writes_no_sidecars(generated):
+    jobs, services = render_pool.collect_jobs(check=True)
+    path = str(generated.join('intermediate', 'batch-map.yml'))
+    assert jobs == [(path, 0, 'azure_rm_batchaccount'), (path, 1, 'azure_rm_batchaccount_info')]
+    assert render_pool.render(jobs, services, [], processes=1, check=True) == []
+    assert not os.path.exists(path + model_cache.CACHE_SUFFIX)
@@ -0,0 +1,84 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import json
+
+import pytest
+
+pytest.importorskip('msrestazure')
+rest_ext = pytest.importorskip('ansible.module_utils.azure_rm_common_rest_ext')
+
+
+RESOURCE_URL = '/subscriptions/sub/resourceGroups/rg/providers/Microsoft.Test/things/thing'
+ASYNC_URL = 'https://management.azure.com/operations/op?api-version=x'
+LOCATION_URL = 'https://management.azure.com/operationResults/op?api-version=x'
+
+
+class Response(object):
+    def __init__(self, status_code, body=None, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = json.dumps(body) if body is not None else ''
+
+
+class ScriptedClient(rest_ext.GenericRestClientExt):
+    '''Answers requests with responses by url, records urls requested.'''
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.requested = []
+        self.lro_polls = 0
+        self.throttled = 0
+        self.throttle = None
+        self.cache = None
+
+    def send(self, url, method, query_parameters, header_parameters, body, expected_status_codes):
+        self.requested.append(url)
+        return self.responses[url]
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(rest_ext.time, 'sleep', lambda seconds: None)
+
+
+def wait(client, method, headers):
+    return client.wait_for_completion(RESOURCE_URL, method, {'api-version': 'x'}, {}, Response(202, None, headers), 60, 1)
+
+
+def test_async_put_gets_resource():
+    client = ScriptedClient({ASYNC_URL: Response(200, {'status': 'Succeeded'}),
+                             RESOURCE_URL: Response(200, {'id': RESOURCE_URL})})
+    response = wait(client, 'PUT', {'Azure-AsyncOperation': ASYNC_URL, 'Location': LOCATION_URL})
+    assert client.requested == [ASYNC_URL, RESOURCE_URL]
+    assert json.loads(response.text) == {'id': RESOURCE_URL}
+
+
+def test_async_post_gets_location():
+    client = ScriptedClient({ASYNC_URL: Response(200, {'status': 'Succeeded'}),
+                             LOCATION_URL: Response(200, {'result': 1})})
+    response = wait(client, 'POST', {'Azure-AsyncOperation': ASYNC_URL, 'Location': LOCATION_URL})
+    assert client.requested == [ASYNC_URL, LOCATION_URL]
+    assert json.loads(response.text) == {'result': 1}
+
+
+def test_async_delete_gets_location():
+    client = ScriptedClient({ASYNC_URL: Response(200, {'status': 'Succeeded'}),
+                             LOCATION_URL: Response(204)})
+    wait(client, 'DELETE', {'Azure-AsyncOperation': ASYNC_URL, 'Location': LOCATION_URL})
+    assert client.requested == [ASYNC_URL, LOCATION_URL]
+
+
+def test_async_delete_without_location_doesnt_get_resource():
+    client = ScriptedClient({ASYNC_URL: Response(200, {'status': 'Succeeded'})})
+    response = wait(client, 'DELETE', {'Azure-AsyncOperation': ASYNC_URL})
+    assert client.requested == [ASYNC_URL]
+    assert json.loads(response.text) == {'status': 'Succeeded'}
+
+
+def test_failed_async_operation_raises():
+    client = ScriptedClient({ASYNC_URL: Response(200, {'status': 'Failed'})})
+    with pytest.raises(rest_ext.CloudError):
+        wait(client, 'DELETE', {'Azure-AsyncOperation': ASYNC_URL})
+    assert client.requested == [ASYNC_URL]
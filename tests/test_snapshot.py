@@ -0,0 +1,53 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from azure_rm_common_snapshot import StateSnapshot, get_resource_type, is_child_type
+
+
+ACCOUNT = '/subscriptions/sub/resourceGroups/rg/providers/Microsoft.Batch/batchAccounts/account'
+NAMESPACE = '/subscriptions/sub/resourceGroups/rg/providers/Microsoft.ServiceBus/namespaces/namespace'
+
+
+def create_snapshot(resources, resource_types=None, resource_groups=None):
+    return StateSnapshot(dict(resources=dict((resource['id'].lower(), resource) for resource in resources),
+                              subscriptions=['SUB'],
+                              resource_groups=resource_groups,
+                              resource_types=resource_types))
+
+
+def test_resource_types():
+    assert get_resource_type(ACCOUNT + '/pools/pool') == 'Microsoft.Batch/batchAccounts/pools'
+    assert not is_child_type('Microsoft.Batch/batchAccounts')
+    assert is_child_type('Microsoft.Batch/batchAccounts/pools')
+
+
+def test_exported_types_are_covered():
+    account = dict(id=ACCOUNT, type='Microsoft.Batch/batchAccounts')
+    snapshot = create_snapshot([account], ['Microsoft.Batch/batchAccounts', 'Microsoft.ServiceBus/namespaces'])
+    assert snapshot.get(ACCOUNT.upper()) == account
+    assert snapshot.get(NAMESPACE) is False
+    assert snapshot.get('/subscriptions/other' + ACCOUNT[len('/subscriptions/sub'):]) is None
+
+
+def test_child_types_without_resources_are_not_covered():
+    snapshot = create_snapshot([dict(id=ACCOUNT, type='Microsoft.Batch/batchAccounts')],
+                               ['Microsoft.Batch/batchAccounts', 'Microsoft.Batch/batchAccounts/pools',
+                                'Microsoft.ServiceBus/namespaces/topics'])
+    assert snapshot.get(ACCOUNT + '/pools/pool') is None
+    assert snapshot.get(NAMESPACE + '/topics/topic') is None
+
+
+def test_child_types_in_resource_graph_are_covered():
+    database = dict(id='/subscriptions/sub/resourceGroups/rg/providers/Microsoft.Sql/servers/server/databases/db',
+                    type='microsoft.sql/servers/databases')
+    snapshot = create_snapshot([database])
+    assert snapshot.get(database['id']) == database
+    assert snapshot.get(database['id'][:-len('db')] + 'other') is False
+    assert snapshot.get(ACCOUNT) is None
+
+
+def test_resource_groups_are_covered():
+    snapshot = create_snapshot([dict(id=ACCOUNT, type='Microsoft.Batch/batchAccounts')], resource_groups=['RG'])
+    assert snapshot.get(ACCOUNT.replace('/rg/', '/other/')) is None
+    assert snapshot.get(ACCOUNT + 'other') is False
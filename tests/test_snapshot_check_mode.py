@@ -0,0 +1,78 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import copy
+import importlib.util
+import os
+
+import pytest
+
+pytest.importorskip('msrestazure')
+pytest.importorskip('ansible.module_utils.azure_rm_common_ext')
+snapshot = pytest.importorskip('ansible.module_utils.azure_rm_common_snapshot')
+
+
+GENERATED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'generated')
+MODULE_PATHS = [os.path.join(GENERATED_DIR, 'intermediate', 'ansible-module-rest', 'azure_rm_healthcareapisservice.py'),
+                os.path.join(GENERATED_DIR, 'ansible-collection', 'healthcareapisservice.py')]
+SERVICE_ID = '/subscriptions/sub/resourceGroups/rg/providers/Microsoft.HealthcareApis/services/service'
+OPTIONS = dict(resource_group='rg', name='service', kind='fhir', location='westus', access_policies_object_id='object',
+               state='present')
+
+
+class NoRequests(object):
+    def query(self, *args, **kwargs):
+        raise AssertionError('resource read from Azure instead of the snapshot')
+
+
+def create_module(path, monkeypatch):
+    spec = importlib.util.spec_from_file_location(os.path.basename(path)[:-len('.py')], path)
+    source = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(source)
+    # AzureRMModuleBase.__init__() parses arguments and connects to Azure
+    monkeypatch.setattr(source.AzureRMModuleBaseExt, '__init__', lambda self, **kwargs: None)
+    module = source.AzureRMServices()
+    module.check_mode = True
+    module.azure_auth = type('AzureAuth', (), dict(subscription_id='sub'))()
+    module.module = type('AnsibleModule', (), dict(warn=lambda self, msg: None))()
+    module.get_mgmt_svc_client = lambda client_type, base_url: NoRequests()
+    module._cloud_environment = type('CloudEnvironment', (), dict(endpoints=type('Endpoints', (), dict(resource_manager=''))))
+    module.get_resource_group = lambda name: type('ResourceGroup', (), dict(location='westus'))
+
+    def fail(msg, **kwargs):
+        raise AssertionError(msg)
+
+    module.fail = fail
+    module.log = lambda msg: None
+    return module
+
+
+@pytest.mark.parametrize('path', MODULE_PATHS)
+def test_check_mode_of_unchanged_resource_from_snapshot(path, monkeypatch, tmpdir):
+    module = create_module(path, monkeypatch)
+    kwargs = dict((option, None) for option in module.module_arg_spec)
+    kwargs.update(OPTIONS, state_snapshot=str(tmpdir.join('snapshot.json')))
+    # Resource Graph row of the service as the module would create it, without etag
+    service = dict((option, value) for option, value in OPTIONS.items() if not hasattr(module, option))
+    module.arg_spec.inflate(service, module.normalize_resource_id)
+    service.update(id=SERVICE_ID, name='service', type='Microsoft.HealthcareApis/services', tags={})
+    snapshot.write_snapshot(kwargs['state_snapshot'], [copy.deepcopy(service)], ['sub'], None,
+                            ['Microsoft.HealthcareApis/services'])
+
+    results = module.exec_module(**kwargs)
+    assert results['changed'] is False
+    assert [change for change in results['compare'] if change['updatable']] == []
+    assert results['id'] == SERVICE_ID
+    assert results['properties'] == service['properties']
+    assert results['etag'] is None
+
+
+@pytest.mark.parametrize('path', MODULE_PATHS)
+def test_unset_url_parameter_fails_module(path, monkeypatch):
+    module = create_module(path, monkeypatch)
+    kwargs = dict((option, None) for option in module.module_arg_spec)
+    kwargs.update(OPTIONS, resource_group=None)
+
+    with pytest.raises(AssertionError, match='Parameters resource_group of url .* are not set'):
+        module.exec_module(**kwargs)
@@ -0,0 +1,83 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+import glob
+import io
+import os
+import re
+
+import pytest
+
+from azure_rm_common_url import build_url, URL_PLACEHOLDER_RE
+
+
+GENERATED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'generated')
+MODULES = sorted(glob.glob(os.path.join(GENERATED_DIR, 'intermediate', 'ansible-module-rest', '*.py')) +
+                 glob.glob(os.path.join(GENERATED_DIR, 'ansible-collection', '*.py')))
+BUILD_URL_RE = re.compile(r"build_url\('([^']*)'((?:,\s*\w+=[^,)]+)*)\)")
+KEYWORD_RE = re.compile(r'(\w+)=')
+ATTRIBUTE_RE = re.compile(r'\w+=self\.(\w+)')
+INIT_RE = re.compile(r'\n    def __init__\(self\):\n(.*?)\n    def ', re.S)
+ASSIGNMENT_RE = re.compile(r'^        self\.(\w+) = ', re.M)
+TEMPLATE = '/subscriptions/{{ subscription_id }}/resourceGroups/{{ resource_group }}/providers/Microsoft.Test/things/{{ name }}'
+
+
+def test_parameters_are_single_encoded_segments():
+    assert build_url(TEMPLATE, subscription_id='sub', resource_group='my group', name='a/b?c') == \
+        '/subscriptions/sub/resourceGroups/my%20group/providers/Microsoft.Test/things/a%2Fb%3Fc'
+
+
+def test_repeated_placeholder_gets_same_value():
+    assert build_url('/{{ name }}/children/{{ name }}', name='x') == '/x/children/x'
+
+
+def test_values_are_converted_to_strings():
+    assert build_url('/things/{{ count }}', count=3) == '/things/3'
+
+
+def test_missing_parameter():
+    with pytest.raises(ValueError, match='resource_group'):
+        build_url(TEMPLATE, subscription_id='sub', resource_group=None, name='thing')
+    with pytest.raises(ValueError, match='name'):
+        build_url(TEMPLATE, subscription_id='sub', resource_group='rg')
+
+
+def test_unknown_parameter():
+    with pytest.raises(ValueError, match='location'):
+        build_url(TEMPLATE, subscription_id='sub', resource_group='rg', name='thing', location='westus')
+
+
+@pytest.mark.parametrize('path', MODULES, ids=os.path.basename)
+def test_modules_bind_every_placeholder(path):
+    with io.open(path, encoding='utf-8') as f:
+        source = f.read()
+    for match in BUILD_URL_RE.finditer(source):
+        placeholders = set(URL_PLACEHOLDER_RE.findall(match.group(1)))
+        assert set(KEYWORD_RE.findall(match.group(2))) == placeholders, match.group(1)
+
+
+def read_module(path):
+    with io.open(path, encoding='utf-8') as f:
+        return f.read().replace('\r', '')
+
+
+@pytest.mark.parametrize('path', MODULES, ids=os.path.basename)
+def test_modules_bind_assigned_attributes(path):
+    source = read_module(path)
+    init = INIT_RE.search(source)
+    # subscription_id is a property of AzureRMModuleBase
+    assigned = set(ASSIGNMENT_RE.findall(init.group(1) if init else '')) | set(['subscription_id'])
+    for match in BUILD_URL_RE.finditer(source):
+        unassigned = set(ATTRIBUTE_RE.findall(match.group(2))) - assigned
+        assert not unassigned, (match.group(1), sorted(unassigned))
+
+
+@pytest.mark.parametrize('path', MODULES, ids=os.path.basename)
+def test_modules_fail_on_url_errors(path):
+    source = read_module(path)
+    for match in BUILD_URL_RE.finditer(source):
+        before = source[:match.start()].split('\n')
+        after = source[match.end():].split('\n', 3)
+        assert before[-2].strip() == 'try:', match.group(1)
+        assert [line.strip() for line in after[1:3]] == ['except ValueError as exc:', 'self.fail(str(exc))'], match.group(1)
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+'''
+Runs generated modules against fake ARM served by tools/fake_arm.py.
+
+Tasks of example playbooks in generated/intermediate/examples_rrm are run one by one,
+each as separate module process like Ansible does, with variables of the playbook
+substituted. Every module found in examples is run from REST and SDK families, so
+both can be compared on the same requests.
+
+Ansible and Azure SDK for Python must be installed, modules use module_utils of
+installed Ansible extended with generated/module_utils.
+
+For every task wall time, number of requests, bytes sent and received, number of
+long running operation polls and throttled requests are reported, and summed per
+module and family at the end. With --output results are also written as JSON, so
+runs can be compared.
+
+usage: benchmark.py [--family rest] [--filter REGEX] [--repeat 1] [--output FILE] [fake_arm options]
+'''
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import argparse
+import glob
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+import yaml
+
+import fake_arm
+
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'generated')
+MODULE_UTILS_DIR = os.path.join(ROOT, 'module_utils')
+EXAMPLES_DIR = os.path.join(ROOT, 'intermediate', 'examples_rrm')
+FAMILIES = {
+    'rest': os.path.join(ROOT, 'intermediate', 'ansible-module-rest'),
+    'sdk': os.path.join(ROOT, 'intermediate', 'ansible-module-sdk'),
+}
+VARIABLE_RE = re.compile(r'\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}')
+
+# runs module in its own interpreter, with generated module_utils on ansible.module_utils path,
+# arguments are module path, module_utils directory and arguments file read by AnsibleModule
+BOOTSTRAP = '''
+import sys, runpy
+import ansible.module_utils
+ansible.module_utils.__path__.append(sys.argv[2])
+sys.argv = [sys.argv[1], sys.argv[3]]
+runpy.run_path(sys.argv[0], run_name='__main__')
+'''
+
+ENVIRONMENT = {
+    'AZURE_SUBSCRIPTION_ID': '00000000-0000-0000-0000-000000000000',
+    'AZURE_CLIENT_ID': '00000000-0000-0000-0000-000000000000',
+    'AZURE_SECRET': 'secret',
+    'AZURE_TENANT': '00000000-0000-0000-0000-000000000000',
+    'OAUTHLIB_INSECURE_TRANSPORT': '1',
+    'ANSIBLE_AZURE_AUTH_SOURCE': 'env',
+}
+
+
+def substitute(value, variables):
+    if isinstance(value, dict):
+        return dict((key, substitute(item, variables)) for key, item in value.items())
+    if isinstance(value, list):
+        return [substitute(item, variables) for item in value]
+    if isinstance(value, str):
+        match = VARIABLE_RE.match(value.strip())
+        if match and match.group(0) == value.strip():
+            # whole value is variable, keep type of the variable
+            return substitute(variables.get(match.group(1), match.group(1)), variables)
+        return VARIABLE_RE.sub(lambda m: str(variables.get(m.group(1), m.group(1))), value)
+    return value
+
+
+def load_tasks(pattern):
+    '''Returns list of (playbook, task name, module, args) found in example playbooks.'''
+    tasks = []
+    for path in sorted(glob.glob(os.path.join(EXAMPLES_DIR, '*.yml'))):
+        try:
+            with open(path) as f:
+                plays = yaml.safe_load(f)
+        except yaml.YAMLError:
+            print('skipped {0}: not valid YAML'.format(os.path.basename(path)), file=sys.stderr)
+            continue
+        for play in plays or []:
+            variables = play.get('vars') or {}
+            for task in play.get('tasks') or []:
+                for key, args in task.items():
+                    if not key.startswith('azure_rm_') or not isinstance(args, dict):
+                        continue
+                    if pattern and not re.search(pattern, key):
+                        continue
+                    tasks.append((os.path.basename(path), task.get('name', key), key, substitute(args, variables)))
+    return tasks
+
+
+def run_module(path, args, url, timeout):
+    '''Runs module and returns tuple of its exit code, result and wall time.'''
+    handle, args_path = tempfile.mkstemp(suffix='.json')
+    with os.fdopen(handle, 'w') as f:
+        json.dump({'ANSIBLE_MODULE_ARGS': args}, f)
+    environment = dict(os.environ, AZURE_CLOUD_ENVIRONMENT=url, **ENVIRONMENT)
+    command = [sys.executable, '-c', BOOTSTRAP, path, MODULE_UTILS_DIR, args_path]
+    start = time.time()
+    try:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=environment)
+        stdout, stderr = process.communicate(timeout=timeout)
+        code = process.returncode
+    except subprocess.TimeoutExpired:
+        process.kill()
+        stdout, stderr = process.communicate()
+        code = None
+    elapsed = time.time() - start
+    os.remove(args_path)
+    try:
+        result = json.loads(stdout.decode('utf-8'))
+    except ValueError:
+        result = dict(failed=True, msg=(stderr or stdout).decode('utf-8', 'replace').strip().split('\n')[-1])
+    return code, result, elapsed
+
+
+def summarize(rows, key):
+    totals = {}
+    for row in rows:
+        total = totals.setdefault(row[key], dict(tasks=0, failed=0, time=0.0, requests=0, bytes_in=0, bytes_out=0, polls=0, throttled=0))
+        total['tasks'] += 1
+        total['failed'] += 1 if row['failed'] else 0
+        for field in ['time', 'requests', 'bytes_in', 'bytes_out', 'polls', 'throttled']:
+            total[field] += row[field]
+    return totals
+
+
+def print_table(title, totals):
+    print('\n{0:<56} {1:>5} {2:>6} {3:>9} {4:>8} {5:>10} {6:>10} {7:>6} {8:>5}'.format(
+        title, 'tasks', 'failed', 'time', 'requests', 'bytes in', 'bytes out', 'polls', '429'))
+    for name in sorted(totals):
+        total = totals[name]
+        print('{0:<56} {1:>5} {2:>6} {3:>9.3f} {4:>8} {5:>10} {6:>10} {7:>6} {8:>5}'.format(
+            name, total['tasks'], total['failed'], total['time'], total['requests'], total['bytes_in'],
+            total['bytes_out'], total['polls'], total['throttled']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark generated modules against fake ARM.')
+    parser.add_argument('--family', choices=sorted(FAMILIES), action='append', help='module family to run, all by default')
+    parser.add_argument('--filter', help='regular expression selecting modules to run')
+    parser.add_argument('--repeat', type=int, default=1, help='number of runs of every task')
+    parser.add_argument('--timeout', type=int, default=300, help='timeout of single module run in seconds')
+    parser.add_argument('--output', help='write results to JSON file')
+    fake_arm.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    tasks = load_tasks(args.filter)
+    server = fake_arm.FakeArmServer(fake_arm.create(args)).start()
+    rows = []
+    try:
+        for family in args.family or sorted(FAMILIES):
+            # every family starts from empty state
+            server.arm.resources.clear()
+            for playbook, name, module, module_args in tasks:
+                path = os.path.join(FAMILIES[family], module + '.py')
+                if not os.path.exists(path):
+                    continue
+                for i in range(args.repeat):
+                    server.arm.stats.reset()
+                    code, result, elapsed = run_module(path, module_args, server.url, args.timeout)
+                    stats = server.arm.stats.as_dict()
+                    rows.append(dict(family=family, module=module, playbook=playbook, task=name, time=elapsed,
+                                     failed=bool(code != 0 or result.get('failed')), msg=result.get('msg'),
+                                     changed=result.get('changed'), **stats))
+    finally:
+        server.stop()
+
+    for row in rows:
+        if row['failed']:
+            print('{0} {1} {2}: {3}'.format(row['family'], row['playbook'], row['task'], row['msg']), file=sys.stderr)
+    print_table('module', summarize([dict(row, name=row['family'] + ' ' + row['module']) for row in rows], 'name'))
+    print_table('family', summarize(rows, 'family'))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(rows, f, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
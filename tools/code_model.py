@@ -0,0 +1,301 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+'''
+Streaming loader of AutoRest code models (generated/intermediate/*-input.yml).
+
+Code models are object graphs serialized with $id on every object and {$ref: id}
+in place of objects serialized before. Instead of building the generic dict tree
+of the whole document and resolving references afterwards, load() builds the graph
+directly from YAML parser events:
+
+  - {$ref: id} resolves to the object with $id id as soon as it's parsed, objects
+    referenced from inside themselves are filled in once the document is parsed,
+  - objects with $id become ModelObject instances, with __slots__ for their keys
+    instead of a dict, one class is shared by all objects with the same keys,
+  - keys and short strings, like raw names, serialized names and enum values, are
+    interned, so every distinct string is kept once.
+
+Mappings without $id, like x-ms-examples, stay plain dicts. ModelObject is a read
+only mapping, so code reading models as dicts works with it unchanged.
+
+usage: code_model.py stats [--compare] FILE ...
+'''
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import argparse
+import gc
+import sys
+import time
+
+import yaml
+
+
+Parser = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# strings up to this length are interned, longer ones are mostly documentation
+INTERN_MAX_LENGTH = 64
+
+
+class ModelObject(object):
+    '''
+    Base of code model objects, read only mappings of keys to values. Subclasses
+    are created by model_class() for each distinct tuple of keys.
+    '''
+    __slots__ = ()
+    _keys = ()
+    _slots = {}
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, self._slots[key])
+        except KeyError:
+            raise KeyError(key)
+
+    def get(self, key, default=None):
+        slot = self._slots.get(key)
+        return default if slot is None else getattr(self, slot)
+
+    def __contains__(self, key):
+        return key in self._slots
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def keys(self):
+        return list(self._keys)
+
+    def values(self):
+        return [getattr(self, slot) for slot in self.__slots__]
+
+    def items(self):
+        return list(zip(self._keys, self.values()))
+
+    def __repr__(self):
+        return '<{0} $id={1}>'.format(self.get('$type') or 'ModelObject', self.get('$id'))
+
+    def __reduce__(self):
+        return restore_object, (self._keys,), tuple(self.values())
+
+    def __setstate__(self, values):
+        for slot, value in zip(self.__slots__, values):
+            setattr(self, slot, value)
+
+
+# classes of model objects, keyed by tuple of keys
+_model_classes = {}
+
+
+def model_class(keys):
+    cls = _model_classes.get(keys)
+    if cls is None:
+        slots = tuple('_{0}'.format(i) for i in range(len(keys)))
+        cls = type(str('ModelObject{0}'.format(len(_model_classes))), (ModelObject,),
+                   dict(__slots__=slots, _keys=keys, _slots=dict(zip(keys, slots))))
+        _model_classes[keys] = cls
+    return cls
+
+
+def restore_object(keys):
+    cls = model_class(keys)
+    return cls.__new__(cls)
+
+
+class Frame(object):
+    '''Mapping or sequence being parsed.'''
+    __slots__ = ('keys', 'values', 'result')
+
+    def __init__(self, is_mapping):
+        self.keys = [] if is_mapping else None
+        self.values = []
+        self.result = None
+
+
+class GraphBuilder(object):
+    '''Builds code model graph from YAML events.'''
+
+    def __init__(self):
+        self.resolver = yaml.resolver.Resolver()
+        self.constructor = yaml.constructor.SafeConstructor()
+        self.strings = {}
+        self.objects = {}
+        # references to objects not built yet, as (frame, index, id)
+        self.pending = []
+
+    def intern(self, value):
+        if len(value) > INTERN_MAX_LENGTH:
+            return value
+        return self.strings.setdefault(value, value)
+
+    def scalar(self, event):
+        tag = event.tag
+        if tag is None or tag == '!':
+            # resolver only gives other type than str to plain scalars starting with few characters
+            if not event.implicit[0] or event.value[:1] not in self.resolver.yaml_implicit_resolvers:
+                return self.intern(event.value)
+            tag = self.resolver.resolve(yaml.ScalarNode, event.value, event.implicit)
+        if tag == 'tag:yaml.org,2002:str':
+            return self.intern(event.value)
+        if tag == 'tag:yaml.org,2002:null':
+            return None
+        node = yaml.ScalarNode(tag, event.value, style=event.style)
+        return self.constructor.construct_object(node)
+
+    def add(self, frame, value):
+        if frame.keys is not None and len(frame.keys) == len(frame.values):
+            frame.keys.append(value)
+        else:
+            frame.values.append(value)
+
+    def close_mapping(self, frame, parent):
+        '''Returns object of mapping frame, or None if it's a reference still pending.'''
+        if frame.keys == ['$ref']:
+            reference = frame.values[0]
+            if reference in self.objects:
+                return self.objects[reference]
+            self.pending.append((parent, len(parent.values), reference))
+            return None
+        keys = tuple(frame.keys)
+        if '$id' in keys:
+            frame.result = model_class(keys)()
+            frame.result.__setstate__(frame.values)
+            self.objects[frame.result['$id']] = frame.result
+        else:
+            frame.result = dict(zip(keys, frame.values))
+        return frame.result
+
+    def build(self, events):
+        root = Frame(False)
+        stack = [root]
+        for event in events:
+            if isinstance(event, yaml.ScalarEvent):
+                self.add(stack[-1], self.scalar(event))
+            elif isinstance(event, yaml.MappingStartEvent):
+                stack.append(Frame(True))
+            elif isinstance(event, yaml.SequenceStartEvent):
+                stack.append(Frame(False))
+            elif isinstance(event, yaml.MappingEndEvent):
+                frame = stack.pop()
+                self.add(stack[-1], self.close_mapping(frame, stack[-1]))
+            elif isinstance(event, yaml.SequenceEndEvent):
+                frame = stack.pop()
+                frame.result = frame.values
+                self.add(stack[-1], frame.result)
+            elif isinstance(event, yaml.AliasEvent):
+                raise ValueError('aliases are not supported in code models')
+        for frame, index, reference in self.pending:
+            if reference not in self.objects:
+                raise ValueError('unresolved $ref {0}'.format(reference))
+            target = self.objects[reference]
+            if isinstance(frame.result, ModelObject):
+                setattr(frame.result, frame.result.__slots__[index], target)
+            elif isinstance(frame.result, dict):
+                frame.result[frame.keys[index]] = target
+            else:
+                frame.result[index] = target
+        return root.values[0] if root.values else None
+
+
+def load(path):
+    '''Returns code model at path as graph of ModelObject instances.'''
+    with open(path) as f:
+        return GraphBuilder().build(yaml.parse(f, Loader=Parser))
+
+
+def measure(function, path):
+    '''Returns result of function(path), seconds it took and peak of traced memory in bytes.'''
+    import tracemalloc
+    gc.collect()
+    tracemalloc.start()
+    start = time.time()
+    result = function(path)
+    elapsed = time.time() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def resolve_references(document):
+    '''
+    Replaces {$ref: id} objects in document with objects having the same $id, in place,
+    as done after loading with generic YAML loader.
+    '''
+    objects = {}
+    references = []
+    stack = [(None, None, document)]
+    while stack:
+        parent, key, value = stack.pop()
+        if isinstance(value, dict):
+            if '$ref' in value and len(value) == 1:
+                references.append((parent, key, value['$ref']))
+                continue
+            if '$id' in value:
+                objects[value['$id']] = value
+            stack.extend((value, k, v) for k, v in value.items())
+        elif isinstance(value, list):
+            stack.extend((value, i, v) for i, v in enumerate(value))
+    for parent, key, reference in references:
+        if reference not in objects:
+            raise ValueError('unresolved $ref {0}'.format(reference))
+        if parent is None:
+            return objects[reference]
+        parent[key] = objects[reference]
+    return document
+
+
+def generic_load(path):
+    with open(path) as f:
+        return resolve_references(yaml.load(f, Loader=Parser))
+
+
+def iter_objects(model):
+    '''Yields every ModelObject reachable from model once.'''
+    seen = set()
+    stack = [model]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, ModelObject):
+            if id(value) in seen:
+                continue
+            seen.add(id(value))
+            yield value
+            stack.extend(value.values())
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load AutoRest code models with streaming graph loader.')
+    subparsers = parser.add_subparsers(dest='command')
+    stats = subparsers.add_parser('stats', help='print load time, peak memory and number of objects')
+    stats.add_argument('files', nargs='+')
+    stats.add_argument('--compare', action='store_true', help='load with generic YAML loader too')
+    args = parser.parse_args(argv)
+
+    if args.command != 'stats':
+        parser.print_usage()
+        return 2
+    for path in args.files:
+        model, elapsed, peak = measure(load, path)
+        line = '{0}: {1:.2f}s, peak {2:.1f} MB, {3} objects of {4} classes'.format(
+            path, elapsed, peak / 1048576.0, sum(1 for obj in iter_objects(model)), len(_model_classes))
+        if args.compare:
+            del model
+            generic, generic_elapsed, generic_peak = measure(generic_load, path)
+            line += ', generic loader {0:.2f}s, peak {1:.1f} MB'.format(generic_elapsed, generic_peak / 1048576.0)
+        print(line)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
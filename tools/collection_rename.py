@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+'''
+Derives generated Ansible collection modules from generated REST modules.
+
+Collection modules only differ from REST modules in names of modules used in their
+documentation, so they are produced by a single pass over lines of REST modules
+instead of rendering them again. Only lines of DOCUMENTATION, EXAMPLES and RETURN
+strings are rewritten:
+
+  - module: azure_rm_batchpool          -> module: batchpool
+  - tasks azure_rm_batchpool:           -> azure.rm.batchpool:
+    azure_rm_batchpool_info:            -> azure.rm.batchpool.info:
+  - other names like M(azure_rm_batchpool) -> M(azure.rm.batchpool)
+
+Code is copied byte for byte, so module_utils imports keep their names.
+
+With --verify nothing is written, every collection module is compared with the one
+derived from its REST module, and modules which differ or miss their counterpart
+are reported.
+
+usage: collection_rename.py [--verify] [SOURCE [DESTINATION]]
+'''
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+
+
+GENERATED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'generated')
+REST_DIR = os.path.join(GENERATED_DIR, 'intermediate', 'ansible-module-rest')
+COLLECTION_DIR = os.path.join(GENERATED_DIR, 'ansible-collection')
+MODULE_PREFIX = 'azure_rm_'
+COLLECTION_PREFIX = b'azure.rm.'
+
+DOCSTRING_START_RE = re.compile(br"^(DOCUMENTATION|EXAMPLES|RETURN) = r?'''")
+MODULE_LINE_RE = re.compile(br'^module: azure_rm_')
+TASK_LINE_RE = re.compile(br'^(\s*)azure_rm_([a-z0-9_]+):')
+NAME_RE = re.compile(br'\bazure_rm_([a-z0-9_]+)\b')
+
+
+def collection_name(name):
+    '''Returns name of collection module file or module for REST one.'''
+    return name[len(MODULE_PREFIX):] if name.startswith(MODULE_PREFIX) else name
+
+
+def rename_task(match):
+    name = match.group(2)
+    if name.endswith(b'_info'):
+        name = name[:-len(b'_info')] + b'.info'
+    return match.group(1) + COLLECTION_PREFIX + name + b':'
+
+
+def rename_lines(lines):
+    '''Yields lines (bytes, with line endings) of REST module rewritten for the collection.'''
+    in_docstring = False
+    for line in lines:
+        if not in_docstring:
+            match = DOCSTRING_START_RE.match(line)
+            in_docstring = match is not None and b"'''" not in line[match.end():]
+        else:
+            if b"'''" in line:
+                in_docstring = False
+            if MODULE_LINE_RE.match(line):
+                line = b'module: ' + line[len(b'module: azure_rm_'):]
+            elif TASK_LINE_RE.match(line):
+                line = TASK_LINE_RE.sub(rename_task, line)
+            else:
+                line = NAME_RE.sub(lambda m: COLLECTION_PREFIX + m.group(1), line)
+        yield line
+
+
+def rename_file(path):
+    '''Returns collection module derived from REST module at path, as bytes.'''
+    with open(path, 'rb') as f:
+        return b''.join(rename_lines(f))
+
+
+def write_file(path, data):
+    '''Writes data to path atomically, unless it's there already. Returns True if written.'''
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    except (IOError, OSError):
+        pass
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp, 0o644)
+        os.rename(tmp, path)
+    except Exception:
+        os.remove(tmp)
+        raise
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Derive Ansible collection modules from REST modules.')
+    parser.add_argument('source', nargs='?', default=REST_DIR, help='directory with REST modules')
+    parser.add_argument('destination', nargs='?', default=COLLECTION_DIR, help='directory with collection modules')
+    parser.add_argument('--verify', action='store_true',
+                        help="don't write, exit with 1 if collection modules aren't derived from REST modules")
+    args = parser.parse_args(argv)
+
+    sources = sorted(filename for filename in os.listdir(args.source) if filename.endswith('.py'))
+    written = unchanged = 0
+    problems = []
+    for filename in sources:
+        data = rename_file(os.path.join(args.source, filename))
+        path = os.path.join(args.destination, collection_name(filename))
+        if not args.verify:
+            if write_file(path, data):
+                written += 1
+            else:
+                unchanged += 1
+            continue
+        if not os.path.exists(path):
+            problems.append('missing ' + collection_name(filename))
+            continue
+        with open(path, 'rb') as f:
+            if f.read() != data:
+                problems.append('differs ' + collection_name(filename))
+    derived = set(collection_name(filename) for filename in sources)
+    for filename in sorted(os.listdir(args.destination)):
+        if filename.endswith('.py') and filename not in derived:
+            problems.append('no REST module for ' + filename)
+
+    for line in problems:
+        print(line)
+    if args.verify:
+        print('{0} of {1} modules equivalent'.format(
+            len(sources) - len([p for p in problems if not p.startswith('no ')]), len(sources)))
+    else:
+        print('{0} modules written, {1} unchanged'.format(written, unchanged))
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
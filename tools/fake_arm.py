@@ -0,0 +1,382 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+'''
+Local stand-in for Azure Resource Manager, serving shapes of x-ms-examples found in
+generated/intermediate/*-input.yml.
+
+Resources created by PUT are kept in memory, so modules go through the same
+get / create / update / delete sequence as against ARM. Long running operations
+return Azure-AsyncOperation or Location headers (DELETE with --delete-async answers
+with Azure-AsyncOperation instead of Location) and stay in progress for a
+configurable number of polls, list responses are paged through nextLink, and every
+n-th request can be answered with 429. Server also answers cloud metadata and AAD
+token requests, so modules can be pointed at it with
+
+    AZURE_CLOUD_ENVIRONMENT=http://127.0.0.1:<port>
+    OAUTHLIB_INSECURE_TRANSPORT=1
+
+Counters of requests, bytes, polls and throttled requests are kept in stats.
+
+usage: fake_arm.py [--port 8080] [--lro-polls 2] [--page-size 10] [--list-items 25] [--throttle-every 0]
+                   [--delete-async]
+'''
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import argparse
+import copy
+import glob
+import itertools
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlparse, parse_qs
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlparse, parse_qs
+
+import model_cache
+
+
+INPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'generated', 'intermediate')
+RESOURCE_GRAPH_URL = '/providers/microsoft.resourcegraph/resources'
+RESOURCE_GROUP_RE = re.compile(r'^/subscriptions/([^/]+)/resourcegroups/([^/]+)$', re.I)
+OPERATIONS_PREFIX = '/_fake/operations/'
+PAGES_PREFIX = '/_fake/pages/'
+
+
+class Operation(object):
+    '''Operation of input file, matched by method and url template.'''
+
+    def __init__(self, method, template, long_running, pageable, responses):
+        self.method = method
+        self.template = template
+        self.long_running = long_running
+        self.pageable = pageable
+        # status code -> body, from the first example which has the status
+        self.responses = responses
+        self.regex = re.compile('^' + re.sub(r'\\\{[^}]+\\\}', '[^/]+', re.escape(template)) + '$', re.I)
+        # more literal segments first, so most specific template wins
+        self.specificity = len([part for part in template.split('/') if part and not part.startswith('{')])
+
+    def example(self, status_codes=('200', '201', '202', '204')):
+        for status in status_codes:
+            if status in self.responses:
+                return int(status), copy.deepcopy(self.responses[status])
+        return 200, None
+
+
+def load_operations(paths=None):
+    '''Loads operations from input files, returns them sorted from most specific template.'''
+    operations = []
+    for path in paths or sorted(glob.glob(os.path.join(INPUT_DIR, '*-input.yml'))):
+        document = model_cache.load(path)
+        for group in document.get('operations') or []:
+            for method in group.get('methods') or []:
+                extensions = method.get('extensions') or {}
+                responses = {}
+                for example in (extensions.get('x-ms-examples') or {}).values():
+                    for status, response in ((example or {}).get('responses') or {}).items():
+                        responses.setdefault(str(status), (response or {}).get('body'))
+                operations.append(Operation(method['httpMethod'].upper(),
+                                            method['url'],
+                                            bool(extensions.get('x-ms-long-running-operation')),
+                                            'x-ms-pageable' in extensions,
+                                            responses))
+    operations.sort(key=lambda operation: -operation.specificity)
+    return operations
+
+
+class Stats(object):
+    FIELDS = ['requests', 'bytes_in', 'bytes_out', 'polls', 'throttled', 'pages', 'errors']
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        for field in self.FIELDS:
+            setattr(self, field, 0)
+
+    def as_dict(self):
+        return dict((field, getattr(self, field)) for field in self.FIELDS)
+
+
+class FakeArm(object):
+    '''State of the fake server: operations, stored resources, pending operations and pages.'''
+
+    def __init__(self, operations, lro_polls=2, page_size=10, list_items=25, throttle_every=0, delete_async=False):
+        self.operations = operations
+        self.resource_templates = set(operation.template.lower() for operation in operations if operation.method == 'PUT')
+        self.lro_polls = lro_polls
+        self.page_size = page_size
+        self.list_items = list_items
+        self.throttle_every = throttle_every
+        self.delete_async = delete_async
+        self.resources = {}
+        self.pending = {}
+        self.pages = {}
+        self.stats = Stats()
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.base_url = None
+
+    def handle(self, method, url, body):
+        '''Returns tuple of status, headers and body (object serialized as JSON) of response.'''
+        parsed = urlparse(url)
+        path = parsed.path.rstrip('/') or '/'
+        query = dict((key, values[0]) for key, values in parse_qs(parsed.query).items())
+        with self.lock:
+            self.stats.requests += 1
+            if self.throttle_every and self.stats.requests % self.throttle_every == 0:
+                self.stats.throttled += 1
+                return 429, {'Retry-After': '0'}, error('TooManyRequests', 'Request was throttled')
+            status, headers, response = self._handle(method, path, query, body)
+            if status >= 400:
+                self.stats.errors += 1
+            return status, headers, response
+
+    def _handle(self, method, path, query, body):
+        if path == '/metadata/endpoints':
+            return 200, {}, self.metadata()
+        if path.endswith('/oauth2/token'):
+            return 200, {}, dict(access_token='fake', token_type='Bearer', expires_in='3600',
+                                 expires_on=str(int(time.time()) + 3600), resource=self.base_url)
+        if path.startswith(OPERATIONS_PREFIX):
+            return self.operation_status(path[len(OPERATIONS_PREFIX):])
+        if path.startswith(PAGES_PREFIX):
+            return self.page(path[len(PAGES_PREFIX):])
+        if path.lower() == RESOURCE_GRAPH_URL:
+            return self.resource_graph(body or {})
+        match = RESOURCE_GROUP_RE.match(path)
+        if match:
+            return 200, {}, dict(id=path, name=match.group(2), location='westus', properties={'provisioningState': 'Succeeded'})
+
+        operation = self.match(method, path)
+        if operation is None:
+            return 404, {}, error('NotFound', 'No operation matches {0} {1}'.format(method, path))
+        if method == 'GET':
+            return self.get(operation, path, query)
+        if method in ['PUT', 'PATCH']:
+            return self.put(operation, method, path, body)
+        if method == 'DELETE':
+            return self.delete(operation, path)
+        return self.post(operation, path)
+
+    def match(self, method, path):
+        for operation in self.operations:
+            if operation.method == method and operation.regex.match(path):
+                return operation
+        return None
+
+    def metadata(self):
+        return dict(galleryEndpoint=self.base_url,
+                    graphEndpoint=self.base_url,
+                    portalEndpoint=self.base_url,
+                    authentication=dict(loginEndpoint=self.base_url, audiences=[self.base_url]))
+
+    def get(self, operation, path, query):
+        if operation.template.lower() in self.resource_templates:
+            resource = self.resources.get(path.lower())
+            if resource is None:
+                return 404, {}, error('ResourceNotFound', 'Resource {0} was not found'.format(path))
+            return 200, {}, resource
+        status, response = operation.example()
+        if isinstance(response, dict) and isinstance(response.get('value'), list):
+            return self.first_page(response, int(query.get('$top') or self.page_size))
+        return status, {}, response
+
+    def put(self, operation, method, path, body):
+        status, example = operation.example()
+        resource = self.resources.get(path.lower())
+        if resource is None and method == 'PATCH':
+            return 404, {}, error('ResourceNotFound', 'Resource {0} was not found'.format(path))
+        resource = merge(merge(example if isinstance(example, dict) else {}, resource or {}), body or {})
+        resource['id'] = path
+        resource['name'] = path.split('/')[-1]
+        if isinstance(resource.get('properties'), dict) or 'properties' not in resource:
+            resource.setdefault('properties', {})['provisioningState'] = 'Succeeded'
+        self.resources[path.lower()] = resource
+        if operation.long_running and self.lro_polls:
+            return 201, {'Azure-AsyncOperation': self.start_operation('async')}, resource
+        return 200, {}, resource
+
+    def delete(self, operation, path):
+        if self.resources.pop(path.lower(), None) is None:
+            return 204, {}, None
+        if operation.long_running and self.lro_polls:
+            if self.delete_async:
+                return 202, {'Azure-AsyncOperation': self.start_operation('async')}, None
+            return 202, {'Location': self.start_operation('location')}, None
+        return 200, {}, None
+
+    def post(self, operation, path):
+        status, response = operation.example()
+        if operation.long_running and self.lro_polls:
+            return 202, {'Location': self.start_operation('location', response)}, None
+        return status, {}, response
+
+    def resource_graph(self, body):
+        items = [dict(resource, type=resource.get('type', '').lower()) for resource in self.resources.values()]
+        return 200, {}, dict(totalRecords=len(items), count=len(items), data=items)
+
+    def start_operation(self, kind, result=None):
+        operation_id = str(next(self.ids))
+        self.pending[operation_id] = dict(kind=kind, polls=self.lro_polls, result=result)
+        return self.base_url + OPERATIONS_PREFIX + operation_id
+
+    def operation_status(self, operation_id):
+        self.stats.polls += 1
+        operation = self.pending.get(operation_id)
+        if operation is None:
+            return 404, {}, error('NotFound', 'Operation {0} was not found'.format(operation_id))
+        operation['polls'] -= 1
+        done = operation['polls'] <= 0
+        if operation['kind'] == 'async':
+            return 200, {}, dict(status='Succeeded' if done else 'InProgress')
+        if done:
+            return 200, {}, operation['result']
+        return 202, {'Location': self.base_url + OPERATIONS_PREFIX + operation_id, 'Retry-After': '0'}, None
+
+    def first_page(self, response, page_size):
+        items = response['value'] or [{}]
+        value = []
+        for i in range(self.list_items):
+            item = copy.deepcopy(items[i % len(items)])
+            if isinstance(item, dict) and 'name' in item:
+                item['name'] = '{0}{1}'.format(item['name'], i)
+            value.append(item)
+        return self.next_page(dict(response, value=value), page_size)
+
+    def next_page(self, response, page_size):
+        self.stats.pages += 1
+        page = dict(response, value=response['value'][:page_size])
+        page.pop('nextLink', None)
+        rest = response['value'][page_size:]
+        if rest:
+            token = str(next(self.ids))
+            self.pages[token] = (dict(response, value=rest), page_size)
+            page['nextLink'] = self.base_url + PAGES_PREFIX + token
+        return 200, {}, page
+
+    def page(self, token):
+        if token not in self.pages:
+            return 404, {}, error('NotFound', 'Page {0} was not found'.format(token))
+        return self.next_page(*self.pages.pop(token))
+
+
+def merge(target, source):
+    result = dict(target)
+    for key, value in source.items():
+        if isinstance(value, dict) and isinstance(result.get(key), dict):
+            value = merge(result[key], value)
+        result[key] = value
+    return result
+
+
+def error(code, message):
+    return {'error': {'code': code, 'message': message}}
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def make_handler(arm):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_request(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            raw = self.rfile.read(length) if length else b''
+            body = None
+            if raw:
+                try:
+                    body = json.loads(raw.decode('utf-8'))
+                except ValueError:
+                    # token requests are form encoded
+                    body = None
+            status, headers, response = arm.handle(self.command, self.path, body)
+            data = json.dumps(response).encode('utf-8') if response is not None else b''
+            with arm.lock:
+                arm.stats.bytes_in += len(raw)
+                arm.stats.bytes_out += len(data)
+            self.send_response(status)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = do_PUT = do_PATCH = do_POST = do_DELETE = do_HEAD = do_request
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+class FakeArmServer(object):
+    '''Fake ARM served on a background thread of the current process.'''
+
+    def __init__(self, arm, host='127.0.0.1', port=0):
+        self.arm = arm
+        self.server = ThreadingHTTPServer((host, port), make_handler(arm))
+        self.url = 'http://{0}:{1}'.format(host, self.server.server_address[1])
+        arm.base_url = self.url
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def add_arguments(parser):
+    parser.add_argument('--lro-polls', type=int, default=2, help='polls before long running operation completes')
+    parser.add_argument('--page-size', type=int, default=10, help='items per page when $top is not specified')
+    parser.add_argument('--list-items', type=int, default=25, help='items returned by list operations')
+    parser.add_argument('--throttle-every', type=int, default=0, help='answer every n-th request with 429')
+    parser.add_argument('--delete-async', action='store_true',
+                        help='answer long running DELETE with Azure-AsyncOperation instead of Location')
+
+
+def create(args):
+    return FakeArm(load_operations(), args.lro_polls, args.page_size, args.list_items, args.throttle_every,
+                   args.delete_async)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve fake Azure Resource Manager.')
+    parser.add_argument('--port', type=int, default=8080)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    server = FakeArmServer(create(args), port=args.port)
+    print('serving {0} operations on {1}'.format(len(server.arm.operations), server.url))
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
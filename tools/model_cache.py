@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+'''
+Binary cache of generator artifacts in generated/intermediate.
+
+Code models (*-input.yml) and module maps (*-map-pre.yml, *-map-unflattened.yml,
+*-map.yml) are multi-megabyte YAML documents which are slow to parse. build writes
+<file>.cache sidecar next to a document, which load() uses instead of the YAML as
+long as SHA-256 of the YAML matches the one recorded in the sidecar. Sidecars are
+only written when asked to, so tools which only read documents, like fake_arm.py,
+render_pool.py --check and regen_manifest.py plan, don't leave them behind.
+
+Code models are loaded by tools/code_model.py, which resolves {$ref: id} objects
+to the objects with the same $id, so the sidecar holds the object graph of compact
+ModelObject instances with shared objects.
+
+Every module of a map is pickled separately and the sidecar header indexes them by
+ModuleName, so load_module() reads and unpickles a single module only, and
+load_service() the rest of the map.
+
+usage: model_cache.py build [FILE ...]
+       model_cache.py show FILE [--module NAME]
+'''
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import pickle
+import struct
+import sys
+import tempfile
+
+import yaml
+
+import code_model
+
+
+INTERMEDIATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'generated', 'intermediate')
+CACHE_SUFFIX = '.cache'
+CACHE_MAGIC = b'AZMODELCACHE2\n'
+HEADER_LENGTH = struct.Struct('>I')
+
+
+class ModelLoader(getattr(yaml, 'CSafeLoader', yaml.SafeLoader)):
+    pass
+
+
+# maps are dumped by js-yaml, which writes undefined values with a tag of its own
+ModelLoader.add_constructor('tag:yaml.org,2002:js/undefined', lambda loader, node: None)
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse(path):
+    if path.endswith('-input.yml'):
+        return code_model.load(path)
+    with open(path) as f:
+        return yaml.load(f, Loader=ModelLoader)
+
+
+def write_cache(path, digest, document):
+    '''
+    Writes sidecar of document: magic, header length, JSON header and pickled blobs.
+    Modules of map documents are separate blobs, rest of the document is the first one.
+    '''
+    blobs = []
+    index = {}
+    order = []
+    offset = 0
+    rest = document
+    if isinstance(document, dict) and isinstance(document.get('Modules'), list):
+        rest = dict(document, Modules=None)
+        for module in document['Modules']:
+            name = module.get('ModuleName')
+            blob = pickle.dumps(module, pickle.HIGHEST_PROTOCOL)
+            blobs.append(blob)
+            order.append([name, offset, len(blob)])
+            index.setdefault(name, [offset, len(blob)])
+            offset += len(blob)
+    rest_blob = pickle.dumps(rest, pickle.HIGHEST_PROTOCOL)
+    header = json.dumps(dict(sha256=digest,
+                             document=[offset, len(rest_blob)],
+                             modules=order if index else None,
+                             index=index)).encode('utf-8')
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(CACHE_MAGIC)
+            f.write(HEADER_LENGTH.pack(len(header)))
+            f.write(header)
+            for blob in blobs:
+                f.write(blob)
+            f.write(rest_blob)
+        os.rename(tmp, path + CACHE_SUFFIX)
+    except Exception:
+        os.remove(tmp)
+        raise
+
+
+def read_header(f):
+    if f.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+        return None, None
+    length = HEADER_LENGTH.unpack(f.read(HEADER_LENGTH.size))[0]
+    header = json.loads(f.read(length).decode('utf-8'))
+    return header, f.tell()
+
+
+def read_blob(f, start, offset, length):
+    f.seek(start + offset)
+    return pickle.loads(f.read(length))
+
+
+def open_cache(path, digest=None):
+    '''Returns tuple of open sidecar, its header and start of blobs, or None if sidecar is missing or stale.'''
+    try:
+        f = open(path + CACHE_SUFFIX, 'rb')
+    except (IOError, OSError):
+        return None
+    try:
+        header, start = read_header(f)
+        if header is not None and header['sha256'] == (digest or file_hash(path)):
+            return f, header, start
+    except (ValueError, struct.error):
+        pass
+    f.close()
+    return None
+
+
+def load(path, write=False):
+    '''
+    Returns document of YAML file at path, from its sidecar if it's up to date.
+    Missing or stale sidecar is written again only if write is True.
+    '''
+    digest = file_hash(path)
+    cache = open_cache(path, digest)
+    if cache is None:
+        document = parse(path)
+        if write:
+            write_cache(path, digest, document)
+        return document
+    f, header, start = cache
+    with f:
+        document = read_blob(f, start, *header['document'])
+        if header['modules'] is not None:
+            document['Modules'] = [read_blob(f, start, offset, length) for name, offset, length in header['modules']]
+    return document
+
+
+def open_or_build_cache(path):
+    cache = open_cache(path)
+    if cache is None:
+        load(path, write=True)
+        cache = open_cache(path)
+    return cache
+
+
+def load_module(path, name):
+    '''
+    Returns module ModuleName name of map at path, None if there is no such module.
+    Builds sidecar of the map if it's missing or stale.
+    '''
+    f, header, start = open_or_build_cache(path)
+    with f:
+        if name not in header['index']:
+            return None
+        return read_blob(f, start, *header['index'][name])
+
+
+def load_service(path):
+    '''Returns map at path without its modules, Modules is None. Builds sidecar like load_module().'''
+    f, header, start = open_or_build_cache(path)
+    with f:
+        return read_blob(f, start, *header['document'])
+
+
+def with_references(value, seen):
+    if isinstance(value, (dict, code_model.ModelObject)):
+        if '$id' in value:
+            if value['$id'] in seen:
+                return {'$ref': value['$id']}
+            seen.add(value['$id'])
+        return dict((key, with_references(item, seen)) for key, item in value.items())
+    if isinstance(value, list):
+        return [with_references(item, seen) for item in value]
+    return value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build or read binary cache of generator artifacts.')
+    subparsers = parser.add_subparsers(dest='command')
+    build = subparsers.add_parser('build', help='build sidecars of files, all artifacts by default')
+    build.add_argument('files', nargs='*')
+    show = subparsers.add_parser('show', help='print document or module as JSON')
+    show.add_argument('file')
+    show.add_argument('--module', help='ModuleName of module to print')
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        files = args.files or sorted(glob.glob(os.path.join(INTERMEDIATE_DIR, '*-input.yml')) +
+                                     glob.glob(os.path.join(INTERMEDIATE_DIR, '*-map*.yml')))
+        for path in files:
+            if open_cache(path) is None:
+                load(path, write=True)
+                print('built ' + path + CACHE_SUFFIX)
+    elif args.command == 'show':
+        if args.module:
+            document = load_module(args.file, args.module)
+        else:
+            # resolved graph may be cyclic, print repeated objects as references again
+            document = with_references(load(args.file), set())
+        json.dump(document, sys.stdout, indent=2, default=str)
+        print()
+    else:
+        parser.print_usage()
+        return 2
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+'''
+Summarizes performance trace written by modules when AZURE_PERF_TRACE is set.
+
+Every line of the trace is a record of one module invocation, with its duration,
+request totals, timed phases and requests. Report lists modules ordered by total
+time spent in them, slowest invocations, and request paths ordered by total latency,
+so tasks which eat run time can be found.
+
+usage: perf_report.py [--top 20] TRACE
+'''
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import argparse
+import json
+import sys
+
+
+def load_records(path):
+    records = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    return records
+
+
+def operation_path(path):
+    # resource names are replaced, so requests of the same operation are summed,
+    # provider namespaces and collection names stay
+    parts = path.split('/')
+    for i in range(2, len(parts), 2):
+        if parts[i - 1].lower() != 'providers':
+            parts[i] = '{}'
+    return '/'.join(parts)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Summarize performance trace of generated modules.')
+    parser.add_argument('trace', help='trace file written by modules')
+    parser.add_argument('--top', type=int, default=20, help='number of rows in each table')
+    args = parser.parse_args(argv)
+
+    records = load_records(args.trace)
+    modules = {}
+    paths = {}
+    for record in records:
+        module = modules.setdefault(record['module'], dict(calls=0, failed=0, duration=0.0, requests=0, latency=0.0, polls=0, throttled=0, phases=0.0))
+        module['calls'] += 1
+        module['failed'] += 1 if record.get('failed') else 0
+        module['duration'] += record['duration']
+        for field in ['requests', 'latency', 'polls', 'throttled']:
+            module[field] += record['totals'][field]
+        module['phases'] += sum(phase['time'] for phase in record.get('phases', {}).values())
+        for request in record.get('requests', []):
+            path = paths.setdefault((request['method'], operation_path(request['path'])), dict(count=0, latency=0.0, bytes_in=0))
+            path['count'] += 1
+            path['latency'] += request['latency']
+            path['bytes_in'] += request['bytes_in']
+
+    print('{0:<48} {1:>6} {2:>6} {3:>10} {4:>8} {5:>10} {6:>6} {7:>5} {8:>9}'.format(
+        'module', 'calls', 'failed', 'time', 'requests', 'latency', 'polls', '429', 'compute'))
+    for name, module in sorted(modules.items(), key=lambda item: -item[1]['duration'])[:args.top]:
+        print('{0:<48} {1:>6} {2:>6} {3:>10.3f} {4:>8} {5:>10.3f} {6:>6} {7:>5} {8:>9.3f}'.format(
+            name, module['calls'], module['failed'], module['duration'], module['requests'], module['latency'],
+            module['polls'], module['throttled'], module['phases']))
+
+    print('\n{0:<48} {1:>10} {2:>10} {3:>8}'.format('slowest invocation', 'time', 'latency', 'requests'))
+    for record in sorted(records, key=lambda record: -record['duration'])[:args.top]:
+        print('{0:<48} {1:>10.3f} {2:>10.3f} {3:>8}'.format(record['module'], record['duration'],
+                                                            record['totals']['latency'], record['totals']['requests']))
+
+    print('\n{0:<100} {1:>6} {2:>10} {3:>12}'.format('request', 'count', 'latency', 'bytes in'))
+    for (method, path), total in sorted(paths.items(), key=lambda item: -item[1]['latency'])[:args.top]:
+        print('{0:<100} {1:>6} {2:>10.3f} {3:>12}'.format(method + ' ' + path, total['count'], total['latency'], total['bytes_in']))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,273 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+'''
+Manifest of generated outputs for incremental regeneration.
+
+Every module of a module map (generated/intermediate/*-map.yml) is fingerprinted
+with SHA-256 of its entry, including Options, Methods, ResponseFields, ApiVersion
+and Examples, of the map level fields templates read and of the template version.
+The manifest records fingerprint of every module and SHA-256 of every output
+rendered from it:
+
+- intermediate/ansible-module-rest/<module>.py and intermediate/ansible-module-sdk/<module>.py
+- ansible-collection/<module without azure_rm_ prefix>.py
+- magic-modules-input/<resource>/, shared by a module and its _info module
+- intermediate/examples_{rrm,rest,python,cli}/<example>, shared by modules using the example
+- azure-cli/<CliName>/, aggregated from all modules of the map
+
+plan lists modules whose fingerprint changed since the manifest was recorded and
+outputs to render again, so only those are passed to the generator, and outputs
+changed or removed outside of the generator. Maps whose SHA-256 matches the
+manifest are not parsed at all. update records the manifest after rendering.
+
+usage: regen_manifest.py plan [--template-version VERSION] [--json] [--check]
+       regen_manifest.py update [--template-version VERSION] [--module NAME ...]
+'''
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import tempfile
+
+import model_cache
+
+
+GENERATED_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'generated'))
+MANIFEST_PATH = os.path.join(GENERATED_DIR, 'regen-manifest.json')
+MANIFEST_VERSION = 1
+MODULE_PREFIX = 'azure_rm_'
+EXAMPLE_OUTPUTS = ['intermediate/examples_rrm/{0}.yml',
+                   'intermediate/examples_rest/{0}.yml',
+                   'intermediate/examples_python/{0}.yml',
+                   'intermediate/examples_cli/{0}.sh']
+
+
+def fingerprint(document, module, template_version):
+    '''Returns fingerprint of module of map document rendered by templates of template_version.'''
+    service = dict((key, value) for key, value in document.items() if key != 'Modules')
+    data = json.dumps([template_version, service, module], sort_keys=True, default=str)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def list_files(directory):
+    '''Returns files under directory relative to GENERATED_DIR, sorted.'''
+    files = []
+    for root, dirs, names in os.walk(os.path.join(GENERATED_DIR, directory)):
+        files.extend(os.path.relpath(os.path.join(root, name), GENERATED_DIR).replace(os.sep, '/') for name in names)
+    return sorted(files)
+
+
+def module_outputs(module):
+    '''Returns outputs rendered from module, existing or not, relative to GENERATED_DIR.'''
+    name = module['ModuleName']
+    short_name = name[len(MODULE_PREFIX):] if name.startswith(MODULE_PREFIX) else name
+    resource = short_name[:-len('_info')] if short_name.endswith('_info') else short_name
+    outputs = ['intermediate/ansible-module-rest/{0}.py'.format(name),
+               'intermediate/ansible-module-sdk/{0}.py'.format(name),
+               'ansible-collection/{0}.py'.format(short_name)]
+    outputs.extend(list_files(os.path.join('magic-modules-input', resource)))
+    for example in module.get('Examples') or []:
+        if example.get('Filename'):
+            outputs.extend(output.format(example['Filename']) for output in EXAMPLE_OUTPUTS)
+    return outputs
+
+
+def map_outputs(document):
+    '''Returns outputs aggregated from all modules of map document.'''
+    if not document.get('CliName'):
+        return []
+    return list_files(os.path.join('azure-cli', document['CliName']))
+
+
+def output_hash(path):
+    full_path = os.path.join(GENERATED_DIR, path)
+    return model_cache.file_hash(full_path) if os.path.isfile(full_path) else None
+
+
+def load_manifest(path):
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (IOError, OSError):
+        manifest = None
+    if not manifest or manifest.get('version') != MANIFEST_VERSION:
+        manifest = dict(version=MANIFEST_VERSION, template_version=None, maps={}, modules={}, outputs={})
+    return manifest
+
+
+def write_manifest(path, manifest):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+            f.write('\n')
+        os.rename(tmp, path)
+    except Exception:
+        os.remove(tmp)
+        raise
+
+
+def map_files():
+    return sorted(glob.glob(os.path.join(GENERATED_DIR, 'intermediate', '*-map.yml')))
+
+
+def map_name(path):
+    return os.path.basename(path)[:-len('-map.yml')]
+
+
+def plan(manifest, template_version):
+    '''
+    Returns dict with modules to render again keyed by reason (new, changed, removed),
+    outputs to render and outputs changed or missing since the manifest was recorded.
+    '''
+    modules = dict(new=[], changed=[], removed=[])
+    render = set()
+    seen = set()
+    everything = template_version != manifest['template_version']
+    for path in map_files():
+        name = map_name(path)
+        recorded = manifest['maps'].get(name)
+        if not everything and recorded and recorded['sha256'] == model_cache.file_hash(path):
+            seen.update(recorded['modules'])
+            continue
+        document = model_cache.load(path)
+        stale = False
+        for module in document['Modules']:
+            module_name = module['ModuleName']
+            seen.add(module_name)
+            entry = manifest['modules'].get(module_name)
+            if entry is None:
+                modules['new'].append(module_name)
+            elif entry['fingerprint'] != fingerprint(document, module, template_version):
+                modules['changed'].append(module_name)
+            else:
+                continue
+            stale = True
+            render.update(module_outputs(module))
+        if stale:
+            render.update(map_outputs(document))
+    for module_name, entry in manifest['modules'].items():
+        if module_name not in seen:
+            modules['removed'].append(module_name)
+            render.update(entry['outputs'])
+    modified = []
+    missing = []
+    for path, entry in sorted(manifest['outputs'].items()):
+        if path in render:
+            continue
+        digest = output_hash(path)
+        if digest is None:
+            missing.append(path)
+        elif digest != entry['sha256']:
+            modified.append(path)
+    return dict(modules=dict((reason, sorted(names)) for reason, names in modules.items()),
+                render=sorted(path for path in render if output_hash(path) is not None or path in manifest['outputs']),
+                modified=modified,
+                missing=missing)
+
+
+def update(manifest, template_version, names=None):
+    '''Records fingerprints and outputs of modules names, all modules if names is None.'''
+    seen = set()
+    for path in map_files():
+        name = map_name(path)
+        document = model_cache.load(path)
+        recorded = True
+        for module in document['Modules']:
+            module_name = module['ModuleName']
+            seen.add(module_name)
+            if names is not None and module_name not in names:
+                recorded = recorded and module_name in manifest['modules']
+                continue
+            outputs = [output for output in module_outputs(module) if output_hash(output) is not None]
+            manifest['modules'][module_name] = dict(map=name,
+                                                    fingerprint=fingerprint(document, module, template_version),
+                                                    outputs=outputs)
+        manifest['maps'][name] = dict(sha256=model_cache.file_hash(path) if recorded else None,
+                                      modules=sorted(module['ModuleName'] for module in document['Modules']),
+                                      outputs=map_outputs(document))
+    for module_name in list(manifest['modules']):
+        if module_name not in seen:
+            del manifest['modules'][module_name]
+    for name in list(manifest['maps']):
+        if not os.path.exists(os.path.join(GENERATED_DIR, 'intermediate', name + '-map.yml')):
+            del manifest['maps'][name]
+
+    # outputs are shared by modules, so all of them are hashed again
+    outputs = {}
+    for name, entry in manifest['maps'].items():
+        for path in entry['outputs']:
+            outputs.setdefault(path, set()).add(name + '-map.yml')
+    for module_name, entry in manifest['modules'].items():
+        for path in entry['outputs']:
+            outputs.setdefault(path, set()).add(module_name)
+    manifest['outputs'] = dict((path, dict(sha256=output_hash(path), sources=sorted(sources)))
+                               for path, sources in outputs.items() if output_hash(path) is not None)
+    manifest['template_version'] = template_version
+    return manifest
+
+
+def print_plan(result):
+    for reason in ('new', 'changed', 'removed'):
+        for name in result['modules'][reason]:
+            print('{0:8} {1}'.format(reason, name))
+    print('{0} modules to render, {1} outputs'.format(
+        sum(len(names) for names in result['modules'].values()), len(result['render'])))
+    for path in result['render']:
+        print('  ' + path)
+    for title in ('modified', 'missing'):
+        if result[title]:
+            print('{0} outputs {1} outside of generator:'.format(len(result[title]), title))
+            for path in result[title]:
+                print('  ' + path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Plan or record incremental regeneration of generated outputs.')
+    parser.add_argument('--manifest', default=MANIFEST_PATH, help='manifest file, default %(default)s')
+    parser.add_argument('--template-version',
+                        help='version of generator templates, every module is stale when it changes, '
+                             'defaults to the recorded one')
+    subparsers = parser.add_subparsers(dest='command')
+    plan_parser = subparsers.add_parser('plan', help='list modules and outputs to render again')
+    plan_parser.add_argument('--json', action='store_true', help='print plan as JSON')
+    plan_parser.add_argument('--check', action='store_true', help='exit with 1 if anything is stale')
+    update_parser = subparsers.add_parser('update', help='record fingerprints and output hashes after rendering')
+    update_parser.add_argument('--module', action='append', dest='modules', metavar='NAME',
+                               help='record only this module, can be repeated')
+    args = parser.parse_args(argv)
+
+    manifest = load_manifest(args.manifest)
+    template_version = args.template_version if args.template_version is not None else manifest['template_version']
+    if args.command == 'plan':
+        result = plan(manifest, template_version)
+        if args.json:
+            json.dump(result, sys.stdout, indent=2)
+            print()
+        else:
+            print_plan(result)
+        if args.check and (result['render'] or result['modified'] or result['missing']):
+            return 1
+    elif args.command == 'update':
+        names = set(args.modules) if args.modules else None
+        write_manifest(args.manifest, update(manifest, template_version, names))
+        print('recorded {0} modules, {1} outputs in {2}'.format(
+            len(manifest['modules']), len(manifest['outputs']), args.manifest))
+    else:
+        parser.print_usage()
+        return 2
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
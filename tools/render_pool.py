@@ -0,0 +1,315 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+'''
+Renders outputs of module maps (generated/intermediate/*-map.yml) with a pool of processes.
+
+Every module of every map is a separate job, rendered by all selected renderers.
+Jobs are independent, so they are spread over worker processes. Workers read the
+module they render through the model_cache sidecar of the map, which is built once
+before the pool starts and shared read-only by all of them. With --check no sidecar
+is written, workers parse maps without an up to date sidecar once instead.
+
+A renderer returns files of a module, written atomically by the worker, and
+fragments of files aggregated from all modules of a map, like _help.py, _params.py
+and commands.py of azure-cli extensions. Fragments are sent back to the main process,
+which merges them in order of modules in the map and renderers on the command line,
+so aggregates are the same regardless of which worker finished first. Files with
+unchanged content are not written at all.
+
+Renderers are subclasses of Renderer, either built in (see RENDERERS) or given as
+package.module:Class. With --stale only modules listed by tools/regen_manifest.py
+plan are rendered, --record then records them in the manifest.
+
+usage: render_pool.py [--renderer NAME ...] [--map NAME ...] [--module NAME ...] [--stale [--record]]
+                      [--jobs N] [--check]
+'''
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import argparse
+import importlib
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import collection_rename
+import model_cache
+import regen_manifest
+
+
+GENERATED_DIR = regen_manifest.GENERATED_DIR
+
+
+class Renderer(object):
+    '''
+    Base of renderers. Paths are relative to generated directory, texts are written
+    encoded as UTF-8, with line endings as they are.
+    '''
+
+    def render_module(self, service, module):
+        '''
+        Returns tuple of files and fragments of module of map service (without Modules),
+        both dicts of path to text.
+        '''
+        return {}, {}
+
+    def render_aggregates(self, service):
+        '''Returns dict of aggregated path to tuple of header and footer of fragments.'''
+        return {}
+
+
+class MagicModulesRenderer(Renderer):
+    '''
+    Renders Ansible and Terraform overrides of Magic Modules resources. Resources
+    are rendered only to magic-modules-input directories created along with their
+    api.yaml.
+    '''
+
+    ANSIBLE_CONFIG = ('--- !ruby/object:Provider::Azure::Ansible::Config\r\n'
+                      'author: audevbot\r\n'
+                      'version_added: "2.9"\r\n'
+                      'overrides: !ruby/object:Overrides::ResourceOverrides\r\n'
+                      '  {0}: !ruby/object:Provider::Azure::Ansible::ResourceOverride\r\n'
+                      '    examples: []\r\n')
+    TERRAFORM_CONFIG = ('--- !ruby/object:Provider::Azure::Terraform::Config\r\n'
+                        'overrides: !ruby/object:Overrides::ResourceOverrides\r\n'
+                        '  {0}: !ruby/object:Provider::Azure::Terraform::ResourceOverride\r\n'
+                        '    properties: {{}}\r\n')
+
+    def render_module(self, service, module):
+        name = module['ModuleName']
+        if name.endswith('_info'):
+            return {}, {}
+        directory = 'magic-modules-input/' + name[len(regen_manifest.MODULE_PREFIX):]
+        if not os.path.isfile(os.path.join(GENERATED_DIR, directory, 'api.yaml')):
+            return {}, {}
+        resource = module['ObjectName']
+        return {directory + '/ansible.yaml': self.ANSIBLE_CONFIG.format(resource),
+                directory + '/terraform.yaml': self.TERRAFORM_CONFIG.format(resource)}, {}
+
+
+class CollectionRenderer(Renderer):
+    '''
+    Renders collection module of a module by renaming its REST module, see
+    tools/collection_rename.py.
+    '''
+
+    def render_module(self, service, module):
+        source = os.path.join(collection_rename.REST_DIR, module['ModuleName'] + '.py')
+        if not os.path.isfile(source):
+            return {}, {}
+        path = 'ansible-collection/' + collection_rename.collection_name(module['ModuleName']) + '.py'
+        return {path: collection_rename.rename_file(source).decode('utf-8')}, {}
+
+
+RENDERERS = {
+    'collection': CollectionRenderer,
+    'magic-modules': MagicModulesRenderer,
+}
+
+
+def get_renderer(name):
+    if name in RENDERERS:
+        return RENDERERS[name]()
+    module_name, _, class_name = name.partition(':')
+    if not class_name:
+        raise ValueError('unknown renderer {0}, use one of {1} or package.module:Class'.format(
+            name, ', '.join(sorted(RENDERERS))))
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def write_output(path, text, check=False):
+    '''
+    Writes text to path relative to generated directory atomically, unless it's
+    there already. Returns written, unchanged or, in check mode, differs.
+    '''
+    full_path = os.path.join(GENERATED_DIR, path)
+    data = text.encode('utf-8')
+    try:
+        with open(full_path, 'rb') as f:
+            if f.read() == data:
+                return 'unchanged'
+    except (IOError, OSError):
+        pass
+    if check:
+        return 'differs'
+    directory = os.path.dirname(full_path)
+    if not os.path.isdir(directory):
+        try:
+            os.makedirs(directory)
+        except OSError:
+            # created by other worker meanwhile
+            if not os.path.isdir(directory):
+                raise
+    fd, tmp = tempfile.mkstemp(dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp, 0o644)
+        os.rename(tmp, full_path)
+    except Exception:
+        os.remove(tmp)
+        raise
+    return 'written'
+
+
+# state of worker process, set by init_worker
+_renderers = None
+_check = False
+_services = {}
+# modules of maps parsed by the worker, keyed by path and ModuleName
+_modules = {}
+
+
+def init_worker(renderer_names, check):
+    global _renderers, _check
+    _renderers = [get_renderer(name) for name in renderer_names]
+    _check = check
+    _services.clear()
+    _modules.clear()
+
+
+def render_job(job):
+    '''
+    Renders module name of map at path by all renderers, writes its files and returns
+    job with results of writes and fragments, keyed by renderer index.
+    '''
+    path, index, name = job
+    if path not in _services:
+        if _check:
+            # check writes nothing, sidecars included
+            document = model_cache.load(path)
+            _services[path] = dict(document, Modules=None)
+            _modules[path] = {}
+            for module in document['Modules']:
+                _modules[path].setdefault(module['ModuleName'], module)
+        else:
+            _services[path] = model_cache.load_service(path)
+    service = _services[path]
+    module = _modules[path].get(name) if _check else model_cache.load_module(path, name)
+    results = []
+    fragments = []
+    for position, renderer in enumerate(_renderers):
+        files, module_fragments = renderer.render_module(service, module)
+        for output, text in sorted(files.items()):
+            results.append((output, write_output(output, text, _check)))
+        fragments.extend((output, position, text) for output, text in sorted(module_fragments.items()))
+    return job, results, fragments
+
+
+def merge_aggregates(services, renderers, rendered, check=False):
+    '''
+    Merges fragments of rendered jobs into aggregated files of maps and writes them.
+    Fragments are ordered by module in map and renderer, then joined between
+    header and footer of the aggregate. Returns results of writes.
+    '''
+    aggregates = {}
+    for path, service in services.items():
+        for renderer in renderers:
+            for output, parts in renderer.render_aggregates(service).items():
+                aggregates[output] = (parts, [])
+    for (path, index, name), results, fragments in rendered:
+        for output, position, text in fragments:
+            if output not in aggregates:
+                raise ValueError('fragment of {0} for {1} has no aggregate'.format(name, output))
+            aggregates[output][1].append((index, position, text))
+    results = []
+    for output, ((header, footer), fragments) in sorted(aggregates.items()):
+        text = header + ''.join(text for index, position, text in sorted(fragments)) + footer
+        results.append((output, write_output(output, text, check)))
+    return results
+
+
+def collect_jobs(maps=None, modules=None, check=False):
+    '''
+    Returns jobs of modules of maps, all by default, and map services keyed by path.
+    Builds sidecars read by workers, unless check is True.
+    '''
+    jobs = []
+    services = {}
+    for path in regen_manifest.map_files():
+        if maps and regen_manifest.map_name(path) not in maps:
+            continue
+        document = model_cache.load(path, write=not check)
+        selected = [(path, index, module['ModuleName']) for index, module in enumerate(document['Modules'])
+                    if not modules or module['ModuleName'] in modules]
+        if selected:
+            jobs.extend(selected)
+            services[path] = dict(document, Modules=None)
+    return jobs, services
+
+
+def render(jobs, services, renderer_names, processes=None, check=False):
+    '''Renders jobs by renderers in pool of processes. Returns results of writes sorted by path.'''
+    renderers = [get_renderer(name) for name in renderer_names]
+    if processes == 1:
+        init_worker(renderer_names, check)
+        rendered = [render_job(job) for job in jobs]
+    else:
+        pool = multiprocessing.Pool(processes, init_worker, (renderer_names, check))
+        try:
+            rendered = list(pool.imap_unordered(render_job, jobs, chunksize=4))
+        finally:
+            pool.close()
+            pool.join()
+    results = [result for job, job_results, fragments in rendered for result in job_results]
+    results.extend(merge_aggregates(services, renderers, rendered, check))
+    return sorted(results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render outputs of module maps with a pool of processes.')
+    parser.add_argument('--renderer', action='append', dest='renderers', metavar='NAME',
+                        help='renderer, one of {0} or package.module:Class, can be repeated, '
+                             'all built in renderers by default'.format(', '.join(sorted(RENDERERS))))
+    parser.add_argument('--map', action='append', dest='maps', metavar='NAME', help='render modules of map NAME only')
+    parser.add_argument('--module', action='append', dest='modules', metavar='NAME', help='render module NAME only')
+    parser.add_argument('--stale', action='store_true', help='render modules stale in regen_manifest.py manifest only')
+    parser.add_argument('--record', action='store_true', help='record rendered modules in the manifest')
+    parser.add_argument('--manifest', default=regen_manifest.MANIFEST_PATH, help='manifest file, default %(default)s')
+    parser.add_argument('--jobs', type=int, default=None, help='number of processes, default number of CPUs')
+    parser.add_argument('--check', action='store_true', help="don't write, exit with 1 if any output differs")
+    args = parser.parse_args(argv)
+
+    renderer_names = args.renderers or sorted(RENDERERS)
+    modules = set(args.modules or [])
+    manifest = None
+    if args.stale or args.record:
+        manifest = regen_manifest.load_manifest(args.manifest)
+    if args.stale:
+        stale = regen_manifest.plan(manifest, manifest['template_version'])['modules']
+        modules.update(stale['new'] + stale['changed'])
+        if not modules:
+            print('nothing to render')
+            return 0
+
+    start = time.time()
+    jobs, services = collect_jobs(args.maps, modules, args.check)
+    results = render(jobs, services, renderer_names, args.jobs, args.check)
+    counts = {}
+    for output, status in results:
+        counts[status] = counts.get(status, 0) + 1
+        if status != 'unchanged':
+            print('{0:9} {1}'.format(status, output))
+    print('rendered {0} modules in {1:.2f}s: {2}'.format(
+        len(jobs), time.time() - start,
+        ', '.join('{0} {1}'.format(count, status) for status, count in sorted(counts.items())) or 'no outputs'))
+
+    if args.check:
+        return 1 if counts.get('differs') else 0
+    if args.record:
+        names = set(name for path, index, name in jobs)
+        regen_manifest.write_manifest(args.manifest,
+                                      regen_manifest.update(manifest, manifest['template_version'], names))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+'''
+Builds slim copy of generated Ansible collection.
+
+Generated modules carry their whole documentation in DOCUMENTATION, EXAMPLES and
+RETURN strings, which Ansible zips, ships to the target and byte-compiles on every
+task although they are never used there. This tool writes collection where:
+
+  - options and description of each module are moved to doc fragment
+    plugins/doc_fragments/<module>.py, module DOCUMENTATION only keeps its name,
+    short description and authors and extends the fragment, so ansible-doc
+    still shows complete documentation,
+  - with --sidecar, EXAMPLES and RETURN are moved to docs/<module>.yml as well.
+    ansible-doc doesn't read sidecar files of Python modules, so they are only
+    available to documentation builds then.
+
+Merged documentation of every module is compared with the original one, modules
+for which it differs are copied unchanged.
+
+usage: slim_collection.py [--sidecar] [--collection azure.rm] SOURCE DESTINATION
+'''
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import argparse
+import os
+import re
+import sys
+
+import yaml
+
+
+DOCSTRING_RE = re.compile(r"^(DOCUMENTATION|EXAMPLES|RETURN) = (r?)'''(.*?)'''\r?\n", re.S | re.M)
+TOP_LEVEL_KEY_RE = re.compile(r'^([A-Za-z_][A-Za-z0-9_]*):')
+
+# keys which stay in module DOCUMENTATION, everything else goes to doc fragment
+MODULE_DOC_KEYS = ['module', 'version_added', 'short_description', 'extends_documentation_fragment', 'author']
+
+FRAGMENT_TEMPLATE = '''# -*- coding: utf-8 -*-
+
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+class ModuleDocFragment(object):
+
+    DOCUMENTATION = {0}\'\'\'{1}\'\'\'
+'''
+
+
+def split_blocks(text):
+    '''
+    Splits YAML document into top level blocks. Returns list of (key, lines) tuples,
+    key is None for lines preceding first key, like document start marker.
+    '''
+    blocks = [(None, [])]
+    for line in text.split('\n'):
+        match = TOP_LEVEL_KEY_RE.match(line)
+        if match:
+            blocks.append((match.group(1), []))
+        blocks[-1][1].append(line)
+    return blocks
+
+
+def join_blocks(blocks):
+    return '\n'.join('\n'.join(lines) for key, lines in blocks)
+
+
+def add_fragment(blocks, fragment):
+    '''Prepends fragment to extends_documentation_fragment list, adding the key if missing.'''
+    for key, lines in blocks:
+        if key == 'extends_documentation_fragment':
+            eol = '\r' if lines[0].endswith('\r') else ''
+            lines.insert(1, '  - ' + fragment + eol)
+            return blocks
+    eol = '\r' if blocks[-1][1][0].endswith('\r') else ''
+    blocks.insert(len(blocks) - 1, ('extends_documentation_fragment', ['extends_documentation_fragment:' + eol,
+                                                                       '  - ' + fragment + eol]))
+    return blocks
+
+
+def merge_fragment(doc, fragment):
+    '''Merges fragment into module documentation the same way ansible-doc does.'''
+    for key, value in fragment.items():
+        if key in doc:
+            if isinstance(doc[key], dict):
+                value = dict(value, **doc[key])
+            elif isinstance(doc[key], list):
+                value = sorted(frozenset(value + doc[key]))
+            else:
+                raise ValueError('Attempt to extend a documentation fragment, invalid type for {0}'.format(key))
+        doc[key] = value
+    return doc
+
+
+def indent(text):
+    return '\n'.join(('  ' + line) if line.strip() else '' for line in text.replace('\r\n', '\n').strip('\n').split('\n'))
+
+
+def slim_module(source, name, collection, sidecar):
+    '''
+    Returns tuple of slim module source, doc fragment source and sidecar text (or None).
+    Raises ValueError if documentation can't be moved without changing it.
+    '''
+    strings = dict((m.group(1), m) for m in DOCSTRING_RE.finditer(source))
+    if 'DOCUMENTATION' not in strings:
+        raise ValueError('DOCUMENTATION not found')
+    match = strings['DOCUMENTATION']
+    prefix, text = match.group(2), match.group(3)
+    fragment_name = '{0}.{1}'.format(collection, name)
+
+    blocks = split_blocks(text)
+    module_blocks = [block for block in blocks if block[0] is None or block[0] in MODULE_DOC_KEYS]
+    fragment_blocks = [block for block in blocks if block[0] is not None and block[0] not in MODULE_DOC_KEYS]
+    module_text = join_blocks(add_fragment(module_blocks, fragment_name))
+    # trailing empty line of the document belongs to last block, keep it in module text
+    fragment_text = '\n' + join_blocks(fragment_blocks).rstrip('\r\n') + '\n'
+
+    original = yaml.safe_load(text)
+    doc = yaml.safe_load(module_text)
+    fragments = doc.pop('extends_documentation_fragment')
+    if fragments[0] != fragment_name:
+        raise ValueError('unexpected fragments {0}'.format(fragments))
+    merge_fragment(doc, yaml.safe_load(fragment_text))
+    original.pop('extends_documentation_fragment', None)
+    if doc != original:
+        raise ValueError('documentation changed by moving it to fragment')
+
+    result = source
+    sidecar_text = None
+    if sidecar:
+        parts = []
+        for key in ['EXAMPLES', 'RETURN']:
+            if key not in strings:
+                continue
+            value = strings[key].group(3)
+            if key == 'EXAMPLES':
+                parts.append('EXAMPLES: |\n' + indent(value) + '\n')
+            else:
+                parts.append('RETURN:\n' + indent(value) + '\n')
+                if yaml.safe_load('RETURN:\n' + indent(value)).get('RETURN') != yaml.safe_load(value):
+                    raise ValueError('RETURN changed by moving it to sidecar')
+        sidecar_text = ''.join(parts)
+        # drop moved strings with empty lines following them, last one first so offsets stay valid
+        for key in sorted([k for k in ['EXAMPLES', 'RETURN'] if k in strings], key=lambda k: -strings[k].start()):
+            start, end = strings[key].start(), strings[key].end()
+            while result[end:end + 2] == '\r\n':
+                end += 2
+            result = result[:start] + result[end:]
+
+    # DOCUMENTATION precedes EXAMPLES and RETURN, so its offsets are still valid
+    result = result[:match.start(3)] + module_text + result[match.end(3):]
+    return result, FRAGMENT_TEMPLATE.format(prefix, fragment_text), sidecar_text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build slim copy of generated Ansible collection.')
+    parser.add_argument('source', help='directory with generated collection modules')
+    parser.add_argument('destination', help='collection root to write')
+    parser.add_argument('--collection', default='azure.rm', help='collection name used to reference doc fragments')
+    parser.add_argument('--sidecar', action='store_true', help='move EXAMPLES and RETURN to docs/<module>.yml')
+    args = parser.parse_args(argv)
+
+    modules_dir = os.path.join(args.destination, 'plugins', 'modules')
+    fragments_dir = os.path.join(args.destination, 'plugins', 'doc_fragments')
+    docs_dir = os.path.join(args.destination, 'docs')
+    for path in [modules_dir, fragments_dir] + ([docs_dir] if args.sidecar else []):
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    before = after = 0
+    skipped = []
+    for filename in sorted(os.listdir(args.source)):
+        if not filename.endswith('.py'):
+            continue
+        name = filename[:-3]
+        with open(os.path.join(args.source, filename), 'rb') as f:
+            source = f.read().decode('utf-8')
+        try:
+            module, fragment, sidecar = slim_module(source, name, args.collection, args.sidecar)
+        except Exception as exc:
+            skipped.append('{0}: {1}'.format(filename, str(exc).split('\n')[0]))
+            module, fragment, sidecar = source, None, None
+        with open(os.path.join(modules_dir, filename), 'wb') as f:
+            f.write(module.encode('utf-8'))
+        if fragment is not None:
+            with open(os.path.join(fragments_dir, filename), 'wb') as f:
+                f.write(fragment.encode('utf-8'))
+        if sidecar is not None:
+            with open(os.path.join(docs_dir, name + '.yml'), 'wb') as f:
+                f.write(sidecar.encode('utf-8'))
+        before += len(source)
+        after += len(module)
+
+    for line in skipped:
+        print('copied unchanged ' + line, file=sys.stderr)
+    print('modules: {0} -> {1} bytes'.format(before, after))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())